@@ -27,6 +27,7 @@ from .json_utils import (
 from .provenance import ProvenanceTracker, ProvenanceSource
 from .pdf_utils import (
     extract_text_from_pages,
+    get_file_hash,
     get_page_count,
     render_page_to_image,
     render_pages_to_images,
@@ -59,6 +60,7 @@ __all__ = [
     "ProvenanceSource",
     # PDF Utilities
     "extract_text_from_pages",
+    "get_file_hash",
     "get_page_count",
     "render_page_to_image",
     "render_pages_to_images",
@@ -0,0 +1,271 @@
+"""
+Artifacts - In-memory JSON artifacts with an asynchronous write-behind sink.
+
+The pipeline stages used to hand results to each other through the output
+directory: the SoA step wrote 9_final_soa.json and main() read it back,
+combine wrote protocol_usdm.json only for validation to overwrite it, and
+enrichment, conformance and the provenance sync each re-loaded the file
+they were given. With a store open (main_v2.main opens one per run) stages
+put the Python object and the next stage gets that same object back;
+nothing is parsed twice.
+
+Persistence happens behind the pipeline. A background thread writes each
+dirty artifact once it has been left alone for WRITE_DELAY seconds, so the
+several puts protocol_usdm.json gets during a run (combine, validate,
+enrich, final status) collapse into a single write. Every write goes to a
+temp file next to the target and is os.replace()d into place, so the
+viewer never sees a half-written file. flush() blocks until the files are
+on disk - main() flushes before launching the viewer, before running the
+external CORE engine on a file, and at the end of the run.
+
+Without an open store put_artifact() writes synchronously and
+load_artifact() reads from disk, so library callers and tests keep the
+plain file semantics.
+
+Stages that mutate an artifact they got from the store must put() it again
+afterwards; a write racing with such a mutation is simply retried.
+
+Usage:
+    from core.artifacts import open_store, close_store, put_artifact, load_artifact
+
+    open_store()
+    put_artifact("output/protocol_usdm.json", data)
+    data = load_artifact("output/protocol_usdm.json")   # same object, no I/O
+    close_store()                                       # flush and stop the writer
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from .serialization import PRETTY, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+WRITE_DELAY = 1.0
+
+
+@dataclass
+class _Entry:
+    data: Any
+    mode: str = PRETTY      # core.serialization output mode
+    version: int = 0        # bumped on every put
+    written: int = 0        # version last on disk (0 = never written by the store)
+    due: float = 0.0        # monotonic time the write becomes due
+    writing: bool = False
+
+    @property
+    def dirty(self) -> bool:
+        return self.version > self.written
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+class ArtifactStore:
+    """JSON artifacts of one run, held in memory and written behind."""
+
+    def __init__(self, write_delay: float = WRITE_DELAY):
+        self.write_delay = write_delay
+        self._entries: Dict[str, _Entry] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.puts = 0
+        self.writes = 0
+        self.reads_saved = 0
+        self.errors: Dict[str, str] = {}
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, path: str, data: Any, mode: str = PRETTY) -> str:
+        """Make data the current content of path; it is written once it settles."""
+        key = _key(path)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Artifact store is closed")
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(data, mode)
+            entry.data = data
+            entry.mode = mode
+            entry.version += 1
+            entry.due = time.monotonic() + self.write_delay
+            self.puts += 1
+            self._cond.notify_all()
+        return path
+
+    def get(self, path: str) -> Any:
+        """
+        Current content of path - the object last put, else the file on disk.
+
+        Files read from disk are kept, so a second get doesn't re-parse.
+
+        Raises:
+            FileNotFoundError: Neither in the store nor on disk
+        """
+        key = _key(path)
+        with self._cond:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.reads_saved += 1
+                return entry.data
+        data = load_json(key)
+        with self._cond:
+            # A put may have landed while we were reading; it wins
+            entry = self._entries.setdefault(key, _Entry(data))
+            return entry.data
+
+    def exists(self, path: str) -> bool:
+        """True if path is in the store (written yet or not) or on disk."""
+        with self._cond:
+            if _key(path) in self._entries:
+                return True
+        return os.path.exists(path)
+
+    def pending(self) -> List[str]:
+        """Paths with content not yet on disk."""
+        with self._cond:
+            return [k for k, e in self._entries.items() if e.dirty]
+
+    def flush(self, paths: Optional[Iterable[str]] = None) -> bool:
+        """
+        Block until the given artifacts (default: all) are on disk.
+
+        Returns:
+            False if any of them failed to write (see errors)
+        """
+        keys = None if paths is None else {_key(p) for p in paths}
+        with self._cond:
+            now = time.monotonic()
+            targets = [k for k in (keys if keys is not None else list(self._entries)) if k in self._entries]
+            for key in targets:
+                self._entries[key].due = min(self._entries[key].due, now)
+            self._cond.notify_all()
+            while any(self._entries[k].dirty for k in targets):
+                if not self._thread.is_alive():
+                    break
+                self._cond.wait(timeout=0.1)
+            return not any(k in self.errors for k in targets)
+
+    def close(self) -> bool:
+        """Flush everything and stop the writer thread."""
+        ok = self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self.puts:
+            logger.debug(f"Artifacts: {self.puts} put(s), {self.writes} write(s), "
+                         f"{self.reads_saved} read(s) served from memory")
+        return ok
+
+    def _due_entries(self) -> List[str]:
+        now = time.monotonic()
+        return [k for k, e in self._entries.items()
+                if e.dirty and not e.writing and (e.due <= now or self._closed)]
+
+    def _next_due(self) -> Optional[float]:
+        dues = [e.due for e in self._entries.values() if e.dirty and not e.writing]
+        return max(0.0, min(dues) - time.monotonic()) if dues else None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                due = self._due_entries()
+                while not due:
+                    if self._closed:
+                        return
+                    self._cond.wait(timeout=self._next_due())
+                    due = self._due_entries()
+                jobs = []
+                for key in due:
+                    entry = self._entries[key]
+                    entry.writing = True
+                    jobs.append((key, entry, entry.version, entry.data, entry.mode))
+
+            for key, entry, version, data, mode in jobs:
+                error = None
+                try:
+                    save_json(key, data, mode, atomic=True)
+                except RuntimeError as e:
+                    # Mutated mid-serialization; the mutating stage puts it again
+                    logger.debug(f"Artifact {key} changed while writing, retrying: {e}")
+                    version = None
+                except Exception as e:
+                    error = str(e)
+                    logger.error(f"Failed to write artifact {key}: {e}")
+                with self._cond:
+                    entry.writing = False
+                    if version is None:
+                        entry.due = time.monotonic() + min(self.write_delay, 0.05)
+                    else:
+                        # A failed version isn't retried; the next put tries again
+                        entry.written = max(entry.written, version)
+                        if error is not None:
+                            self.errors[key] = error
+                        else:
+                            self.errors.pop(key, None)
+                            self.writes += 1
+                    self._cond.notify_all()
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def open_store(write_delay: float = WRITE_DELAY) -> ArtifactStore:
+    """Start a fresh store for this run (flushing and closing any previous one)."""
+    global _store
+    close_store()
+    with _store_lock:
+        _store = ArtifactStore(write_delay)
+        return _store
+
+
+def close_store() -> bool:
+    """Flush and close the current store; artifacts go straight to disk afterwards."""
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    return store.close() if store is not None else True
+
+
+def get_store() -> Optional[ArtifactStore]:
+    return _store
+
+
+def put_artifact(path: str, data: Any, mode: str = PRETTY) -> str:
+    """Hand an artifact to the store, or write it now when no store is open."""
+    store = _store
+    if store is not None:
+        return store.put(path, data, mode)
+    save_json(path, data, mode, atomic=True)
+    return path
+
+
+def load_artifact(path: str) -> Any:
+    """
+    Current content of an artifact.
+
+    Raises:
+        FileNotFoundError: The artifact was never put and isn't on disk
+    """
+    store = _store
+    if store is not None:
+        return store.get(path)
+    return load_json(path)
+
+
+def artifact_exists(path: str) -> bool:
+    store = _store
+    return store.exists(path) if store is not None else os.path.exists(path)
+
+
+def flush_artifacts(paths: Optional[Iterable[str]] = None) -> bool:
+    """Block until artifacts (default: all) are on disk; needed before handing files to other programs."""
+    store = _store
+    return store.flush(paths) if store is not None else True
@@ -0,0 +1,143 @@
+"""
+Boilerplate Stripping - Remove running headers and footers from page text.
+
+Sponsor protocols repeat the confidentiality notice, protocol number,
+version/date and "Page X of Y" on every page. This document-level pass finds
+lines that recur in the same position (counted from the top or bottom of
+the page) on at least MIN_PAGE_SHARE of pages and removes them.
+
+Removed lines are kept per page as (line index, text), so the original page
+text can be restored exactly.
+
+Usage:
+    from core.boilerplate import strip_boilerplate, restore_page
+
+    clean_pages, removed = strip_boilerplate(pages)
+    assert restore_page(clean_pages[5], removed[5]) == pages[5]
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lines this far from the top/bottom of a page are header/footer candidates
+EDGE_LINES = 4
+
+# A line must recur at the same position on this share of pages (K%)
+MIN_PAGE_SHARE = 0.4
+
+# Documents shorter than this are left alone
+MIN_PAGES = 4
+
+# Pages never stripped; the cover page is where metadata reads the
+# protocol number and version that the running header repeats
+KEEP_PAGES = (0,)
+
+DIGITS_PATTERN = re.compile(r'\d+')
+
+RemovedLines = List[Tuple[int, str]]
+
+
+def line_key(line: str) -> str:
+    """Normalize a line so 'Page 3 of 90' and 'Page 4 of 90' compare equal."""
+    return DIGITS_PATTERN.sub('#', ' '.join(line.split()).lower())
+
+
+def _edge_positions(lines: Sequence[str], edge_lines: int) -> List[Tuple[int, int]]:
+    """
+    (position, line index) for the lines near the page edges.
+
+    Positions count non-blank lines: 0, 1, ... from the top and -1, -2, ...
+    from the bottom.
+    """
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    top = [(pos, i) for pos, i in enumerate(content[:edge_lines])]
+    bottom = [(-1 - pos, i) for pos, i in enumerate(reversed(content[-edge_lines:]))]
+    return top + bottom
+
+
+def find_boilerplate(
+    pages: Sequence[str],
+    min_share: float = MIN_PAGE_SHARE,
+    edge_lines: int = EDGE_LINES,
+) -> Set[Tuple[int, str]]:
+    """
+    Find (position, normalized line) pairs repeated across the document.
+
+    Returns:
+        Set of keys to strip (empty for short documents)
+    """
+    if len(pages) < MIN_PAGES:
+        return set()
+    counts: Counter = Counter()
+    for text in pages:
+        lines = text.split("\n")
+        counts.update({(pos, line_key(lines[i])) for pos, i in _edge_positions(lines, edge_lines)})
+    threshold = max(2, math.ceil(len(pages) * min_share))
+    return {key for key, n in counts.items() if n >= threshold}
+
+
+def strip_page(
+    text: str,
+    keys: Set[Tuple[int, str]],
+    edge_lines: int = EDGE_LINES,
+) -> Tuple[str, RemovedLines]:
+    """
+    Remove boilerplate lines from one page.
+
+    Returns:
+        Tuple of (clean text, removed (line index, line) pairs)
+    """
+    if not keys:
+        return text, []
+    lines = text.split("\n")
+    drop = {i for pos, i in _edge_positions(lines, edge_lines) if (pos, line_key(lines[i])) in keys}
+    if not drop:
+        return text, []
+    removed = [(i, lines[i]) for i in sorted(drop)]
+    kept = [line for i, line in enumerate(lines) if i not in drop]
+    return "\n".join(kept), removed
+
+
+def strip_boilerplate(
+    pages: Sequence[str],
+    min_share: float = MIN_PAGE_SHARE,
+    edge_lines: int = EDGE_LINES,
+    keep_pages: Iterable[int] = KEEP_PAGES,
+) -> Tuple[List[str], List[RemovedLines]]:
+    """
+    Strip running headers/footers from every page of a document.
+
+    Returns:
+        Tuple of (clean page texts, removed lines per page)
+    """
+    keys = find_boilerplate(pages, min_share, edge_lines)
+    keep = set(keep_pages)
+    clean: List[str] = []
+    removed: List[RemovedLines] = []
+    for page_num, text in enumerate(pages):
+        if page_num in keep:
+            page_text, page_removed = text, []
+        else:
+            page_text, page_removed = strip_page(text, keys, edge_lines)
+        clean.append(page_text)
+        removed.append(page_removed)
+
+    if keys:
+        stripped = sum(len(r) for r in removed)
+        logger.info(f"Stripped {stripped} boilerplate lines ({len(keys)} patterns) from {len(pages)} pages")
+    return clean, removed
+
+
+def restore_page(clean_text: str, removed: RemovedLines) -> str:
+    """Rebuild the original page text from clean text and its removed lines."""
+    if not removed:
+        return clean_text
+    lines = clean_text.split("\n")
+    for index, line in removed:
+        lines.insert(index, line)
+    return "\n".join(lines)
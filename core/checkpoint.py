@@ -0,0 +1,420 @@
+"""
+Run Checkpoints - Make-like incremental re-runs of an output directory.
+
+Each pipeline step records a fingerprint of its inputs in
+<output_dir>/run_manifest.json:
+
+- step inputs (PDF hash, pages, model, options)
+- the code that implements the step: its source files, every project
+  module they import (transitively, so core/, llm_providers.py and the
+  prompts kept next to each extractor are covered) and the data files
+  those modules read (USDM schema, page classifier model)
+- the output hashes of the upstream steps it consumes
+
+and pickles its result under <output_dir>/.checkpoints/. When the same
+output directory is used again, steps whose fingerprint still matches (and
+whose artifacts still exist) are skipped and their result is reloaded.
+Forcing a step invalidates it and every step downstream of it.
+
+Usage:
+    from core.checkpoint import RunManifest, run_step
+
+    manifest = RunManifest(output_dir)
+    manifest.force(["validate"])
+    result = run_step(manifest, "eligibility", lambda: extract(...),
+                      inputs={"pdf": pdf_hash, "model": model},
+                      artifacts=["3_eligibility_criteria.json"])
+"""
+
+import ast
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .artifacts import artifact_exists
+from .ids import id_scope
+from .memory import track_memory
+from .pdf_utils import get_file_hash
+from .profiling import phase
+from .serialization import CANONICAL, dumps_bytes, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "run_manifest.json"
+CHECKPOINT_DIR = ".checkpoints"
+
+# Bump when the manifest layout or step semantics change
+MANIFEST_VERSION = 1
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+EXPANSION_STEPS = [
+    "metadata", "eligibility", "objectives", "studydesign", "interventions",
+    "narrative", "advanced", "procedures", "scheduling", "docstructure",
+    "amendmentdetails",
+]
+
+# step -> steps whose output it consumes
+STEP_DEPENDENCIES: Dict[str, List[str]] = {
+    "soa": [],
+    **{step: [] for step in EXPANSION_STEPS},
+    "sap": [],
+    "sites": [],
+    "combine": ["soa", *EXPANSION_STEPS, "sap", "sites"],
+    "validate": ["combine"],
+    "enrich": ["validate"],
+    "conformance": ["validate", "enrich"],
+}
+
+# step -> source files (globs relative to the project root) that implement it
+STEP_CODE: Dict[str, List[str]] = {
+    "soa": ["extraction/*.py"],
+    "metadata": ["extraction/metadata/*.py"],
+    "eligibility": ["extraction/eligibility/*.py"],
+    "objectives": ["extraction/objectives/*.py"],
+    "studydesign": ["extraction/studydesign/*.py"],
+    "interventions": ["extraction/interventions/*.py"],
+    "narrative": ["extraction/narrative/*.py"],
+    "advanced": ["extraction/advanced/*.py"],
+    "procedures": ["extraction/procedures/*.py"],
+    "scheduling": ["extraction/scheduling/*.py"],
+    "docstructure": ["extraction/document_structure/*.py"],
+    "amendmentdetails": ["extraction/amendments/*.py"],
+    "sap": ["extraction/conditional/*.py"],
+    "sites": ["extraction/conditional/*.py"],
+    "combine": ["main_v2.py"],
+    "validate": ["main_v2.py", "validation/*.py", "core/usdm_types_generated.py"],
+    "enrich": ["enrichment/**/*.py"],
+    "conformance": ["validation/cdisc_conformance.py"],
+}
+
+# module -> data files (globs) it reads, hashed along with the module
+MODULE_DATA: Dict[str, List[str]] = {
+    "core/usdm_schema_loader.py": ["core/schema_cache/dataStructure.yml"],
+    "extraction/page_classifier.py": ["extraction/models/*.json"],
+}
+
+ALL_STEPS = list(STEP_DEPENDENCIES)
+
+# (path, mtime_ns) -> project files the module imports
+_imports_memo: Dict[Tuple[str, int], List[Path]] = {}
+
+# Set by a daemon worker; run_step stops the run when it is set (see set_cancel_event)
+_cancel_event = None
+
+
+class RunCancelled(BaseException):
+    """
+    The run was cancelled; raised by run_step before its next step starts.
+
+    A BaseException so the pipeline's per-step error handling doesn't
+    swallow it.
+    """
+
+
+def set_cancel_event(event) -> None:
+    """Stop runs at the next step boundary once event (threading/multiprocessing Event, or None) is set."""
+    global _cancel_event
+    _cancel_event = event
+
+
+def downstream_steps(steps: Iterable[str]) -> Set[str]:
+    """The given steps plus every step that (transitively) depends on them."""
+    result = set(steps)
+    changed = True
+    while changed:
+        changed = False
+        for step, deps in STEP_DEPENDENCIES.items():
+            if step not in result and result.intersection(deps):
+                result.add(step)
+                changed = True
+    return result
+
+
+def _module_file(name: str) -> Optional[Path]:
+    """Project file for a dotted module name (None for the stdlib and packages outside the project)."""
+    base = PROJECT_ROOT.joinpath(*name.split("."))
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+def _local_imports(path: Path) -> List[Path]:
+    """Project files imported anywhere in a module, including function-level imports."""
+    key = (str(path), path.stat().st_mtime_ns)
+    if key in _imports_memo:
+        return _imports_memo[key]
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (SyntaxError, ValueError) as e:
+        logger.debug(f"Not following imports of {path}: {e}")
+        tree = ast.Module(body=[], type_ignores=[])
+
+    package = path.parent.relative_to(PROJECT_ROOT).parts
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            parts = package[:len(package) - node.level + 1] if node.level else ()
+            module = ".".join([*parts, *(node.module or "").split(".")]).strip(".")
+            names.append(module)
+            names.extend(f"{module}.{alias.name}" for alias in node.names)
+
+    found = []
+    for name in names:
+        # Importing a.b.c also runs a/__init__.py and a/b/__init__.py
+        parts = name.split(".")
+        for i in range(1, len(parts) + 1):
+            module_path = _module_file(".".join(parts[:i]))
+            if module_path is not None and module_path not in found:
+                found.append(module_path)
+    _imports_memo[key] = found
+    return found
+
+
+def step_sources(step: str) -> List[Path]:
+    """The files a step's code fingerprint covers: its globs and their imports."""
+    pending = [
+        Path(path)
+        for pattern in STEP_CODE.get(step, [])
+        for path in sorted(glob.glob(str(PROJECT_ROOT / pattern), recursive=True))
+    ]
+    seen: Set[Path] = set()
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        if path.suffix == ".py":
+            pending.extend(_local_imports(path))
+            rel = path.relative_to(PROJECT_ROOT).as_posix()
+            for pattern in MODULE_DATA.get(rel, []):
+                pending.extend(Path(p) for p in glob.glob(str(PROJECT_ROOT / pattern)))
+    return sorted(seen)
+
+
+def code_fingerprint(step: str) -> str:
+    """Hash of the source files implementing a step (see step_sources)."""
+    digest = hashlib.sha256()
+    for path in step_sources(step):
+        digest.update(os.path.relpath(path, PROJECT_ROOT).encode())
+        digest.update(get_file_hash(str(path)).encode())
+    return digest.hexdigest()[:16]
+
+
+def _hash_json(data: Any) -> str:
+    return hashlib.sha256(dumps_bytes(data, CANONICAL, default=str)).hexdigest()
+
+
+class RunManifest:
+    """Step fingerprints and checkpointed results for one output directory."""
+
+    def __init__(self, output_dir: str, enabled: bool = True):
+        self.output_dir = Path(output_dir)
+        self.enabled = enabled
+        self.path = self.output_dir / MANIFEST_NAME
+        self.checkpoint_dir = self.output_dir / CHECKPOINT_DIR
+        self.forced: Set[str] = set()
+        self.executed: List[str] = []
+        self.skipped: List[str] = []
+        self.steps: Dict[str, Dict] = {}
+        self.memory: Dict = {}
+        if enabled:
+            self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = load_json(self.path)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Run manifest {self.path} unreadable, starting fresh: {e}")
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.steps = data.get("steps", {})
+            self.memory = data.get("memory", {})
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "updatedAt": datetime.now().isoformat(),
+            "steps": self.steps,
+            "memory": self.memory,
+        }
+        save_json(self.path, data, atomic=True)
+
+    def force(self, steps: Iterable[str]) -> Set[str]:
+        """
+        Invalidate steps and everything downstream of them.
+
+        Returns:
+            The full set of steps that will re-run
+        """
+        steps = list(steps)
+        if "all" in steps:
+            steps = ALL_STEPS
+        unknown = [s for s in steps if s not in STEP_DEPENDENCIES]
+        if unknown:
+            raise ValueError(f"Unknown step(s): {', '.join(unknown)}. Choose from: {', '.join(ALL_STEPS)}")
+        self.forced |= downstream_steps(steps)
+        return self.forced
+
+    def output_hash(self, step: str) -> Optional[str]:
+        entry = self.steps.get(step)
+        return entry.get("outputHash") if entry else None
+
+    def fingerprint(self, step: str, inputs: Optional[Dict] = None, upstream: Iterable[str] = ()) -> str:
+        return _hash_json({
+            "inputs": inputs or {},
+            "code": code_fingerprint(step),
+            "upstream": {u: self.output_hash(u) for u in sorted(upstream)},
+        })
+
+    def _checkpoint_path(self, step: str) -> Path:
+        return self.checkpoint_dir / f"{step}.pkl"
+
+    def is_fresh(self, step: str, fingerprint: str) -> bool:
+        """True if the step can be skipped."""
+        if not self.enabled or step in self.forced:
+            return False
+        entry = self.steps.get(step)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return False
+        if not self._checkpoint_path(step).exists():
+            return False
+        return all(artifact_exists(str(self.output_dir / a)) for a in entry.get("artifacts", []))
+
+    def run(
+        self,
+        step: str,
+        fn: Callable[[], Any],
+        inputs: Optional[Dict] = None,
+        upstream: Iterable[str] = (),
+        artifacts: Iterable[str] = (),
+    ) -> Any:
+        """
+        Run a step, or reload its checkpointed result if it is up to date.
+
+        Args:
+            step: Step name (a key of STEP_DEPENDENCIES)
+            fn: Zero-argument callable that performs the step
+            inputs: JSON-serializable inputs that affect the result
+            upstream: Steps whose output this run consumes
+            artifacts: Files (relative to output_dir) the step writes
+
+        Results with success == False are not checkpointed.
+        """
+        if not self.enabled:
+            return fn()
+
+        upstream = [u for u in upstream if u in self.steps]
+        fingerprint = self.fingerprint(step, inputs, upstream)
+        if self.is_fresh(step, fingerprint):
+            try:
+                with open(self._checkpoint_path(step), 'rb') as f:
+                    result = pickle.load(f)
+                logger.info(f"  ✓ {step}: up to date, reusing checkpoint")
+                self.skipped.append(step)
+                return result
+            except Exception as e:
+                logger.warning(f"Checkpoint for {step} unreadable, re-running: {e}")
+
+        start = time.time()
+        result = fn()
+        self.executed.append(step)
+        self._record(step, fingerprint, result, inputs, list(upstream), list(artifacts), time.time() - start)
+        return result
+
+    def _record(self, step, fingerprint, result, inputs, upstream, artifacts, duration) -> None:
+        success = result.get("success", True) if isinstance(result, dict) else getattr(result, "success", True)
+        if not success:
+            self.steps.pop(step, None)
+            self.save()
+            return
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Result of {step} cannot be checkpointed: {e}")
+            self.steps.pop(step, None)
+            self.save()
+            return
+
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.checkpoint_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, self._checkpoint_path(step))
+
+        self.steps[step] = {
+            "fingerprint": fingerprint,
+            "outputHash": hashlib.sha256(payload).hexdigest()[:16],
+            "inputs": inputs or {},
+            "upstream": upstream,
+            # Artifacts may still be queued in the write-behind store
+            "artifacts": [a for a in artifacts if artifact_exists(str(self.output_dir / a))],
+            "completedAt": datetime.now().isoformat(),
+            "durationSeconds": round(duration, 2),
+        }
+        self.save()
+
+    def record_memory(self, step: str, memory: Dict) -> None:
+        """Attach a step's memory use (see core.memory) to its manifest entry."""
+        if step in self.steps:
+            self.steps[step]["memory"] = memory
+            self.save()
+
+    def record_run_memory(self, memory: Dict) -> None:
+        """Record the whole run's memory use (read back by the batch runner)."""
+        self.memory = memory
+        self.save()
+
+    def summary(self) -> str:
+        return f"{len(self.executed)} step(s) run, {len(self.skipped)} reused from checkpoints"
+
+
+def run_step(
+    manifest: Optional[RunManifest],
+    step: str,
+    fn: Callable[[], Any],
+    inputs: Optional[Dict] = None,
+    upstream: Iterable[str] = (),
+    artifacts: Iterable[str] = (),
+) -> Any:
+    """
+    Run fn through the manifest when one is active, else just call it.
+
+    The step is timed as a phase and its memory use is recorded on the
+    span and, when the step actually ran, in the manifest. Ids the step
+    mints are counted in its own id scope, so they don't depend on which
+    other steps ran (or were reused) before it.
+
+    Raises:
+        RunCancelled: The cancel event (set_cancel_event) is set
+    """
+    if _cancel_event is not None and _cancel_event.is_set():
+        raise RunCancelled(step)
+    with phase(step) as record:
+        with track_memory(step) as memory, id_scope(step):
+            if manifest is None:
+                result = fn()
+            else:
+                skipped = len(manifest.skipped)
+                result = manifest.run(step, fn, inputs=inputs, upstream=upstream, artifacts=artifacts)
+                record.attrs["cache.hit"] = len(manifest.skipped) > skipped
+        record.attrs.update(memory.span_attributes())
+    if manifest is not None and not record.attrs["cache.hit"]:
+        manifest.record_memory(step, memory.to_dict())
+    return result
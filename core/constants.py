@@ -51,3 +51,27 @@ TIMING_CODES = {
     "Start to Start": "C99074",
     "Visit": "C25426",
 }
+
+# Per-phase context token budgets for retrieval-selected text (BM25 pages and
+# chunks, the SoA finder's candidates, SAP context)
+PHASE_TOKEN_BUDGETS = {
+    "soa_finder": 5000,
+    "metadata": 6000,
+    "eligibility": 12000,
+    "objectives": 8000,
+    "studydesign": 8000,
+    "interventions": 10000,
+    "narrative": 10000,
+    "advanced": 10000,
+    "procedures": 12000,
+    "scheduling": 10000,
+    "document_structure": 10000,
+    "amendments": 8000,
+    "sap": 10000,
+}
+
+# Optional caps on the pages a phase's find_*_pages() detector returns.
+# Detectors return 3-47 pages (up to ~40k tokens) on the bundled protocols,
+# so by default every detected page is sent; a phase listed here packs its
+# pages into the budget, most relevant (BM25) first.
+DETECTED_PAGE_TOKEN_BUDGETS = {}  # e.g. {"interventions": 40000}
@@ -0,0 +1,336 @@
+"""
+Context Packer - Fit protocol text into a per-phase token budget.
+
+Replaces fixed character truncation (10,000 chars per page, 2,000 chars per
+SoA candidate, 30,000 chars of SAP) with budgets expressed in tokens of the
+target model. The packer:
+
+- estimates tokens locally with a per-provider approximation
+  (tiktoken is used for OpenAI models when it is installed)
+- strips page numbers and collapses whitespace (running headers/footers
+  are removed from the page store text by core.boilerplate)
+- packs pages/chunks in priority order until the budget is spent,
+  truncating the last one on a line boundary (callers that pass detector
+  pages pack without a budget unless one is configured)
+- records how many tokens each phase saved (see get_packing_stats)
+
+Usage:
+    from core.context_packer import pack_pages
+
+    packed = pack_pages([(3, text3), (4, text4)], token_budget=8000,
+                        model_name="gemini-2.5-pro", phase="eligibility")
+    prompt_text = packed.text
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+# Average characters per token on protocol text, per tokenizer family
+CHARS_PER_TOKEN = {
+    "openai": 4.0,
+    "google": 4.3,
+    "anthropic": 3.6,
+    "unknown": 3.8,
+}
+
+# Budget used when a caller names neither a phase nor a budget
+DEFAULT_TOKEN_BUDGET = 12000
+
+# Don't bother sending a truncated tail smaller than this
+MIN_PARTIAL_TOKENS = 150
+
+# Page labels are only dropped this close to the edges of the text
+EDGE_LINES = 3
+
+TRUNCATION_MARKER = "...[truncated]..."
+
+PIECE_PATTERN = re.compile(r'[A-Za-z]+|\d+|[^\sA-Za-z\d]')
+PAGE_LABEL_PATTERN = re.compile(r'^page\s+\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?$', re.IGNORECASE)
+BARE_NUMBER_PATTERN = re.compile(r'^\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?$')
+INLINE_SPACE_PATTERN = re.compile(r'[ \t\u00a0]+')
+
+_encoders: Dict[str, object] = {}
+_stats_lock = threading.Lock()
+
+
+def provider_family(model_name: Optional[str]) -> str:
+    """Map a model name to its tokenizer family."""
+    name = (model_name or "").lower()
+    if any(x in name for x in ("gpt", "o1", "o3", "o4")):
+        return "openai"
+    if "gemini" in name:
+        return "google"
+    if "claude" in name or "anthropic" in name:
+        return "anthropic"
+    return "unknown"
+
+
+def _tiktoken_encoder(model_name: str):
+    if model_name not in _encoders:
+        try:
+            _encoders[model_name] = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            _encoders[model_name] = tiktoken.get_encoding("o200k_base")
+    return _encoders[model_name]
+
+
+def estimate_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """
+    Estimate the token count of text for a model.
+
+    Splits text into words, digit runs and punctuation (the pre-tokenization
+    every BPE tokenizer does) and charges each piece by the provider's
+    characters-per-token ratio. Numbers are charged per 3 digits.
+    """
+    if not text:
+        return 0
+    family = provider_family(model_name)
+    if family == "openai" and HAS_TIKTOKEN:
+        return len(_tiktoken_encoder(model_name).encode(text, disallowed_special=()))
+
+    ratio = CHARS_PER_TOKEN[family]
+    tokens = 0
+    for piece in PIECE_PATTERN.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / ratio)
+        else:
+            tokens += 1
+    return tokens
+
+
+def clean_text(text: str) -> str:
+    """
+    Drop page numbers and collapse whitespace.
+
+    Running headers/footers are already removed from page store text (see
+    core.boilerplate). Here "Page N of M" labels are dropped near either
+    edge of the text and a bare number only as the very first or last line,
+    so numeric table cells survive.
+    """
+    lines = [INLINE_SPACE_PATTERN.sub(' ', line).strip() for line in text.splitlines()]
+    content = [i for i, line in enumerate(lines) if line]
+    edges = set(content[:EDGE_LINES] + content[-EDGE_LINES:])
+    outer = {content[0], content[-1]} if content else set()
+
+    out: List[str] = []
+    for i, line in enumerate(lines):
+        if not line:
+            if out and out[-1]:
+                out.append("")
+            continue
+        if i in edges and PAGE_LABEL_PATTERN.match(line):
+            continue
+        if i in outer and BARE_NUMBER_PATTERN.match(line):
+            continue
+        out.append(line)
+    return "\n".join(out).strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """Cut text on a line boundary so it fits in max_tokens."""
+    if estimate_tokens(text, model_name) <= max_tokens:
+        return text
+    ratio = CHARS_PER_TOKEN[provider_family(model_name)]
+    limit = int(max_tokens * ratio)
+    while limit > 0:
+        cut = text[:limit]
+        newline = cut.rfind("\n")
+        if newline > limit // 2:
+            cut = cut[:newline]
+        if estimate_tokens(cut, model_name) <= max_tokens:
+            return cut
+        limit = int(limit * 0.9)
+    return ""
+
+
+@dataclass
+class PackingStats:
+    """Token accounting for one phase across a run."""
+    calls: int = 0
+    raw_tokens: int = 0
+    packed_tokens: int = 0
+    pages_in: int = 0
+    pages_dropped: int = 0
+    pages_truncated: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.raw_tokens - self.packed_tokens
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "tokens_saved": self.tokens_saved}
+
+
+_stats: Dict[str, PackingStats] = {}
+
+
+@dataclass
+class PackedContext:
+    """Result of packing pages into a token budget."""
+    text: str
+    pages: List[int] = field(default_factory=list)
+    tokens: int = 0
+    raw_tokens: int = 0
+    dropped_pages: List[int] = field(default_factory=list)
+    truncated_pages: List[int] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.raw_tokens - self.tokens
+
+
+def pack_pages(
+    items: Sequence[Tuple[int, str]],
+    token_budget: Optional[int] = None,
+    model_name: Optional[str] = None,
+    phase: Optional[str] = None,
+    per_item_budget: Optional[int] = None,
+    header_template: str = "--- Page {number} ---",
+    separator: str = "\n\n",
+    phase_budget: bool = True,
+) -> PackedContext:
+    """
+    Pack page (or chunk) texts into a token budget.
+
+    Args:
+        items: (0-indexed page, text) pairs in priority order - the most
+               valuable first. Several items may share a page (chunks).
+        token_budget: Total budget; defaults to the phase budget from
+                      PHASE_TOKEN_BUDGETS, then DEFAULT_TOKEN_BUDGET
+        model_name: Target model (selects the tokenizer approximation)
+        phase: Phase name for the budget lookup and the savings report
+        per_item_budget: Optional cap per item, so every item gets a share
+        header_template: Page header; {number} is 1-indexed, {index} 0-indexed
+        separator: Text placed between pages
+        phase_budget: Whether a missing token_budget falls back to the phase
+                      budget; False packs every item without a total cap
+
+    Returns:
+        PackedContext with the text in document order
+    """
+    from .constants import PHASE_TOKEN_BUDGETS
+
+    if token_budget is None and phase_budget:
+        token_budget = PHASE_TOKEN_BUDGETS.get(phase, DEFAULT_TOKEN_BUDGET)
+
+    raw_tokens = 0
+    used = 0
+    taken: List[Tuple[int, int, str]] = []
+    dropped: List[int] = []
+    truncated: List[int] = []
+
+    for order, (page_num, raw) in enumerate(items):
+        header = header_template.format(number=page_num + 1, index=page_num)
+        header_cost = estimate_tokens(header, model_name)
+        raw_tokens += header_cost + estimate_tokens(raw, model_name)
+
+        text = clean_text(raw)
+        if not text:
+            continue
+        cost = header_cost + estimate_tokens(text, model_name)
+        allowed = cost if token_budget is None else token_budget - used
+        if per_item_budget is not None:
+            allowed = min(allowed, per_item_budget)
+
+        if cost > allowed:
+            if allowed - header_cost < MIN_PARTIAL_TOKENS:
+                dropped.append(page_num)
+                continue
+            text = truncate_to_tokens(text, allowed - header_cost, model_name) + "\n" + TRUNCATION_MARKER
+            cost = header_cost + estimate_tokens(text, model_name)
+            truncated.append(page_num)
+        taken.append((page_num, order, text))
+        used += cost
+
+    # Document order; chunks of one page share its header
+    parts: List[str] = []
+    last_page = None
+    for page_num, _, text in sorted(taken):
+        if page_num == last_page:
+            parts[-1] += "\n" + text
+        else:
+            parts.append(header_template.format(number=page_num + 1, index=page_num) + "\n" + text)
+            last_page = page_num
+
+    packed = PackedContext(
+        text=separator.join(parts),
+        pages=sorted({p for p, _, _ in taken}),
+        tokens=used,
+        raw_tokens=raw_tokens,
+        dropped_pages=sorted(set(dropped)),
+        truncated_pages=sorted(set(truncated)),
+    )
+
+    budget_label = "none" if token_budget is None else f"{token_budget:,}"
+    if phase:
+        _record(phase, packed, len(items))
+        logger.info(
+            f"Context packing [{phase}]: {packed.raw_tokens:,} -> {packed.tokens:,} tokens "
+            f"(saved {packed.tokens_saved:,}, budget {budget_label})"
+        )
+    if packed.dropped_pages:
+        logger.warning(
+            f"Token budget {budget_label} exceeded; dropped pages "
+            f"{[p + 1 for p in packed.dropped_pages]} (1-indexed)"
+        )
+    return packed
+
+
+def _record(phase: str, packed: PackedContext, items_in: int) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(phase, PackingStats())
+        stats.calls += 1
+        stats.raw_tokens += packed.raw_tokens
+        stats.packed_tokens += packed.tokens
+        stats.pages_in += items_in
+        stats.pages_dropped += len(packed.dropped_pages)
+        stats.pages_truncated += len(packed.truncated_pages)
+
+
+def get_packing_stats() -> Dict[str, Dict]:
+    """Per-phase token accounting for this process."""
+    with _stats_lock:
+        return {phase: stats.to_dict() for phase, stats in sorted(_stats.items())}
+
+
+def reset_packing_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def save_packing_report(output_dir: str, filename: str = "context_packing.json") -> Optional[Path]:
+    """
+    Write per-phase tokens saved to output_dir.
+
+    Returns:
+        Path of the report, or None if nothing was packed
+    """
+    stats = get_packing_stats()
+    if not stats:
+        return None
+    report = {
+        "phases": stats,
+        "total_raw_tokens": sum(s["raw_tokens"] for s in stats.values()),
+        "total_packed_tokens": sum(s["packed_tokens"] for s in stats.values()),
+        "total_tokens_saved": sum(s["tokens_saved"] for s in stats.values()),
+    }
+    path = Path(output_dir) / filename
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return path
@@ -19,6 +19,8 @@ import time
 from pathlib import Path
 from typing import Optional, Dict, List, Any
 
+from .serialization import load_json
+
 try:
     import requests
 except ImportError:
@@ -48,8 +50,7 @@ class EVSClient:
         """Load cache from disk."""
         if self.cache_file.exists():
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
+                self.cache = load_json(self.cache_file)
                 logger.debug(f"Loaded {len(self.cache)} codes from EVS cache")
             except Exception as e:
                 logger.warning(f"EVS cache corrupted, starting fresh: {e}")
@@ -0,0 +1,158 @@
+"""
+IDs - UUIDs for USDM entities, random or deterministic.
+
+By default every id the pipeline mints is a random uuid4(), so extracting
+the same protocol twice gives files that differ in every id. In
+deterministic mode (main_v2 --deterministic-ids) ids are UUIDv5 instead:
+
+    namespace = uuid5(ID_NAMESPACE, <protocol hash>)
+    id        = uuid5(namespace, "<entity type>:<key>")
+
+The key is the simple ID being replaced (convert_ids_to_uuids: 'act_3',
+'enc_12' - the prefix already names the type, and references to an id
+must get the same UUID as the id itself) or, for entities that never had
+one, a hash of the entity's canonical JSON content. Entities with the same
+type and content are told apart by an occurrence number, so ids are only
+stable as long as entities are created in the same order - which holds for
+identical extraction results. The occurrence numbers are counted per id
+scope (run_step opens one per checkpoint step) and the scope name is part
+of the key, so a step mints the same ids whether it runs alone or after
+other steps, and a step reused from its checkpoint can't collide with one
+that re-runs. id_mapping.json keeps its {simple_id: uuid} shape in both
+modes.
+
+Identical extractions then produce byte-identical protocol_usdm.json, so
+content hashes, caches and diffs between runs work on whole files.
+
+Usage:
+    from core.ids import enable_deterministic_ids, new_uuid, stable_uuid
+
+    enable_deterministic_ids(get_file_hash(pdf_path))
+    stable_uuid("id", "act_3")           # same value on every run
+    new_uuid("Code", {"code": "C25426"}) # content-keyed
+
+    with id_scope("metadata"):          # occurrences counted for this step only
+        extract(...)
+"""
+
+import hashlib
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .serialization import CANONICAL, dumps_bytes
+
+# Fixed namespace of Protocol2USDM ids; changing it changes every deterministic id
+ID_NAMESPACE = uuid.UUID("6f1c0b52-3d4e-5a8b-9c2f-7e5d1a4b8c30")
+
+_namespace: Optional[uuid.UUID] = None
+_scope = ""
+_occurrences: Dict[Tuple[str, str, str], int] = {}
+_lock = threading.Lock()
+
+
+def enable_deterministic_ids(protocol_hash: str) -> None:
+    """Derive ids from protocol_hash from now on (and start the occurrence counts afresh)."""
+    global _namespace
+    with _lock:
+        _namespace = uuid.uuid5(ID_NAMESPACE, protocol_hash)
+        _occurrences.clear()
+
+
+def disable_deterministic_ids() -> None:
+    """Go back to random uuid4() ids."""
+    global _namespace
+    with _lock:
+        _namespace = None
+        _occurrences.clear()
+
+
+def deterministic_ids_enabled() -> bool:
+    return _namespace is not None
+
+
+def id_mode() -> str:
+    # uuid5/scoped: occurrence numbers are counted per id scope (uuid5 counted per process)
+    return "uuid5/scoped" if _namespace is not None else "uuid4"
+
+
+def id_inputs() -> Dict[str, str]:
+    """Checkpoint inputs for steps that mint ids: empty in the default mode, so old runs stay valid."""
+    return {"ids": id_mode()} if _namespace is not None else {}
+
+
+@contextmanager
+def id_scope(name: str) -> Iterator[None]:
+    """
+    Count minted-id occurrences for name on their own, starting from zero.
+
+    Scopes nest ('expansion/metadata'). Steps run one at a time, so the
+    scope is process-wide rather than per thread - worker threads a step
+    starts mint in the step's scope.
+    """
+    global _scope
+    with _lock:
+        outer = _scope
+        _scope = f"{outer}/{name}" if outer else name
+        for key in [k for k in _occurrences if k[0] == _scope]:
+            del _occurrences[key]
+    try:
+        yield
+    finally:
+        with _lock:
+            _scope = outer
+
+
+def stable_uuid(entity_type: str, key: str, namespace: Optional[uuid.UUID] = None) -> str:
+    """UUIDv5 of entity_type + key in the current protocol namespace."""
+    namespace = namespace or _namespace or ID_NAMESPACE
+    return str(uuid.uuid5(namespace, f"{entity_type}:{key}"))
+
+
+def uuid_for_simple_id(simple_id: str) -> str:
+    """UUID replacing a simple ID like 'act_3': random, or stable for this protocol."""
+    if _namespace is None:
+        return str(uuid.uuid4())
+    return stable_uuid("id", simple_id, _namespace)
+
+
+def content_key(content: Any) -> str:
+    """Short hash of content's canonical JSON."""
+    payload = dumps_bytes(content, CANONICAL, default=_plain)
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def new_uuid(entity_type: str = "", content: Any = None) -> str:
+    """
+    A fresh id for an entity that has none.
+
+    Random unless deterministic ids are enabled; then derived from the
+    entity type, the content key (or a per-type sequence when there's no
+    content), the id scope and how many times that combination has been
+    seen in the scope.
+    """
+    namespace = _namespace
+    if namespace is None:
+        return str(uuid.uuid4())
+    key = content_key(content) if content is not None else "#"
+    with _lock:
+        scope = _scope
+        n = _occurrences.get((scope, entity_type, key), 0)
+        _occurrences[(scope, entity_type, key)] = n + 1
+    if n:
+        key = f"{key}/{n}"
+    return stable_uuid(entity_type, f"{scope}:{key}" if scope else key, namespace)
+
+
+def _plain(obj: Any) -> Any:
+    """Content of objects canonical JSON can't encode (dataclass entities, enums)."""
+    if isinstance(obj, Enum):
+        return obj.value
+    if is_dataclass(obj):   # slotted entities have no __dict__
+        return {f.name: getattr(obj, f.name) for f in fields(obj) if not f.name.startswith("_")}
+    if hasattr(obj, "__dict__"):
+        return {k: v for k, v in vars(obj).items() if not k.startswith("_")}
+    return str(obj)
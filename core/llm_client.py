@@ -42,11 +42,32 @@ try:
         LLMResponse,
         OpenAIProvider,
         GeminiProvider,
+        ReplayCache,
+        file_digests,
+        replayed,
+        request_slot,
+        set_replay_cache,
+        set_request_limit,
     )
     PROVIDER_LAYER_AVAILABLE = True
 except ImportError:
     PROVIDER_LAYER_AVAILABLE = False
     
+    from contextlib import contextmanager
+    
+    @contextmanager
+    def request_slot(**attrs):
+        yield None
+    
+    def set_request_limit(slots, provider=None) -> None:
+        pass
+    
+    def replayed(key_parts, call, **attrs):
+        return call()
+    
+    def file_digests(paths):
+        return []
+    
     # Minimal fallback definitions
     @dataclass
     class LLMConfig:
@@ -142,6 +163,33 @@ def detect_provider(model_name: str) -> str:
         return 'unknown'
 
 
+def genai_system(model_name: str) -> str:
+    """Provider name as used on trace spans and per-provider limits (openai, gemini, anthropic)."""
+    provider = detect_provider(model_name)
+    if provider == 'unknown' and 'claude' in model_name.lower():
+        provider = 'anthropic'
+    return {"google": "gemini"}.get(provider, provider)
+
+
+def image_request_attrs(model_name: str, image_paths: List[str], retry: int = 0) -> Dict[str, Any]:
+    """Trace attributes for a vision request (passed to request_slot)."""
+    image_bytes = 0
+    for path in image_paths:
+        try:
+            image_bytes += os.path.getsize(path)
+        except OSError:
+            pass
+    attrs = {
+        "gen_ai.system": genai_system(model_name),
+        "gen_ai.request.model": model_name,
+        "p2u.images": len(image_paths),
+        "p2u.image_bytes": image_bytes,
+    }
+    if retry:
+        attrs["p2u.retry"] = retry
+    return attrs
+
+
 # Convenience function for simple text generation
 def generate_text(
     messages: List[Dict[str, str]],
@@ -256,12 +304,23 @@ def call_llm_with_image(
     Returns:
         Dict with 'response' key containing the generated text
     """
-    import base64
-    from pathlib import Path
-    
     if model_name is None:
         model_name = get_default_model()
     
+    try:
+        return replayed(
+            ("vision.call", model_name, prompt, file_digests([image_path]), json_mode),
+            lambda: _call_llm_with_image(prompt, image_path, model_name, json_mode),
+            **{"gen_ai.system": genai_system(model_name), "gen_ai.request.model": model_name},
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _call_llm_with_image(prompt: str, image_path: str, model_name: str, json_mode: bool) -> Dict[str, Any]:
+    import base64
+    from pathlib import Path
+    
     _ensure_env_loaded()
     
     try:
@@ -298,7 +357,8 @@ def call_llm_with_image(
                 "data": base64_image,
             }
             
-            response = model.generate_content([prompt, image_part])
+            with request_slot(**image_request_attrs(model_name, [image_path])):
+                response = model.generate_content([prompt, image_part])
             return {"response": response.text}
             
         elif provider == 'openai':
@@ -326,11 +386,12 @@ def call_llm_with_image(
                 }
             ]
             
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                response_format={"type": "json_object"} if json_mode else None,
-            )
+            with request_slot(**image_request_attrs(model_name, [image_path])):
+                response = client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    response_format={"type": "json_object"} if json_mode else None,
+                )
             
             return {"response": response.choices[0].message.content}
         else:
@@ -0,0 +1,275 @@
+"""
+Memory - Per-phase RSS sampling, tracemalloc allocation sites and sizes.
+
+Each checkpointed step runs inside a memory window (core.checkpoint.run_step)
+that records the process RSS at start and end and its peak, sampled by a
+background thread every SAMPLE_INTERVAL seconds. With tracemalloc enabled
+(main_v2.py --memory-profile) the window also records the Python heap peak
+and the top allocation sites still alive when the step finishes - e.g. the
+expansion results and combined dict a full-protocol run holds on to.
+
+The numbers go on the step's trace span (memory.* attributes) and into the
+run manifest, where the batch runner reads them back to size its worker
+pool under --memory-budget.
+
+Usage:
+    from core.memory import track_memory, reset_memory, run_peak_rss
+
+    reset_memory()
+    with track_memory("combine") as mem:
+        ...
+    print(mem.to_dict(), run_peak_rss())
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+SAMPLE_INTERVAL = 0.05
+TOP_ALLOCATIONS = 10
+MB = 1024 * 1024
+
+SIZE_PATTERN = re.compile(r'^\s*([\d.]+)\s*([kmgt]?)i?b?\s*$', re.IGNORECASE)
+SIZE_UNITS = {"": MB, "k": 1024, "m": MB, "g": 1024 * MB, "t": 1024 * 1024 * MB}
+
+# tracemalloc's own bookkeeping and import machinery aren't interesting sites
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if it can't be read)."""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if HAS_PSUTIL:
+        return psutil.Process().memory_info().rss
+    if HAS_RESOURCE:
+        # Peak rather than current; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if peak > 1 << 32 else peak * 1024
+    return 0
+
+
+def available_memory() -> Optional[int]:
+    """Memory the OS can hand out without swapping (MemAvailable), in bytes."""
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if HAS_PSUTIL:
+        return psutil.virtual_memory().available
+    return None
+
+
+def parse_size(text: str) -> int:
+    """Parse '12G', '1500M', '512MB' or a bare number of megabytes into bytes."""
+    match = SIZE_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid memory size '{text}' (e.g. 12G, 1500M)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def _mb(size: int) -> float:
+    return round(size / MB, 1)
+
+
+@dataclass(eq=False)
+class MemoryWindow:
+    """Memory use over one tracked region."""
+    name: str
+    rss_start: int
+    rss_end: int = 0
+    rss_peak: int = 0
+    python_peak: Optional[int] = None
+    top_allocations: List[Dict] = field(default_factory=list)
+
+    def sample(self, rss: int) -> None:
+        if rss > self.rss_peak:
+            self.rss_peak = rss
+
+    def to_dict(self) -> Dict:
+        data = {
+            "rssStartMb": _mb(self.rss_start),
+            "rssEndMb": _mb(self.rss_end),
+            "rssPeakMb": _mb(self.rss_peak),
+            "rssGrowthMb": _mb(self.rss_end - self.rss_start),
+        }
+        if self.python_peak is not None:
+            data["pythonPeakMb"] = _mb(self.python_peak)
+        if self.top_allocations:
+            data["topAllocations"] = self.top_allocations
+        return data
+
+    def span_attributes(self) -> Dict:
+        """memory.* attributes for the region's trace span."""
+        attrs = {
+            "memory.rss_peak_mb": _mb(self.rss_peak),
+            "memory.rss_growth_mb": _mb(self.rss_end - self.rss_start),
+        }
+        if self.python_peak is not None:
+            attrs["memory.python_peak_mb"] = _mb(self.python_peak)
+        return attrs
+
+
+_lock = threading.Lock()
+_wakeup = threading.Condition(_lock)
+_windows: List[MemoryWindow] = []
+_run_window: Optional[MemoryWindow] = None
+_sampler: Optional[threading.Thread] = None
+_traced_depth = 0
+
+
+def _sample_loop() -> None:
+    while True:
+        with _wakeup:
+            while not _windows:
+                _wakeup.wait()
+            windows = list(_windows)
+        rss = current_rss()
+        for window in windows:
+            window.sample(rss)
+        time.sleep(SAMPLE_INTERVAL)
+
+
+def _open(window: MemoryWindow) -> None:
+    global _sampler
+    with _wakeup:
+        _windows.append(window)
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="p2u-memory", daemon=True)
+            _sampler.start()
+        _wakeup.notify()
+
+
+def _close(window: MemoryWindow) -> None:
+    with _lock:
+        if window in _windows:
+            _windows.remove(window)
+
+
+def enable_tracemalloc(nframes: int = 1) -> None:
+    """Trace Python allocations (slows the run; for --memory-profile)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(nframes)
+
+
+def disable_tracemalloc() -> None:
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def top_allocation_sites(limit: int = TOP_ALLOCATIONS) -> List[Dict]:
+    """The source lines holding the most live Python memory right now."""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+    sites = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        filename = frame.filename
+        if os.path.isabs(filename):
+            filename = os.path.relpath(filename)
+        sites.append({
+            "site": f"{filename}:{frame.lineno}",
+            "sizeMb": _mb(stat.size),
+            "blocks": stat.count,
+        })
+    return sites
+
+
+@contextmanager
+def track_memory(name: str) -> Iterator[MemoryWindow]:
+    """
+    Record RSS (and, with tracemalloc on, the Python heap peak and top
+    allocation sites) over a block. Nested windows only collect
+    allocation sites at the outermost level.
+    """
+    global _traced_depth
+    rss = current_rss()
+    window = MemoryWindow(name=name, rss_start=rss, rss_peak=rss)
+    traced = tracemalloc.is_tracing()
+    if traced:
+        with _lock:
+            _traced_depth += 1
+            outermost = _traced_depth == 1
+        if outermost:
+            tracemalloc.reset_peak()
+    _open(window)
+    try:
+        yield window
+    finally:
+        _close(window)
+        window.rss_end = current_rss()
+        window.sample(window.rss_end)
+        if traced:
+            window.python_peak = tracemalloc.get_traced_memory()[1]
+            if outermost:
+                window.top_allocations = top_allocation_sites()
+            with _lock:
+                _traced_depth -= 1
+
+
+def reset_memory() -> None:
+    """Start a new run-level window (called at the start of each run)."""
+    global _run_window, _traced_depth
+    if _run_window is not None:
+        _close(_run_window)
+    rss = current_rss()
+    _run_window = MemoryWindow(name="run", rss_start=rss, rss_peak=rss)
+    _traced_depth = 0
+    _open(_run_window)
+
+
+def run_peak_rss() -> int:
+    """Peak RSS in bytes since reset_memory() (0 if never reset)."""
+    if _run_window is None:
+        return 0
+    _run_window.sample(current_rss())
+    return _run_window.rss_peak
+
+
+def run_memory() -> Dict:
+    """Run-level summary for the run manifest."""
+    if _run_window is None:
+        return {}
+    peak = run_peak_rss()
+    return {
+        "rssStartMb": _mb(_run_window.rss_start),
+        "rssPeakMb": _mb(peak),
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
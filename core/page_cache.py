@@ -0,0 +1,217 @@
+"""
+Page-Finding Cache - Persist page detection decisions across runs.
+
+Every phase locates its source pages with a find_*_pages() detector before
+extracting. For a given PDF the answer only changes when the detector logic
+(or, for SoA, the LLM model) changes, so decisions are stored on disk keyed
+by PDF content hash + detector name/version + arguments and reused on
+later runs: output-directory reruns, --expansion-only and model benchmarks
+skip detection entirely.
+
+Explicit page overrides (--pages) never consult the cache. Entries live in
+the per-user cache directory (~/.cache/protocol2usdm/page_cache, or
+%LOCALAPPDATA% on Windows) unless PAGE_CACHE_DIR points elsewhere.
+
+Usage:
+    from core.page_cache import memoize_page_finder
+
+    @memoize_page_finder("eligibility")
+    def find_eligibility_pages(pdf_path: str, max_pages_to_scan: int = 50) -> List[int]:
+        ...
+
+    # Disable for a run (e.g. main_v2.py --no-page-cache)
+    set_page_cache_enabled(False)
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .pdf_utils import get_file_hash
+from .profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+def _default_cache_dir() -> Path:
+    """Per-user cache directory; page text and indexes are protocol content, not package data."""
+    if os.name == "nt":
+        base = os.getenv("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "protocol2usdm" / "page_cache"
+
+
+# Cache configuration (PAGE_CACHE_DIR overrides the per-user default)
+CACHE_DIR = Path(os.getenv("PAGE_CACHE_DIR") or _default_cache_dir())
+
+# Bump when shared detection behaviour changes; invalidates every entry
+DETECTOR_VERSION = 2
+
+DEFAULT_ENABLED = os.getenv("PAGE_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+
+_enabled = DEFAULT_ENABLED
+_lock = threading.Lock()
+_state = threading.local()
+
+
+def set_page_cache_enabled(enabled: bool) -> None:
+    """Enable or disable the page-finding cache for this process."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_page_cache_enabled() -> bool:
+    return _enabled
+
+
+def mark_result_uncacheable() -> None:
+    """
+    Flag the detector call in progress as degraded (e.g. the LLM failed and
+    a heuristic fallback was returned) so its result is not persisted.
+    """
+    _state.uncacheable = True
+
+
+class PageCache:
+    """On-disk store of page-finding decisions, one JSON file per PDF hash."""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+
+    def _path(self, pdf_hash: str) -> Path:
+        return self.cache_dir / f"{pdf_hash}.json"
+
+    def _load(self, pdf_hash: str) -> Dict[str, Any]:
+        path = self._path(pdf_hash)
+        if not path.exists():
+            return {"entries": {}}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Page cache file {path} unreadable, ignoring: {e}")
+            return {"entries": {}}
+
+    def get(self, pdf_hash: str, key: str) -> Optional[List[int]]:
+        """Return cached pages for a detector key, or None."""
+        entry = self._load(pdf_hash).get("entries", {}).get(key)
+        if entry is None:
+            return None
+        return list(entry["pages"])
+
+    def put(self, pdf_hash: str, key: str, pages: List[int], pdf_name: str = "") -> None:
+        """Store pages for a detector key (atomic write)."""
+        with _lock:
+            data = self._load(pdf_hash)
+            if pdf_name:
+                data["pdf"] = pdf_name
+            data.setdefault("entries", {})[key] = {
+                "pages": list(pages),
+                "cached_at": time.time(),
+            }
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp, self._path(pdf_hash))
+            except OSError as e:
+                logger.warning(f"Could not write page cache: {e}")
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+
+    def clear(self, pdf_hash: Optional[str] = None) -> None:
+        """Remove cached decisions for one PDF, or all of them."""
+        if pdf_hash:
+            paths = [self._path(pdf_hash)]
+        else:
+            paths = list(self.cache_dir.glob("*.json")) if self.cache_dir.exists() else []
+        for path in paths:
+            if path.exists():
+                path.unlink()
+
+
+# Singleton instance for convenience
+_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> PageCache:
+    """Get the singleton page cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = PageCache()
+    return _cache
+
+
+def _build_key(
+    name: str,
+    version: Any,
+    func: Callable,
+    args: tuple,
+    kwargs: dict,
+    fingerprint: Optional[Callable[[], str]],
+) -> str:
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    params = {k: v for k, v in bound.arguments.items() if k != "pdf_path"}
+    key = f"{name}:v{DETECTOR_VERSION}.{version}"
+    if fingerprint is not None:
+        key += f":{fingerprint()}"
+    if params:
+        key += ":" + json.dumps(params, sort_keys=True, default=str)
+    return key
+
+
+def memoize_page_finder(
+    name: str,
+    version: Any = 1,
+    fingerprint: Optional[Callable[[], str]] = None,
+) -> Callable:
+    """
+    Decorator that persists a page detector's result per PDF content hash.
+
+    The cache key covers the detector name and version, DETECTOR_VERSION,
+    every argument except pdf_path (e.g. model_name, max_pages_to_scan) and
+    an optional fingerprint callable for external state such as a model file.
+
+    Args:
+        name: Detector name (e.g. "soa", "eligibility")
+        version: Bump when this detector's logic changes
+        fingerprint: Optional callable returning extra key material
+    """
+    def decorator(func: Callable[..., List[int]]) -> Callable[..., List[int]]:
+        @functools.wraps(func)
+        def wrapper(pdf_path, *args, **kwargs):
+            if not _enabled:
+                return func(pdf_path, *args, **kwargs)
+            try:
+                pdf_hash = get_file_hash(str(pdf_path))
+                key = _build_key(name, version, func, (pdf_path,) + args, kwargs, fingerprint)
+            except (OSError, TypeError) as e:
+                logger.debug(f"Page cache bypassed for {name}: {e}")
+                return func(pdf_path, *args, **kwargs)
+
+            with span(f"pages.{name}") as record:
+                cache = get_page_cache()
+                cached = cache.get(pdf_hash, key)
+                record.attrs["cache.hit"] = cached is not None
+                if cached is not None:
+                    logger.info(f"Using cached {name} pages: {cached}")
+                    return cached
+
+                _state.uncacheable = False
+                pages = func(pdf_path, *args, **kwargs)
+                # Empty or degraded results are usually transient failures - retry next run
+                if pages and not getattr(_state, "uncacheable", False):
+                    cache.put(pdf_hash, key, pages, pdf_name=Path(pdf_path).name)
+                return pages
+        return wrapper
+    return decorator
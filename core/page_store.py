@@ -0,0 +1,159 @@
+"""
+Page Text Store - Extract each PDF's page text once and reuse it.
+
+Phase detectors and extractors all need the plain text of protocol pages.
+The store extracts every page once per document (keyed by PDF content
+hash), keeps it in memory for the rest of the run and caches it on disk
+next to the page-finding decisions so later runs skip PyMuPDF entirely.
+
+Running headers/footers are stripped from the stored text (see
+core.boilerplate); raw_page() restores the original text of a page.
+
+Usage:
+    from core.page_store import get_page_store
+
+    store = get_page_store("protocol.pdf")
+    print(store.page_count, store.pages[0][:200])
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import page_cache
+from .boilerplate import RemovedLines, restore_page, strip_boilerplate
+from .pdf_utils import get_file_hash
+from .profiling import span
+from .serialization import COMPACT, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction changes so cached page text is rebuilt
+STORE_VERSION = 2
+
+_stores: Dict[str, "PageTextStore"] = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class PageTextStore:
+    """Plain text of every page of one PDF, without running headers/footers."""
+    pdf_hash: str
+    pages: List[str] = field(default_factory=list)
+    source: str = ""
+    removed: List[RemovedLines] = field(default_factory=list)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def get_page(self, page_num: int) -> str:
+        """Get text for a 0-indexed page ('' if out of range)."""
+        if 0 <= page_num < len(self.pages):
+            return self.pages[page_num]
+        return ""
+
+    def raw_page(self, page_num: int) -> str:
+        """Original text of a page, boilerplate included."""
+        removed = self.removed[page_num] if 0 <= page_num < len(self.removed) else []
+        return restore_page(self.get_page(page_num), removed)
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": STORE_VERSION,
+            "pdfHash": self.pdf_hash,
+            "source": self.source,
+            "pages": self.pages,
+            "removed": self.removed,
+        }
+
+    @classmethod
+    def from_pdf(cls, pdf_path: str, pdf_hash: Optional[str] = None) -> "PageTextStore":
+        """Extract page text with PyMuPDF."""
+        import fitz  # PyMuPDF
+
+        with span("pdf.text", source=Path(pdf_path).name, **{"file.size": os.path.getsize(pdf_path)}) as record:
+            doc = fitz.open(pdf_path)
+            try:
+                raw_pages = [doc[i].get_text() for i in range(len(doc))]
+            finally:
+                doc.close()
+            pages, removed = strip_boilerplate(raw_pages)
+            record.attrs["pages"] = len(pages)
+        return cls(
+            pdf_hash=pdf_hash or get_file_hash(pdf_path),
+            pages=pages,
+            source=Path(pdf_path).name,
+            removed=removed,
+        )
+
+
+def _cache_path(pdf_hash: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / f"{pdf_hash}.text.json"
+
+
+def _load_cached(pdf_hash: str, cache_dir: Path) -> Optional[PageTextStore]:
+    path = _cache_path(pdf_hash, cache_dir)
+    if not path.exists():
+        return None
+    try:
+        data = load_json(path)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Page text cache {path} unreadable, rebuilding: {e}")
+        return None
+    if data.get("version") != STORE_VERSION:
+        return None
+    return PageTextStore(
+        pdf_hash=pdf_hash,
+        pages=data["pages"],
+        source=data.get("source", ""),
+        removed=[[tuple(r) for r in page] for page in data.get("removed", [])],
+    )
+
+
+def _save_cached(store: PageTextStore, cache_dir: Path) -> None:
+    cache_dir = Path(cache_dir)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        save_json(_cache_path(store.pdf_hash, cache_dir), store.to_dict(), COMPACT, atomic=True)
+    except OSError as e:
+        logger.warning(f"Could not write page text cache: {e}")
+
+
+def get_page_store(pdf_path: str, cache_dir: Optional[Path] = None) -> PageTextStore:
+    """
+    Get the page text store for a PDF.
+
+    Looks in the in-process memo, then the on-disk cache (defaults to the
+    page cache directory), and only then extracts text with PyMuPDF.
+    """
+    cache_dir = Path(cache_dir) if cache_dir else page_cache.CACHE_DIR
+    pdf_hash = get_file_hash(str(pdf_path))
+    with _lock:
+        store = _stores.get(pdf_hash)
+        if store is None:
+            # Only the first lookup per process is traced; memo hits are free
+            with span("pdf.page_store", source=Path(pdf_path).name) as record:
+                store = _load_cached(pdf_hash, cache_dir)
+                record.attrs["cache.hit"] = store is not None
+                if store is None:
+                    store = PageTextStore.from_pdf(str(pdf_path), pdf_hash)
+                    _save_cached(store, cache_dir)
+                record.attrs["pages"] = store.page_count
+            _stores[pdf_hash] = store
+    return store
+
+
+def get_page_texts(pdf_path: str) -> List[str]:
+    """Convenience accessor for the cached text of every page."""
+    return get_page_store(pdf_path).pages
+
+
+def clear_page_stores() -> None:
+    """Drop in-process page stores (disk cache is left in place)."""
+    with _lock:
+        _stores.clear()
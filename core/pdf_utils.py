@@ -4,61 +4,112 @@ PDF Utility Functions.
 Common PDF operations used across the pipeline.
 """
 
+import hashlib
 import logging
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# (resolved path, size, mtime) -> sha256, so repeated lookups skip re-hashing
+_file_hash_memo: Dict[Tuple[str, int, float], str] = {}
+
 
 def extract_text_from_pages(
     pdf_path: str,
     pages: List[int],
-    max_chars_per_page: int = 10000,
+    max_chars_per_page: Optional[int] = None,
+    phase: Optional[str] = None,
+    model_name: Optional[str] = None,
+    token_budget: Optional[int] = None,
+    query: Optional[str] = None,
 ) -> Optional[str]:
     """
     Extract text from specific pages of a PDF.
     
+    Page text comes from the per-document page store and is cleaned by
+    core.context_packer (running headers/footers, page labels, whitespace).
+    Every page is sent unless a token budget applies - token_budget, or the
+    phase's entry in DETECTED_PAGE_TOKEN_BUDGETS. Under a budget, pages are
+    first ranked by BM25 relevance to query so the least relevant are the
+    ones dropped.
+    
     Args:
         pdf_path: Path to the PDF file
         pages: List of 0-indexed page numbers to extract
-        max_chars_per_page: Maximum characters per page (to avoid huge texts)
+        max_chars_per_page: Deprecated hard character cap per page; only
+                            applied when passed explicitly
+        phase: Extraction phase (budget lookup and tokens-saved report)
+        model_name: Target model, for the tokenizer approximation
+        token_budget: Explicit token budget (overrides the phase's cap)
+        query: Phase retrieval query used to rank pages under a budget
         
     Returns:
         Combined text from all specified pages, or None on failure
     """
     try:
-        import fitz  # PyMuPDF
+        from .constants import DETECTED_PAGE_TOKEN_BUDGETS
+        from .context_packer import pack_pages
+        from .page_store import get_page_store
         
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
+        store = get_page_store(pdf_path)
+        total_pages = store.page_count
         
-        texts = []
+        items = []
         for page_num in pages:
             if page_num < 0 or page_num >= total_pages:
                 logger.warning(f"Page {page_num} out of range (0-{total_pages-1})")
                 continue
-                
-            page = doc[page_num]
-            text = page.get_text()
-            
-            # Truncate if too long
-            if len(text) > max_chars_per_page:
+            text = store.get_page(page_num)
+            if max_chars_per_page is not None and len(text) > max_chars_per_page:
                 text = text[:max_chars_per_page] + "\n...[truncated]..."
-                
-            texts.append(f"--- Page {page_num + 1} ---\n{text}")
-            
-        doc.close()
+            items.append((page_num, text))
         
-        if texts:
-            return "\n\n".join(texts)
-        return None
+        if not items:
+            return None
+        if token_budget is None:
+            token_budget = DETECTED_PAGE_TOKEN_BUDGETS.get(phase)
+        if token_budget is not None and query:
+            from .retrieval import rank_pages
+            
+            rank = {p: i for i, p in enumerate(rank_pages(pdf_path, query, [p for p, _ in items]))}
+            items.sort(key=lambda item: rank[item[0]])
+        packed = pack_pages(
+            items,
+            token_budget=token_budget,
+            model_name=model_name,
+            phase=phase,
+            phase_budget=False,
+        )
+        return packed.text or None
         
     except Exception as e:
         logger.error(f"Failed to extract text from PDF: {e}")
         return None
 
 
+def get_file_hash(path: str) -> str:
+    """
+    Get the SHA-256 content hash of a file (e.g. a protocol PDF).
+    
+    The digest is memoized per path, size and modification time, so callers
+    can ask for it freely during a run.
+    """
+    resolved = os.path.abspath(path)
+    stat = os.stat(resolved)
+    memo_key = (resolved, stat.st_size, stat.st_mtime)
+    digest = _file_hash_memo.get(memo_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(resolved, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        _file_hash_memo[memo_key] = digest
+    return digest
+
+
 def get_page_count(pdf_path: str) -> int:
     """Get the number of pages in a PDF."""
     try:
@@ -0,0 +1,703 @@
+"""
+Profiling - Per-phase wall/CPU timing spans and optional cProfile dumps.
+
+Every pipeline step runs inside a span that records its wall time and the
+CPU time of the thread that ran it; the difference is time spent waiting
+(LLM calls, disk, the request limiter). Spans nest, so a run breaks down as
+
+    soa                         <- checkpointed step (core.checkpoint.run_step)
+      soa.header                <- pipeline sub-step
+        llm.request             <- one provider API call
+      soa.text
+      ...
+
+Spans are always recorded (a span costs a few microseconds). With
+profiling enabled (main_v2.py --profile), each top-level phase also runs
+under cProfile and writes to <output_dir>/profile/:
+
+    <phase>.pstats      - load with pstats / snakeviz
+    <phase>.collapsed   - collapsed stacks (microseconds) for flamegraph.pl
+                          or speedscope
+
+Only the thread that enters a phase is profiled; work handed to other
+threads shows up in that phase's wall time but not in its profile.
+
+Spans are also exported as a trace with OpenTelemetry span semantics
+(trace/span ids, parent links, start/end in Unix nanoseconds, attributes
+such as gen_ai.usage.input_tokens or cache.hit). save_trace() writes
+<output_dir>/trace.jsonl (one span per line) or an OTLP/JSON file that
+OpenTelemetry tooling can import; no collector is needed. A W3C
+TRACEPARENT environment variable puts the run inside a parent trace (the
+batch runner uses this so every protocol in a batch shares one trace).
+
+Usage:
+    from core.profiling import span, phase, save_timing_report, save_trace
+
+    with phase("eligibility"):
+        with span("eligibility.llm", model=model):
+            ...
+    save_timing_report(output_dir)
+    save_trace(output_dir)
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = "profile"
+SUMMARY_NAME = "timing_summary"
+TRACE_JSONL_NAME = "trace.jsonl"
+TRACE_OTLP_NAME = "trace.otlp.json"
+TRACE_FORMATS = ("jsonl", "otlp")
+SERVICE_NAME = "protocol2usdm"
+
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+# Stop recording (but keep counting) past this many spans per run
+MAX_SPANS = 50000
+
+# Collapsed-stack frames below this many microseconds are dropped
+MIN_COLLAPSED_US = 1
+MAX_STACK_DEPTH = 200
+
+
+@dataclass(eq=False)
+class Span:
+    """One timed region."""
+    id: int
+    name: str
+    parent_id: Optional[int]
+    thread: str
+    start: float                  # time.time() at entry
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    attrs: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def wait_seconds(self) -> float:
+        return max(0.0, self.wall_seconds - self.cpu_seconds)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "parentId": self.parent_id,
+            "thread": self.thread,
+            "start": self.start,
+            "wallSeconds": round(self.wall_seconds, 6),
+            "cpuSeconds": round(self.cpu_seconds, 6),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+_lock = threading.Lock()
+_local = threading.local()
+_spans: List[Span] = []
+_dropped = 0
+_next_id = 1
+_profile_dir: Optional[Path] = None
+_profiles: Dict[str, pstats.Stats] = {}
+_profiling_thread: Optional[int] = None
+_trace_id = uuid.uuid4().hex
+_span_prefix = uuid.uuid4().hex[:8]    # keeps span ids unique across processes in one trace
+_remote_parent: Optional[str] = None
+_resource: Dict[str, Any] = {}
+
+
+def _stack() -> List[Span]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span on this thread."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def begin_span(name: str, **attrs) -> Span:
+    """
+    Open a span on this thread; close it with end_span().
+
+    For regions that don't fit a with-block (e.g. a whole run with many
+    exit paths); prefer span() everywhere else.
+    """
+    global _next_id
+    stack = _stack()
+    with _lock:
+        record = Span(
+            id=_next_id,
+            name=name,
+            parent_id=stack[-1].id if stack else None,
+            thread=threading.current_thread().name,
+            start=time.time(),
+            attrs=attrs,
+        )
+        _next_id += 1
+    record._wall0 = time.perf_counter()
+    record._cpu0 = time.thread_time()
+    stack.append(record)
+    return record
+
+
+def end_span(record: Span, error: Optional[str] = None) -> None:
+    """Close a span opened with begin_span() (closing twice is a no-op)."""
+    global _dropped
+    if not hasattr(record, "_wall0"):
+        return
+    record.cpu_seconds = time.thread_time() - record._cpu0
+    record.wall_seconds = time.perf_counter() - record._wall0
+    del record._wall0, record._cpu0
+    if error:
+        record.error = error
+    stack = _stack()
+    if record in stack:
+        # Anything still open inside it was abandoned by an exception
+        del stack[stack.index(record):]
+    with _lock:
+        if len(_spans) < MAX_SPANS:
+            _spans.append(record)
+        else:
+            _dropped += 1
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span]:
+    """Time a block; attrs are stored with the span and may be added to inside it."""
+    record = begin_span(name, **attrs)
+    error = None
+    try:
+        yield record
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        end_span(record, error)
+
+
+@contextmanager
+def phase(name: str, **attrs) -> Iterator[Span]:
+    """
+    A span that also runs under cProfile when profiling is enabled.
+
+    Nested phases (and phases on other threads while one is being profiled)
+    are timed but not separately profiled.
+    """
+    global _profiling_thread
+    profiler = None
+    if _profile_dir is not None:
+        with _lock:
+            if _profiling_thread is None:
+                _profiling_thread = threading.get_ident()
+                profiler = cProfile.Profile()
+
+    with span(name, **attrs) as record:
+        if profiler is None:
+            yield record
+            return
+        profiler.enable()
+        try:
+            yield record
+        finally:
+            profiler.disable()
+            with _lock:
+                _profiling_thread = None
+            _dump_profile(name, profiler)
+
+
+def enable_profiling(output_dir: str) -> Path:
+    """Profile each top-level phase into <output_dir>/profile/."""
+    global _profile_dir
+    _profile_dir = Path(output_dir) / PROFILE_DIR
+    _profile_dir.mkdir(parents=True, exist_ok=True)
+    return _profile_dir
+
+
+def disable_profiling() -> None:
+    global _profile_dir
+    _profile_dir = None
+
+
+def is_profiling() -> bool:
+    return _profile_dir is not None
+
+
+def reset_timing() -> None:
+    """
+    Forget recorded spans and profiles and start a new trace (called at the
+    start of each run).
+
+    The trace joins the parent given by the TRACEPARENT environment
+    variable, if set.
+    """
+    global _dropped, _trace_id, _span_prefix, _remote_parent
+    # Spans left open by an aborted run on this thread
+    _stack().clear()
+    with _lock:
+        _spans.clear()
+        _profiles.clear()
+        _dropped = 0
+        match = TRACEPARENT_PATTERN.match(os.environ.get("TRACEPARENT", "").strip().lower())
+        if match:
+            _trace_id, _remote_parent = match.group(1), match.group(2)
+        else:
+            _trace_id, _remote_parent = uuid.uuid4().hex, None
+        _span_prefix = uuid.uuid4().hex[:8]
+        _resource.clear()
+
+
+def trace_id() -> str:
+    return _trace_id
+
+
+def set_resource(**attrs) -> None:
+    """Attributes describing the whole run (protocol, model), exported with every span."""
+    _resource.update({k: v for k, v in attrs.items() if v is not None})
+
+
+def make_traceparent(trace: str, span_id: str) -> str:
+    """W3C traceparent header value for a (trace id, span id) pair."""
+    return f"00-{trace}-{span_id}-01"
+
+
+def get_spans() -> List[Span]:
+    """Finished spans, in the order they closed."""
+    with _lock:
+        return list(_spans)
+
+
+# ---------------------------------------------------------------------------
+# cProfile output
+# ---------------------------------------------------------------------------
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^\w.-]+', '_', name).strip('_') or "phase"
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        label = name
+    else:
+        label = f"{os.path.basename(filename)}:{name}:{line}"
+    # ';' separates frames and the last space separates the count
+    return label.replace(";", ",").replace(" ", "_")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Convert a profile to collapsed stacks ("a;b;c" -> self microseconds).
+
+    cProfile only keeps caller->callee edges, not full stacks, so each
+    function's self time is split across its callers in proportion to the
+    cumulative time of each call edge. Recursive edges are cut.
+    """
+    raw = stats.stats
+    callees: Dict[Tuple, List[Tuple]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [f for f, (_, _, _, _, callers) in raw.items() if not callers]
+    result: Dict[str, int] = {}
+
+    def visit(func, path: List[str], on_path: set, fraction: float) -> None:
+        _, _, tt, ct, _ = raw[func]
+        label = path + [_frame_label(func)]
+        self_us = int(tt * fraction * 1e6)
+        if self_us >= MIN_COLLAPSED_US:
+            key = ";".join(label)
+            result[key] = result.get(key, 0) + self_us
+        if len(label) >= MAX_STACK_DEPTH:
+            return
+        on_path.add(func)
+        for callee, edge_ct in callees.get(func, ()):
+            if callee in on_path or callee not in raw:
+                continue
+            callee_ct = raw[callee][3]
+            if callee_ct <= 0:
+                continue
+            share = fraction * min(1.0, edge_ct / callee_ct)
+            if raw[callee][3] * share * 1e6 >= MIN_COLLAPSED_US:
+                visit(callee, label, on_path, share)
+        on_path.discard(func)
+
+    for root in roots:
+        visit(root, [], set(), 1.0)
+    return result
+
+
+def _dump_profile(name: str, profiler: cProfile.Profile) -> None:
+    directory = _profile_dir
+    if directory is None:
+        return
+    try:
+        stats = pstats.Stats(profiler)
+        # A phase that runs twice (e.g. 'validate' for SoA and full output) accumulates
+        key = _safe_name(name)
+        if key in _profiles:
+            _profiles[key].add(stats)
+            stats = _profiles[key]
+        else:
+            _profiles[key] = stats
+        directory.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(str(directory / f"{key}.pstats"))
+        with open(directory / f"{key}.collapsed", 'w', encoding='utf-8') as f:
+            for stack, micros in sorted(collapsed_stacks(stats).items()):
+                f.write(f"{stack} {micros}\n")
+    except Exception as e:
+        logger.warning(f"Could not write profile for phase '{name}': {e}")
+
+
+# ---------------------------------------------------------------------------
+# Trace export
+# ---------------------------------------------------------------------------
+
+def _span_hex(span_id: int) -> str:
+    return f"{_span_prefix}{span_id:08x}"
+
+
+def _attr_value(value: Any) -> Any:
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_attr_value(v) for v in value]
+    return str(value)
+
+
+def _base_resource() -> Dict[str, Any]:
+    return {
+        "service.name": SERVICE_NAME,
+        "process.pid": os.getpid(),
+        "host.name": socket.gethostname(),
+    }
+
+
+def resource_attributes() -> Dict[str, Any]:
+    attrs = _base_resource()
+    attrs.update(_resource)
+    return attrs
+
+
+def span_to_otel(record: Span) -> Dict:
+    """One span as a flat OpenTelemetry-style dict (the trace.jsonl line format)."""
+    start_ns = int(record.start * 1e9)
+    attrs = {k: _attr_value(v) for k, v in record.attrs.items()}
+    attrs["thread.name"] = record.thread
+    attrs["p2u.cpu_seconds"] = round(record.cpu_seconds, 6)
+    if record.parent_id is not None:
+        parent = _span_hex(record.parent_id)
+    else:
+        parent = _remote_parent
+    return {
+        "traceId": _trace_id,
+        "spanId": _span_hex(record.id),
+        "parentSpanId": parent,
+        "name": record.name,
+        "kind": "CLIENT" if record.name.startswith("llm.") else "INTERNAL",
+        "startTimeUnixNano": start_ns,
+        "endTimeUnixNano": start_ns + int(record.wall_seconds * 1e9),
+        "attributes": attrs,
+        "status": {"code": "ERROR", "message": record.error} if record.error else {"code": "OK"},
+        "resource": resource_attributes(),
+    }
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, list):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": "" if value is None else str(value)}
+
+
+def _otlp_attributes(attrs: Dict[str, Any]) -> List[Dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attrs.items()]
+
+
+def to_otlp(spans: List[Dict]) -> Dict:
+    """Wrap span_to_otel() dicts in an OTLP/JSON ExportTraceServiceRequest."""
+    kinds = {"INTERNAL": 1, "CLIENT": 3}
+    by_resource: Dict[str, Tuple[Dict, List[Dict]]] = {}
+    for s in spans:
+        key = json.dumps(s.get("resource", {}), sort_keys=True)
+        entry = by_resource.setdefault(key, (s.get("resource", {}), []))
+        otlp_span = {
+            "traceId": s["traceId"],
+            "spanId": s["spanId"],
+            "name": s["name"],
+            "kind": kinds.get(s.get("kind"), 1),
+            "startTimeUnixNano": str(s["startTimeUnixNano"]),
+            "endTimeUnixNano": str(s["endTimeUnixNano"]),
+            "attributes": _otlp_attributes(s.get("attributes", {})),
+            "status": {"code": 2, "message": s["status"].get("message", "")}
+                      if s.get("status", {}).get("code") == "ERROR" else {"code": 1},
+        }
+        if s.get("parentSpanId"):
+            otlp_span["parentSpanId"] = s["parentSpanId"]
+        entry[1].append(otlp_span)
+    return {"resourceSpans": [
+        {
+            "resource": {"attributes": _otlp_attributes(resource)},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": otlp_spans}],
+        }
+        for resource, otlp_spans in by_resource.values()
+    ]}
+
+
+def save_trace(output_dir: str, fmt: str = "jsonl") -> Optional[Path]:
+    """
+    Export this run's spans to output_dir (trace.jsonl or trace.otlp.json).
+
+    Returns:
+        Path of the trace file, or None if no spans were recorded
+    """
+    if fmt not in TRACE_FORMATS:
+        raise ValueError(f"Unknown trace format '{fmt}' (expected one of {TRACE_FORMATS})")
+    spans = sorted(get_spans(), key=lambda s: s.start)
+    if not spans:
+        return None
+    records = [span_to_otel(s) for s in spans]
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    if fmt == "otlp":
+        path = Path(output_dir) / TRACE_OTLP_NAME
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(to_otlp(records), f)
+    else:
+        path = Path(output_dir) / TRACE_JSONL_NAME
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+    return path
+
+
+def new_span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def make_span(
+    trace: str,
+    span_id: str,
+    parent_span_id: Optional[str],
+    name: str,
+    start: float,
+    end: float,
+    attributes: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+    resource: Optional[Dict[str, Any]] = None,
+) -> Dict:
+    """A trace.jsonl record for a span timed outside the span recorder (e.g. a queued batch job)."""
+    return {
+        "traceId": trace,
+        "spanId": span_id,
+        "parentSpanId": parent_span_id,
+        "name": name,
+        "kind": "INTERNAL",
+        "startTimeUnixNano": int(start * 1e9),
+        "endTimeUnixNano": int(end * 1e9),
+        "attributes": {k: _attr_value(v) for k, v in (attributes or {}).items()},
+        "status": {"code": "ERROR", "message": error} if error else {"code": "OK"},
+        "resource": {**_base_resource(), **(resource or {})},
+    }
+
+
+def append_trace(path: str, records: List[Dict]) -> None:
+    """Append span records to a trace.jsonl file (one write per call)."""
+    if not records:
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records))
+
+
+def _from_otlp_value(value: Dict) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "arrayValue" in value:
+        return [_from_otlp_value(v) for v in value["arrayValue"].get("values", [])]
+    for key in ("stringValue", "boolValue", "doubleValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def load_trace(path: str) -> List[Dict]:
+    """
+    Read a trace written by save_trace() (either format) or appended by
+    the batch runner.
+
+    Returns:
+        span_to_otel()-style dicts sorted by start time
+    """
+    path = Path(path)
+    spans: List[Dict] = []
+    if path.suffix == ".jsonl":
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    spans.append(json.loads(line))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        kinds = {3: "CLIENT"}
+        for rs in data.get("resourceSpans", []):
+            resource = {a["key"]: _from_otlp_value(a["value"])
+                        for a in rs.get("resource", {}).get("attributes", [])}
+            for ss in rs.get("scopeSpans", []):
+                for s in ss.get("spans", []):
+                    status = s.get("status", {})
+                    spans.append({
+                        "traceId": s["traceId"],
+                        "spanId": s["spanId"],
+                        "parentSpanId": s.get("parentSpanId"),
+                        "name": s["name"],
+                        "kind": kinds.get(s.get("kind"), "INTERNAL"),
+                        "startTimeUnixNano": int(s["startTimeUnixNano"]),
+                        "endTimeUnixNano": int(s["endTimeUnixNano"]),
+                        "attributes": {a["key"]: _from_otlp_value(a["value"])
+                                       for a in s.get("attributes", [])},
+                        "status": {"code": "ERROR", "message": status.get("message", "")}
+                                  if status.get("code") == 2 else {"code": "OK"},
+                        "resource": resource,
+                    })
+    spans.sort(key=lambda s: s["startTimeUnixNano"])
+    return spans
+
+
+def critical_path(spans: List[Dict]) -> List[Dict]:
+    """
+    The chain of spans that determined the end-to-end latency of a trace.
+
+    Starting from the longest root span, repeatedly follows the child that
+    finished last, then the sibling that finished last before that child
+    started, and so on (each chosen child is expanded the same way).
+    Returns the spans on the path in start order.
+    """
+    if not spans:
+        return []
+    ids = {s["spanId"] for s in spans}
+    children: Dict[str, List[Dict]] = {}
+    roots = []
+    for s in spans:
+        parent = s.get("parentSpanId")
+        if parent in ids:
+            children.setdefault(parent, []).append(s)
+        else:
+            roots.append(s)
+    root = max(roots, key=lambda s: s["endTimeUnixNano"] - s["startTimeUnixNano"])
+
+    path: List[Dict] = []
+
+    def expand(node: Dict) -> None:
+        path.append(node)
+        kids = children.get(node["spanId"], [])
+        chain: List[Dict] = []
+        chosen = set()
+        limit = node["endTimeUnixNano"]
+        while True:
+            candidates = [k for k in kids if k["endTimeUnixNano"] <= limit and k["spanId"] not in chosen]
+            if not candidates:
+                break
+            last = max(candidates, key=lambda k: k["endTimeUnixNano"])
+            chain.append(last)
+            chosen.add(last["spanId"])
+            limit = last["startTimeUnixNano"]
+        for kid in reversed(chain):
+            expand(kid)
+
+    expand(root)
+    return sorted(path, key=lambda s: s["startTimeUnixNano"])
+
+
+# ---------------------------------------------------------------------------
+# Summary report
+# ---------------------------------------------------------------------------
+
+def summarize_spans(spans: Optional[List[Span]] = None) -> Dict:
+    """Aggregate spans by name; percentages are of the total top-level wall time."""
+    spans = get_spans() if spans is None else spans
+    rows: Dict[str, Dict] = {}
+    for s in spans:
+        row = rows.setdefault(s.name, {
+            "name": s.name, "calls": 0, "errors": 0,
+            "wallSeconds": 0.0, "cpuSeconds": 0.0, "waitSeconds": 0.0,
+            "maxWallSeconds": 0.0,
+        })
+        row["calls"] += 1
+        row["errors"] += 1 if s.error else 0
+        row["wallSeconds"] += s.wall_seconds
+        row["cpuSeconds"] += s.cpu_seconds
+        row["waitSeconds"] += s.wait_seconds
+        row["maxWallSeconds"] = max(row["maxWallSeconds"], s.wall_seconds)
+
+    total = sum(s.wall_seconds for s in spans if s.parent_id is None)
+    ordered = sorted(rows.values(), key=lambda r: -r["wallSeconds"])
+    for row in ordered:
+        row["percent"] = round(100.0 * row["wallSeconds"] / total, 1) if total else 0.0
+        for k in ("wallSeconds", "cpuSeconds", "waitSeconds", "maxWallSeconds"):
+            row[k] = round(row[k], 4)
+    return {
+        "totalWallSeconds": round(total, 4),
+        "spanCount": len(spans),
+        "droppedSpans": _dropped,
+        "spans": ordered,
+    }
+
+
+def format_timing_table(summary: Dict) -> str:
+    """Fixed-width table of a summarize_spans() result."""
+    rows = summary["spans"]
+    width = max([len("span")] + [len(r["name"]) for r in rows])
+    lines = [
+        f"{'span':<{width}}  {'calls':>6}  {'wall s':>9}  {'cpu s':>9}  {'wait s':>9}  {'%':>6}",
+        "-" * (width + 49),
+    ]
+    for r in rows:
+        lines.append(
+            f"{r['name']:<{width}}  {r['calls']:>6}  {r['wallSeconds']:>9.2f}  "
+            f"{r['cpuSeconds']:>9.2f}  {r['waitSeconds']:>9.2f}  {r['percent']:>6.1f}"
+        )
+    lines.append(f"Total (top-level spans): {summary['totalWallSeconds']:.2f}s wall")
+    return "\n".join(lines)
+
+
+def save_timing_report(output_dir: str) -> Optional[Path]:
+    """
+    Write timing_summary.json and timing_summary.txt to output_dir.
+
+    Returns:
+        Path of the JSON report, or None if no spans were recorded
+    """
+    spans = get_spans()
+    if not spans:
+        return None
+    summary = summarize_spans(spans)
+    summary["profileDir"] = str(_profile_dir) if _profile_dir is not None else None
+    path = Path(output_dir) / f"{SUMMARY_NAME}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    with open(path.with_suffix(".txt"), 'w', encoding='utf-8') as f:
+        f.write(format_timing_table(summary) + "\n")
+    return path
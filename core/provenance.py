@@ -21,12 +21,13 @@ Usage:
     tracker.save('output/soa_provenance.json')
 """
 
-import json
 from enum import Enum
 from typing import Dict, List, Optional, Set, Any
 from dataclasses import dataclass, field
 from pathlib import Path
 
+from .serialization import COMPACT, load_json
+
 
 class ProvenanceSource(Enum):
     """Source of extracted data."""
@@ -269,8 +270,8 @@ class ProvenanceTracker:
         Args:
             path: Output file path
         """
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        from .artifacts import put_artifact
+        put_artifact(path, self.to_dict(), COMPACT)
     
     @classmethod
     def load(cls, path: str) -> 'ProvenanceTracker':
@@ -283,9 +284,7 @@ class ProvenanceTracker:
         Returns:
             Loaded ProvenanceTracker
         """
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return cls.from_dict(data)
+        return cls.from_dict(load_json(path))
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about tracked provenance."""
@@ -0,0 +1,339 @@
+"""
+BM25 Retrieval - Rank protocol chunks for phase context selection.
+
+Builds an in-process BM25 index once per document over page chunks (page
+text split into ~CHUNK_CHARS windows on line boundaries; chunks never span
+pages). Each phase declares a query and a token budget and receives the
+best-scoring chunks, instead of a fixed "first N pages" window.
+
+The index is cached on disk next to the page text store, keyed by the PDF
+content hash.
+
+Usage:
+    from core.retrieval import rank_pages, select_context_pages, retrieve_context
+
+    pages = select_context_pages("protocol.pdf", "inclusion exclusion criteria", token_budget=8000)
+    ranked = rank_pages("protocol.pdf", "inclusion exclusion criteria", detected_pages)
+    text, pages = retrieve_context("sap.pdf", "analysis population safety set", token_budget=8000)
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import page_cache
+from .context_packer import estimate_tokens, pack_pages
+from .page_store import get_page_store
+from .serialization import COMPACT, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+# Bump when chunking/tokenization changes so cached indexes are rebuilt
+INDEX_VERSION = 2
+
+# Target chunk size in characters (~300-400 tokens)
+CHUNK_CHARS = 1500
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Chunks scoring below this fraction of the best hit are not worth their tokens
+MIN_RELATIVE_SCORE = 0.3
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the
+this to was were will with which who may must should all any each not no
+""".split())
+
+_indexes: Dict[str, "BM25Index"] = {}
+_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens without stopwords."""
+    return [
+        t for t in TOKEN_PATTERN.findall(text.lower())
+        if len(t) > 1 and t not in STOPWORDS
+    ]
+
+
+def approx_tokens(text: str) -> int:
+    """Model-agnostic token estimate used for budgeted selection."""
+    return estimate_tokens(text) + 1
+
+
+@dataclass
+class Chunk:
+    """A contiguous piece of one page."""
+    page_num: int
+    text: str
+
+
+@dataclass
+class ScoredChunk:
+    """A chunk with its BM25 score for a query."""
+    chunk_id: int
+    page_num: int
+    text: str
+    score: float
+
+
+def chunk_pages(pages: List[str], chunk_chars: int = CHUNK_CHARS) -> List[Chunk]:
+    """Split page texts into chunks on line boundaries."""
+    chunks: List[Chunk] = []
+    for page_num, text in enumerate(pages):
+        buf: List[str] = []
+        size = 0
+        for line in text.splitlines():
+            buf.append(line)
+            size += len(line) + 1
+            if size >= chunk_chars:
+                chunks.append(Chunk(page_num, "\n".join(buf)))
+                buf, size = [], 0
+        if buf and "".join(buf).strip():
+            chunks.append(Chunk(page_num, "\n".join(buf)))
+    return chunks
+
+
+@dataclass
+class BM25Index:
+    """Okapi BM25 index over document chunks."""
+    chunks: List[Chunk] = field(default_factory=list)
+    lengths: List[int] = field(default_factory=list)
+    postings: Dict[str, List[Tuple[int, int]]] = field(default_factory=dict)
+
+    @property
+    def avg_length(self) -> float:
+        return sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    @classmethod
+    def build(cls, pages: List[str], chunk_chars: int = CHUNK_CHARS) -> "BM25Index":
+        """Build an index from page texts."""
+        index = cls(chunks=chunk_pages(pages, chunk_chars))
+        for chunk_id, chunk in enumerate(index.chunks):
+            terms = Counter(tokenize(chunk.text))
+            index.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                index.postings.setdefault(term, []).append((chunk_id, tf))
+        return index
+
+    def search(self, query: str, top_k: Optional[int] = None) -> List[ScoredChunk]:
+        """Return chunks ranked by BM25 score (zero-score chunks omitted)."""
+        n_docs = len(self.chunks)
+        if not n_docs:
+            return []
+        avgdl = self.avg_length or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for chunk_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[chunk_id] / avgdl)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        if top_k is not None:
+            ranked = ranked[:top_k]
+        return [
+            ScoredChunk(chunk_id=cid, page_num=self.chunks[cid].page_num, text=self.chunks[cid].text, score=s)
+            for cid, s in ranked
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": INDEX_VERSION,
+            "chunks": [[c.page_num, c.text] for c in self.chunks],
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BM25Index":
+        return cls(
+            chunks=[Chunk(page, text) for page, text in data["chunks"]],
+            lengths=list(data["lengths"]),
+            postings={t: [tuple(p) for p in plist] for t, plist in data["postings"].items()},
+        )
+
+
+def _index_path(pdf_hash: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / f"{pdf_hash}.bm25.json"
+
+
+def get_document_index(pdf_path: str, cache_dir: Optional[Path] = None) -> BM25Index:
+    """
+    Get the BM25 index for a PDF, building it at most once per document.
+
+    Checks the in-process memo, then the disk cache, then builds from the
+    page text store.
+    """
+    cache_dir = Path(cache_dir) if cache_dir else page_cache.CACHE_DIR
+    store = get_page_store(pdf_path, cache_dir)
+    with _lock:
+        index = _indexes.get(store.pdf_hash)
+        if index is not None:
+            return index
+
+        path = _index_path(store.pdf_hash, cache_dir)
+        if path.exists():
+            try:
+                data = load_json(path)
+                if data.get("version") == INDEX_VERSION:
+                    index = BM25Index.from_dict(data)
+            except (OSError, json.JSONDecodeError, KeyError) as e:
+                logger.warning(f"BM25 index cache {path} unreadable, rebuilding: {e}")
+
+        if index is None:
+            index = BM25Index.build(store.pages)
+            try:
+                save_json(path, index.to_dict(), COMPACT, atomic=True)
+            except OSError as e:
+                logger.warning(f"Could not write BM25 index cache: {e}")
+
+        _indexes[store.pdf_hash] = index
+    return index
+
+
+def clear_document_indexes() -> None:
+    """Drop in-process BM25 indexes (disk cache is left in place)."""
+    with _lock:
+        _indexes.clear()
+
+def select_chunks(
+    pdf_path: str,
+    query: str,
+    token_budget: int,
+    always_include_pages: Iterable[int] = (),
+) -> List[ScoredChunk]:
+    """
+    Pick the best-scoring chunks for a query that fit in a token budget.
+
+    Chunks from always_include_pages are taken first (e.g. the title page
+    for metadata). The result is returned in document order.
+    """
+    index = get_document_index(pdf_path)
+    forced = set(always_include_pages)
+    selected: List[ScoredChunk] = []
+    used = 0
+
+    for chunk_id, chunk in enumerate(index.chunks):
+        if chunk.page_num in forced:
+            selected.append(ScoredChunk(chunk_id, chunk.page_num, chunk.text, float("inf")))
+            used += approx_tokens(chunk.text)
+
+    taken = {c.chunk_id for c in selected}
+    hits = index.search(query)
+    floor = hits[0].score * MIN_RELATIVE_SCORE if hits else 0.0
+    for hit in hits:
+        if hit.score < floor:
+            break
+        if hit.chunk_id in taken:
+            continue
+        cost = approx_tokens(hit.text)
+        if used + cost > token_budget:
+            continue
+        selected.append(hit)
+        taken.add(hit.chunk_id)
+        used += cost
+
+    selected.sort(key=lambda c: c.chunk_id)
+    return selected
+
+
+def select_context_pages(
+    pdf_path: str,
+    query: str,
+    token_budget: int,
+    always_include_pages: Iterable[int] = (),
+) -> List[int]:
+    """
+    Whole pages ranked by their best chunk score that fit in a token budget.
+
+    Use this when the extractor consumes full pages (extract_text_from_pages);
+    use retrieve_context() to send only the matching chunks.
+
+    Returns:
+        Sorted 0-indexed pages ([] if nothing matches the query)
+    """
+    index = get_document_index(pdf_path)
+    store = get_page_store(pdf_path)
+
+    page_scores: Dict[int, float] = {}
+    hits = index.search(query)
+    floor = hits[0].score * MIN_RELATIVE_SCORE if hits else 0.0
+    for hit in hits:
+        if hit.score < floor:
+            break
+        page_scores.setdefault(hit.page_num, hit.score)
+
+    selected = [p for p in always_include_pages if 0 <= p < store.page_count]
+    used = sum(approx_tokens(store.get_page(p)) for p in selected)
+    for page_num, _ in sorted(page_scores.items(), key=lambda kv: (-kv[1], kv[0])):
+        if page_num in selected:
+            continue
+        cost = approx_tokens(store.get_page(page_num))
+        if used + cost > token_budget:
+            continue
+        selected.append(page_num)
+        used += cost
+
+    pages = sorted(set(selected))
+    if page_scores:
+        logger.info(f"Retrieval selected pages {[p + 1 for p in pages]} (1-indexed) for: {query[:60]}")
+        return pages
+    return []
+
+
+def rank_pages(pdf_path: str, query: str, pages: Sequence[int]) -> List[int]:
+    """
+    Order pages by their best chunk score for a query, most relevant first.
+
+    Pages without a matching chunk follow in their given order.
+    """
+    wanted = set(pages)
+    best: Dict[int, float] = {}
+    for hit in get_document_index(pdf_path).search(query):
+        if hit.page_num in wanted:
+            best.setdefault(hit.page_num, hit.score)
+    return sorted(pages, key=lambda p: -best.get(p, 0.0))
+
+
+def retrieve_context(
+    pdf_path: str,
+    query: str,
+    token_budget: int,
+    always_include_pages: Iterable[int] = (),
+    phase: Optional[str] = None,
+    model_name: Optional[str] = None,
+) -> Tuple[str, List[int]]:
+    """
+    Build prompt context from the best-scoring chunks.
+
+    The chunks are passed through the context packer, which enforces the
+    budget for the target model and records the tokens saved for the phase.
+
+    Returns:
+        Tuple of (text with "--- Page N ---" headers, 0-indexed pages used)
+    """
+    chunks = select_chunks(pdf_path, query, token_budget, always_include_pages)
+    if not chunks:
+        return "", []
+    packed = pack_pages(
+        [(c.page_num, c.text) for c in chunks],
+        token_budget=token_budget,
+        model_name=model_name,
+        phase=phase,
+    )
+    return packed.text, packed.pages
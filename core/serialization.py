@@ -0,0 +1,131 @@
+"""
+Serialization - JSON encoding/decoding for every file the pipeline writes.
+
+Uses orjson when it is installed (several times faster on the 1 MB golden
+files and protocol_usdm.json) and the stdlib json module otherwise. Three
+output modes:
+
+    PRETTY     2-space indented, UTF-8 - files people open (protocol_usdm.json,
+               extraction results, reports)
+    COMPACT    no whitespace - machine artifacts (id_mapping.json, provenance,
+               page and index caches)
+    CANONICAL  compact with sorted keys - hashing and diffing
+
+CANONICAL is always produced by the stdlib encoder: orjson and json format
+some floats differently (1e-05 vs 0.00001), and a fingerprint must not
+depend on which backend happens to be installed. PRETTY and COMPACT output
+of the two backends differs only in such float spellings.
+
+Values orjson refuses (integers past 64 bits, exotic keys) fall back to the
+stdlib encoder, as do files orjson can't parse (NaN literals written by
+json.dump), so callers see stdlib behaviour and exceptions either way.
+
+Usage:
+    from core.serialization import save_json, load_json, dumps, COMPACT
+
+    save_json("output/protocol_usdm.json", data)
+    save_json("output/id_mapping.json", id_map, mode=COMPACT, atomic=True)
+    data = load_json("output/protocol_usdm.json")
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+PRETTY = "pretty"
+COMPACT = "compact"
+CANONICAL = "canonical"
+MODES = (PRETTY, COMPACT, CANONICAL)
+
+_STDLIB_OPTIONS = {
+    PRETTY: {"indent": 2, "ensure_ascii": False},
+    COMPACT: {"separators": (",", ":"), "ensure_ascii": False},
+    CANONICAL: {"separators": (",", ":"), "ensure_ascii": False, "sort_keys": True},
+}
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = {
+        PRETTY: orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        COMPACT: orjson.OPT_NON_STR_KEYS,
+    }
+
+
+def backend() -> str:
+    """Name of the encoder used for PRETTY/COMPACT output."""
+    return "orjson" if HAS_ORJSON else "json"
+
+
+def dumps_bytes(data: Any, mode: str = PRETTY, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Encode data as UTF-8 JSON in the given mode."""
+    if mode not in _STDLIB_OPTIONS:
+        raise ValueError(f"Unknown JSON mode '{mode}'. Choose from: {', '.join(MODES)}")
+    if HAS_ORJSON and mode in _ORJSON_OPTIONS:
+        try:
+            return orjson.dumps(data, default=default, option=_ORJSON_OPTIONS[mode])
+        except orjson.JSONEncodeError:
+            pass  # let the stdlib encoder handle it (or raise its usual error)
+    return json.dumps(data, default=default, **_STDLIB_OPTIONS[mode]).encode('utf-8')
+
+
+def dumps(data: Any, mode: str = PRETTY, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Encode data as a JSON string in the given mode."""
+    return dumps_bytes(data, mode, default).decode('utf-8')
+
+
+def loads(text: Union[str, bytes]) -> Any:
+    """
+    Decode JSON text.
+
+    Raises:
+        json.JSONDecodeError: The text isn't valid JSON
+    """
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass  # NaN/Infinity literals and the stdlib's error message
+    return json.loads(text)
+
+
+def load_json(path: Union[str, os.PathLike]) -> Any:
+    """Read and decode a JSON file."""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def save_json(
+    path: Union[str, os.PathLike],
+    data: Any,
+    mode: str = PRETTY,
+    default: Optional[Callable[[Any], Any]] = None,
+    atomic: bool = False,
+) -> None:
+    """
+    Encode data and write it to path.
+
+    With atomic=True the file is written next to the target and moved into
+    place, so readers never see a partial file.
+    """
+    payload = dumps_bytes(data, mode, default)
+    if not atomic:
+        with open(path, 'wb') as f:
+            f.write(payload)
+        return
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,299 @@
+"""
+USDM Index - Id, type, name and reference lookups over one USDM document.
+
+Code across the pipeline used to find entities by walking
+study.versions[0].studyDesigns[0] and scanning its lists: name matching in
+the provenance sync, link checks in validate_schema, the viewer's SoA grid
+(which looked up each encounter with a list scan per cell link). USDMIndex
+is built in one pass over a document and answers those questions with
+dict lookups:
+
+    get(id)                 entity with that id
+    of_type("Activity")     entities by instanceType, in document order
+    ids_named("Screening")  ids of entities with that name
+    in_collection("epochs") entities held under that key (a list or a dict)
+    collection_of(id)       the key an entity is held under
+    references[id]          ids an entity refers to (*Id and *Ids fields)
+    referrers[id]           ids of the entities referring to it
+    dangling()              references to ids that aren't in the document
+
+Only dicts with a string "id" are entities. A reference belongs to the
+nearest entity holding it, so the encounterId of an id-less helper dict
+counts for the enclosing entity.
+
+Edits made through the index (append, remove, set_field, rename) update
+the document and the index together. Edit the document directly and the
+index goes stale; build a new one.
+
+Usage:
+    from core.usdm_index import USDMIndex
+
+    index = USDMIndex(data)
+    encounter = index.get(instance["encounterId"])
+    epoch_name = index.get(encounter["epochId"])["name"]
+    index.rename("enc_1", str(uuid.uuid4()))    # also rewrites references
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+
+@dataclass
+class Reference:
+    """One reference field: holder[field] (or an item of it) points at target."""
+    referrer: Optional[str]     # id of the entity holding the field (None at top level)
+    holder: Dict[str, Any]
+    field: str
+    target: str
+
+
+def _reference_targets(key: str, value: Any) -> List[str]:
+    if key == 'id':
+        return []
+    if key.endswith('Id') and isinstance(value, str):
+        return [value]
+    if key.endswith('Ids') and isinstance(value, list):
+        return [v for v in value if isinstance(v, str)]
+    return []
+
+
+class USDMIndex:
+    """Lookups over one USDM document (or any part of one)."""
+
+    def __init__(self, data: Any = None):
+        self.data = data
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_type: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_name: Dict[str, List[str]] = {}
+        self.references: Dict[str, Set[str]] = {}   # referrer id -> ids it refers to
+        self.referrers: Dict[str, Set[str]] = {}    # id -> ids of entities referring to it
+        self.duplicates: Set[str] = set()           # ids held by more than one entity
+        self._collections: Dict[str, List[Dict[str, Any]]] = {}
+        self._parent: Dict[str, Tuple[Optional[Dict[str, Any]], str]] = {}  # id -> (owner, key)
+        self._sites: Dict[str, List[Reference]] = {}                       # target -> fields naming it
+        if data is not None:
+            self._add(data, None, None, "")
+
+    # --- lookups ---
+
+    def __contains__(self, entity_id: Any) -> bool:
+        return entity_id in self.by_id
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, entity_id: Any, default: Any = None) -> Any:
+        return self.by_id.get(entity_id, default)
+
+    def of_type(self, instance_type: str) -> List[Dict[str, Any]]:
+        return list(self.by_type.get(instance_type, []))
+
+    def ids_named(self, name: str, instance_type: Optional[str] = None) -> List[str]:
+        ids = self.by_name.get(name, [])
+        if instance_type is None:
+            return list(ids)
+        return [i for i in ids if self.by_id[i].get('instanceType') == instance_type]
+
+    def in_collection(self, key: str) -> List[Dict[str, Any]]:
+        return list(self._collections.get(key, []))
+
+    def collection_of(self, entity_id: Any) -> Optional[str]:
+        parent = self._parent.get(entity_id)
+        return parent[1] if parent else None
+
+    def owner_of(self, entity_id: Any) -> Optional[str]:
+        """Id of the nearest entity holding this one (None at the top level)."""
+        parent = self._parent.get(entity_id)
+        return parent[0].get('id') if parent and parent[0] is not None else None
+
+    def names(self, key: str) -> Dict[str, str]:
+        """name -> id for the entities of a collection (the last one wins on a clash)."""
+        return {e['name']: e['id'] for e in self._collections.get(key, []) if e.get('name')}
+
+    def reference_sites(self, target: str) -> List[Reference]:
+        return list(self._sites.get(target, []))
+
+    def dangling(self) -> List[Reference]:
+        """References to ids no entity in the document has."""
+        return [ref for target, refs in self._sites.items() if target not in self.by_id for ref in refs]
+
+    # --- edits that keep the index current ---
+
+    def append(self, owner_id: Optional[str], key: str, entity: Dict[str, Any]) -> Dict[str, Any]:
+        """Append entity (and everything in it) to owner[key], creating the list if needed."""
+        owner = self.data if owner_id is None else self.by_id[owner_id]
+        owner.setdefault(key, []).append(entity)
+        self._add(entity, owner if owner_id is not None else None, owner_id, key)
+        return entity
+
+    def remove(self, entity_id: str) -> Dict[str, Any]:
+        """Remove an entity from its owner and drop it and its contents from the index."""
+        entity = self.by_id[entity_id]
+        owner, key = self._parent[entity_id]
+        if owner is None:
+            owner = self.data
+        held = owner.get(key)
+        if isinstance(held, list):
+            owner[key] = [item for item in held if item is not entity]
+        elif held is entity:
+            del owner[key]
+        self._drop(entity, self.owner_of(entity_id))
+        return entity
+
+    def set_field(self, entity_id: str, key: str, value: Any) -> None:
+        """entity[key] = value, re-indexing names, references and nested entities."""
+        if key == 'id':
+            self.rename(entity_id, value)
+            return
+        entity = self.by_id[entity_id]
+        old = entity.get(key)
+        if isinstance(old, (dict, list)):
+            self._drop(old, entity_id)
+        self._drop_references(entity_id, entity, key)
+        if key == 'name':
+            self._unname(entity_id, old)
+        entity[key] = value
+        if key == 'name' and isinstance(value, str) and value:
+            self.by_name.setdefault(value, []).append(entity_id)
+        self._add_references(entity_id, entity, key, value)
+        if isinstance(value, (dict, list)):
+            self._add(value, entity, entity_id, key)
+
+    def rename(self, old_id: str, new_id: str) -> None:
+        """
+        Change an entity's id and every reference to it.
+
+        Raises:
+            ValueError: new_id already belongs to another entity
+        """
+        if new_id == old_id:
+            return
+        if new_id in self.by_id:
+            raise ValueError(f"Id '{new_id}' is already in use")
+        entity = self.by_id.pop(old_id)
+        entity['id'] = new_id
+        self.by_id[new_id] = entity
+        self._parent[new_id] = self._parent.pop(old_id)
+        name = entity.get('name')
+        if isinstance(name, str) and name:
+            ids = self.by_name[name]
+            ids[ids.index(old_id)] = new_id
+
+        # What it refers to
+        targets = self.references.pop(old_id, set())
+        if targets:
+            self.references[new_id] = targets
+        for target in targets:
+            self.referrers[target].discard(old_id)
+            self.referrers[target].add(new_id)
+            for ref in self._sites[target]:
+                if ref.referrer == old_id:
+                    ref.referrer = new_id
+
+        # What refers to it
+        sites = self._sites.pop(old_id, [])
+        for ref in sites:
+            value = ref.holder[ref.field]
+            if isinstance(value, list):
+                ref.holder[ref.field] = [new_id if v == old_id else v for v in value]
+            else:
+                ref.holder[ref.field] = new_id
+            ref.target = new_id
+        if sites:
+            self._sites[new_id] = sites
+        referrers = self.referrers.pop(old_id, set())
+        for referrer in referrers:
+            self.references[referrer].discard(old_id)
+            self.references[referrer].add(new_id)
+        if referrers:
+            self.referrers[new_id] = referrers
+
+    # --- internals ---
+
+    def _add(self, obj: Any, owner: Optional[Dict[str, Any]], owner_id: Optional[str], key: str) -> None:
+        if isinstance(obj, list):
+            for item in obj:
+                if isinstance(item, (dict, list)):
+                    self._add(item, owner, owner_id, key)
+            return
+        if not isinstance(obj, dict):
+            return
+        entity_id = obj.get('id')
+        if isinstance(entity_id, str):
+            self._register(entity_id, obj, owner, key)
+            owner, owner_id = obj, entity_id
+        for field, value in obj.items():
+            self._add_references(owner_id, obj, field, value)
+            if isinstance(value, (dict, list)):
+                self._add(value, owner, owner_id, field)
+
+    def _register(self, entity_id: str, entity: Dict[str, Any], owner: Optional[Dict[str, Any]], key: str) -> None:
+        if entity_id in self.by_id:
+            self.duplicates.add(entity_id)
+            return
+        self.by_id[entity_id] = entity
+        self._parent[entity_id] = (owner, key)
+        self._collections.setdefault(key, []).append(entity)
+        instance_type = entity.get('instanceType')
+        if instance_type:
+            self.by_type.setdefault(instance_type, []).append(entity)
+        name = entity.get('name')
+        if isinstance(name, str) and name:
+            self.by_name.setdefault(name, []).append(entity_id)
+
+    def _add_references(self, referrer: Optional[str], holder: Dict[str, Any], field: str, value: Any) -> None:
+        for target in dict.fromkeys(_reference_targets(field, value)):
+            self._sites.setdefault(target, []).append(Reference(referrer, holder, field, target))
+            if referrer is not None:
+                self.references.setdefault(referrer, set()).add(target)
+                self.referrers.setdefault(target, set()).add(referrer)
+
+    def _drop_references(self, referrer: Optional[str], holder: Dict[str, Any], field: str) -> None:
+        for target in dict.fromkeys(_reference_targets(field, holder.get(field))):
+            refs = [r for r in self._sites.get(target, []) if not (r.holder is holder and r.field == field)]
+            if refs:
+                self._sites[target] = refs
+            else:
+                self._sites.pop(target, None)
+            if referrer is not None and not any(r.referrer == referrer for r in refs):
+                self.references.get(referrer, set()).discard(target)
+                self.referrers.get(target, set()).discard(referrer)
+
+    def _unname(self, entity_id: str, name: Any) -> None:
+        ids = self.by_name.get(name) if isinstance(name, str) else None
+        if ids and entity_id in ids:
+            ids.remove(entity_id)
+            if not ids:
+                del self.by_name[name]
+
+    def _drop(self, obj: Any, owner_id: Optional[str]) -> None:
+        """Forget every entity and reference inside obj (which is leaving the document)."""
+        for holder, holder_owner in _dicts(obj, owner_id):
+            for field in list(holder):
+                self._drop_references(holder_owner, holder, field)
+            entity_id = holder.get('id')
+            if not isinstance(entity_id, str) or self.by_id.get(entity_id) is not holder:
+                continue
+            del self.by_id[entity_id]
+            _, key = self._parent.pop(entity_id)
+            self._collections[key] = [e for e in self._collections[key] if e is not holder]
+            instance_type = holder.get('instanceType')
+            if instance_type:
+                self.by_type[instance_type] = [e for e in self.by_type[instance_type] if e is not holder]
+            self._unname(entity_id, holder.get('name'))
+            self.references.pop(entity_id, None)
+
+
+def _dicts(obj: Any, owner_id: Optional[str]) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+    """Every dict in obj with the id of the entity its references belong to."""
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _dicts(item, owner_id)
+    elif isinstance(obj, dict):
+        entity_id = obj.get('id')
+        if isinstance(entity_id, str):
+            owner_id = entity_id
+        yield obj, owner_id
+        for value in obj.values():
+            if isinstance(value, (dict, list)):
+                yield from _dicts(value, owner_id)
@@ -7,13 +7,18 @@ Python dataclasses that are always in sync with the USDM specification.
 Source: https://github.com/cdisc-org/DDF-RA/blob/main/Deliverables/UML/dataStructure.yml
 """
 
-import yaml
-import uuid
+import hashlib
 import logging
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Type, get_type_hints
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Dict, FrozenSet, List, Optional, Any, Tuple, Type, get_type_hints
 from pathlib import Path
 
+from .ids import new_uuid
+
 logger = logging.getLogger(__name__)
 
 # Schema location
@@ -22,6 +27,10 @@ CACHE_DIR = Path(__file__).parent / "schema_cache"
 CACHED_SCHEMA = CACHE_DIR / "dataStructure.yml"
 VERSION_FILE = CACHE_DIR / "version.json"
 
+# Bump when parsing changes what EntityDefinition/AttributeDefinition hold;
+# invalidates every compiled schema (<schema>.pickle next to the YAML)
+COMPILED_SCHEMA_VERSION = 1
+
 # Type mapping from YAML refs to Python types
 TYPE_MAP = {
     "#/string": "str",
@@ -113,6 +122,7 @@ class USDMSchemaLoader:
         self._entities: Dict[str, EntityDefinition] = {}
         self._raw_schema: Dict[str, Any] = {}
         self._loaded = False
+        self._lock = threading.Lock()
     
     def ensure_schema_cached(self, force_download: bool = False) -> Path:
         """Ensure schema is downloaded and cached."""
@@ -142,24 +152,74 @@ class USDMSchemaLoader:
             raise RuntimeError(f"No schema available: {e}")
     
     def load(self) -> Dict[str, EntityDefinition]:
-        """Load and parse the schema."""
+        """
+        Load and parse the schema.
+        
+        The parsed definitions are pickled next to the YAML, keyed by the
+        YAML's hash and COMPILED_SCHEMA_VERSION, so later processes skip
+        yaml.safe_load and the parse.
+        """
         if self._loaded:
             return self._entities
         
-        schema_path = self.ensure_schema_cached()
-        
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            self._raw_schema = yaml.safe_load(f)
-        
-        # Parse each entity
-        for entity_name, entity_data in self._raw_schema.items():
-            if isinstance(entity_data, dict) and 'Attributes' in entity_data:
-                self._entities[entity_name] = self._parse_entity(entity_name, entity_data)
-        
-        self._loaded = True
+        with self._lock:
+            if self._loaded:
+                return self._entities
+            
+            schema_path = self.ensure_schema_cached()
+            with open(schema_path, 'rb') as f:
+                source = f.read()
+            key = f"{COMPILED_SCHEMA_VERSION}:{hashlib.sha256(source).hexdigest()}"
+            compiled_path = schema_path.with_suffix('.pickle')
+            
+            entities = self._load_compiled(compiled_path, key)
+            if entities is None:
+                import yaml
+                self._raw_schema = yaml.safe_load(source.decode('utf-8'))
+                
+                # Parse each entity
+                entities = {}
+                for entity_name, entity_data in self._raw_schema.items():
+                    if isinstance(entity_data, dict) and 'Attributes' in entity_data:
+                        entities[entity_name] = self._parse_entity(entity_name, entity_data)
+                self._save_compiled(compiled_path, key, entities)
+            
+            self._entities = entities
+            self._loaded = True
         logger.info(f"Loaded {len(self._entities)} USDM entities from schema")
         return self._entities
     
+    def _load_compiled(self, path: Path, key: str) -> Optional[Dict[str, EntityDefinition]]:
+        """Parsed definitions from the compiled schema, or None if missing or stale."""
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                compiled = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Compiled schema {path} unreadable, re-parsing: {e}")
+            return None
+        if not isinstance(compiled, dict) or compiled.get('key') != key:
+            return None
+        return compiled['entities']
+    
+    def _save_compiled(self, path: Path, key: str, entities: Dict[str, EntityDefinition]) -> None:
+        """Write the compiled schema (atomic; a read-only install just re-parses next time)."""
+        payload = pickle.dumps({'key': key, 'entities': entities}, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        except OSError as e:
+            logger.debug(f"Could not write compiled schema: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug(f"Could not write compiled schema: {e}")
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+    
     def _parse_entity(self, name: str, data: Dict) -> EntityDefinition:
         """Parse a single entity definition."""
         # Parse super classes
@@ -250,19 +310,159 @@ class USDMSchemaLoader:
             'optional_fields': entity.optional_attributes,
         }
 
+    def get_reference_fields(self) -> Dict[str, bool]:
+        """
+        Names of the reference (Ref) attributes across all entities.
+
+        Returns:
+            {attribute name: True for lists of IDs, False for a single ID}
+        """
+        fields = {}
+        for entity in self.get_all_entities().values():
+            for attr in entity.attributes.values():
+                if attr.is_reference:
+                    fields[attr.name] = attr.is_list
+        return fields
+
+
+def generate_uuid(entity_type: str = "", content: Any = None) -> str:
+    """Generate a UUID string (deterministic when core.ids is in deterministic mode)."""
+    return new_uuid(entity_type, content)
+
 
-def generate_uuid() -> str:
-    """Generate a UUID string."""
-    return str(uuid.uuid4())
+def slotted_dataclass(cls: Type) -> Type:
+    """
+    @dataclass, then rebuild the class with __slots__ for its fields.
+    
+    The SoA types exist in the thousands per protocol (one per tick); without
+    a per-instance __dict__ they are smaller and attribute access is faster.
+    Same as dataclass(slots=True), which needs Python 3.10. Instances no
+    longer accept attributes that aren't fields.
+    """
+    cls = dataclass(cls)
+    names = tuple(f.name for f in fields(cls))
+    inherited = {name for base in cls.__mro__[1:] for name in getattr(base, '__slots__', ())}
+    body = dict(cls.__dict__)
+    body['__slots__'] = tuple(name for name in names if name not in inherited)
+    for name in names:
+        body.pop(name, None)    # class-level defaults would clash with the slots
+    body.pop('__dict__', None)
+    body.pop('__weakref__', None)
+    if '__setstate__' not in body:
+        body['__setstate__'] = _set_slot_state
+    return type(cls)(cls.__name__, cls.__bases__, body)
+
+
+def _set_slot_state(self, state: Any) -> None:
+    """Unpickle both slot state and the __dict__ state of objects pickled before the slots."""
+    if isinstance(state, tuple):
+        dict_state, slot_state = state
+        state = {**(dict_state or {}), **(slot_state or {})}
+    for name, value in state.items():
+        object.__setattr__(self, name, value)
+
+
+def _compiled(cls: Type, name: str, source: str, namespace: Dict[str, Any]) -> Any:
+    """Exec source (one function called name) and return the function."""
+    exec(compile(source, f"<{cls.__qualname__}.{name}>", 'exec'), namespace)
+    return namespace[name]
+
+
+def _compile_to_dict(cls: Type) -> Any:
+    """
+    USDMEntity.to_dict for cls with its fields unrolled.
+
+    The same rules as a loop over the fields - None and empty lists are
+    skipped, values with a to_dict are serialized, id and instanceType are
+    filled in last - without looking fields up by name on every call.
+    """
+    lines = ["def to_dict(self):", "    result = {}"]
+    for name in cls._field_names():
+        lines += [
+            f"    value = self.{name}",
+            "    if value is not None:",
+            "        if isinstance(value, list):",
+            "            if value:",
+            f"                result[{name!r}] = [v.to_dict() if hasattr(v, 'to_dict') else v for v in value]",
+            "        elif hasattr(value, 'to_dict'):",
+            f"            result[{name!r}] = value.to_dict()",
+            "        else:",
+            f"            result[{name!r}] = value",
+        ]
+    lines += [
+        "    if 'id' not in result:",
+        "        result['id'] = generate_uuid(self.__class__.__name__, result)",
+        "    if 'instanceType' not in result:",
+        "        result['instanceType'] = self.__class__.__name__",
+        "    return result",
+    ]
+    return _compiled(cls, 'to_dict', "\n".join(lines), {'generate_uuid': generate_uuid})
+
+
+def _compile_from_dict(cls: Type) -> Any:
+    """
+    USDMEntity.from_dict for cls: keys that are fields, the rest defaulted.
+
+    Fills the slots the way the dataclass __init__ would (defaults, default
+    factories, __post_init__) without building and unpacking a kwargs
+    dict. Data missing a required field goes through cls(**fields) so it
+    raises the usual TypeError; classes with init=False or private fields
+    always do.
+    """
+    field_set = cls._field_set()
+    namespace = {'field_set': field_set, 'new': object.__new__}
+    lines = ["def from_dict(cls, data):", "    if not data:", "        return None"]
+    slow = "cls(**{k: v for k, v in data.items() if k in field_set})"
+    all_fields = fields(cls)
+    if any(not f.init or f.name not in field_set for f in all_fields):
+        lines.append(f"    return {slow}")
+        return _compiled(cls, 'from_dict', "\n".join(lines), namespace)
+    required = [f.name for f in all_fields if f.default is MISSING and f.default_factory is MISSING]
+    if required:
+        lines += [f"    if {' or '.join(f'{name!r} not in data' for name in required)}:",
+                  f"        return {slow}"]
+    lines += ["    self = new(cls)", "    get = data.get"]
+    for i, f in enumerate(all_fields):
+        if f.default is not MISSING:
+            namespace[f"default_{i}"] = f.default
+            lines.append(f"    self.{f.name} = get({f.name!r}, default_{i})")
+        elif f.default_factory is not MISSING:
+            namespace[f"factory_{i}"] = f.default_factory
+            lines.append(f"    self.{f.name} = data[{f.name!r}] if {f.name!r} in data else factory_{i}()")
+        else:
+            lines.append(f"    self.{f.name} = data[{f.name!r}]")
+    if hasattr(cls, '__post_init__'):
+        lines.append("    self.__post_init__()")
+    lines.append("    return self")
+    return _compiled(cls, 'from_dict', "\n".join(lines), namespace)
 
 
 # Base class for all generated USDM types
 class USDMEntity:
     """Base class for all USDM entity types."""
     
+    __slots__ = ()
+    
     _schema_loader: Optional[USDMSchemaLoader] = None
     _entity_name: str = ""
     
+    @classmethod
+    def _field_names(cls) -> Tuple[str, ...]:
+        """Public dataclass field names, in order (computed once per class)."""
+        names = cls.__dict__.get('_public_fields')
+        if names is None:
+            names = tuple(f.name for f in fields(cls) if not f.name.startswith('_')) \
+                if hasattr(cls, '__dataclass_fields__') else ()
+            cls._public_fields = names
+            cls._public_field_set = frozenset(names)
+        return names
+    
+    @classmethod
+    def _field_set(cls) -> FrozenSet[str]:
+        """_field_names() as a set, for membership checks."""
+        cls._field_names()
+        return cls.__dict__['_public_field_set']
+    
     def _ensure_id(self) -> str:
         """
         Ensure entity has an ID, generating one if needed.
@@ -271,15 +471,13 @@ class USDMEntity:
         the same ID. This ensures consistency between data and provenance.
         """
         if not getattr(self, 'id', None):
-            import uuid
-            self.id = str(uuid.uuid4())
+            content = {k: getattr(self, k) for k in self._field_names() if k != 'id'}
+            self.id = new_uuid(self.__class__.__name__, content)
         return self.id
     
     @classmethod
     def _get_schema(cls) -> USDMSchemaLoader:
-        if cls._schema_loader is None:
-            cls._schema_loader = USDMSchemaLoader()
-        return cls._schema_loader
+        return cls._schema_loader or get_schema_loader()
     
     @classmethod
     def get_definition(cls) -> Optional[EntityDefinition]:
@@ -293,50 +491,20 @@ class USDMEntity:
         return defn.required_attributes if defn else []
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
-        result = {}
-        
-        for key, value in self.__dict__.items():
-            if value is None:
-                continue
-            if key.startswith('_'):
-                continue
-                
-            if isinstance(value, list):
-                if not value:
-                    continue
-                result[key] = [
-                    v.to_dict() if hasattr(v, 'to_dict') else v 
-                    for v in value
-                ]
-            elif hasattr(value, 'to_dict'):
-                result[key] = value.to_dict()
-            else:
-                result[key] = value
-        
-        # Ensure id is present
-        if 'id' not in result:
-            result['id'] = generate_uuid()
-        
-        # Ensure instanceType is present
-        if 'instanceType' not in result:
-            result['instanceType'] = self.__class__.__name__
-        
-        return result
+        """Convert to dictionary for JSON serialization (compiled once per class)."""
+        cls = type(self)
+        encode = cls.__dict__.get('_compiled_to_dict')
+        if encode is None:
+            encode = cls._compiled_to_dict = _compile_to_dict(cls)
+        return encode(self)
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'USDMEntity':
-        """Create instance from dictionary."""
-        if not data:
-            return None
-        
-        # Get valid field names
-        valid_fields = set(cls.__dataclass_fields__.keys()) if hasattr(cls, '__dataclass_fields__') else set()
-        
-        # Filter to valid fields
-        filtered = {k: v for k, v in data.items() if k in valid_fields}
-        
-        return cls(**filtered)
+        """Create instance from dictionary, ignoring keys that aren't fields (compiled once per class)."""
+        decode = cls.__dict__.get('_compiled_from_dict')
+        if decode is None:
+            decode = cls._compiled_from_dict = _compile_from_dict(cls)
+        return decode(cls, data)
     
     def validate(self) -> List[str]:
         """Validate this entity against schema. Returns list of errors."""
@@ -361,11 +529,15 @@ class USDMEntity:
 # Global loader instance
 _global_loader: Optional[USDMSchemaLoader] = None
 
+_global_loader_lock = threading.Lock()
+
 def get_schema_loader() -> USDMSchemaLoader:
-    """Get the global schema loader instance."""
+    """Get the global schema loader instance (shared by the generated types, prompts and validators)."""
     global _global_loader
     if _global_loader is None:
-        _global_loader = USDMSchemaLoader()
+        with _global_loader_lock:
+            if _global_loader is None:
+                _global_loader = USDMSchemaLoader()
     return _global_loader
 
 
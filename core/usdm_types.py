@@ -20,9 +20,11 @@ Usage:
 """
 
 from enum import Enum
-from dataclasses import dataclass, field
+from dataclasses import field
 from typing import Dict, List, Optional, Any
 
+from core.usdm_schema_loader import slotted_dataclass
+
 # Import all official USDM types from schema-generated module
 from core.usdm_types_generated import (
     # Core types
@@ -94,7 +96,7 @@ from core.usdm_types_generated import (
 # These types are used ONLY during the extraction pipeline and are NOT official
 # USDM entities. They serve as intermediate containers before conversion.
 
-@dataclass
+@slotted_dataclass
 class PlannedTimepoint:
     """
     Internal extraction type - represents a column in the SoA table.
@@ -145,7 +147,7 @@ class PlannedTimepoint:
         return Timing(id=self.id or generate_uuid(), value=self.day, valueLabel=self.visit)
 
 
-@dataclass
+@slotted_dataclass
 class ActivityTimepoint:
     """
     Internal extraction type - represents a tick in the SoA matrix.
@@ -212,7 +214,7 @@ class ActivityTimepoint:
         )
 
 
-@dataclass
+@slotted_dataclass
 class ActivityGroup:
     """
     Internal extraction type - represents a row section header in SoA.
@@ -261,7 +263,7 @@ class ActivityGroup:
                        description=self.description, childIds=self.activity_ids)
 
 
-@dataclass
+@slotted_dataclass
 class HeaderStructure:
     """
     Internal extraction type - container for SoA table structure from vision analysis.
@@ -326,7 +328,7 @@ class HeaderStructure:
         return [g.id for g in self.activityGroups]
 
 
-@dataclass
+@slotted_dataclass
 class Timeline:
     """
     Internal extraction type - container for SoA data during extraction.
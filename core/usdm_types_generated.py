@@ -15,25 +15,20 @@ Usage:
     print(activity.to_dict())
 """
 
-import uuid
-from dataclasses import dataclass, field
+from dataclasses import field
 from typing import Dict, List, Optional, Any, Union
 from .usdm_schema_loader import (
     USDMSchemaLoader, EntityDefinition, AttributeDefinition,
-    get_schema_loader, get_entity_definition, USDMEntity
+    get_schema_loader, get_entity_definition, USDMEntity, generate_uuid, slotted_dataclass
 )
-
-
-def generate_uuid() -> str:
-    """Generate a UUID string."""
-    return str(uuid.uuid4())
+from .usdm_visitor import SKIP, UsdmVisitor, walk
 
 
 # ============================================================================
 # Core Types - These are fundamental and used throughout
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class Code(USDMEntity):
     """
     USDM Code - A symbol or combination of symbols assigned to members of a collection.
@@ -79,7 +74,7 @@ class Code(USDMEntity):
         )
 
 
-@dataclass
+@slotted_dataclass
 class AliasCode(USDMEntity):
     """
     USDM AliasCode - An alternative symbol with standard code reference.
@@ -116,7 +111,7 @@ class AliasCode(USDMEntity):
         return cls(standardCode=Code.make(code, decode))
 
 
-@dataclass
+@slotted_dataclass
 class CommentAnnotation(USDMEntity):
     """
     USDM CommentAnnotation - A note or comment.
@@ -136,7 +131,7 @@ class CommentAnnotation(USDMEntity):
         }
 
 
-@dataclass
+@slotted_dataclass
 class Range(USDMEntity):
     """USDM Range - A numeric range."""
     minValue: Optional[float] = None
@@ -152,7 +147,7 @@ class Range(USDMEntity):
         return result
 
 
-@dataclass  
+@slotted_dataclass
 class Quantity(USDMEntity):
     """USDM Quantity - A value with unit."""
     value: float = 0
@@ -170,7 +165,7 @@ class Quantity(USDMEntity):
 # Study Structure Types
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class Study(USDMEntity):
     """
     USDM Study - A clinical study.
@@ -200,7 +195,7 @@ class Study(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class StudyVersion(USDMEntity):
     """
     USDM StudyVersion - A version of a study.
@@ -235,7 +230,7 @@ class StudyVersion(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class StudyTitle(USDMEntity):
     """
     USDM StudyTitle - A title for a study.
@@ -261,7 +256,7 @@ class StudyTitle(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class StudyIdentifier(USDMEntity):
     """
     USDM StudyIdentifier - An identifier for a study.
@@ -302,7 +297,7 @@ class StudyIdentifier(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class Organization(USDMEntity):
     """
     USDM Organization - A formalized group/company.
@@ -330,7 +325,7 @@ class Organization(USDMEntity):
 # Study Design Types
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class StudyDesign(USDMEntity):
     """
     USDM StudyDesign - Base for Interventional/Observational designs.
@@ -428,7 +423,7 @@ class StudyDesign(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class StudyArm(USDMEntity):
     """
     USDM StudyArm - A treatment arm.
@@ -478,7 +473,7 @@ class StudyArm(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class StudyCell(USDMEntity):
     """USDM StudyCell - Intersection of arm and epoch."""
     id: str = ""
@@ -495,7 +490,7 @@ class StudyCell(USDMEntity):
         }
 
 
-@dataclass
+@slotted_dataclass
 class StudyEpoch(USDMEntity):
     """
     USDM StudyEpoch - A study phase/period.
@@ -556,7 +551,7 @@ Epoch = StudyEpoch
 # SoA Types
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class Activity(USDMEntity):
     """
     USDM Activity - A study activity.
@@ -601,7 +596,7 @@ class Activity(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class Encounter(USDMEntity):
     """
     USDM Encounter - A study visit.
@@ -658,7 +653,7 @@ class Encounter(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class ScheduleTimeline(USDMEntity):
     """
     USDM ScheduleTimeline - Contains scheduled instances.
@@ -696,7 +691,7 @@ class ScheduleTimeline(USDMEntity):
         elif self.instances:
             result["entryId"] = self.instances[0].id
         else:
-            result["entryId"] = generate_uuid()
+            result["entryId"] = generate_uuid("ScheduleTimeline.entryId", result)
         
         if self.instances:
             result["instances"] = [i.to_dict() for i in self.instances]
@@ -706,7 +701,7 @@ class ScheduleTimeline(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class ScheduledActivityInstance(USDMEntity):
     """
     USDM ScheduledActivityInstance - Activity scheduled at a timepoint.
@@ -762,7 +757,7 @@ class ScheduledActivityInstance(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class ScheduleTimelineExit(USDMEntity):
     """USDM ScheduleTimelineExit - Exit criteria for timeline."""
     id: str = ""
@@ -775,7 +770,7 @@ class ScheduleTimelineExit(USDMEntity):
         }
 
 
-@dataclass
+@slotted_dataclass
 class Timing(USDMEntity):
     """USDM Timing - Timing for scheduled activities."""
     id: str = ""
@@ -802,7 +797,7 @@ class Timing(USDMEntity):
 # Eligibility Types
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class EligibilityCriterion(USDMEntity):
     """USDM EligibilityCriterion - Eligibility criteria."""
     id: str = ""
@@ -826,7 +821,7 @@ class EligibilityCriterion(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class StudyDesignPopulation(USDMEntity):
     """USDM StudyDesignPopulation - Study population definition."""
     id: str = ""
@@ -855,7 +850,7 @@ class StudyDesignPopulation(USDMEntity):
 # Objectives & Endpoints
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class Objective(USDMEntity):
     """USDM Objective - Study objective."""
     id: str = ""
@@ -876,7 +871,7 @@ class Objective(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class Endpoint(USDMEntity):
     """USDM Endpoint - Study endpoint."""
     id: str = ""
@@ -904,7 +899,7 @@ class Endpoint(USDMEntity):
 # Interventions
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class StudyIntervention(USDMEntity):
     """USDM StudyIntervention - Treatment intervention."""
     id: str = ""
@@ -926,7 +921,7 @@ class StudyIntervention(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class Procedure(USDMEntity):
     """USDM Procedure - A procedure performed."""
     id: str = ""
@@ -952,7 +947,7 @@ class Procedure(USDMEntity):
 # Additional Official USDM Types
 # ============================================================================
 
-@dataclass
+@slotted_dataclass
 class Duration(USDMEntity):
     """
     USDM Duration - Time duration with optional bounds.
@@ -981,7 +976,7 @@ class Duration(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class Abbreviation(USDMEntity):
     """
     USDM Abbreviation - Abbreviation with expansion.
@@ -1002,7 +997,7 @@ class Abbreviation(USDMEntity):
         }
 
 
-@dataclass
+@slotted_dataclass
 class Indication(USDMEntity):
     """
     USDM Indication - Medical condition being studied.
@@ -1030,7 +1025,7 @@ class Indication(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class StudyCohort(USDMEntity):
     """
     USDM StudyCohort - A group of subjects.
@@ -1055,7 +1050,7 @@ class StudyCohort(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class Condition(USDMEntity):
     """
     USDM Condition - A conditional rule.
@@ -1089,7 +1084,7 @@ class Condition(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class TransitionRule(USDMEntity):
     """
     USDM TransitionRule - Rule for state transitions.
@@ -1110,7 +1105,7 @@ class TransitionRule(USDMEntity):
         }
 
 
-@dataclass
+@slotted_dataclass
 class EligibilityCriterionItem(USDMEntity):
     """
     USDM EligibilityCriterionItem - Individual criterion item.
@@ -1138,7 +1133,7 @@ class EligibilityCriterionItem(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class IntercurrentEvent(USDMEntity):
     """
     USDM IntercurrentEvent - Event affecting estimand.
@@ -1161,7 +1156,7 @@ class IntercurrentEvent(USDMEntity):
         }
 
 
-@dataclass
+@slotted_dataclass
 class Estimand(USDMEntity):
     """
     USDM Estimand - Statistical estimand.
@@ -1194,7 +1189,7 @@ class Estimand(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class Administration(USDMEntity):
     """
     USDM Administration - Drug administration details.
@@ -1228,7 +1223,7 @@ class Administration(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class AdministrableProduct(USDMEntity):
     """
     USDM AdministrableProduct - Administrable drug product.
@@ -1261,7 +1256,7 @@ class AdministrableProduct(USDMEntity):
         return result
 
 
-@dataclass
+@slotted_dataclass
 class NarrativeContent(USDMEntity):
     """
     USDM NarrativeContent - Narrative document section.
@@ -1290,7 +1285,7 @@ class NarrativeContent(USDMEntity):
         }
 
 
-@dataclass
+@slotted_dataclass
 class StudyAmendment(USDMEntity):
     """
     USDM StudyAmendment - Protocol amendment.
@@ -1396,197 +1391,211 @@ def create_wrapper_input(
         raise ValueError(f"Unsupported type: {type(data)}")
 
 
-def normalize_usdm_data(data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Normalize USDM data by passing entities through dataclasses.
+def _normalize_code(obj: Dict) -> Dict:
+    """Normalize a Code object."""
+    if not obj or not isinstance(obj, dict):
+        return obj
+    if "code" in obj:
+        code = Code(
+            code=obj.get("code", ""),
+            decode=obj.get("decode", obj.get("code", "")),
+            codeSystem=obj.get("codeSystem", "http://www.cdisc.org"),
+            codeSystemVersion=obj.get("codeSystemVersion", "2024-09-27"),
+            id=obj.get("id"),
+        )
+        return code.to_dict()
+    return obj
+
+
+def _normalize_encounter(obj: Dict) -> Dict:
+    """Normalize an Encounter."""
+    if not obj or not isinstance(obj, dict):
+        return obj
+    enc = Encounter(
+        id=obj.get("id") or None,  # Preserve existing ID, None triggers UUID gen only if truly missing
+        name=obj.get("name", ""),
+        description=obj.get("description"),
+        label=obj.get("label"),
+        type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
+        epochId=obj.get("epochId"),
+    )
+    return enc.to_dict()
+
+
+def _normalize_epoch(obj: Dict) -> Dict:
+    """Normalize a StudyEpoch."""
+    if not obj or not isinstance(obj, dict):
+        return obj
+    epoch = StudyEpoch(
+        id=obj.get("id") or None,  # Preserve existing ID
+        name=obj.get("name", ""),
+        description=obj.get("description"),
+        type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
+    )
+    return epoch.to_dict()
+
+
+def _normalize_arm(obj: Dict) -> Dict:
+    """Normalize a StudyArm."""
+    if not obj or not isinstance(obj, dict):
+        return obj
+    arm = StudyArm(
+        id=obj.get("id") or None,  # Preserve existing ID
+        name=obj.get("name", ""),
+        description=obj.get("description"),
+        type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
+        dataOriginDescription=obj.get("dataOriginDescription", "Collected"),
+        dataOriginType=Code.from_dict(obj.get("dataOriginType")) if obj.get("dataOriginType") else None,
+    )
+    return arm.to_dict()
+
+
+def _normalize_study_identifier(obj: Dict) -> Dict:
+    """Normalize a StudyIdentifier to include type field."""
+    if not obj or not isinstance(obj, dict):
+        return obj
+    si = StudyIdentifier(
+        id=obj.get("id") or None,
+        text=obj.get("text", ""),
+        scopeId=obj.get("scopeId"),
+        type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
+    )
+    return si.to_dict()
+
+
+def _normalize_alias_code(obj: Dict) -> Dict:
+    """Normalize an AliasCode (e.g., blindingSchema) to include standardCode."""
+    if not obj or not isinstance(obj, dict):
+        return obj
     
-    This leverages the auto-population logic in each dataclass's to_dict():
-    - Code objects get id, codeSystem, codeSystemVersion, instanceType
-    - Encounters get type inferred from name
-    - StudyArms get type, dataOriginType inferred
-    - Epochs get type inferred from name
+    # If it looks like a Code object (has code but no standardCode), convert to AliasCode
+    if obj.get("instanceType") == "Code" or ("code" in obj and "standardCode" not in obj):
+        # Convert Code to AliasCode with standardCode
+        code_obj = _normalize_code(obj)
+        return {
+            "id": generate_uuid("AliasCode", code_obj),
+            "standardCode": code_obj,
+            "instanceType": "AliasCode",
+        }
     
-    This should be called before validation to ensure all required fields are populated.
+    # Already has standardCode structure, just normalize it
+    result = dict(obj)
+    if "standardCode" in result and result["standardCode"]:
+        result["standardCode"] = _normalize_code(result["standardCode"])
+    
+    if "id" not in result:
+        result["id"] = generate_uuid("AliasCode", result)
+    if "instanceType" not in result:
+        result["instanceType"] = "AliasCode"
+    
+    return result
+
+
+# Lists whose items are rebuilt whole from their dataclass
+_NORMALIZED_LISTS = {
+    "encounters": _normalize_encounter,
+    "epochs": _normalize_epoch,
+    "arms": _normalize_arm,
+    "studyIdentifiers": _normalize_study_identifier,
+}
+
+
+class UsdmNormalizer(UsdmVisitor):
     """
-    import copy
-    result = copy.deepcopy(data)
-    
-    def normalize_code(obj: Dict) -> Dict:
-        """Normalize a Code object."""
-        if not obj or not isinstance(obj, dict):
-            return obj
-        if "code" in obj:
-            code = Code(
-                code=obj.get("code", ""),
-                decode=obj.get("decode", obj.get("code", "")),
-                codeSystem=obj.get("codeSystem", "http://www.cdisc.org"),
-                codeSystemVersion=obj.get("codeSystemVersion", "2024-09-27"),
-                id=obj.get("id"),
-            )
-            return code.to_dict()
-        return obj
+    normalize_usdm_data as a visitor (see core.usdm_visitor.walk).
     
-    def normalize_encounter(obj: Dict) -> Dict:
-        """Normalize an Encounter."""
-        if not obj or not isinstance(obj, dict):
-            return obj
-        enc = Encounter(
-            id=obj.get("id") or None,  # Preserve existing ID, None triggers UUID gen only if truly missing
-            name=obj.get("name", ""),
-            description=obj.get("description"),
-            label=obj.get("label"),
-            type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
-            epochId=obj.get("epochId"),
-        )
-        return enc.to_dict()
-    
-    def normalize_epoch(obj: Dict) -> Dict:
-        """Normalize a StudyEpoch."""
-        if not obj or not isinstance(obj, dict):
-            return obj
-        epoch = StudyEpoch(
-            id=obj.get("id") or None,  # Preserve existing ID
-            name=obj.get("name", ""),
-            description=obj.get("description"),
-            type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
-        )
-        return epoch.to_dict()
-    
-    def normalize_arm(obj: Dict) -> Dict:
-        """Normalize a StudyArm."""
-        if not obj or not isinstance(obj, dict):
-            return obj
-        arm = StudyArm(
-            id=obj.get("id") or None,  # Preserve existing ID
-            name=obj.get("name", ""),
-            description=obj.get("description"),
-            type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
-            dataOriginDescription=obj.get("dataOriginDescription", "Collected"),
-            dataOriginType=Code.from_dict(obj.get("dataOriginType")) if obj.get("dataOriginType") else None,
-        )
-        return arm.to_dict()
-    
-    def normalize_study_identifier(obj: Dict) -> Dict:
-        """Normalize a StudyIdentifier to include type field."""
-        if not obj or not isinstance(obj, dict):
-            return obj
-        si = StudyIdentifier(
-            id=obj.get("id") or None,
-            text=obj.get("text", ""),
-            scopeId=obj.get("scopeId"),
-            type=Code.from_dict(obj.get("type")) if obj.get("type") else None,
-        )
-        return si.to_dict()
+    Code-like dicts and the entity lists in _NORMALIZED_LISTS are rebuilt
+    through their dataclasses; the rebuilt values aren't descended into.
+    """
     
-    def normalize_alias_code(obj: Dict) -> Dict:
-        """Normalize an AliasCode (e.g., blindingSchema) to include standardCode."""
-        if not obj or not isinstance(obj, dict):
-            return obj
+    def enter(self, node: Dict[str, Any], trail) -> Any:
+        # Normalize Code objects
+        if node.get("instanceType") == "Code" or ("code" in node and "decode" in node and "standardCode" not in node):
+            normalized = _normalize_code(node)
+            node.clear()
+            node.update(normalized)
+            return SKIP
         
-        # If it looks like a Code object (has code but no standardCode), convert to AliasCode
-        if obj.get("instanceType") == "Code" or ("code" in obj and "standardCode" not in obj):
-            # Convert Code to AliasCode with standardCode
-            code_obj = normalize_code(obj)
-            return {
-                "id": generate_uuid(),
-                "standardCode": code_obj,
-                "instanceType": "AliasCode",
-            }
+        if isinstance(node.get("studyArms"), list):
+            # Rename studyArms -> arms in place, keeping key order
+            items = [("arms" if k == "studyArms" else k, v) for k, v in node.items()]
+            node.clear()
+            node.update(items)
         
-        # Already has standardCode structure, just normalize it
-        result = dict(obj)
-        if "standardCode" in result and result["standardCode"]:
-            result["standardCode"] = normalize_code(result["standardCode"])
+        done = []
+        for key, value in node.items():
+            if key in _NORMALIZED_LISTS and isinstance(value, list):
+                normalize = _NORMALIZED_LISTS[key]
+                node[key] = [normalize(item) for item in value]
+            elif key == "type" and isinstance(value, dict) and "code" in value:
+                node[key] = _normalize_code(value)
+            elif key == "blindingSchema" and isinstance(value, dict):
+                # AliasCode requires standardCode
+                node[key] = _normalize_alias_code(value)
+            elif key in ("dataOriginType", "model") and isinstance(value, dict) and "code" in value:
+                node[key] = _normalize_code(value)
+            else:
+                continue
+            done.append(key)
+        return done
+    
+    def finish(self, data: Any) -> None:
+        _ensure_study_fields(data)
+
+
+def _ensure_study_fields(result: Dict[str, Any]) -> None:
+    """Ensure top-level required fields."""
+    if not isinstance(result, dict) or "study" not in result:
+        return
+    study = result["study"]
+    
+    # Study.name is required
+    if "name" not in study or not study["name"]:
+        # Try to get name from various locations
+        titles = study.get("studyTitles") or study.get("titles") or []
         
-        if "id" not in result:
-            result["id"] = generate_uuid()
-        if "instanceType" not in result:
-            result["instanceType"] = "AliasCode"
+        # Check in versions if not found at study level
+        versions = study.get("versions", [])
+        if not titles and versions:
+            for version in versions:
+                if isinstance(version, dict):
+                    titles = version.get("titles") or version.get("studyTitles") or []
+                    if titles:
+                        break
         
-        return result
-    
-    def walk_and_normalize(obj: Any, path: str = "$") -> Any:
-        """Recursively walk and normalize entities."""
-        if isinstance(obj, dict):
-            # Check for specific entity types by instanceType or field patterns
-            inst_type = obj.get("instanceType", "")
-            
-            # Normalize Code objects
-            if inst_type == "Code" or ("code" in obj and "decode" in obj and "standardCode" not in obj):
-                return normalize_code(obj)
-            
-            # Normalize by path patterns
-            normalized = {}
-            for key, value in obj.items():
-                new_path = f"{path}.{key}"
-                
-                # Handle arrays of specific types
-                if key == "encounters" and isinstance(value, list):
-                    normalized[key] = [normalize_encounter(e) for e in value]
-                elif key == "epochs" and isinstance(value, list):
-                    normalized[key] = [normalize_epoch(e) for e in value]
-                elif key in ("arms", "studyArms") and isinstance(value, list):
-                    # Also rename studyArms -> arms
-                    normalized["arms"] = [normalize_arm(a) for a in value]
-                elif key == "studyIdentifiers" and isinstance(value, list):
-                    # Normalize StudyIdentifiers to add type field
-                    normalized[key] = [normalize_study_identifier(si) for si in value]
-                elif key == "type" and isinstance(value, dict) and "code" in value:
-                    normalized[key] = normalize_code(value)
-                elif key == "blindingSchema" and isinstance(value, dict):
-                    # AliasCode requires standardCode
-                    normalized[key] = normalize_alias_code(value)
-                elif key in ("dataOriginType", "model") and isinstance(value, dict):
-                    if "code" in value:
-                        normalized[key] = normalize_code(value)
-                    else:
-                        normalized[key] = walk_and_normalize(value, new_path)
-                else:
-                    normalized[key] = walk_and_normalize(value, new_path)
-            
-            return normalized
-        elif isinstance(obj, list):
-            return [walk_and_normalize(item, f"{path}[{i}]") for i, item in enumerate(obj)]
+        if titles and isinstance(titles, list) and len(titles) > 0:
+            # Prefer official title, fall back to first
+            official = next((t for t in titles if "official" in str(t.get("type", {})).lower()), None)
+            title_obj = official or titles[0]
+            study["name"] = title_obj.get("text", "Untitled Study")
         else:
-            return obj
+            study["name"] = "Untitled Study"
     
-    # Apply normalization
-    result = walk_and_normalize(result)
+    # Ensure versions have rationale
+    versions = study.get("versions", [])
+    for version in versions:
+        if isinstance(version, dict):
+            if "rationale" not in version or not version["rationale"]:
+                version["rationale"] = "Protocol version"
+
+
+def normalize_usdm_data(data: Dict[str, Any], in_place: bool = False) -> Dict[str, Any]:
+    """
+    Normalize USDM data by passing entities through dataclasses.
     
-    # Ensure top-level required fields
-    if "study" in result:
-        study = result["study"]
-        
-        # Study.name is required
-        if "name" not in study or not study["name"]:
-            # Try to get name from various locations
-            titles = study.get("studyTitles") or study.get("titles") or []
-            
-            # Check in versions if not found at study level
-            versions = study.get("versions", [])
-            if not titles and versions:
-                for version in versions:
-                    if isinstance(version, dict):
-                        titles = version.get("titles") or version.get("studyTitles") or []
-                        if titles:
-                            break
-            
-            if titles and isinstance(titles, list) and len(titles) > 0:
-                # Prefer official title, fall back to first
-                official = next((t for t in titles if "official" in str(t.get("type", {})).lower()), None)
-                title_obj = official or titles[0]
-                study["name"] = title_obj.get("text", "Untitled Study")
-            else:
-                study["name"] = "Untitled Study"
-        
-        # Ensure versions have rationale
-        versions = study.get("versions", [])
-        for version in versions:
-            if isinstance(version, dict):
-                if "rationale" not in version or not version["rationale"]:
-                    version["rationale"] = "Protocol version"
+    This leverages the auto-population logic in each dataclass's to_dict():
+    - Code objects get id, codeSystem, codeSystemVersion, instanceType
+    - Encounters get type inferred from name
+    - StudyArms get type, dataOriginType inferred
+    - Epochs get type inferred from name
     
-    return result
+    This should be called before validation to ensure all required fields are populated.
+    The pipeline runs UsdmNormalizer together with its other transforms in
+    one walk instead; this works on a copy unless in_place is set.
+    """
+    import copy
+    result = data if in_place else copy.deepcopy(data)
+    return walk(result, [UsdmNormalizer()])
 
 
 # Export all types
@@ -1611,5 +1620,5 @@ __all__ = [
     # Scheduling
     'Condition', 'TransitionRule',
     # Helpers
-    'generate_uuid', 'create_wrapper_input', 'normalize_usdm_data', 'USDMEntity',
+    'generate_uuid', 'create_wrapper_input', 'normalize_usdm_data', 'UsdmNormalizer', 'USDMEntity',
 ]
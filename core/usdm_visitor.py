@@ -0,0 +1,130 @@
+"""
+USDM Visitor - One in-place walk over a USDM document for many transforms.
+
+Post-processing used to walk the combined document once per transform:
+normalize_usdm_data (after a full deepcopy), convert_ids_to_uuids (building
+a second copy), terminology enrichment and the controlled-terminology
+checks of local conformance. Each of those is now a UsdmVisitor, and walk()
+runs any number of them in a single depth-first pass that edits the
+document in place. The pipeline's validate step walks once for
+normalization and ID conversion together; enrichment stays a separate
+checkpointed step (one walk of its own) and the CT checks run inside the
+local conformance checker.
+
+For every dict, the visitors' enter() hooks run in order before the walk
+descends, so a later visitor sees the dict as the earlier ones left it -
+the same thing it would see in a separate pass after them. enter() may:
+
+- edit the dict (values, keys, or its whole content via clear()/update())
+- return SKIP to stay out of the dict's subtree
+- return a collection of keys whose values it doesn't want to visit
+  (e.g. the normalizer builds Encounter dicts whole and has nothing to do
+  inside them, while ID conversion still has to visit them)
+
+A visitor with instance_types set is only called for dicts with one of
+those instanceTypes, but keeps walking through everything else.
+
+Usage:
+    from core.usdm_visitor import walk
+    from core.usdm_types_generated import UsdmNormalizer
+    from main_v2 import UuidConverter
+
+    walk(data, [UsdmNormalizer(), UuidConverter(id_map)])
+"""
+
+from typing import Any, Collection, Dict, FrozenSet, Iterable, List, Optional, Union
+
+# enter() result: leave this dict's subtree to the other visitors
+SKIP = object()
+
+Trail = List[Union[str, int]]
+
+
+class UsdmVisitor:
+    """A transform or check that runs inside walk()."""
+
+    # Only call enter() for dicts with one of these instanceTypes (None: every dict)
+    instance_types: Optional[FrozenSet[str]] = None
+
+    def enter(self, node: Dict[str, Any], trail: Trail) -> Any:
+        """
+        Visit a dict before its children.
+
+        Args:
+            node: The dict, edited in place
+            trail: Keys and list indices from the root to node (see format_path)
+
+        Returns:
+            None to visit all children, SKIP to visit none of them, or a
+            collection of keys not to descend into
+        """
+        return None
+
+    def finish(self, data: Any) -> None:
+        """Called once with the root after the walk."""
+
+
+def format_path(trail: Trail) -> str:
+    """Trail as '/studyDesigns[0]/objectives[2]' (the conformance report format)."""
+    return "".join(f"[{step}]" if isinstance(step, int) else f"/{step}" for step in trail)
+
+
+def walk(data: Any, visitors: Iterable[UsdmVisitor]) -> Any:
+    """
+    Run visitors over data in one depth-first pass, in place.
+
+    Returns:
+        data (the same object)
+    """
+    visitors = list(visitors)
+    if visitors:
+        _walk(data, visitors, [])
+    for visitor in visitors:
+        visitor.finish(data)
+    return data
+
+
+def _walk(obj: Any, visitors: List[UsdmVisitor], trail: Trail) -> None:
+    if isinstance(obj, dict):
+        _walk_dict(obj, visitors, trail)
+    elif isinstance(obj, list):
+        for i, item in enumerate(obj):
+            if isinstance(item, (dict, list)):
+                trail.append(i)
+                _walk(item, visitors, trail)
+                trail.pop()
+
+
+def _walk_dict(node: Dict[str, Any], visitors: List[UsdmVisitor], trail: Trail) -> None:
+    instance_type = node.get("instanceType")
+    descend = visitors
+    skipped_keys: Optional[Dict[UsdmVisitor, Collection[str]]] = None
+    for visitor in visitors:
+        types = visitor.instance_types
+        if types is not None and instance_type not in types:
+            continue
+        result = visitor.enter(node, trail)
+        if result is None:
+            continue
+        if result is SKIP:
+            if descend is visitors:
+                descend = list(visitors)
+            descend.remove(visitor)
+        elif result:
+            if skipped_keys is None:
+                skipped_keys = {}
+            skipped_keys[visitor] = result
+    if not descend:
+        return
+
+    for key, value in node.items():
+        if not isinstance(value, (dict, list)):
+            continue
+        active = descend
+        if skipped_keys:
+            active = [v for v in descend if key not in skipped_keys.get(v, ())]
+            if not active:
+                continue
+        trail.append(key)
+        _walk(value, active, trail)
+        trail.pop()
@@ -0,0 +1,842 @@
+#!/usr/bin/env python3
+"""
+Protocol2USDM Daemon - Long-running extraction service with warm workers.
+
+Every main_v2.py invocation pays for importing the LLM SDKs, PyMuPDF,
+pydantic models and pandas, for parsing the USDM dataStructure.yml schema
+and for loading the EVS cache. The daemon starts a fixed set of worker
+processes that do all of that once, then runs jobs in them back to back
+through one shared scheduler (priority queue, one job per worker, one LLM
+request limit across workers).
+
+Jobs arrive over a local HTTP API and/or a spool directory:
+
+HTTP API (binds to 127.0.0.1 by default):
+    POST   /jobs              {"pdf": path, "sap": path, "sites": path,
+                               "model": name, "args": ["--full-protocol"],
+                               "priority": "interactive" | "normal" | "backlog"}
+    GET    /jobs              All jobs
+    GET    /jobs/<id>         Job status
+    DELETE /jobs/<id>         Cancel a queued or running job
+    GET    /jobs/<id>/result  Final USDM JSON of a finished job
+    GET    /health            Worker and queue status
+
+Spool directory:
+    <spool>/incoming/*.json   Job requests (same body as POST /jobs)
+    <spool>/accepted/         Requests taken, renamed to <job id>.json
+    <spool>/rejected/         Invalid requests, with a .error note
+    <spool>/status/<id>.json  Job status, updated on every change
+
+Watch folder (see watcher.py): protocol PDFs dropped into a shared folder
+are paired with their SAP/sites files, de-duplicated by content and queued.
+
+Results are written to <output_root>/<protocol>_<timestamp>/ exactly as
+main_v2.py writes them, plus job.json with the job record.
+
+Usage:
+    python daemon.py --workers 2 --llm-concurrency 6
+    python daemon.py --spool /srv/protocols/spool --no-http
+    python daemon.py --watch /shared/protocols --watch-args="--full-protocol"
+    curl -X POST localhost:8765/jobs -d '{"pdf": "input/protocol.pdf", "args": ["--full-protocol"]}'
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import shlex
+import shutil
+import signal
+import sys
+import threading
+import time
+import uuid
+import heapq
+import itertools
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from core.constants import DEFAULT_MODEL
+from main import BatchJob, check_passthrough_args, find_companions, run_job
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(levelname)s] %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+# Final output, in order of preference
+RESULT_FILES = ("protocol_usdm.json", "9_final_soa_usdm.json", "9_final_soa.json")
+
+JOB_RECORD_NAME = "job.json"
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+# A cancelled job stops at its next pipeline step; its worker is killed if it
+# hasn't by then (e.g. a long LLM call)
+CANCEL_GRACE_SECONDS = 30
+
+# Lower runs first; interactive reviews jump ahead of backlog reprocessing
+PRIORITIES = {"interactive": 0, "normal": 50, "backlog": 100}
+DEFAULT_PRIORITY = "normal"
+
+# Modules main_v2 imports lazily, per step
+WARM_MODULES = (
+    "main_v2",
+    "extraction.procedures",
+    "extraction.scheduling",
+    "extraction.document_structure",
+    "extraction.amendments",
+    "extraction.conditional",
+    "enrichment.terminology",
+    "validation",
+    "validation.cdisc_conformance",
+    "core.usdm_types_generated",
+    # Loaded on first use, so a plain import of the pipeline no longer pulls them in
+    "extraction.soa_finder",
+    "openai",
+    "anthropic",
+    "google.generativeai",
+    "usdm_model",
+)
+
+
+@dataclass
+class DaemonJob:
+    """One extraction job and its lifecycle."""
+    id: str
+    pdf_path: str
+    model: str
+    output_dir: str
+    sap_path: Optional[str] = None
+    sites_path: Optional[str] = None
+    args: List[str] = field(default_factory=list)
+    source: str = "http"
+    priority: int = PRIORITIES[DEFAULT_PRIORITY]
+    status: str = "queued"
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    exit_code: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
+    worker: Optional[int] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def batch_job(self) -> BatchJob:
+        return BatchJob(self.pdf_path, self.sap_path, self.sites_path, self.output_dir)
+
+    def result_path(self) -> Optional[Path]:
+        for name in RESULT_FILES:
+            path = Path(self.output_dir) / name
+            if path.exists():
+                return path
+        return None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Import the pipeline and load the shared caches into this process.
+
+    Returns:
+        Seconds spent per warm-up step
+    """
+    timings: Dict[str, float] = {}
+
+    def timed(name: str, fn: Callable) -> None:
+        start = time.time()
+        try:
+            fn()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+        timings[name] = round(time.time() - start, 3)
+
+    for module in WARM_MODULES:
+        timed(module, lambda: importlib.import_module(module))
+    timed("pandas", lambda: importlib.import_module("pandas"))
+    timed("usdm_schema", lambda: importlib.import_module("core.usdm_schema_loader").get_schema_loader().load())
+    timed("evs_cache", lambda: importlib.import_module("core.evs_client").get_client())
+    return timings
+
+
+def priority_value(priority: Union[str, int, None]) -> int:
+    """
+    Resolve a priority name (see PRIORITIES) or number.
+
+    Raises:
+        ValueError: Unknown priority name
+    """
+    if priority is None:
+        return PRIORITIES[DEFAULT_PRIORITY]
+    if isinstance(priority, int) and not isinstance(priority, bool):
+        return priority
+    if isinstance(priority, str) and priority in PRIORITIES:
+        return PRIORITIES[priority]
+    raise ValueError(f"Unknown priority {priority!r}; use a number or one of {', '.join(PRIORITIES)}")
+
+
+class _TrackedSlots:
+    """
+    The shared LLM request semaphore, counting the slots this worker holds.
+
+    A worker killed during a request never releases its slot; the daemon
+    reads the count once the process is gone and gives the slots back.
+    """
+
+    def __init__(self, slots, held):
+        self._slots = slots
+        self._held = held
+        self._lock = threading.Lock()
+
+    def acquire(self, block: bool = True, timeout: Optional[float] = None) -> bool:
+        acquired = self._slots.acquire(block, timeout)
+        if acquired:
+            with self._lock:
+                self._held.value += 1
+        return acquired
+
+    def release(self) -> None:
+        with self._lock:
+            self._held.value -= 1
+        self._slots.release()
+
+
+def _worker_main(conn, worker_id: int, llm_slots, held, cancel) -> None:
+    """Worker process: warm up once, then run the jobs sent over conn."""
+    from core.checkpoint import set_cancel_event
+    from core.llm_client import set_request_limit
+    from core.page_store import clear_page_stores
+    from core.retrieval import clear_document_indexes
+
+    # Ctrl+C goes to the whole process group; let the daemon decide
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    set_request_limit(_TrackedSlots(llm_slots, held) if llm_slots is not None else None)
+    set_cancel_event(cancel)
+    conn.send(("ready", warm_up()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        job_id, job, model, args = message
+        cancel.clear()      # a cancel that arrived after the previous job finished
+        outcome = run_job(job, model, args)
+        # Page text and indexes are cached on disk; don't grow without bound
+        clear_page_stores()
+        clear_document_indexes()
+        conn.send(("done", job_id, outcome))
+
+
+class _Worker:
+    """Handle on one warm worker process."""
+
+    def __init__(self, ctx, worker_id: int, llm_slots):
+        self.id = worker_id
+        self.conn, child_conn = ctx.Pipe()
+        # LLM slots the worker holds, and the flag that cancels its job
+        self.held = ctx.RawValue('i', 0)
+        self.cancel = ctx.Event()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, worker_id, llm_slots, self.held, self.cancel),
+            name=f"p2u-worker-{worker_id}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.warmup: Dict[str, float] = {}
+        self.job_id: Optional[str] = None
+        self.jobs_run = 0
+        self.kill_at: Optional[float] = None
+
+    @property
+    def idle(self) -> bool:
+        return self.ready and self.job_id is None
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "pid": self.process.pid,
+            "ready": self.ready,
+            "job": self.job_id,
+            "jobsRun": self.jobs_run,
+            "warmupSeconds": round(sum(self.warmup.values()), 2),
+        }
+
+
+class Scheduler:
+    """
+    Shared job queue feeding a pool of warm worker processes.
+
+    Jobs run by priority (FIFO within a priority), one per worker.
+    Cancelling a running job stops it before its next pipeline step; a
+    worker still busy after CANCEL_GRACE_SECONDS is terminated, its LLM
+    request slots are given back and it is replaced by a freshly warmed one.
+    """
+
+    def __init__(self, workers: int = 1, llm_concurrency: Optional[int] = None, output_root: str = "output"):
+        # spawn: LLM SDK clients and gRPC channels don't survive fork
+        self._ctx = multiprocessing.get_context("spawn")
+        self._llm_slots = self._ctx.BoundedSemaphore(llm_concurrency) if llm_concurrency else None
+        self.output_root = output_root
+        self.llm_concurrency = llm_concurrency
+        self._size = workers
+        self._workers: List[_Worker] = []
+        self._next_worker_id = 0
+        self._jobs: Dict[str, DaemonJob] = {}
+        # (priority, submission order, job id); cancelled entries are skipped on pop
+        self._queue: List[Tuple[int, int, str]] = []
+        self._order = itertools.count()
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[DaemonJob], None]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._dispatch_loop, name="p2u-scheduler", daemon=True)
+
+    def start(self) -> "Scheduler":
+        with self._lock:
+            for _ in range(self._size):
+                self._workers.append(self._spawn_worker())
+        self._thread.start()
+        return self
+
+    def _spawn_worker(self) -> _Worker:
+        worker = _Worker(self._ctx, self._next_worker_id, self._llm_slots)
+        self._next_worker_id += 1
+        return worker
+
+    def add_listener(self, listener: Callable[[DaemonJob], None]) -> None:
+        """Call listener(job) after every job state change."""
+        self._listeners.append(listener)
+
+    def _changed(self, job: DaemonJob) -> None:
+        try:
+            os.makedirs(job.output_dir, exist_ok=True)
+            with open(os.path.join(job.output_dir, JOB_RECORD_NAME), 'w', encoding='utf-8') as f:
+                json.dump(job.to_dict(), f, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not write job record for {job.id}: {e}")
+        for listener in self._listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.warning(f"Job listener failed for {job.id}: {e}")
+
+    def _output_dir(self, pdf_path: str) -> str:
+        stem = Path(pdf_path).stem
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_root, f"{stem}_{timestamp}")
+        taken = {job.output_dir for job in self._jobs.values()}
+        suffix = 2
+        candidate = path
+        while candidate in taken or os.path.exists(candidate):
+            candidate = f"{path}_{suffix}"
+            suffix += 1
+        return os.path.abspath(candidate)
+
+    def submit(
+        self,
+        pdf_path: str,
+        model: Optional[str] = None,
+        sap_path: Optional[str] = None,
+        sites_path: Optional[str] = None,
+        args: Optional[List[str]] = None,
+        source: str = "http",
+        priority: Union[str, int, None] = None,
+    ) -> DaemonJob:
+        """
+        Queue a protocol for extraction.
+
+        SAP/sites files not given explicitly are paired by naming
+        convention (see main.find_companions).
+
+        Raises:
+            ValueError: If the PDF or a companion file doesn't exist, args
+                        set a reserved option (main.RESERVED_ARGS), or the
+                        priority is unknown
+        """
+        if not pdf_path or not os.path.isfile(pdf_path):
+            raise ValueError(f"PDF not found: {pdf_path}")
+        for path in (sap_path, sites_path):
+            if path and not os.path.isfile(path):
+                raise ValueError(f"File not found: {path}")
+        if args is not None and not (isinstance(args, list) and all(isinstance(a, str) for a in args)):
+            raise ValueError("args must be a list of strings")
+        check_passthrough_args(args or [])
+        priority = priority_value(priority)
+
+        paired = find_companions(pdf_path)
+        with self._lock:
+            job = DaemonJob(
+                id=uuid.uuid4().hex[:12],
+                pdf_path=paired.pdf_path,
+                model=model or DEFAULT_MODEL,
+                output_dir=self._output_dir(pdf_path),
+                sap_path=os.path.abspath(sap_path) if sap_path else paired.sap_path,
+                sites_path=os.path.abspath(sites_path) if sites_path else paired.sites_path,
+                args=list(args or []),
+                source=source,
+                priority=priority,
+            )
+            self._jobs[job.id] = job
+            heapq.heappush(self._queue, (priority, next(self._order), job.id))
+            self._changed(job)
+        logger.info(f"Queued job {job.id}: {Path(job.pdf_path).name} ({source})")
+        return job
+
+    def get(self, job_id: str) -> DaemonJob:
+        """Raises KeyError for unknown jobs."""
+        with self._lock:
+            return self._jobs[job_id]
+
+    def list(self) -> List[DaemonJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> DaemonJob:
+        """
+        Cancel a queued or running job (finished jobs are left as they are).
+
+        A running job is asked to stop at its next step and its worker is
+        killed if it hasn't stopped within CANCEL_GRACE_SECONDS.
+
+        Raises:
+            KeyError: Unknown job
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.finished:
+                return job
+            if job.status == "running":
+                for worker in self._workers:
+                    if worker.job_id == job_id:
+                        worker.cancel.set()
+                        worker.kill_at = time.time() + CANCEL_GRACE_SECONDS
+            job.status = "cancelled"
+            job.finished_at = datetime.now().isoformat()
+            self._changed(job)
+        logger.info(f"Cancelled job {job_id}")
+        return job
+
+    def health(self) -> Dict:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "workers": [w.to_dict() for w in self._workers],
+                "queued": counts.get("queued", 0),
+                "jobs": counts,
+                "llmConcurrency": self.llm_concurrency,
+            }
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> DaemonJob:
+        """Block until a job finishes (or timeout) and return it."""
+        deadline = time.time() + timeout if timeout is not None else None
+        while not self.get(job_id).finished:
+            if deadline is not None and time.time() >= deadline:
+                break
+            time.sleep(0.1)
+        return self.get(job_id)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop dispatching and stop the workers (running jobs are terminated)."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        with self._lock:
+            for worker in self._workers:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+            for worker in self._workers:
+                worker.process.join(timeout if worker.job_id is None else 0)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join()
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop.is_set():
+            self._assign_jobs()
+            with self._lock:
+                handles = {}
+                for worker in self._workers:
+                    handles[worker.conn] = worker
+                    handles[worker.process.sentinel] = worker
+            for ready in wait(list(handles), timeout=0.5):
+                worker = handles[ready]
+                if ready is worker.conn:
+                    self._receive(worker)
+                elif not worker.process.is_alive():
+                    self._replace(worker)
+            self._kill_overdue()
+
+    def _kill_overdue(self) -> None:
+        """Terminate workers still running a job cancelled more than CANCEL_GRACE_SECONDS ago."""
+        with self._lock:
+            for worker in self._workers:
+                if worker.kill_at is not None and time.time() >= worker.kill_at and worker.process.is_alive():
+                    logger.info(f"Worker {worker.id} didn't stop its cancelled job; terminating it")
+                    worker.kill_at = None
+                    worker.process.terminate()
+
+    def _assign_jobs(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                if not worker.idle:
+                    continue
+                job = self._next_job()
+                if job is None:
+                    return
+                job.status = "running"
+                job.started_at = datetime.now().isoformat()
+                job.worker = worker.id
+                worker.job_id = job.id
+                worker.conn.send((job.id, job.batch_job(), job.model, job.args))
+                self._changed(job)
+                logger.info(f"Job {job.id} started on worker {worker.id}")
+
+    def _next_job(self) -> Optional[DaemonJob]:
+        while self._queue:
+            _, _, job_id = heapq.heappop(self._queue)
+            job = self._jobs[job_id]
+            if job.status == "queued":
+                return job
+        return None
+
+    def _receive(self, worker: _Worker) -> None:
+        try:
+            message = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker)
+            return
+        with self._lock:
+            if message[0] == "ready":
+                worker.ready = True
+                worker.warmup = message[1]
+                logger.info(f"Worker {worker.id} warm in {sum(worker.warmup.values()):.1f}s")
+            elif message[0] == "done":
+                _, job_id, outcome = message
+                worker.job_id = None
+                worker.kill_at = None
+                worker.jobs_run += 1
+                job = self._jobs[job_id]
+                if job.status != "running":
+                    return
+                job.exit_code = outcome.get("exitCode")
+                job.duration_seconds = outcome.get("durationSeconds")
+                job.error = outcome.get("error")
+                job.finished_at = outcome.get("finishedAt") or datetime.now().isoformat()
+                job.status = "done" if job.exit_code == 0 else "failed"
+                self._changed(job)
+                logger.info(f"Job {job.id} {job.status} in {job.duration_seconds}s")
+
+    def _replace(self, worker: _Worker) -> None:
+        """Swap a dead worker for a fresh one, failing the job it was running."""
+        with self._lock:
+            if worker not in self._workers:
+                return
+            worker.process.join(1)
+            if worker.process.is_alive():       # pipe broke; it can't take jobs anyway
+                worker.process.terminate()
+                worker.process.join()
+            if self._llm_slots is not None and worker.held.value > 0:
+                # Slots the dead worker held are never released otherwise
+                logger.info(f"Releasing {worker.held.value} LLM request slot(s) held by worker {worker.id}")
+                for _ in range(worker.held.value):
+                    self._llm_slots.release()
+                worker.held.value = 0
+            job = self._jobs.get(worker.job_id) if worker.job_id else None
+            if job and job.status == "running":
+                job.status = "failed"
+                job.exit_code = worker.process.exitcode
+                job.error = f"Worker exited with code {worker.process.exitcode}"
+                job.finished_at = datetime.now().isoformat()
+                self._changed(job)
+            worker.conn.close()
+            index = self._workers.index(worker)
+            if not self._stop.is_set():
+                self._workers[index] = self._spawn_worker()
+                logger.info(f"Worker {worker.id} replaced by worker {self._workers[index].id}")
+
+
+class SpoolWatcher:
+    """Feed job requests dropped into <spool>/incoming/ to the scheduler."""
+
+    def __init__(self, scheduler: Scheduler, spool_dir: str, interval: float = 1.0):
+        self.scheduler = scheduler
+        self.root = Path(spool_dir)
+        self.interval = interval
+        self.dirs = {name: self.root / name for name in ("incoming", "accepted", "rejected", "status")}
+        for path in self.dirs.values():
+            path.mkdir(parents=True, exist_ok=True)
+        scheduler.add_listener(self._write_status)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="p2u-spool", daemon=True)
+
+    def start(self) -> "SpoolWatcher":
+        self._thread.start()
+        logger.info(f"Watching spool directory {self.dirs['incoming']}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _write_status(self, job: DaemonJob) -> None:
+        if job.source != "spool":
+            return
+        path = self.dirs["status"] / f"{job.id}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job.to_dict(), indent=2), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def scan(self) -> List[DaemonJob]:
+        """Submit every request waiting in incoming/."""
+        jobs = []
+        for request_path in sorted(self.dirs["incoming"].glob("*.json")):
+            try:
+                request = json.loads(request_path.read_text(encoding='utf-8'))
+                base = request_path.parent
+
+                def resolve(p):
+                    if not p:
+                        return None
+                    return p if os.path.isabs(p) else str((base / p).resolve())
+
+                job = self.scheduler.submit(
+                    resolve(request.get("pdf")),
+                    model=request.get("model"),
+                    sap_path=resolve(request.get("sap")),
+                    sites_path=resolve(request.get("sites")),
+                    args=request.get("args"),
+                    source="spool",
+                    priority=request.get("priority"),
+                )
+            except (ValueError, json.JSONDecodeError, AttributeError) as e:
+                logger.warning(f"Rejected spool request {request_path.name}: {e}")
+                shutil.move(str(request_path), self.dirs["rejected"] / request_path.name)
+                (self.dirs["rejected"] / f"{request_path.name}.error").write_text(str(e), encoding='utf-8')
+                continue
+            shutil.move(str(request_path), self.dirs["accepted"] / f"{job.id}.json")
+            jobs.append(job)
+        return jobs
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan()
+            except OSError as e:
+                logger.warning(f"Spool scan failed: {e}")
+
+
+class _APIHandler(BaseHTTPRequestHandler):
+    """JSON API over the scheduler (set as a class attribute by make_server)."""
+
+    scheduler: Scheduler = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: HTTPStatus, body) -> None:
+        payload = json.dumps(body, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: HTTPStatus, message: str) -> None:
+        self._send(status, {"error": message})
+
+    def _route(self):
+        """(job id, sub-resource, path parts) for /jobs/<id>[/<sub>] paths."""
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+        if not parts or parts[0] != "jobs":
+            return None, None, parts
+        return (parts[1] if len(parts) > 1 else None), (parts[2] if len(parts) > 2 else None), parts
+
+    def do_GET(self):
+        job_id, sub, parts = self._route()
+        if parts == ["health"]:
+            return self._send(HTTPStatus.OK, self.scheduler.health())
+        if parts == ["jobs"]:
+            return self._send(HTTPStatus.OK, [j.to_dict() for j in self.scheduler.list()])
+        if not job_id or sub not in (None, "result"):
+            return self._error(HTTPStatus.NOT_FOUND, f"No route for {self.path}")
+        try:
+            job = self.scheduler.get(job_id)
+        except KeyError:
+            return self._error(HTTPStatus.NOT_FOUND, f"Unknown job {job_id}")
+        if sub is None:
+            return self._send(HTTPStatus.OK, job.to_dict())
+
+        result = job.result_path() if job.status == "done" else None
+        if result is None:
+            return self._error(HTTPStatus.CONFLICT, f"Job {job_id} is {job.status}; no result available")
+        with open(result, 'r', encoding='utf-8') as f:
+            self._send(HTTPStatus.OK, json.load(f))
+
+    def do_POST(self):
+        _, _, parts = self._route()
+        if parts != ["jobs"]:
+            return self._error(HTTPStatus.NOT_FOUND, f"No route for {self.path}")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = self.scheduler.submit(
+                request.get("pdf"),
+                model=request.get("model"),
+                sap_path=request.get("sap"),
+                sites_path=request.get("sites"),
+                args=request.get("args"),
+                priority=request.get("priority"),
+            )
+        except (ValueError, AttributeError) as e:
+            return self._error(HTTPStatus.BAD_REQUEST, str(e))
+        self._send(HTTPStatus.ACCEPTED, job.to_dict())
+
+    def do_DELETE(self):
+        job_id, sub, _ = self._route()
+        if not job_id or sub is not None:
+            return self._error(HTTPStatus.NOT_FOUND, f"No route for {self.path}")
+        try:
+            self._send(HTTPStatus.OK, self.scheduler.cancel(job_id).to_dict())
+        except KeyError:
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown job {job_id}")
+
+
+def make_server(scheduler: Scheduler, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """HTTP server for the job API (call serve_forever() to run it)."""
+    handler = type("APIHandler", (_APIHandler,), {"scheduler": scheduler})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run Protocol2USDM as a daemon with warm workers and a local job API"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="Warm worker processes, i.e. jobs run in parallel (default: 1)"
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        help="Maximum LLM requests in flight across all workers (default: no limit)"
+    )
+    parser.add_argument(
+        "--output-root", "-o",
+        default="output",
+        help="Directory for job outputs (default: output)"
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="HTTP API bind address (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"HTTP API port (default: {DEFAULT_PORT})"
+    )
+    parser.add_argument(
+        "--no-http",
+        action="store_true",
+        help="Don't start the HTTP API (use with --spool or --watch)"
+    )
+    parser.add_argument(
+        "--spool",
+        metavar="DIR",
+        help="Accept job requests dropped into DIR/incoming/"
+    )
+    parser.add_argument(
+        "--watch",
+        metavar="DIR",
+        help="Queue protocol PDFs (with SAP/sites companions) dropped into DIR"
+    )
+    parser.add_argument(
+        "--watch-priority",
+        default=DEFAULT_PRIORITY,
+        choices=list(PRIORITIES),
+        help="Priority of watched files outside an interactive/ or backlog/ subfolder"
+    )
+    parser.add_argument(
+        "--watch-args",
+        default="",
+        help='main_v2.py arguments for watched protocols, e.g. --watch-args="--full-protocol"'
+    )
+    parser.add_argument(
+        "--watch-poll",
+        action="store_true",
+        help="Poll the watch folder instead of using inotify"
+    )
+    args = parser.parse_args(argv)
+
+    if args.no_http and not (args.spool or args.watch):
+        parser.error("--no-http needs --spool or --watch, or the daemon has no way to receive jobs")
+
+    scheduler = Scheduler(args.workers, args.llm_concurrency, args.output_root).start()
+    spool = SpoolWatcher(scheduler, args.spool).start() if args.spool else None
+    watcher = None
+    if args.watch:
+        from watcher import FolderWatcher
+        watcher = FolderWatcher(
+            scheduler,
+            args.watch,
+            priority=args.watch_priority,
+            args=shlex.split(args.watch_args),
+            use_inotify=not args.watch_poll,
+        ).start()
+    server = None if args.no_http else make_server(scheduler, args.host, args.port)
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("Shutting down...")
+        stop.set()
+        if server:
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    logger.info(f"Daemon started: {args.workers} worker(s), output in {args.output_root}")
+    if server:
+        logger.info(f"Job API on http://{args.host}:{server.server_address[1]}/jobs")
+        server.serve_forever()
+        server.server_close()
+    else:
+        stop.wait()
+
+    for source in (spool, watcher):
+        if source:
+            source.stop()
+    scheduler.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,6 @@ USDM Enrichment Package
 Provides terminology enrichment using NCI and CDISC terminology services.
 """
 
-from .terminology import enrich_terminology
+from .terminology import TerminologyEnricher, enrich_terminology
 
-__all__ = ['enrich_terminology']
+__all__ = ['enrich_terminology', 'TerminologyEnricher']
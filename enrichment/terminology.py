@@ -9,12 +9,13 @@ Uses the EVS client with local caching for offline operation.
 Based on the approach from https://github.com/Panikos/AIBC
 """
 
-import json
 import logging
 import os
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
+from core.artifacts import load_artifact, put_artifact
+from core.usdm_visitor import Trail, UsdmVisitor, walk
 from core.evs_client import (
     EVSClient, 
     get_client, 
@@ -82,6 +83,119 @@ def _find_mapping(text: str, mappings: Dict[str, str]) -> Optional[str]:
     return None
 
 
+class TerminologyEnricher(UsdmVisitor):
+    """
+    Replaces free-text phases, blinding schemas, objective/endpoint levels,
+    eligibility categories and arm types with NCI Code objects.
+
+    Runs inside core.usdm_visitor.walk(), alone or alongside other visitors.
+    """
+
+    def __init__(self, client: Optional[EVSClient] = None):
+        self.client = client or get_client()
+        self.enriched_count = 0
+        self.total_entities = 0
+        self.by_type: Dict[str, int] = {}
+        self.enriched_items: List[Dict[str, str]] = []  # Track individual enriched items
+
+    def _record(self, entity_type: str, item: Dict[str, str]) -> None:
+        self.enriched_count += 1
+        self.by_type[entity_type] = self.by_type.get(entity_type, 0) + 1
+        self.enriched_items.append({'type': entity_type, **item})
+
+    def _code_for(self, text: str, mappings: Dict[str, str]) -> Optional[tuple]:
+        nci_code = _find_mapping(text, mappings)
+        if nci_code:
+            code_obj = _get_code_object(nci_code, self.client)
+            if code_obj:
+                # Own copy: the client hands out its cached dict, and later
+                # visitors in the same pass may edit what we insert
+                return nci_code, dict(code_obj)
+        return None
+
+    @staticmethod
+    def _coded_text(value: Any) -> str:
+        if isinstance(value, dict):
+            return value.get('decode') or value.get('code', '')
+        if isinstance(value, str):
+            return value
+        return ''
+
+    def enter(self, obj: Dict[str, Any], trail: Trail) -> None:
+        instance_type = obj.get('instanceType')
+        if instance_type:
+            self.total_entities += 1
+        
+        # Enrich study phase
+        if 'studyPhase' in obj or instance_type == 'StudyPhase':
+            phase_obj = obj.get('studyPhase', obj) if 'studyPhase' in obj else obj
+            if isinstance(phase_obj, dict):
+                phase_text = (
+                    phase_obj.get('phase') or 
+                    phase_obj.get('standardCode', {}).get('decode') or
+                    phase_obj.get('decode', '')
+                )
+                found = self._code_for(phase_text, STUDY_PHASE_MAPPINGS)
+                if found:
+                    phase_obj['standardCode'] = found[1]
+                    self._record('StudyPhase', {'name': phase_text, 'nci_code': found[0]})
+        
+        # Enrich blinding schema
+        if 'blindingSchema' in obj:
+            blinding_text = self._coded_text(obj['blindingSchema'])
+            found = self._code_for(blinding_text, BLINDING_MAPPINGS)
+            if found:
+                obj['blindingSchema'] = found[1]
+                self._record('BlindingSchema', {'name': blinding_text, 'nci_code': found[0]})
+        
+        # Enrich objective level
+        if instance_type == 'Objective' and 'level' in obj:
+            level_text = self._coded_text(obj['level'])
+            found = self._code_for(level_text, OBJECTIVE_LEVEL_MAPPINGS)
+            if found:
+                obj['level'] = found[1]
+                obj_name = obj.get('name', obj.get('text', 'Unnamed'))[:50]
+                self._record('Objective', {'name': obj_name, 'level': level_text, 'nci_code': found[0]})
+        
+        # Enrich endpoint level
+        if instance_type == 'Endpoint' and 'level' in obj:
+            level_text = self._coded_text(obj['level'])
+            found = self._code_for(level_text, ENDPOINT_LEVEL_MAPPINGS)
+            if found:
+                obj['level'] = found[1]
+                ep_name = obj.get('name', obj.get('text', 'Unnamed'))[:50]
+                self._record('Endpoint', {'name': ep_name, 'level': level_text, 'nci_code': found[0]})
+        
+        # Enrich eligibility category
+        if instance_type == 'EligibilityCriterion' and 'category' in obj:
+            cat_text = self._coded_text(obj['category'])
+            found = self._code_for(cat_text, ELIGIBILITY_MAPPINGS)
+            if found:
+                obj['category'] = found[1]
+                crit_name = obj.get('name', obj.get('identifier', 'Unnamed'))[:40]
+                self._record('EligibilityCriterion', {'name': crit_name, 'category': cat_text, 'nci_code': found[0]})
+        
+        # Enrich study arm type
+        if instance_type == 'StudyArm' and 'type' in obj:
+            type_text = self._coded_text(obj['type'])
+            found = self._code_for(type_text, ARM_TYPE_MAPPINGS)
+            if found:
+                obj['type'] = found[1]
+                arm_name = obj.get('name', 'Unnamed Arm')
+                self._record('StudyArm', {'name': arm_name, 'arm_type': type_text, 'nci_code': found[0]})
+
+    def result(self) -> Dict[str, Any]:
+        """Counts in the shape of the enrichment report."""
+        return {
+            'success': True,
+            'enriched': self.enriched_count,
+            'total_entities': self.total_entities,
+            'by_type': self.by_type,
+            'enriched_items': self.enriched_items,
+            'cache_stats': self.client.get_cache_stats(),
+        }
+
+
 def enrich_terminology(json_path: str, output_dir: str = None) -> Dict[str, Any]:
     """
     Enrich USDM entities with standardized NCI terminology codes.
@@ -100,169 +214,24 @@ def enrich_terminology(json_path: str, output_dir: str = None) -> Dict[str, Any]
         client = get_client()
         ensure_usdm_codes_cached(client)
         
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        enriched_count = 0
-        total_entities = 0
-        by_type: Dict[str, int] = {}
-        enriched_items: List[Dict[str, str]] = []  # Track individual enriched items
+        # Edits the artifact in place; an open store hands back the object itself
+        data = load_artifact(json_path)
         
-        def enrich_entity(obj: Dict, path: str = "") -> None:
-            nonlocal enriched_count, total_entities
-            
-            if not isinstance(obj, dict):
-                return
-            
-            instance_type = obj.get('instanceType')
-            if instance_type:
-                total_entities += 1
-            
-            # Enrich study phase
-            if 'studyPhase' in obj or instance_type == 'StudyPhase':
-                phase_obj = obj.get('studyPhase', obj) if 'studyPhase' in obj else obj
-                if isinstance(phase_obj, dict):
-                    phase_text = (
-                        phase_obj.get('phase') or 
-                        phase_obj.get('standardCode', {}).get('decode') or
-                        phase_obj.get('decode', '')
-                    )
-                    nci_code = _find_mapping(phase_text, STUDY_PHASE_MAPPINGS)
-                    if nci_code:
-                        code_obj = _get_code_object(nci_code, client)
-                        if code_obj:
-                            phase_obj['standardCode'] = code_obj
-                            enriched_count += 1
-                            by_type['StudyPhase'] = by_type.get('StudyPhase', 0) + 1
-                            enriched_items.append({'type': 'StudyPhase', 'name': phase_text, 'nci_code': nci_code})
-            
-            # Enrich blinding schema
-            if 'blindingSchema' in obj:
-                blinding = obj['blindingSchema']
-                blinding_text = ''
-                if isinstance(blinding, dict):
-                    blinding_text = blinding.get('decode') or blinding.get('code', '')
-                elif isinstance(blinding, str):
-                    blinding_text = blinding
-                
-                nci_code = _find_mapping(blinding_text, BLINDING_MAPPINGS)
-                if nci_code:
-                    code_obj = _get_code_object(nci_code, client)
-                    if code_obj:
-                        obj['blindingSchema'] = code_obj
-                        enriched_count += 1
-                        by_type['BlindingSchema'] = by_type.get('BlindingSchema', 0) + 1
-                        enriched_items.append({'type': 'BlindingSchema', 'name': blinding_text, 'nci_code': nci_code})
-            
-            # Enrich objective level
-            if instance_type == 'Objective' and 'level' in obj:
-                level = obj['level']
-                level_text = ''
-                if isinstance(level, dict):
-                    level_text = level.get('decode') or level.get('code', '')
-                elif isinstance(level, str):
-                    level_text = level
-                
-                nci_code = _find_mapping(level_text, OBJECTIVE_LEVEL_MAPPINGS)
-                if nci_code:
-                    code_obj = _get_code_object(nci_code, client)
-                    if code_obj:
-                        obj['level'] = code_obj
-                        enriched_count += 1
-                        by_type['Objective'] = by_type.get('Objective', 0) + 1
-                        obj_name = obj.get('name', obj.get('text', 'Unnamed'))[:50]
-                        enriched_items.append({'type': 'Objective', 'name': obj_name, 'level': level_text, 'nci_code': nci_code})
-            
-            # Enrich endpoint level
-            if instance_type == 'Endpoint' and 'level' in obj:
-                level = obj['level']
-                level_text = ''
-                if isinstance(level, dict):
-                    level_text = level.get('decode') or level.get('code', '')
-                elif isinstance(level, str):
-                    level_text = level
-                
-                nci_code = _find_mapping(level_text, ENDPOINT_LEVEL_MAPPINGS)
-                if nci_code:
-                    code_obj = _get_code_object(nci_code, client)
-                    if code_obj:
-                        obj['level'] = code_obj
-                        enriched_count += 1
-                        by_type['Endpoint'] = by_type.get('Endpoint', 0) + 1
-                        ep_name = obj.get('name', obj.get('text', 'Unnamed'))[:50]
-                        enriched_items.append({'type': 'Endpoint', 'name': ep_name, 'level': level_text, 'nci_code': nci_code})
-            
-            # Enrich eligibility category
-            if instance_type == 'EligibilityCriterion' and 'category' in obj:
-                category = obj['category']
-                cat_text = ''
-                if isinstance(category, dict):
-                    cat_text = category.get('decode') or category.get('code', '')
-                elif isinstance(category, str):
-                    cat_text = category
-                
-                nci_code = _find_mapping(cat_text, ELIGIBILITY_MAPPINGS)
-                if nci_code:
-                    code_obj = _get_code_object(nci_code, client)
-                    if code_obj:
-                        obj['category'] = code_obj
-                        enriched_count += 1
-                        by_type['EligibilityCriterion'] = by_type.get('EligibilityCriterion', 0) + 1
-                        crit_name = obj.get('name', obj.get('identifier', 'Unnamed'))[:40]
-                        enriched_items.append({'type': 'EligibilityCriterion', 'name': crit_name, 'category': cat_text, 'nci_code': nci_code})
-            
-            # Enrich study arm type
-            if instance_type == 'StudyArm' and 'type' in obj:
-                arm_type = obj['type']
-                type_text = ''
-                if isinstance(arm_type, dict):
-                    type_text = arm_type.get('decode') or arm_type.get('code', '')
-                elif isinstance(arm_type, str):
-                    type_text = arm_type
-                
-                nci_code = _find_mapping(type_text, ARM_TYPE_MAPPINGS)
-                if nci_code:
-                    code_obj = _get_code_object(nci_code, client)
-                    if code_obj:
-                        obj['type'] = code_obj
-                        enriched_count += 1
-                        by_type['StudyArm'] = by_type.get('StudyArm', 0) + 1
-                        arm_name = obj.get('name', 'Unnamed Arm')
-                        enriched_items.append({'type': 'StudyArm', 'name': arm_name, 'arm_type': type_text, 'nci_code': nci_code})
-            
-            # Recurse into nested objects
-            for key, value in obj.items():
-                if isinstance(value, dict):
-                    enrich_entity(value, f"{path}/{key}")
-                elif isinstance(value, list):
-                    for i, item in enumerate(value):
-                        if isinstance(item, dict):
-                            enrich_entity(item, f"{path}/{key}[{i}]")
-        
-        # Run enrichment
-        enrich_entity(data)
+        enricher = TerminologyEnricher(client)
+        walk(data, [enricher])
         
         # Save enriched data
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        put_artifact(json_path, data)
         
-        logger.info(f"Enriched {enriched_count} entities with NCI terminology codes")
+        logger.info(f"Enriched {enricher.enriched_count} entities with NCI terminology codes")
         
         # Build result
-        result = {
-            'success': True,
-            'enriched': enriched_count,
-            'total_entities': total_entities,
-            'by_type': by_type,
-            'enriched_items': enriched_items,
-            'cache_stats': client.get_cache_stats(),
-        }
+        result = enricher.result()
         
         # Save enrichment report if output_dir provided
         if output_dir:
             report_path = Path(output_dir) / "terminology_enrichment.json"
-            with open(report_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2)
+            put_artifact(str(report_path), result)
             logger.info(f"Enrichment report saved to: {report_path}")
         
         return result
@@ -21,101 +21,73 @@ Design Principle:
 - Vision validates Text (confirms ticks, flags hallucinations)
 """
 
-from .soa_finder import (
-    find_soa_pages,
-    find_soa_pages_heuristic,
-    extract_soa_text,
-    extract_soa_images,
-)
-from .header_analyzer import (
-    analyze_soa_headers, 
-    HeaderAnalysisResult,
-    load_header_structure,
-    save_header_structure,
-)
-from .text_extractor import (
-    extract_soa_from_text,
-    TextExtractionResult,
-    build_usdm_output,
-)
-from .validator import (
-    validate_extraction,
-    ValidationResult,
-    ValidationIssue,
-    IssueType,
-)
-from .pipeline import (
-    run_extraction_pipeline,
-    run_from_files,
-    PipelineConfig,
-    PipelineResult,
-)
-from .metadata import (
-    extract_study_metadata,
-    MetadataExtractionResult,
-    StudyMetadata,
-    StudyTitle,
-    StudyIdentifier,
-    Organization,
-    StudyRole,
-    Indication,
-)
-from .eligibility import (
-    extract_eligibility_criteria,
-    EligibilityExtractionResult,
-    EligibilityCriterion,
-    EligibilityCriterionItem,
-    StudyDesignPopulation,
-    CriterionCategory,
-)
-from .objectives import (
-    extract_objectives_endpoints,
-    ObjectivesExtractionResult,
-    Objective,
-    Endpoint,
-    Estimand,
-    IntercurrentEvent,
-    ObjectivesData,
-    ObjectiveLevel,
-    EndpointLevel,
-)
-from .studydesign import (
-    extract_study_design,
-    StudyDesignExtractionResult,
-    StudyDesignData,
-    InterventionalStudyDesign,
-    StudyArm,
-    StudyCell,
-    StudyCohort,
-    ArmType,
-    BlindingSchema,
-)
-from .interventions import (
-    extract_interventions,
-    InterventionsExtractionResult,
-    InterventionsData,
-    StudyIntervention,
-    AdministrableProduct,
-    Administration,
-    MedicalDevice,
-    Substance,
-)
-from .narrative import (
-    extract_narrative_structure,
-    NarrativeExtractionResult,
-    NarrativeData,
-    NarrativeContent,
-    Abbreviation,
-    StudyDefinitionDocument,
-)
-from .advanced import (
-    extract_advanced_entities,
-    AdvancedExtractionResult,
-    AdvancedData,
-    StudyAmendment,
-    GeographicScope,
-    Country,
-)
+import importlib
+
+# Submodules are imported on first access to one of their names (module
+# __getattr__), so importing one phase - or main_v2.py --help - doesn't
+# load every extractor and PyMuPDF.
+_EXPORTS = {
+    "soa_finder": (
+        "find_soa_pages", "find_soa_pages_heuristic", "extract_soa_text", "extract_soa_images",
+    ),
+    "header_analyzer": (
+        "analyze_soa_headers", "HeaderAnalysisResult", "load_header_structure",
+        "save_header_structure",
+    ),
+    "text_extractor": (
+        "extract_soa_from_text", "TextExtractionResult", "build_usdm_output",
+    ),
+    "validator": (
+        "validate_extraction", "ValidationResult", "ValidationIssue", "IssueType",
+    ),
+    "pipeline": (
+        "run_extraction_pipeline", "run_from_files", "PipelineConfig", "PipelineResult",
+    ),
+    "metadata": (
+        "extract_study_metadata", "MetadataExtractionResult", "StudyMetadata", "StudyTitle",
+        "StudyIdentifier", "Organization", "StudyRole", "Indication",
+    ),
+    "eligibility": (
+        "extract_eligibility_criteria", "EligibilityExtractionResult", "EligibilityCriterion",
+        "EligibilityCriterionItem", "StudyDesignPopulation", "CriterionCategory",
+    ),
+    "objectives": (
+        "extract_objectives_endpoints", "ObjectivesExtractionResult", "Objective", "Endpoint",
+        "Estimand", "IntercurrentEvent", "ObjectivesData", "ObjectiveLevel", "EndpointLevel",
+    ),
+    "studydesign": (
+        "extract_study_design", "StudyDesignExtractionResult", "StudyDesignData",
+        "InterventionalStudyDesign", "StudyArm", "StudyCell", "StudyCohort", "ArmType",
+        "BlindingSchema",
+    ),
+    "interventions": (
+        "extract_interventions", "InterventionsExtractionResult", "InterventionsData",
+        "StudyIntervention", "AdministrableProduct", "Administration", "MedicalDevice", "Substance",
+    ),
+    "narrative": (
+        "extract_narrative_structure", "NarrativeExtractionResult", "NarrativeData",
+        "NarrativeContent", "Abbreviation", "StudyDefinitionDocument",
+    ),
+    "advanced": (
+        "extract_advanced_entities", "AdvancedExtractionResult", "AdvancedData", "StudyAmendment",
+        "GeographicScope", "Country",
+    ),
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULE_OF))
+
 
 __all__ = [
     # SoA Finder
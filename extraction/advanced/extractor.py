@@ -13,6 +13,9 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.serialization import save_json
 from .schema import (
     AdvancedData,
     StudyAmendment,
@@ -38,6 +41,7 @@ class AdvancedExtractionResult:
     model_used: Optional[str] = None
 
 
+@memoize_page_finder("advanced")
 def find_advanced_pages(
     pdf_path: str,
     max_pages: int = 100,  # Increased to search more of the document
@@ -48,8 +52,6 @@ def find_advanced_pages(
     Amendment history is often near the END of protocols, so we search
     the entire document, not just the first 30 pages.
     """
-    import fitz
-    
     # Keywords to find amendment-related pages
     amendment_keywords = [
         r'amendment\s+history',
@@ -76,16 +78,15 @@ def find_advanced_pages(
     amendment_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
+        store = get_page_store(pdf_path)
+        total_pages = store.page_count
         
         # Always include first few pages (title, current amendment summary often there)
         found_pages = [0, 1, 2, 3]
         
         # Search ENTIRE document for amendment history (often at end)
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             # Priority: amendment history pages
             if amendment_pattern.search(text):
@@ -98,7 +99,6 @@ def find_advanced_pages(
         # Add all amendment history pages (these contain the detailed summaries)
         found_pages.extend(amendment_pages)
         
-        doc.close()
         found_pages = sorted(set(found_pages))
         
         logger.info(f"Found {len(found_pages)} advanced entity pages "
@@ -132,7 +132,7 @@ def extract_advanced_entities(
         # Extract text from pages
         if protocol_text is None:
             logger.info(f"Extracting text from pages {pages}...")
-            protocol_text = extract_text_from_pages(pdf_path, pages)
+            protocol_text = extract_text_from_pages(pdf_path, pages, phase="advanced", model_name=model_name)
         
         if not protocol_text:
             result.error = "Failed to extract text from PDF"
@@ -331,7 +331,6 @@ def save_advanced_result(
     if result.raw_response:
         output["rawResponse"] = result.raw_response
         
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, output)
         
     logger.info(f"Saved advanced entities to {output_path}")
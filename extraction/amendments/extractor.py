@@ -12,6 +12,9 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.serialization import save_json
 from .schema import (
     AmendmentDetailsData,
     AmendmentDetailsResult,
@@ -27,6 +30,7 @@ from .prompts import get_amendments_prompt, get_system_prompt
 logger = logging.getLogger(__name__)
 
 
+@memoize_page_finder("amendments")
 def find_amendment_pages(
     pdf_path: str,
     max_pages_to_scan: int = 60,
@@ -34,8 +38,6 @@ def find_amendment_pages(
     """
     Find pages containing amendment information.
     """
-    import fitz
-    
     amendment_keywords = [
         r'amendment',
         r'revision',
@@ -54,22 +56,19 @@ def find_amendment_pages(
     amendment_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         # Include first few pages (often have amendment summary)
         amendment_pages = [0, 1, 2]
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             matches = len(pattern.findall(text))
             if matches >= 2 and page_num not in amendment_pages:
                 amendment_pages.append(page_num)
         
-        doc.close()
-        
         amendment_pages = sorted(set(amendment_pages))
         if len(amendment_pages) > 15:
             amendment_pages = amendment_pages[:15]
@@ -129,7 +128,7 @@ def extract_amendment_details(
     
     pages = find_amendment_pages(pdf_path)
     
-    text = extract_text_from_pages(pdf_path, pages)
+    text = extract_text_from_pages(pdf_path, pages, phase="amendments", model_name=model)
     if not text:
         return AmendmentDetailsResult(
             success=False,
@@ -216,8 +215,7 @@ def extract_amendment_details(
         
         if output_dir:
             output_path = Path(output_dir) / "14_amendment_details.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+            save_json(output_path, result.to_dict())
             logger.info(f"Saved amendment details to {output_path}")
         
         logger.info(f"Extracted {len(impacts)} impacts, {len(reasons)} reasons, {len(changes)} changes")
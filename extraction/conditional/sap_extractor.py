@@ -16,9 +16,18 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.retrieval import retrieve_context
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query for selecting SAP context
+CONTEXT_QUERY = (
+    "analysis population analysis set full analysis set intent to treat per protocol "
+    "safety population pharmacokinetic pharmacodynamic baseline characteristics demographics"
+)
+
 
 @dataclass
 class AnalysisPopulation:
@@ -183,18 +192,31 @@ def extract_from_sap(
             source_file=sap_path,
         )
     
-    # Extract text from SAP
+    # Select the best-matching SAP chunks within the phase token budget
     try:
-        pages = list(range(min(40, get_page_count(sap_path))))
-        text = extract_text_from_pages(sap_path, pages)
+        text, pages = retrieve_context(
+            sap_path, CONTEXT_QUERY, PHASE_TOKEN_BUDGETS["sap"], phase="sap", model_name=model,
+        )
+        if not text:
+            pages = list(range(min(40, get_page_count(sap_path))))
+            text = extract_text_from_pages(
+                sap_path, pages, phase="sap", model_name=model,
+                token_budget=PHASE_TOKEN_BUDGETS["sap"],
+            ) or ""
     except Exception as e:
         return SAPExtractionResult(
             success=False,
             error=f"Failed to read SAP: {e}",
             source_file=sap_path,
         )
+    if not text:
+        return SAPExtractionResult(
+            success=False,
+            error="No text extracted from SAP",
+            source_file=sap_path,
+        )
     
-    prompt = SAP_EXTRACTION_PROMPT.format(sap_text=text[:30000])
+    prompt = SAP_EXTRACTION_PROMPT.format(sap_text=text)
     
     try:
         # Combine system prompt with user prompt
@@ -245,8 +267,7 @@ def extract_from_sap(
         
         if output_dir:
             output_path = Path(output_dir) / "11_sap_populations.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+            save_json(output_path, result.to_dict())
         
         logger.info(f"Extracted {len(populations)} populations, {len(characteristics)} characteristics from SAP")
         return result
@@ -8,12 +8,13 @@ Extracts USDM entities from site list documents (CSV/Excel):
 - PersonName
 """
 
-import json
 import logging
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 
+from core.serialization import save_json
+
 logger = logging.getLogger(__name__)
 
 
@@ -252,8 +253,7 @@ def extract_from_sites(
         
         if output_dir:
             output_path = Path(output_dir) / "12_study_sites.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+            save_json(output_path, result.to_dict())
         
         logger.info(f"Extracted {len(sites)} sites, {len(roles)} roles from sites list")
         return result
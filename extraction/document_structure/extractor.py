@@ -13,6 +13,9 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.serialization import save_json
 from .schema import (
     DocumentStructureData,
     DocumentStructureResult,
@@ -26,6 +29,7 @@ from .prompts import get_document_structure_prompt, get_system_prompt
 logger = logging.getLogger(__name__)
 
 
+@memoize_page_finder("document_structure")
 def find_document_structure_pages(
     pdf_path: str,
     max_pages_to_scan: int = 60,
@@ -33,8 +37,6 @@ def find_document_structure_pages(
     """
     Find pages containing document structure information.
     """
-    import fitz
-    
     structure_keywords = [
         r'table\s+of\s+contents',
         r'list\s+of\s+tables',
@@ -55,22 +57,19 @@ def find_document_structure_pages(
     structure_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         # Always include first few pages (cover, TOC)
         structure_pages = [0, 1, 2, 3, 4]
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             matches = len(pattern.findall(text))
             if matches >= 2 and page_num not in structure_pages:
                 structure_pages.append(page_num)
         
-        doc.close()
-        
         structure_pages = sorted(set(structure_pages))
         if len(structure_pages) > 20:
             structure_pages = structure_pages[:20]
@@ -108,7 +107,7 @@ def extract_document_structure(
     
     pages = find_document_structure_pages(pdf_path)
     
-    text = extract_text_from_pages(pdf_path, pages)
+    text = extract_text_from_pages(pdf_path, pages, phase="document_structure", model_name=model)
     if not text:
         return DocumentStructureResult(
             success=False,
@@ -213,8 +212,7 @@ def extract_document_structure(
         
         if output_dir:
             output_path = Path(output_dir) / "13_document_structure.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+            save_json(output_path, result.to_dict())
             logger.info(f"Saved document structure to {output_path}")
         
         logger.info(f"Extracted {len(content_references)} refs, {len(annotations)} annotations, {len(document_versions)} versions")
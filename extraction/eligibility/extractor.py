@@ -13,6 +13,11 @@ from typing import List, Optional, Dict, Any, Tuple
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.retrieval import select_context_pages
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 from .schema import (
     EligibilityData,
     EligibilityCriterion,
@@ -24,6 +29,11 @@ from .prompts import build_eligibility_extraction_prompt
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query used when no eligibility pages are detected
+CONTEXT_QUERY = (
+    "inclusion criteria exclusion criteria eligibility participants eligible age diagnosis history of"
+)
+
 
 @dataclass
 class EligibilityExtractionResult:
@@ -36,6 +46,7 @@ class EligibilityExtractionResult:
     model_used: Optional[str] = None
 
 
+@memoize_page_finder("eligibility")
 def find_eligibility_pages(
     pdf_path: str,
     max_pages_to_scan: int = 50,
@@ -53,8 +64,6 @@ def find_eligibility_pages(
     Returns:
         List of 0-indexed page numbers likely containing eligibility criteria
     """
-    import fitz
-    
     # Patterns for section headers followed by numbered criteria
     content_patterns = [
         # Section header followed by numbered items
@@ -79,12 +88,11 @@ def find_eligibility_pages(
     eligibility_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text()
+            text = store.get_page(page_num)
             text_lower = text.lower()
             
             # Skip TOC pages
@@ -101,8 +109,6 @@ def find_eligibility_pages(
                 eligibility_pages.append(page_num)
                 logger.debug(f"Found eligibility content on page {page_num + 1}")
         
-        doc.close()
-        
         # If we found pages, also include adjacent pages for context
         if eligibility_pages:
             expanded = set()
@@ -147,16 +153,20 @@ def extract_eligibility_criteria(
         if pages is None:
             pages = find_eligibility_pages(pdf_path)
             if not pages:
-                # Fallback to first 20 pages if no eligibility keywords found
-                logger.warning("No eligibility pages detected, scanning first 20 pages")
-                pages = list(range(min(20, get_page_count(pdf_path))))
+                # Fallback to the pages ranked best by BM25 retrieval
+                logger.warning("No eligibility pages detected, using retrieval-ranked pages")
+                pages = select_context_pages(
+                    pdf_path, CONTEXT_QUERY, PHASE_TOKEN_BUDGETS["eligibility"]
+                ) or list(range(min(20, get_page_count(pdf_path))))
         
         result.pages_used = pages
         
         # Extract text from pages
         if protocol_text is None:
             logger.info(f"Extracting text from pages {pages}...")
-            protocol_text = extract_text_from_pages(pdf_path, pages)
+            protocol_text = extract_text_from_pages(
+                pdf_path, pages, phase="eligibility", model_name=model_name, query=CONTEXT_QUERY,
+            )
         
         if not protocol_text:
             result.error = "Failed to extract text from PDF"
@@ -494,7 +504,6 @@ def save_eligibility_result(
     if result.raw_response:
         output["rawResponse"] = result.raw_response
         
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, output)
         
     logger.info(f"Saved eligibility criteria to {output_path}")
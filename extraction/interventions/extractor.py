@@ -13,6 +13,11 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.retrieval import select_context_pages
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 from .schema import (
     InterventionsData,
     StudyIntervention,
@@ -28,6 +33,11 @@ from .prompts import build_interventions_extraction_prompt
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query used when no interventions pages are detected
+CONTEXT_QUERY = (
+    "study intervention investigational product dose dosage administration route formulation strength"
+)
+
 
 @dataclass
 class InterventionsExtractionResult:
@@ -40,6 +50,7 @@ class InterventionsExtractionResult:
     model_used: Optional[str] = None
 
 
+@memoize_page_finder("interventions")
 def find_intervention_pages(
     pdf_path: str,
     max_pages_to_scan: int = 50,
@@ -47,8 +58,6 @@ def find_intervention_pages(
     """
     Find pages containing intervention/product information using heuristics.
     """
-    import fitz
-    
     intervention_keywords = [
         r'investigational\s+product',
         r'study\s+drug',
@@ -70,19 +79,16 @@ def find_intervention_pages(
     intervention_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             if pattern.search(text):
                 intervention_pages.append(page_num)
                 logger.debug(f"Found intervention keywords on page {page_num + 1}")
         
-        doc.close()
-        
         # Include adjacent pages for context
         if intervention_pages:
             expanded = set()
@@ -118,15 +124,20 @@ def extract_interventions(
         if pages is None:
             pages = find_intervention_pages(pdf_path)
             if not pages:
-                logger.warning("No intervention pages detected, scanning first 30 pages")
-                pages = list(range(min(30, get_page_count(pdf_path))))
+                # Fallback to the pages ranked best by BM25 retrieval
+                logger.warning("No intervention pages detected, using retrieval-ranked pages")
+                pages = select_context_pages(
+                    pdf_path, CONTEXT_QUERY, PHASE_TOKEN_BUDGETS["interventions"]
+                ) or list(range(min(30, get_page_count(pdf_path))))
         
         result.pages_used = pages
         
         # Extract text from pages
         if protocol_text is None:
             logger.info(f"Extracting text from pages {pages}...")
-            protocol_text = extract_text_from_pages(pdf_path, pages)
+            protocol_text = extract_text_from_pages(
+                pdf_path, pages, phase="interventions", model_name=model_name, query=CONTEXT_QUERY,
+            )
         
         if not protocol_text:
             result.error = "Failed to extract text from PDF"
@@ -396,7 +407,6 @@ def save_interventions_result(
     if result.raw_response:
         output["rawResponse"] = result.raw_response
         
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, output)
         
     logger.info(f"Saved interventions to {output_path}")
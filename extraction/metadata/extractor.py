@@ -12,6 +12,9 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple
 
 from core.llm_client import call_llm, call_llm_with_image
+from core.retrieval import select_context_pages
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 from .schema import (
     StudyMetadata,
     StudyTitle,
@@ -32,6 +35,12 @@ from .prompts import (
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query for synopsis pages that complement the title page
+CONTEXT_QUERY = (
+    "protocol title short title acronym sponsor phase indication NCT number "
+    "IND EudraCT identifier amendment version date synopsis"
+)
+
 
 @dataclass
 class MetadataExtractionResult:
@@ -59,7 +68,8 @@ def extract_study_metadata(
         model_name: LLM model to use
         title_page_images: Optional pre-rendered images of title pages
         protocol_text: Optional pre-extracted text from title/synopsis pages
-        pages: Specific pages to use (0-indexed), defaults to [0, 1, 2]
+        pages: Specific pages to use (0-indexed), defaults to the title page
+               plus retrieval-ranked pages (or [0, 1, 2] if nothing matches)
         
     Returns:
         MetadataExtractionResult with extracted metadata
@@ -67,8 +77,8 @@ def extract_study_metadata(
     result = MetadataExtractionResult(success=False, model_used=model_name)
     
     try:
-        # Default to first 3 pages if not specified
-        target_pages = pages or [0, 1, 2]
+        # Default to the title page plus the best-matching synopsis chunks
+        target_pages = pages or _default_metadata_pages(pdf_path)
         result.pages_used = target_pages
         
         # Strategy 1: Vision extraction from title page images
@@ -89,7 +99,9 @@ def extract_study_metadata(
         if not result.raw_response:
             logger.info(f"Extracting text from PDF pages {target_pages}...")
             from core.pdf_utils import extract_text_from_pages
-            extracted_text = extract_text_from_pages(pdf_path, target_pages)
+            extracted_text = extract_text_from_pages(
+                pdf_path, target_pages, phase="metadata", model_name=model_name, query=CONTEXT_QUERY,
+            )
             if extracted_text:
                 text_result = _extract_with_text(extracted_text, model_name)
                 if text_result:
@@ -110,6 +122,21 @@ def extract_study_metadata(
     return result
 
 
+def _default_metadata_pages(pdf_path: str) -> List[int]:
+    """Title page plus the pages holding the best synopsis matches."""
+    try:
+        pages = select_context_pages(
+            pdf_path,
+            CONTEXT_QUERY,
+            PHASE_TOKEN_BUDGETS["metadata"],
+            always_include_pages=[0],
+        )
+    except Exception as e:
+        logger.warning(f"Retrieval failed, using first pages: {e}")
+        pages = []
+    return pages or [0, 1, 2]
+
+
 def _extract_with_vision(
     image_paths: List[str],
     model_name: str,
@@ -413,7 +440,6 @@ def save_metadata_result(
     if result.raw_response:
         output["rawResponse"] = result.raw_response
         
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, output)
         
     logger.info(f"Saved metadata to {output_path}")
@@ -13,6 +13,9 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.serialization import save_json
 from .schema import (
     NarrativeData,
     NarrativeContent,
@@ -37,6 +40,7 @@ class NarrativeExtractionResult:
     model_used: Optional[str] = None
 
 
+@memoize_page_finder("narrative")
 def find_structure_pages(
     pdf_path: str,
     max_pages: int = 20,
@@ -45,8 +49,6 @@ def find_structure_pages(
     Find pages containing document structure (TOC, abbreviations).
     Usually in the first 10-20 pages.
     """
-    import fitz
-    
     structure_keywords = [
         r'table\s+of\s+contents',
         r'list\s+of\s+abbreviations',
@@ -61,18 +63,15 @@ def find_structure_pages(
     structure_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             if pattern.search(text):
                 structure_pages.append(page_num)
         
-        doc.close()
-        
         # If nothing found, use first 10 pages
         if not structure_pages:
             structure_pages = list(range(min(10, get_page_count(pdf_path))))
@@ -109,7 +108,7 @@ def extract_narrative_structure(
         # Extract text from pages
         if protocol_text is None:
             logger.info(f"Extracting text from pages {pages}...")
-            protocol_text = extract_text_from_pages(pdf_path, pages)
+            protocol_text = extract_text_from_pages(pdf_path, pages, phase="narrative", model_name=model_name)
         
         if not protocol_text:
             result.error = "Failed to extract text from PDF"
@@ -333,7 +332,6 @@ def save_narrative_result(
     if result.raw_response:
         output["rawResponse"] = result.raw_response
         
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, output)
         
     logger.info(f"Saved narrative structure to {output_path}")
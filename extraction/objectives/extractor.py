@@ -13,6 +13,11 @@ from typing import List, Optional, Dict, Any, Tuple
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.retrieval import select_context_pages
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 from .schema import (
     ObjectivesData,
     Objective,
@@ -27,6 +32,11 @@ from .prompts import build_objectives_extraction_prompt
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query used when no objectives pages are detected
+CONTEXT_QUERY = (
+    "primary objective secondary objective exploratory objective endpoint estimand outcome measure"
+)
+
 
 @dataclass
 class ObjectivesExtractionResult:
@@ -39,6 +49,7 @@ class ObjectivesExtractionResult:
     model_used: Optional[str] = None
 
 
+@memoize_page_finder("objectives")
 def find_objectives_pages(
     pdf_path: str,
     max_pages_to_scan: int = 30,
@@ -53,8 +64,6 @@ def find_objectives_pages(
     Returns:
         List of 0-indexed page numbers likely containing objectives
     """
-    import fitz
-    
     objectives_keywords = [
         r'primary\s+objective',
         r'secondary\s+objective',
@@ -73,19 +82,16 @@ def find_objectives_pages(
     objectives_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             if pattern.search(text):
                 objectives_pages.append(page_num)
                 logger.debug(f"Found objectives keywords on page {page_num + 1}")
         
-        doc.close()
-        
         # If we found pages, also include adjacent pages for context
         if objectives_pages:
             expanded = set()
@@ -130,16 +136,20 @@ def extract_objectives_endpoints(
         if pages is None:
             pages = find_objectives_pages(pdf_path)
             if not pages:
-                # Fallback to first 15 pages (synopsis usually has objectives)
-                logger.warning("No objectives pages detected, scanning first 15 pages")
-                pages = list(range(min(15, get_page_count(pdf_path))))
+                # Fallback to the pages ranked best by BM25 retrieval
+                logger.warning("No objectives pages detected, using retrieval-ranked pages")
+                pages = select_context_pages(
+                    pdf_path, CONTEXT_QUERY, PHASE_TOKEN_BUDGETS["objectives"]
+                ) or list(range(min(15, get_page_count(pdf_path))))
         
         result.pages_used = pages
         
         # Extract text from pages
         if protocol_text is None:
             logger.info(f"Extracting text from pages {pages}...")
-            protocol_text = extract_text_from_pages(pdf_path, pages)
+            protocol_text = extract_text_from_pages(
+                pdf_path, pages, phase="objectives", model_name=model_name, query=CONTEXT_QUERY,
+            )
         
         if not protocol_text:
             result.error = "Failed to extract text from PDF"
@@ -513,7 +523,6 @@ def save_objectives_result(
     if result.raw_response:
         output["rawResponse"] = result.raw_response
         
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, output)
         
     logger.info(f"Saved objectives/endpoints to {output_path}")
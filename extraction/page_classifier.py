@@ -0,0 +1,327 @@
+"""
+SoA Page Classifier - Local model for Schedule of Activities page detection.
+
+Scores every page of a protocol with a small logistic-regression model over
+the existing keyword/table heuristics plus layout features (short tokens,
+column alignment, X-mark density). Pages the model is confident about are
+accepted or rejected locally; only pages inside the uncertainty band need
+to be confirmed by the LLM.
+
+The model is plain JSON (weights + feature scaling) so it runs without any
+ML dependency. Retrain it with tools/train_page_classifier.py.
+
+Usage:
+    from extraction.page_classifier import get_page_classifier
+
+    classifier = get_page_classifier()
+    if classifier:
+        predictions = classifier.classify_pdf("protocol.pdf")
+        soa_pages = [p.page_num for p in predictions if p.is_soa]
+"""
+
+import json
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import fitz  # PyMuPDF
+
+from .soa_finder import score_page_text
+
+logger = logging.getLogger(__name__)
+
+# Default location of the trained model shipped with the repository
+MODEL_DIR = Path(__file__).parent / "models"
+DEFAULT_MODEL_PATH = MODEL_DIR / "soa_page_classifier.json"
+
+# Ordered feature names - the model weights follow this order
+PAGE_FEATURES = [
+    "keyword_score",
+    "table_score",
+    "table_title",
+    "short_token_ratio",
+    "numeric_token_ratio",
+    "x_mark_density",
+    "column_alignment",
+    "words_per_line",
+    "landscape",
+    "toc_leaders",
+]
+
+# Tokens that mark a cell in an SoA grid (including footnote-suffixed "Xa")
+X_MARK_PATTERN = re.compile(r'^(x[a-z0-9,]{0,3}|[✓✔√•●])$', re.IGNORECASE)
+NUMERIC_TOKEN_PATTERN = re.compile(r'^[-+±]?\d+([-–/]\d+)?$')
+TABLE_TITLE_PATTERN = re.compile(
+    r'table\s+\d+[:\.]?\s*schedule\s+of\s+(activities|assessments)'
+)
+TOC_LEADER_PATTERN = re.compile(r'\.{5,}\s*\d+')
+
+# x0 positions are bucketed to this width (points) when measuring alignment
+COLUMN_BIN_WIDTH = 6.0
+# A column needs at least this many short tokens starting at the same x position
+MIN_TOKENS_PER_COLUMN = 3
+
+
+@dataclass
+class PagePrediction:
+    """Classifier output for a single page."""
+    page_num: int
+    probability: float
+    label: str  # "soa", "not_soa" or "uncertain"
+    features: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def is_soa(self) -> bool:
+        return self.label == "soa"
+
+    @property
+    def is_uncertain(self) -> bool:
+        return self.label == "uncertain"
+
+
+def extract_page_features(page: "fitz.Page") -> Dict[str, float]:
+    """
+    Compute classifier features for a single PDF page.
+
+    Args:
+        page: PyMuPDF page object
+
+    Returns:
+        Dict of feature name -> value (see PAGE_FEATURES)
+    """
+    text = page.get_text().lower()
+    words = page.get_text("words")
+    keyword_score, table_score = score_page_text(text)
+
+    tokens = [w[4] for w in words]
+    n_tokens = max(len(tokens), 1)
+    short_words = [w for w in words if len(w[4]) <= 3]
+    short_tokens = len(short_words)
+    numeric_tokens = sum(1 for t in tokens if NUMERIC_TOKEN_PATTERN.match(t))
+    x_marks = sum(1 for t in tokens if X_MARK_PATTERN.match(t))
+
+    # Column alignment: share of short tokens (X marks, day numbers) that
+    # start at the same x position as other short tokens on the page
+    x_bins = Counter(int(w[0] // COLUMN_BIN_WIDTH) for w in short_words)
+    aligned = sum(c for c in x_bins.values() if c >= MIN_TOKENS_PER_COLUMN)
+
+    lines = Counter((w[5], w[6]) for w in words)
+    words_per_line = len(words) / len(lines) if lines else 0.0
+
+    rect = page.rect
+    return {
+        "keyword_score": math.log1p(keyword_score),
+        "table_score": math.log1p(table_score),
+        "table_title": 1.0 if TABLE_TITLE_PATTERN.search(text) else 0.0,
+        "short_token_ratio": short_tokens / n_tokens,
+        "numeric_token_ratio": numeric_tokens / n_tokens,
+        "x_mark_density": x_marks / n_tokens,
+        "column_alignment": aligned / max(short_tokens, 1),
+        "words_per_line": math.log1p(words_per_line),
+        "landscape": 1.0 if rect.width > rect.height else 0.0,
+        "toc_leaders": math.log1p(len(TOC_LEADER_PATTERN.findall(text))),
+    }
+
+
+def extract_pdf_features(pdf_path: str) -> List[Dict[str, float]]:
+    """Compute classifier features for every page of a PDF."""
+    doc = fitz.open(pdf_path)
+    try:
+        return [extract_page_features(doc[i]) for i in range(len(doc))]
+    finally:
+        doc.close()
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    ez = math.exp(z)
+    return ez / (1.0 + ez)
+
+
+@dataclass
+class PageClassifier:
+    """
+    Logistic-regression SoA page classifier.
+
+    Features are standardized with the stored mean/std before applying the
+    weights. Probabilities >= high_threshold are SoA, <= low_threshold are
+    not, anything in between is reported as uncertain.
+    """
+    weights: List[float]
+    bias: float
+    mean: List[float]
+    std: List[float]
+    features: List[str] = field(default_factory=lambda: list(PAGE_FEATURES))
+    low_threshold: float = 0.2
+    high_threshold: float = 0.9
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def _vector(self, features: Dict[str, float]) -> List[float]:
+        return [features.get(name, 0.0) for name in self.features]
+
+    def predict_proba(self, features: Dict[str, float]) -> float:
+        """Return the SoA probability for one page's features."""
+        z = self.bias
+        for x, w, mu, sd in zip(self._vector(features), self.weights, self.mean, self.std):
+            z += w * (x - mu) / sd
+        return _sigmoid(z)
+
+    def label_for(self, probability: float) -> str:
+        if probability >= self.high_threshold:
+            return "soa"
+        if probability <= self.low_threshold:
+            return "not_soa"
+        return "uncertain"
+
+    def classify_features(self, page_features: Sequence[Dict[str, float]]) -> List[PagePrediction]:
+        """Classify pre-computed per-page features."""
+        predictions = []
+        for page_num, features in enumerate(page_features):
+            prob = self.predict_proba(features)
+            predictions.append(PagePrediction(
+                page_num=page_num,
+                probability=prob,
+                label=self.label_for(prob),
+                features=features,
+            ))
+        return predictions
+
+    def holdout_recall(self) -> Optional[float]:
+        """Worst leave-one-protocol-out recall in the training metadata (None if it wasn't measured)."""
+        holdout = self.metadata.get("holdout") or {}
+        recalls = [m["recall"] for m in holdout.values() if "recall" in m]
+        return min(recalls) if recalls else None
+
+    def classify_pdf(self, pdf_path: str) -> List[PagePrediction]:
+        """Classify every page of a PDF."""
+        return self.classify_features(extract_pdf_features(pdf_path))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "features": self.features,
+            "weights": self.weights,
+            "bias": self.bias,
+            "mean": self.mean,
+            "std": self.std,
+            "thresholds": {"low": self.low_threshold, "high": self.high_threshold},
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PageClassifier":
+        thresholds = data.get("thresholds", {})
+        return cls(
+            weights=list(data["weights"]),
+            bias=float(data["bias"]),
+            mean=list(data["mean"]),
+            std=list(data["std"]),
+            features=list(data.get("features", PAGE_FEATURES)),
+            low_threshold=thresholds.get("low", 0.2),
+            high_threshold=thresholds.get("high", 0.9),
+            metadata=data.get("metadata", {}),
+        )
+
+    def save(self, path: Path = DEFAULT_MODEL_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_MODEL_PATH) -> "PageClassifier":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def train_page_classifier(
+    samples: Sequence[Dict[str, float]],
+    labels: Sequence[int],
+    epochs: int = 2000,
+    learning_rate: float = 0.1,
+    l2: float = 0.01,
+    low_threshold: float = 0.2,
+    high_threshold: float = 0.9,
+) -> PageClassifier:
+    """
+    Fit a logistic-regression page classifier with batch gradient descent.
+
+    Positive pages are rare (a few per protocol), so each class is weighted
+    by its inverse frequency.
+
+    Args:
+        samples: Per-page feature dicts (see extract_page_features)
+        labels: 1 for SoA pages, 0 otherwise
+        epochs: Gradient descent iterations
+        learning_rate: Step size
+        l2: L2 regularization strength
+
+    Returns:
+        Trained PageClassifier
+    """
+    if len(samples) != len(labels) or not samples:
+        raise ValueError("samples and labels must be non-empty and the same length")
+    n_pos = sum(labels)
+    n_neg = len(labels) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError("Training data needs both SoA and non-SoA pages")
+
+    n_features = len(PAGE_FEATURES)
+    rows = [[s.get(name, 0.0) for name in PAGE_FEATURES] for s in samples]
+    mean = [sum(r[j] for r in rows) / len(rows) for j in range(n_features)]
+    std = []
+    for j in range(n_features):
+        var = sum((r[j] - mean[j]) ** 2 for r in rows) / len(rows)
+        std.append(math.sqrt(var) or 1.0)
+    scaled = [[(r[j] - mean[j]) / std[j] for j in range(n_features)] for r in rows]
+
+    pos_weight = len(labels) / (2.0 * n_pos)
+    neg_weight = len(labels) / (2.0 * n_neg)
+    weights = [0.0] * n_features
+    bias = 0.0
+
+    for _ in range(epochs):
+        grad_w = [0.0] * n_features
+        grad_b = 0.0
+        for x, y in zip(scaled, labels):
+            p = _sigmoid(bias + sum(w * v for w, v in zip(weights, x)))
+            err = (p - y) * (pos_weight if y else neg_weight)
+            grad_b += err
+            for j in range(n_features):
+                grad_w[j] += err * x[j]
+        n = len(scaled)
+        for j in range(n_features):
+            weights[j] -= learning_rate * (grad_w[j] / n + l2 * weights[j])
+        bias -= learning_rate * grad_b / n
+
+    return PageClassifier(
+        weights=weights,
+        bias=bias,
+        mean=mean,
+        std=std,
+        low_threshold=low_threshold,
+        high_threshold=high_threshold,
+    )
+
+
+# Global classifier instance (None if no trained model is available)
+_global_classifier: Optional[PageClassifier] = None
+_classifier_loaded = False
+
+
+def get_page_classifier() -> Optional[PageClassifier]:
+    """Get the shipped page classifier, or None if the model file is missing."""
+    global _global_classifier, _classifier_loaded
+    if not _classifier_loaded:
+        _classifier_loaded = True
+        try:
+            _global_classifier = PageClassifier.load(DEFAULT_MODEL_PATH)
+        except FileNotFoundError:
+            logger.warning(f"Page classifier model not found at {DEFAULT_MODEL_PATH}")
+        except (json.JSONDecodeError, KeyError) as e:
+            logger.warning(f"Page classifier model is invalid: {e}")
+    return _global_classifier
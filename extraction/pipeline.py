@@ -17,7 +17,6 @@ Usage:
 """
 
 import os
-import json
 import logging
 from pathlib import Path
 from typing import Optional, List
@@ -27,8 +26,12 @@ from .header_analyzer import analyze_soa_headers, load_header_structure, save_he
 from .text_extractor import extract_soa_from_text, build_usdm_output, save_extraction_result
 from .validator import validate_extraction, apply_validation_fixes, save_validation_result
 
+from core.artifacts import flush_artifacts, load_artifact, put_artifact
 from core.provenance import ProvenanceTracker, get_provenance_path
+from core.profiling import span
 from core.constants import USDM_VERSION
+from core.page_store import get_page_store
+from core.usdm_index import USDMIndex
 
 logger = logging.getLogger(__name__)
 
@@ -185,10 +188,11 @@ def run_extraction_pipeline(
         # ═══════════════════════════════════════════════════════════════
         logger.info("Step 1: Analyzing SoA header structure from images...")
         
-        header_result = analyze_soa_headers(
-            image_paths=soa_images,
-            model_name=config.model_name,
-        )
+        with span("soa.header", images=len(soa_images)):
+            header_result = analyze_soa_headers(
+                image_paths=soa_images,
+                model_name=config.model_name,
+            )
         
         if not header_result.success:
             result.errors.append(f"Header analysis failed: {header_result.error}")
@@ -209,11 +213,12 @@ def run_extraction_pipeline(
         # ═══════════════════════════════════════════════════════════════
         logger.info("Step 2: Extracting SoA data from text...")
         
-        text_result = extract_soa_from_text(
-            protocol_text=protocol_text,
-            header_structure=header_structure,
-            model_name=config.model_name,
-        )
+        with span("soa.text", chars=len(protocol_text)):
+            text_result = extract_soa_from_text(
+                protocol_text=protocol_text,
+                header_structure=header_structure,
+                model_name=config.model_name,
+            )
         
         if not text_result.success:
             result.errors.append(f"Text extraction failed: {text_result.error}")
@@ -223,9 +228,7 @@ def run_extraction_pipeline(
         result.ticks_count = len(text_result.activity_timepoints)
         
         if config.save_intermediate:
-            usdm_output = build_usdm_output(text_result, header_structure)
-            with open(paths['raw_text'], 'w', encoding='utf-8') as f:
-                json.dump(usdm_output, f, indent=2, ensure_ascii=False)
+            put_artifact(paths['raw_text'], build_usdm_output(text_result, header_structure))
         
         logger.info(f"  Extracted {result.activities_count} activities, "
                    f"{result.ticks_count} ticks")
@@ -244,15 +247,16 @@ def run_extraction_pipeline(
             if hasattr(header_structure, 'footnotes') and header_structure.footnotes:
                 footnotes_text = "\n".join(header_structure.footnotes)
             
-            validation = validate_extraction(
-                text_activities=[a.to_dict() for a in text_result.activities],
-                text_ticks=final_ticks,
-                header_structure=header_structure,
-                image_paths=soa_images,
-                model_name=config.model_name,
-                protocol_text=protocol_text,
-                footnotes=footnotes_text,
-            )
+            with span("soa.vision_validate", images=len(soa_images)):
+                validation = validate_extraction(
+                    text_activities=[a.to_dict() for a in text_result.activities],
+                    text_ticks=final_ticks,
+                    header_structure=header_structure,
+                    image_paths=soa_images,
+                    model_name=config.model_name,
+                    protocol_text=protocol_text,
+                    footnotes=footnotes_text,
+                )
             
             if validation.success:
                 result.validated = True
@@ -288,34 +292,34 @@ def run_extraction_pipeline(
         # Rebuild timeline with validated ticks
         from core.usdm_types import Timeline, ActivityTimepoint, create_wrapper_input
         
-        # Post-process: Link activities to groups if not already linked
-        activity_groups = _resolve_activity_group_links(
-            text_result.activities, 
-            header_structure.activityGroups
-        )
+        with span("soa.build"):
+            # Post-process: Link activities to groups if not already linked
+            activity_groups = _resolve_activity_group_links(
+                text_result.activities, 
+                header_structure.activityGroups
+            )
         
-        final_timeline = Timeline(
-            activities=text_result.activities,
-            plannedTimepoints=header_structure.plannedTimepoints,
-            encounters=header_structure.encounters,
-            epochs=header_structure.epochs,
-            activityGroups=activity_groups,
-            activityTimepoints=[ActivityTimepoint.from_dict(t) for t in final_ticks],
-            footnotes=header_structure.footnotes,  # SoA table footnotes
-        )
+            final_timeline = Timeline(
+                activities=text_result.activities,
+                plannedTimepoints=header_structure.plannedTimepoints,
+                encounters=header_structure.encounters,
+                epochs=header_structure.epochs,
+                activityGroups=activity_groups,
+                activityTimepoints=[ActivityTimepoint.from_dict(t) for t in final_ticks],
+                footnotes=header_structure.footnotes,  # SoA table footnotes
+            )
         
-        final_output = create_wrapper_input(final_timeline)
+            final_output = create_wrapper_input(final_timeline)
         
-        # Save final output
-        with open(paths['final'], 'w', encoding='utf-8') as f:
-            json.dump(final_output, f, indent=2, ensure_ascii=False)
+            # Hand the final output on (written behind when an artifact store is open)
+            put_artifact(paths['final'], final_output)
         
-        result.output_path = paths['final']
+            result.output_path = paths['final']
         
-        # Save provenance separately
-        provenance_path = get_provenance_path(paths['final'])
-        provenance.save(provenance_path)
-        result.provenance_path = provenance_path
+            # Save provenance separately
+            provenance_path = get_provenance_path(paths['final'])
+            provenance.save(provenance_path)
+            result.provenance_path = provenance_path
         
         result.success = True
         logger.info(f"Pipeline complete! Output: {paths['final']}")
@@ -370,7 +374,8 @@ def run_from_files(
     if soa_pages is None:
         logger.info("Finding SoA pages...")
         # Use enhanced finder with title detection and adjacent page expansion
-        soa_pages = find_soa_pages(pdf_path, model_name=config.model_name, use_llm=True)
+        with span("soa.find_pages"):
+            soa_pages = find_soa_pages(pdf_path, model_name=config.model_name, use_llm=True)
         
         if not soa_pages:
             logger.warning("Could not find SoA pages. Using first 10 pages as fallback.")
@@ -379,9 +384,10 @@ def run_from_files(
             # Log pages in human-readable format (1-indexed)
             logger.info(f"Found SoA pages: {[p+1 for p in sorted(soa_pages)]} (PDF viewer numbering)")
     
-    # Extract text from SoA pages
+    # Extract text from SoA pages (running headers/footers stripped)
+    store = get_page_store(pdf_path)
     text = "\n\n--- PAGE BREAK ---\n\n".join(
-        doc[p].get_text() for p in soa_pages if 0 <= p < len(doc)
+        store.get_page(p) for p in soa_pages if 0 <= p < store.page_count
     )
     
     # Extract images from SoA pages only
@@ -389,14 +395,15 @@ def run_from_files(
     os.makedirs(images_dir, exist_ok=True)
     
     image_paths = []
-    for page_num in soa_pages:
-        if 0 <= page_num < len(doc):
-            page = doc[page_num]
-            pix = page.get_pixmap(dpi=150)
-            img_path = os.path.join(images_dir, f"soa_page_{page_num + 1:03d}.png")  # 1-indexed for human readability
-            pix.save(img_path)
-            image_paths.append(img_path)
-            logger.debug(f"Extracted page {page_num} as image")
+    with span("soa.render_images", pages=len(soa_pages)):
+        for page_num in soa_pages:
+            if 0 <= page_num < len(doc):
+                page = doc[page_num]
+                pix = page.get_pixmap(dpi=150)
+                img_path = os.path.join(images_dir, f"soa_page_{page_num + 1:03d}.png")  # 1-indexed for human readability
+                pix.save(img_path)
+                image_paths.append(img_path)
+                logger.debug(f"Extracted page {page_num} as image")
     
     doc.close()
     
@@ -421,8 +428,6 @@ def enrich_terminology(soa_path: str) -> dict:
     
     Uses a curated mapping of common clinical terms to NCI codes.
     """
-    import json
-    
     # Common clinical procedure NCI codes
     KNOWN_CODES = {
         "informed consent": ("C16735", "Informed Consent"),
@@ -441,8 +446,7 @@ def enrich_terminology(soa_path: str) -> dict:
         "medical history": ("C18772", "Medical History"),
     }
     
-    with open(soa_path) as f:
-        soa_data = json.load(f)
+    soa_data = load_artifact(soa_path)
     
     timeline = soa_data.get("study", {}).get("versions", [{}])[0].get("timeline", {})
     activities = timeline.get("activities", [])
@@ -461,8 +465,7 @@ def enrich_terminology(soa_path: str) -> dict:
                 break
     
     # Save back
-    with open(soa_path, 'w') as f:
-        json.dump(soa_data, f, indent=2)
+    put_artifact(soa_path, soa_data)
     
     logger.info(f"Enriched {enriched_count}/{len(activities)} activities with terminology codes")
     return {"enriched": enriched_count, "total": len(activities)}
@@ -472,10 +475,7 @@ def validate_schema(soa_path: str) -> dict:
     """
     Step 8: Validate JSON structure against USDM requirements.
     """
-    import json
-    
-    with open(soa_path) as f:
-        soa_data = json.load(f)
+    soa_data = load_artifact(soa_path)
     
     issues = []
     warnings = []
@@ -490,18 +490,15 @@ def validate_schema(soa_path: str) -> dict:
     versions = study.get("versions", [])
     if versions:
         timeline = versions[0].get("timeline", {})
-        activities = {a.get("id"): a for a in timeline.get("activities", [])}
-        # Support both plannedTimepoints (legacy) and encounters (USDM 4.0)
-        timepoints = {t.get("id"): t for t in timeline.get("plannedTimepoints", [])}
-        encounters = {e.get("id"): e for e in timeline.get("encounters", [])}
+        index = USDMIndex(timeline)
         
         # Check linkage
         for at in timeline.get("activityTimepoints", []):
-            if at.get("activityId") not in activities:
+            if index.collection_of(at.get("activityId")) != "activities":
                 issues.append(f"Invalid activityId: {at.get('activityId')}")
             # Support both encounterId (new) and plannedTimepointId (legacy)
             enc_id = at.get("encounterId") or at.get("plannedTimepointId")
-            if enc_id and enc_id not in encounters and enc_id not in timepoints:
+            if enc_id and index.collection_of(enc_id) not in ("encounters", "plannedTimepoints"):
                 issues.append(f"Invalid encounterId: {enc_id}")
     
     valid = len(issues) == 0
@@ -523,6 +520,7 @@ def run_cdisc_conformance(soa_path: str, output_dir: str) -> dict:
         return {"error": "CORE not installed"}
     
     output_path = Path(output_dir) / "conformance_report"
+    flush_artifacts([soa_path])  # CORE reads the file itself
     
     try:
         result = subprocess.run(
@@ -13,6 +13,11 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.retrieval import select_context_pages
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 from .schema import (
     ProceduresDevicesData,
     ProceduresDevicesResult,
@@ -28,7 +33,13 @@ from .prompts import get_procedures_prompt, get_system_prompt
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query used when no procedures pages are detected
+CONTEXT_QUERY = (
+    "procedures assessments blood sample collection ECG vital signs physical examination imaging device"
+)
+
 
+@memoize_page_finder("procedures")
 def find_procedure_pages(
     pdf_path: str,
     max_pages_to_scan: int = 60,
@@ -36,8 +47,6 @@ def find_procedure_pages(
     """
     Find pages containing procedure and device information using heuristics.
     """
-    import fitz
-    
     procedure_keywords = [
         r'procedure',
         r'blood\s+draw',
@@ -73,12 +82,11 @@ def find_procedure_pages(
     procedure_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             # Count keyword matches on this page
             matches = len(pattern.findall(text))
@@ -86,8 +94,6 @@ def find_procedure_pages(
                 procedure_pages.append(page_num)
                 logger.debug(f"Found procedure keywords on page {page_num + 1} ({matches} matches)")
         
-        doc.close()
-        
         # Limit to most relevant pages
         if len(procedure_pages) > 15:
             procedure_pages = procedure_pages[:15]
@@ -154,11 +160,14 @@ def extract_procedures_devices(
     # Find relevant pages
     pages = find_procedure_pages(pdf_path)
     if not pages:
-        logger.warning("No procedure pages found, using first 20 pages")
-        pages = list(range(min(20, get_page_count(pdf_path))))
+        # Fallback to the pages ranked best by BM25 retrieval
+        logger.warning("No procedure pages found, using retrieval-ranked pages")
+        pages = select_context_pages(
+            pdf_path, CONTEXT_QUERY, PHASE_TOKEN_BUDGETS["procedures"]
+        ) or list(range(min(20, get_page_count(pdf_path))))
     
     # Extract text from pages
-    text = extract_text_from_pages(pdf_path, pages)
+    text = extract_text_from_pages(pdf_path, pages, phase="procedures", model_name=model, query=CONTEXT_QUERY)
     if not text:
         return ProceduresDevicesResult(
             success=False,
@@ -277,8 +286,7 @@ def extract_procedures_devices(
         # Save output if directory specified
         if output_dir:
             output_path = Path(output_dir) / "9_procedures_devices.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+            save_json(output_path, result.to_dict())
             logger.info(f"Saved procedures/devices to {output_path}")
         
         logger.info(f"Extracted {len(procedures)} procedures, {len(devices)} devices, {len(ingredients)} ingredients")
@@ -13,6 +13,11 @@ from typing import List, Optional, Dict, Any
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.retrieval import select_context_pages
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 from .schema import (
     SchedulingData,
     SchedulingResult,
@@ -30,7 +35,13 @@ from .prompts import get_scheduling_prompt, get_system_prompt
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query used when no scheduling pages are detected
+CONTEXT_QUERY = (
+    "visit window timing day week schedule study visit follow-up period duration"
+)
+
 
+@memoize_page_finder("scheduling")
 def find_scheduling_pages(
     pdf_path: str,
     max_pages_to_scan: int = 60,
@@ -38,8 +49,6 @@ def find_scheduling_pages(
     """
     Find pages containing scheduling/timing information using heuristics.
     """
-    import fitz
-    
     scheduling_keywords = [
         r'visit\s+window',
         r'visit\s+schedule',
@@ -67,20 +76,17 @@ def find_scheduling_pages(
     scheduling_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             matches = len(pattern.findall(text))
             if matches >= 2:
                 scheduling_pages.append(page_num)
                 logger.debug(f"Found scheduling keywords on page {page_num + 1}")
         
-        doc.close()
-        
         if len(scheduling_pages) > 20:
             scheduling_pages = scheduling_pages[:20]
         
@@ -151,10 +157,13 @@ def extract_scheduling(
     
     pages = find_scheduling_pages(pdf_path)
     if not pages:
-        logger.warning("No scheduling pages found, using first 30 pages")
-        pages = list(range(min(30, get_page_count(pdf_path))))
+        # Fallback to the pages ranked best by BM25 retrieval
+        logger.warning("No scheduling pages found, using retrieval-ranked pages")
+        pages = select_context_pages(
+            pdf_path, CONTEXT_QUERY, PHASE_TOKEN_BUDGETS["scheduling"]
+        ) or list(range(min(30, get_page_count(pdf_path))))
     
-    text = extract_text_from_pages(pdf_path, pages)
+    text = extract_text_from_pages(pdf_path, pages, phase="scheduling", model_name=model, query=CONTEXT_QUERY)
     if not text:
         return SchedulingResult(
             success=False,
@@ -276,8 +285,7 @@ def extract_scheduling(
         
         if output_dir:
             output_path = Path(output_dir) / "10_scheduling_logic.json"
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result.to_dict(), f, indent=2, ensure_ascii=False)
+            save_json(output_path, result.to_dict())
             logger.info(f"Saved scheduling logic to {output_path}")
         
         logger.info(f"Extracted {len(timings)} timings, {len(transition_rules)} rules, {len(conditions)} conditions")
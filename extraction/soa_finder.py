@@ -3,7 +3,10 @@ SoA Page Finder - Locate Schedule of Activities pages in protocol PDFs.
 
 This module identifies which pages contain the SoA table(s) using:
 1. Text-based heuristics (searching for "Schedule of Activities", table markers)
-2. LLM-assisted page identification
+2. A local page classifier (see page_classifier.py); its pages join the
+   LLM's candidates, and only a model whose held-out recall reaches
+   CLASSIFIER_MIN_HOLDOUT_RECALL may decide pages without the LLM
+3. LLM-assisted page identification for everything else
 
 Usage:
     from extraction.soa_finder import find_soa_pages
@@ -22,9 +25,19 @@ import fitz  # PyMuPDF
 
 from core.llm_client import get_llm_client, LLMConfig
 from core.json_utils import parse_llm_json
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.context_packer import pack_pages
+from core.page_cache import memoize_page_finder, mark_result_uncacheable
+from core.page_store import get_page_store
+from core.pdf_utils import get_file_hash, get_page_count
 
 logger = logging.getLogger(__name__)
 
+# The classifier decides SoA pages without the LLM only when its worst
+# leave-one-protocol-out recall (stored with the model) reaches this; the
+# shipped model misses every SoA page of a held-out protocol, so it doesn't
+CLASSIFIER_MIN_HOLDOUT_RECALL = 0.95
+
 
 # Keywords that indicate SoA presence
 SOA_KEYWORDS = [
@@ -58,6 +71,37 @@ class PageScore:
     text_snippet: str
 
 
+def score_page_text(text: str) -> Tuple[float, float]:
+    """
+    Score page text for SoA keywords and table structure.
+    
+    Args:
+        text: Lower-cased page text
+        
+    Returns:
+        Tuple of (keyword_score, table_score)
+    """
+    # Score keywords
+    keyword_score = 0.0
+    for kw in SOA_KEYWORDS:
+        if kw in text:
+            keyword_score += 2.0
+    
+    # Score table indicators
+    table_score = 0.0
+    for pattern in TABLE_INDICATORS:
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        table_score += len(matches) * 0.5
+    
+    # Bonus for having multiple column-like structures
+    # (rough heuristic based on repeated patterns)
+    visit_matches = re.findall(r'visit\s*\d+', text, re.IGNORECASE)
+    if len(visit_matches) >= 3:
+        table_score += 3.0
+    
+    return keyword_score, table_score
+
+
 def find_soa_pages_heuristic(pdf_path: str, top_n: int = 5) -> List[int]:
     """
     Find SoA pages using text heuristics.
@@ -69,30 +113,13 @@ def find_soa_pages_heuristic(pdf_path: str, top_n: int = 5) -> List[int]:
     Returns:
         List of 0-indexed page numbers likely containing SoA
     """
-    doc = fitz.open(pdf_path)
+    store = get_page_store(pdf_path)
     scores: List[PageScore] = []
     
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text().lower()
-        
-        # Score keywords
-        keyword_score = 0.0
-        for kw in SOA_KEYWORDS:
-            if kw in text:
-                keyword_score += 2.0
-        
-        # Score table indicators
-        table_score = 0.0
-        for pattern in TABLE_INDICATORS:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            table_score += len(matches) * 0.5
+    for page_num in range(store.page_count):
+        text = store.get_page(page_num).lower()
         
-        # Bonus for having multiple column-like structures
-        # (rough heuristic based on repeated patterns)
-        visit_matches = re.findall(r'visit\s*\d+', text, re.IGNORECASE)
-        if len(visit_matches) >= 3:
-            table_score += 3.0
+        keyword_score, table_score = score_page_text(text)
         
         total_score = keyword_score + table_score
         
@@ -111,8 +138,6 @@ def find_soa_pages_heuristic(pdf_path: str, top_n: int = 5) -> List[int]:
                 text_snippet=snippet,
             ))
     
-    doc.close()
-    
     # Sort by score descending
     scores.sort(key=lambda x: x.total_score, reverse=True)
     
@@ -137,25 +162,28 @@ def find_soa_pages_llm(
     Returns:
         List of 0-indexed page numbers containing SoA
     """
-    doc = fitz.open(pdf_path)
+    store = get_page_store(pdf_path)
     
     # If no candidates provided, use heuristics to narrow down
     if candidate_pages is None:
         candidate_pages = find_soa_pages_heuristic(pdf_path, top_n=10)
         if not candidate_pages:
-            candidate_pages = list(range(min(30, len(doc))))  # Check first 30 pages
-    
-    # Extract text from candidate pages
-    page_texts = []
-    for page_num in candidate_pages:
-        if 0 <= page_num < len(doc):
-            text = doc[page_num].get_text()[:2000]  # Limit text per page
-            page_texts.append(f"PAGE {page_num}:\n{text}")
-    
-    doc.close()
+            candidate_pages = list(range(min(30, store.page_count)))  # Check first 30 pages
     
-    if not page_texts:
+    # Give every candidate an equal share of the phase token budget
+    items = [(p, store.get_page(p)) for p in candidate_pages if 0 <= p < store.page_count]
+    if not items:
         return []
+    budget = PHASE_TOKEN_BUDGETS["soa_finder"]
+    packed = pack_pages(
+        items,
+        token_budget=budget,
+        model_name=model_name,
+        phase="soa_finder",
+        per_item_budget=budget // len(items),
+        header_template="PAGE {index}:",
+        separator="\n\n---\n\n",
+    )
     
     # Build prompt
     prompt = """Analyze these protocol pages and identify which ones contain a Schedule of Activities (SoA) table.
@@ -181,7 +209,7 @@ Return a JSON object with:
 }}
 
 Include any page that has SoA table content, even if it's a continuation page.""".format(
-        pages="\n\n---\n\n".join(page_texts)
+        pages=packed.text
     )
     
     try:
@@ -200,9 +228,20 @@ Include any page that has SoA table content, even if it's a continuation page.""
         
     except Exception as e:
         logger.warning(f"LLM page finding failed: {e}. Falling back to heuristics.")
+        mark_result_uncacheable()
         return candidate_pages[:5]  # Return top 5 heuristic candidates
 
 
+def _classifier_fingerprint() -> str:
+    """Cache key material for the shipped page classifier model."""
+    from .page_classifier import DEFAULT_MODEL_PATH
+    
+    if not DEFAULT_MODEL_PATH.exists():
+        return "no-classifier"
+    return get_file_hash(str(DEFAULT_MODEL_PATH))[:16]
+
+
+@memoize_page_finder("soa", version=4, fingerprint=_classifier_fingerprint)
 def find_soa_pages(
     pdf_path: str,
     model_name: Optional[str] = None,
@@ -211,7 +250,9 @@ def find_soa_pages(
     """
     Find pages containing Schedule of Activities table.
     
-    This is the main entry point for SoA page detection.
+    This is the main entry point for SoA page detection. Results are
+    cached per PDF content hash, detector version and model (see
+    core.page_cache); explicit page overrides should bypass this function.
     
     Args:
         pdf_path: Path to protocol PDF
@@ -235,8 +276,19 @@ def find_soa_pages(
     title_pages = _find_soa_title_pages(pdf_path)
     logger.info(f"Title pages: {title_pages}")
     
-    # Combine heuristic and title pages
-    all_candidates = list(set(heuristic_pages + title_pages))
+    # Local classifier: a trusted model's confident pages that the title/heuristic
+    # passes agree with are decided without an LLM call; otherwise they are candidates
+    classifier_pages, flagged_pages, total_pages = _find_soa_pages_classifier(
+        pdf_path, model_name, use_llm, title_pages, heuristic_pages
+    )
+    if classifier_pages:
+        final_pages = _expand_adjacent_pages(classifier_pages, pdf_path, total_pages)
+        if set(final_pages) != set(classifier_pages):
+            logger.info(f"Expanded pages from {sorted(classifier_pages)} to {sorted(final_pages)} (adjacent page detection)")
+        return sorted(final_pages)[:10]
+    
+    # Combine heuristic and title pages (and whatever the classifier flagged)
+    all_candidates = list(set(heuristic_pages + title_pages + flagged_pages))
     
     if not use_llm or not model_name:
         final_pages = _expand_adjacent_pages(all_candidates, pdf_path)
@@ -257,6 +309,116 @@ def find_soa_pages(
     return sorted(final_pages)[:10]
 
 
+def _find_soa_pages_classifier(
+    pdf_path: str,
+    model_name: Optional[str],
+    use_llm: bool,
+    title_pages: List[int],
+    heuristic_pages: List[int],
+) -> Tuple[List[int], List[int], Optional[int]]:
+    """
+    Find SoA pages with the local page classifier.
+    
+    The classifier's confident pages are used on their own only when the
+    model's held-out recall reaches CLASSIFIER_MIN_HOLDOUT_RECALL, the
+    title/heuristic passes agree with them (see _classifier_agrees) and they
+    cover every title/heuristic candidate with table features (see
+    _covers_table_candidates), so a partial hit on a multi-page table isn't
+    returned as final. Pages in the uncertainty band are then sent to the
+    LLM (when enabled) or accepted on probability >= 0.5 otherwise.
+    
+    Returns:
+        Tuple of (0-indexed SoA pages, pages the classifier flagged, total
+        page count). SoA pages are [] if the classifier is unavailable or
+        untrusted, found nothing, or disagrees with the other passes; callers
+        then fall back to heuristics + LLM over the flagged pages as extra
+        candidates
+    """
+    from .page_classifier import get_page_classifier
+    
+    classifier = get_page_classifier()
+    if classifier is None:
+        return [], [], None
+    
+    predictions = classifier.classify_pdf(pdf_path)
+    total_pages = len(predictions)
+    confident = [p.page_num for p in predictions if p.is_soa]
+    uncertain = sorted(
+        (p for p in predictions if p.is_uncertain),
+        key=lambda p: p.probability,
+        reverse=True,
+    )[:10]
+    logger.info(
+        f"Classifier: SoA pages {[p + 1 for p in confident]}, "
+        f"uncertain {[p.page_num + 1 for p in uncertain]} (1-indexed)"
+    )
+    flagged = confident + [p.page_num for p in uncertain]
+    
+    if not confident:
+        return [], flagged, total_pages
+    
+    recall = classifier.holdout_recall()
+    if recall is None or recall < CLASSIFIER_MIN_HOLDOUT_RECALL:
+        logger.info(f"Classifier held-out recall {recall} is below {CLASSIFIER_MIN_HOLDOUT_RECALL}; "
+                    f"its pages are LLM candidates only")
+        return [], flagged, total_pages
+    
+    if not _classifier_agrees(confident, title_pages, heuristic_pages):
+        logger.info("Classifier pages disagree with title/heuristic pages; using heuristic + LLM detection")
+        return [], flagged, total_pages
+    
+    if not _covers_table_candidates(confident, predictions, title_pages, heuristic_pages):
+        logger.info("Classifier pages miss title/heuristic table pages; using heuristic + LLM detection")
+        return [], flagged, total_pages
+    
+    if not uncertain:
+        return confident, flagged, total_pages
+    
+    if use_llm and model_name:
+        confirmed = find_soa_pages_llm(pdf_path, model_name, [p.page_num for p in uncertain])
+        uncertain_nums = {p.page_num for p in uncertain}
+        return sorted(set(confident) | (set(confirmed) & uncertain_nums)), flagged, total_pages
+    
+    return sorted(set(confident) | {p.page_num for p in uncertain if p.probability >= 0.5}), flagged, total_pages
+
+
+def _classifier_agrees(pages: List[int], title_pages: List[int], heuristic_pages: List[int]) -> bool:
+    """
+    Check the classifier's confident pages against the title and heuristic passes.
+    
+    They agree when every page is a title/heuristic candidate or next to one
+    (continuation pages), and the pages include a title page or are mostly
+    heuristic candidates.
+    """
+    candidates = set(title_pages) | set(heuristic_pages)
+    near = candidates | {p - 1 for p in candidates} | {p + 1 for p in candidates}
+    if not set(pages) <= near:
+        return False
+    if set(pages) & set(title_pages):
+        return True
+    return 2 * len(set(pages) & set(heuristic_pages)) >= len(set(pages))
+
+
+def _covers_table_candidates(
+    pages: List[int],
+    predictions: list,
+    title_pages: List[int],
+    heuristic_pages: List[int],
+) -> bool:
+    """
+    Check the classifier's pages include every title/heuristic candidate with table features.
+    
+    predictions are the classifier's per-page PagePredictions. A candidate
+    has table features when the classifier saw X-mark grid cells on it; one left out suggests the classifier caught only part of
+    a multi-page table.
+    """
+    table_candidates = {
+        p for p in set(title_pages) | set(heuristic_pages)
+        if 0 <= p < len(predictions) and predictions[p].features.get("x_mark_density", 0.0) > 0
+    }
+    return table_candidates <= set(pages)
+
+
 def _find_soa_title_pages(pdf_path: str) -> List[int]:
     """
     Find pages that contain actual SoA table (not just mentions of it).
@@ -265,7 +427,7 @@ def _find_soa_title_pages(pdf_path: str) -> List[int]:
     - "Table X: Schedule of Activities" pattern (actual table title)
     - Combined presence of title AND table structure (column headers like Day, Visit)
     """
-    doc = fitz.open(pdf_path)
+    store = get_page_store(pdf_path)
     title_pages = []
     
     # Patterns for actual table titles (not TOC or references)
@@ -284,8 +446,8 @@ def _find_soa_title_pages(pdf_path: str) -> List[int]:
         r'\boutpatient\b',
     ]
     
-    for page_num in range(len(doc)):
-        text = doc[page_num].get_text().lower()
+    for page_num in range(store.page_count):
+        text = store.get_page(page_num).lower()
         
         # Method 1: Explicit table title pattern
         for pattern in table_title_patterns:
@@ -304,23 +466,27 @@ def _find_soa_title_pages(pdf_path: str) -> List[int]:
                     title_pages.append(page_num)
                     logger.debug(f"Page {page_num + 1}: Found title + {structure_count} structure indicators")
     
-    doc.close()
     return title_pages
 
 
-def _expand_adjacent_pages(pages: List[int], pdf_path: str) -> List[int]:
+def _expand_adjacent_pages(
+    pages: List[int],
+    pdf_path: str,
+    total_pages: Optional[int] = None,
+) -> List[int]:
     """
     Expand page list to include adjacent pages and fill gaps.
     
     SoA tables often span multiple pages, so if we find page N,
     we should also check page N+1 (and potentially N-1) for table continuation.
     Also fills in any gaps between detected pages (e.g., if 13 and 15 are detected, include 14).
+    Pass total_pages when already known to avoid re-opening the PDF.
     """
     if not pages:
         return pages
     
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
+    if total_pages is None:
+        total_pages = get_page_count(pdf_path)
     
     expanded = set(pages)
     
@@ -349,7 +515,6 @@ def _expand_adjacent_pages(pages: List[int], pdf_path: str) -> List[int]:
         expanded.add(max_page + 1)
         logger.debug(f"Added page {max_page + 2} (1-indexed) after SoA")
     
-    doc.close()
     return list(expanded)
 
 
@@ -364,14 +529,8 @@ def extract_soa_text(pdf_path: str, page_numbers: List[int]) -> str:
     Returns:
         Combined text from specified pages
     """
-    doc = fitz.open(pdf_path)
-    texts = []
-    
-    for page_num in page_numbers:
-        if 0 <= page_num < len(doc):
-            texts.append(doc[page_num].get_text())
-    
-    doc.close()
+    store = get_page_store(pdf_path)
+    texts = [store.get_page(p) for p in page_numbers if 0 <= p < store.page_count]
     return "\n\n---PAGE BREAK---\n\n".join(texts)
 
 
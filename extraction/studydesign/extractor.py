@@ -13,6 +13,11 @@ from typing import List, Optional, Dict, Any, Tuple
 
 from core.llm_client import call_llm
 from core.pdf_utils import extract_text_from_pages, get_page_count
+from core.page_cache import memoize_page_finder
+from core.page_store import get_page_store
+from core.retrieval import select_context_pages
+from core.constants import PHASE_TOKEN_BUDGETS
+from core.serialization import save_json
 from .schema import (
     StudyDesignData,
     InterventionalStudyDesign,
@@ -29,6 +34,11 @@ from .prompts import build_study_design_extraction_prompt
 
 logger = logging.getLogger(__name__)
 
+# Retrieval query used when no studydesign pages are detected
+CONTEXT_QUERY = (
+    "study design randomized blinded open label arms cohorts epochs treatment period screening follow-up"
+)
+
 
 @dataclass
 class StudyDesignExtractionResult:
@@ -41,6 +51,7 @@ class StudyDesignExtractionResult:
     model_used: Optional[str] = None
 
 
+@memoize_page_finder("studydesign")
 def find_study_design_pages(
     pdf_path: str,
     max_pages_to_scan: int = 30,
@@ -55,8 +66,6 @@ def find_study_design_pages(
     Returns:
         List of 0-indexed page numbers likely containing study design
     """
-    import fitz
-    
     design_keywords = [
         r'study\s+design',
         r'trial\s+design',
@@ -79,19 +88,16 @@ def find_study_design_pages(
     design_pages = []
     
     try:
-        doc = fitz.open(pdf_path)
-        total_pages = min(len(doc), max_pages_to_scan)
+        store = get_page_store(pdf_path)
+        total_pages = min(store.page_count, max_pages_to_scan)
         
         for page_num in range(total_pages):
-            page = doc[page_num]
-            text = page.get_text().lower()
+            text = store.get_page(page_num).lower()
             
             if pattern.search(text):
                 design_pages.append(page_num)
                 logger.debug(f"Found design keywords on page {page_num + 1}")
         
-        doc.close()
-        
         # If we found pages, also include adjacent pages for context
         if design_pages:
             expanded = set()
@@ -136,16 +142,20 @@ def extract_study_design(
         if pages is None:
             pages = find_study_design_pages(pdf_path)
             if not pages:
-                # Fallback to first 15 pages (synopsis usually has design info)
-                logger.warning("No design pages detected, scanning first 15 pages")
-                pages = list(range(min(15, get_page_count(pdf_path))))
+                # Fallback to the pages ranked best by BM25 retrieval
+                logger.warning("No design pages detected, using retrieval-ranked pages")
+                pages = select_context_pages(
+                    pdf_path, CONTEXT_QUERY, PHASE_TOKEN_BUDGETS["studydesign"]
+                ) or list(range(min(15, get_page_count(pdf_path))))
         
         result.pages_used = pages
         
         # Extract text from pages
         if protocol_text is None:
             logger.info(f"Extracting text from pages {pages}...")
-            protocol_text = extract_text_from_pages(pdf_path, pages)
+            protocol_text = extract_text_from_pages(
+                pdf_path, pages, phase="studydesign", model_name=model_name, query=CONTEXT_QUERY,
+            )
         
         if not protocol_text:
             result.error = "Failed to extract text from PDF"
@@ -412,7 +422,6 @@ def save_study_design_result(
     if result.raw_response:
         output["rawResponse"] = result.raw_response
         
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, output)
         
     logger.info(f"Saved study design to {output_path}")
@@ -33,6 +33,7 @@ from core.usdm_types import (
 )
 from core.provenance import ProvenanceTracker, ProvenanceSource
 from core.constants import USDM_VERSION, SYSTEM_NAME, SYSTEM_VERSION
+from core.serialization import save_json
 
 logger = logging.getLogger(__name__)
 
@@ -381,8 +382,7 @@ def save_extraction_result(
     # Build and save USDM output
     usdm_output = build_usdm_output(result, header)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(usdm_output, f, indent=2, ensure_ascii=False)
+    save_json(output_path, usdm_output)
     
     logger.info(f"Saved USDM output to {output_path}")
     
@@ -30,10 +30,13 @@ from typing import List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
-from core.llm_client import get_llm_client, LLMConfig
+from core.llm_client import (
+    get_llm_client, LLMConfig, file_digests, genai_system, image_request_attrs, replayed, request_slot,
+)
 from core.json_utils import parse_llm_json
 from core.usdm_types import HeaderStructure, ActivityTimepoint
 from core.provenance import ProvenanceTracker, ProvenanceSource
+from core.serialization import save_json
 
 logger = logging.getLogger(__name__)
 
@@ -231,12 +234,17 @@ def validate_extraction(
         )
         
         # Call vision model
-        if 'gemini' in model_name.lower():
-            result = _validate_with_gemini(prompt, image_paths, model_name)
-        elif 'claude' in model_name.lower():
-            result = _validate_with_claude(prompt, image_paths, model_name)
-        else:
-            result = _validate_with_openai(prompt, image_paths, model_name)
+        def call_model() -> dict:
+            if 'gemini' in model_name.lower():
+                return _validate_with_gemini(prompt, image_paths, model_name)
+            elif 'claude' in model_name.lower():
+                return _validate_with_claude(prompt, image_paths, model_name)
+            return _validate_with_openai(prompt, image_paths, model_name)
+        
+        result = replayed(
+            ("vision.validate", model_name, prompt, file_digests(image_paths)), call_model,
+            **{"gen_ai.system": genai_system(model_name), "gen_ai.request.model": model_name},
+        )
         
         # Parse results into issues
         issues = []
@@ -309,9 +317,9 @@ def _validate_with_gemini(prompt: str, image_paths: List[str], model_name: str)
     content_parts = [prompt]
     
     for img_path in image_paths:
-        img = Image.open(img_path)
         img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG')
+        with Image.open(img_path) as img:
+            img.save(img_bytes, format='PNG')
         content_parts.append({
             'inline_data': {
                 'mime_type': 'image/png',
@@ -319,13 +327,14 @@ def _validate_with_gemini(prompt: str, image_paths: List[str], model_name: str)
             }
         })
     
-    response = model.generate_content(
-        content_parts,
-        generation_config=genai.types.GenerationConfig(
-            temperature=0.1,
-            response_mime_type="application/json"
+    with request_slot(**image_request_attrs(model_name, image_paths)):
+        response = model.generate_content(
+            content_parts,
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.1,
+                response_mime_type="application/json"
+            )
         )
-    )
     
     return {'response': response.text or ""}
 
@@ -365,7 +374,8 @@ def _validate_with_openai(prompt: str, image_paths: List[str], model_name: str)
     if not is_reasoning:
         params["temperature"] = 0.1
     
-    response = client.responses.create(**params)
+    with request_slot(**image_request_attrs(model_name, image_paths)):
+        response = client.responses.create(**params)
     
     # Extract content from Responses API response
     result = ""
@@ -418,12 +428,13 @@ def _validate_with_claude(prompt: str, image_paths: List[str], model_name: str)
     # Add JSON mode instruction to system
     system = "You must respond with valid JSON only. No markdown code blocks, no explanation, just the JSON object."
     
-    response = client.messages.create(
-        model=model_name,
-        max_tokens=4096,
-        system=system,
-        messages=[{"role": "user", "content": content}]
-    )
+    with request_slot(**image_request_attrs(model_name, image_paths)):
+        response = client.messages.create(
+            model=model_name,
+            max_tokens=4096,
+            system=system,
+            messages=[{"role": "user", "content": content}]
+        )
     
     # Extract content from response
     result = ""
@@ -507,6 +518,5 @@ def apply_validation_fixes(
 
 def save_validation_result(validation: ValidationResult, output_path: str) -> None:
     """Save validation result to JSON file."""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(validation.to_dict(), f, indent=2, ensure_ascii=False)
+    save_json(output_path, validation.to_dict())
     logger.info(f"Saved validation result to {output_path}")
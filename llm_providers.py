@@ -10,12 +10,218 @@ Usage:
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Any
 from dataclasses import dataclass
+import hashlib
+import importlib
+import json
 import os
-from openai import OpenAI
-import google.generativeai as genai
-import anthropic
+import threading
+import time
+
+# Vendor SDKs take seconds to import, so they load on first use: a provider
+# gets them through _sdk(), other code as attributes (llm_providers.genai)
+_VENDOR_SDKS = {
+    "OpenAI": ("openai", "OpenAI"),
+    "genai": ("google.generativeai", None),
+    "anthropic": ("anthropic", None),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _VENDOR_SDKS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _VENDOR_SDKS[name]
+    module = importlib.import_module(module_name)
+    value = getattr(module, attr) if attr else module
+    globals()[name] = value
+    return value
+
+
+def _sdk(name: str) -> Any:
+    """Vendor SDK object by its module-level name (honours one patched in by tests)."""
+    value = globals().get(name)
+    return value if value is not None else __getattr__(name)
+
+
+# Optional cap on concurrent API requests. The batch runner (main.py) installs
+# a multiprocessing semaphore so the limit holds across all worker processes.
+_request_slots = None
+
+# Optional per-provider caps, keyed by gen_ai.system ("openai", "gemini",
+# "anthropic"), held on top of the global cap (testing/benchmark_models.py)
+_provider_slots: Dict[str, Any] = {}
+
+
+def set_request_limit(slots, provider: Optional[str] = None) -> None:
+    """
+    Limit concurrent LLM API requests.
+
+    Args:
+        slots: Maximum number of requests (int), a semaphore shared with
+               other processes, or None for no limit
+        provider: Limit only this provider's requests (its gen_ai.system
+                  name); by default the limit covers all requests
+    """
+    global _request_slots
+    if isinstance(slots, int):
+        slots = threading.BoundedSemaphore(slots)
+    if provider is None:
+        _request_slots = slots
+    elif slots is None:
+        _provider_slots.pop(provider, None)
+    else:
+        _provider_slots[provider] = slots
+
+
+@contextmanager
+def request_slot(**attrs):
+    """
+    Hold one request slot for the duration of an API call.
+
+    The call is traced as an llm.request span (waiting for a slot as
+    llm.slot_wait); attrs are added to it and the span is yielded so the
+    caller can record token usage (see record_usage).
+    """
+    # Lazy: core imports this module via core.llm_client
+    from core.profiling import span
+
+    slots = [s for s in (_provider_slots.get(attrs.get("gen_ai.system")), _request_slots) if s is not None]
+    if not slots:
+        with span("llm.request", **attrs) as call:
+            yield call
+        return
+    with span("llm.slot_wait"):
+        for slot in slots:
+            slot.acquire()
+    try:
+        with span("llm.request", **attrs) as call:
+            yield call
+    finally:
+        for slot in reversed(slots):
+            slot.release()
+
+
+def record_usage(call, usage: Optional[Dict[str, int]], finish_reason: Optional[str] = None) -> None:
+    """Add token usage (OpenTelemetry gen_ai.* names) to an llm.request span."""
+    if call is None:
+        return
+    if usage:
+        call.attrs["gen_ai.usage.input_tokens"] = usage.get("prompt_tokens") or 0
+        call.attrs["gen_ai.usage.output_tokens"] = usage.get("completion_tokens") or 0
+    if finish_reason:
+        call.attrs["gen_ai.response.finish_reasons"] = [str(finish_reason)]
+
+
+class ReplayMiss(RuntimeError):
+    """A replay-only cache has no recorded response for a request."""
+
+
+class ReplayCache:
+    """
+    Recorded LLM responses keyed by a hash of the request, for reproducible
+    reruns (testing/benchmark_models.py --replay-cache).
+
+    Modes:
+        auto:   serve recorded responses; call the API and record on a miss
+        replay: serve recorded responses only; a miss raises ReplayMiss
+        record: always call the API and (re)record the response
+
+    One JSON file per response, written atomically, so worker processes
+    can share a directory.
+    """
+
+    MODES = ("auto", "replay", "record")
+
+    def __init__(self, directory: str, mode: str = "auto"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown replay mode '{mode}' (expected one of {self.MODES})")
+        self.directory = directory
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        if self.mode == "record":
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            if self.mode == "replay":
+                raise ReplayMiss(f"No recorded response for request {key[:12]} in {self.directory}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def put(self, key: str, record: Dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+_replay_cache: Optional[ReplayCache] = None
+
+
+def set_replay_cache(cache: Optional[ReplayCache]) -> None:
+    """Serve and record LLM responses through a ReplayCache (None to stop)."""
+    global _replay_cache
+    _replay_cache = cache
+
+
+def get_replay_cache() -> Optional[ReplayCache]:
+    return _replay_cache
+
+
+def file_digests(paths: List[str]) -> List[str]:
+    """Content hashes of request attachments (page images) for replay keys."""
+    digests = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            digests.append(hashlib.sha256(f.read()).hexdigest())
+    return digests
+
+
+def replayed(key_parts: tuple, call: Callable[[], Dict], **attrs) -> Dict:
+    """
+    Return call()'s JSON-serializable result through the replay cache.
+
+    Without a cache this is just call(). A recorded result is returned
+    without calling the API, traced as an llm.request span tagged
+    cache.hit with the original call's duration as p2u.replayed_seconds;
+    attrs name the provider and model on that span. Results carrying an
+    "error" key are not recorded.
+    """
+    cache = _replay_cache
+    if cache is None:
+        return call()
+    key = cache.key(*key_parts)
+    record = cache.get(key)
+    if record is not None:
+        from core.profiling import span
+
+        with span("llm.request", **attrs, **{"cache.hit": True,
+                                             "p2u.replayed_seconds": record.get("seconds", 0.0)}):
+            pass
+        return record["result"]
+    start = time.perf_counter()
+    result = call()
+    if not (isinstance(result, dict) and "error" in result):
+        cache.put(key, {"result": result, "seconds": round(time.perf_counter() - start, 3)})
+    return result
 
 
 @dataclass
@@ -45,6 +251,9 @@ class LLMResponse:
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
     
+    # OpenTelemetry gen_ai.system value for trace spans
+    GENAI_SYSTEM = "unknown"
+    
     def __init__(self, model: str, api_key: Optional[str] = None):
         """
         Initialize provider.
@@ -84,10 +293,69 @@ class LLMProvider(ABC):
         """Check if model supports native JSON mode."""
         pass
     
+    def _span_attrs(self) -> Dict[str, str]:
+        """Attributes for this provider's llm.request spans."""
+        return {"gen_ai.system": self.GENAI_SYSTEM, "gen_ai.request.model": self.model}
+    
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(model='{self.model}')"
 
 
+class ReplayProvider(LLMProvider):
+    """
+    Serves generate() from the replay cache. The real provider is only
+    created on a miss, so a replay-only rerun needs no API keys.
+    """
+
+    def __init__(self, provider_class: type, model: str, api_key: Optional[str], cache: ReplayCache):
+        self.provider_class = provider_class
+        self.model = model
+        self.api_key = api_key
+        self.cache = cache
+        self.GENAI_SYSTEM = provider_class.GENAI_SYSTEM
+        self._provider: Optional[LLMProvider] = None
+
+    @property
+    def provider(self) -> LLMProvider:
+        if self._provider is None:
+            self._provider = self.provider_class(model=self.model, api_key=self.api_key)
+        return self._provider
+
+    def _get_api_key_from_env(self) -> str:
+        return self.provider.api_key
+
+    def supports_json_mode(self) -> bool:
+        # Class-level answer; doesn't need the real provider (or its API key)
+        return self.provider_class.supports_json_mode(self)
+
+    def generate(
+        self,
+        messages: List[Dict[str, str]],
+        config: Optional[LLMConfig] = None
+    ) -> LLMResponse:
+        key = self.cache.key("generate", self.model, messages, (config or LLMConfig()).to_dict())
+        record = self.cache.get(key)
+        if record is not None:
+            from core.profiling import span
+
+            with span("llm.request", **self._span_attrs(), **{"cache.hit": True,
+                                                             "p2u.replayed_seconds": record.get("seconds", 0.0)}) as call:
+                record_usage(call, record.get("usage"), record.get("finish_reason"))
+            return LLMResponse(content=record["content"], model=record.get("model", self.model),
+                               usage=record.get("usage"), finish_reason=record.get("finish_reason"))
+
+        start = time.perf_counter()
+        response = self.provider.generate(messages, config)
+        self.cache.put(key, {
+            "content": response.content,
+            "model": response.model,
+            "usage": response.usage,
+            "finish_reason": None if response.finish_reason is None else str(response.finish_reason),
+            "seconds": round(time.perf_counter() - start, 3),
+        })
+        return response
+
+
 class OpenAIProvider(LLMProvider):
     """
     OpenAI provider supporting GPT-4, GPT-4o, GPT-5 (when available).
@@ -98,6 +366,8 @@ class OpenAIProvider(LLMProvider):
     - High token limits
     """
     
+    GENAI_SYSTEM = "openai"
+    
     SUPPORTED_MODELS = [
         'gpt-4', 'gpt-4-turbo', 'gpt-4o', 'gpt-4o-mini',
         'o1', 'o1-mini', 'o3', 'o3-mini', 'o3-mini-high',
@@ -112,7 +382,7 @@ class OpenAIProvider(LLMProvider):
     
     def __init__(self, model: str, api_key: Optional[str] = None):
         super().__init__(model, api_key)
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = _sdk("OpenAI")(api_key=self.api_key)
     
     def _get_api_key_from_env(self) -> str:
         """Get OpenAI API key from environment."""
@@ -176,7 +446,8 @@ class OpenAIProvider(LLMProvider):
         
         # Make API call using Responses API
         try:
-            response = self.client.responses.create(**params)
+            with request_slot(**self._span_attrs()) as call:
+                response = self.client.responses.create(**params)
             
             # Extract usage information
             usage = None
@@ -186,6 +457,7 @@ class OpenAIProvider(LLMProvider):
                     "completion_tokens": getattr(response.usage, 'output_tokens', 0),
                     "total_tokens": getattr(response.usage, 'total_tokens', 0)
                 }
+            record_usage(call, usage, getattr(response, 'status', None))
             
             # Extract content from response - try output_text first (simpler)
             content = ""
@@ -221,6 +493,8 @@ class GeminiProvider(LLMProvider):
     - Multimodal support
     """
     
+    GENAI_SYSTEM = "gemini"
+    
     SUPPORTED_MODELS = [
         # Gemini 3.x (preview)
         'gemini-3-pro-preview',
@@ -237,7 +511,7 @@ class GeminiProvider(LLMProvider):
     
     def __init__(self, model: str, api_key: Optional[str] = None):
         super().__init__(model, api_key)
-        genai.configure(api_key=self.api_key)
+        _sdk("genai").configure(api_key=self.api_key)
     
     def _get_api_key_from_env(self) -> str:
         """Get Google API key from environment."""
@@ -284,6 +558,7 @@ class GeminiProvider(LLMProvider):
         if config.json_mode and self.supports_json_mode():
             gen_config_dict["response_mime_type"] = "application/json"
         
+        genai = _sdk("genai")
         generation_config = genai.types.GenerationConfig(**gen_config_dict)
         
         # Convert messages to Gemini format
@@ -299,7 +574,8 @@ class GeminiProvider(LLMProvider):
         
         # Make API call
         try:
-            response = model.generate_content(full_prompt)
+            with request_slot(**self._span_attrs()) as call:
+                response = model.generate_content(full_prompt)
             
             # Extract usage information (if available)
             usage = None
@@ -309,6 +585,7 @@ class GeminiProvider(LLMProvider):
                     "completion_tokens": response.usage_metadata.candidates_token_count,
                     "total_tokens": response.usage_metadata.total_token_count
                 }
+            record_usage(call, usage)
             
             return LLMResponse(
                 content=response.text,
@@ -359,6 +636,8 @@ class ClaudeProvider(LLMProvider):
     - Vision support (Claude 3+)
     """
     
+    GENAI_SYSTEM = "anthropic"
+    
     SUPPORTED_MODELS = [
         # Claude Opus 4.5 (latest, most powerful)
         'claude-opus-4-5-20250918', 'claude-opus-4-5',
@@ -380,7 +659,7 @@ class ClaudeProvider(LLMProvider):
     
     def __init__(self, model: str, api_key: Optional[str] = None):
         super().__init__(model, api_key)
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = _sdk("anthropic").Anthropic(api_key=self.api_key)
     
     def _get_api_key_from_env(self) -> str:
         """Get Anthropic API key from environment."""
@@ -456,7 +735,8 @@ class ClaudeProvider(LLMProvider):
         
         # Make API call
         try:
-            response = self.client.messages.create(**params)
+            with request_slot(**self._span_attrs()) as call:
+                response = self.client.messages.create(**params)
             
             # Extract content from response
             content = ""
@@ -489,6 +769,7 @@ class ClaudeProvider(LLMProvider):
                     "completion_tokens": response.usage.output_tokens,
                     "total_tokens": response.usage.input_tokens + response.usage.output_tokens
                 }
+            record_usage(call, usage, response.stop_reason)
             
             return LLMResponse(
                 content=content,
@@ -543,6 +824,8 @@ class LLMProviderFactory:
             )
         
         provider_class = cls._providers[provider_name]
+        if _replay_cache is not None:
+            return ReplayProvider(provider_class, model, api_key, _replay_cache)
         return provider_class(model=model, api_key=api_key)
     
     @classmethod
@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+"""
+Protocol2USDM Batch Runner - Extract many protocols concurrently.
+
+Runs the main_v2.py pipeline for every protocol in a directory, glob or
+manifest file. Protocols run in parallel across a process pool, and one LLM
+request limit is shared by all workers so the pool can't exceed the
+provider's rate limits.
+
+Companion documents are paired by naming convention:
+    protocol.pdf  +  protocol_SAP.pdf  +  protocol_sites.csv / .xlsx
+
+Progress, failures and a summary table are written to
+<output_root>/batch_manifest.json; each protocol gets <output_root>/<name>/
+with its own run.log. Re-running into the same output root reuses each
+protocol's checkpoints (see core/checkpoint.py).
+
+Every protocol's trace is nested under one batch trace (passed down via the
+TRACEPARENT environment variable) and merged into <output_root>/trace.jsonl,
+with a batch.job span per protocol covering the time it spent queued.
+
+With --memory-budget the pool only starts a protocol when its expected peak
+RSS (from the run manifest of an earlier run, else the largest peak seen so
+far in the batch) fits alongside the protocols already running.
+
+Usage:
+    python main.py input/ --workers 4
+    python main.py "input/*Diabetes*.pdf" --full-protocol
+    python main.py batch.json --workers 3 --llm-concurrency 6 --full-protocol
+    python main.py input/ --workers 8 --memory-budget 12G
+
+Arguments main.py doesn't know (e.g. --full-protocol, --no-validate) are
+passed through to main_v2.py for every protocol.
+
+Manifest files are JSON (a list of paths or {"pdf", "sap", "sites"} objects)
+or plain text (one PDF path per line). Relative paths are resolved against
+the manifest's directory.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.checkpoint import MANIFEST_NAME as RUN_MANIFEST_NAME, RunCancelled
+from core.constants import DEFAULT_MODEL
+from core.memory import MB, available_memory, parse_size, reset_memory, run_peak_rss
+from core.profiling import (
+    TRACE_JSONL_NAME, TRACE_OTLP_NAME, TRACEPARENT_PATTERN,
+    append_trace, load_trace, make_span, make_traceparent, new_span_id,
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(levelname)s] %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "batch_manifest.json"
+JOB_LOG_NAME = "run.log"
+
+SAP_SUFFIXES = ("_SAP", "_sap")
+SITES_SUFFIXES = ("_sites", "_Sites", "_SITES")
+SITES_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+# main_v2 options the batch runner sets per protocol
+RESERVED_ARGS = {"--output-dir", "-o", "--sap", "--sites", "--pages", "-p", "--view", "--model", "-m"}
+
+# Peak RSS assumed for a protocol that has never been run (full-protocol runs
+# with vision validation sit around 1 GB); --memory-budget auto uses this
+# share of the memory available when the batch starts
+DEFAULT_JOB_MEMORY = 1536 * MB
+AUTO_BUDGET_FRACTION = 0.8
+
+
+
+def check_passthrough_args(args: List[str]) -> None:
+    """
+    Reject main_v2 options the runner sets per protocol (RESERVED_ARGS).
+
+    Raises:
+        ValueError: If args contain a reserved option
+    """
+    reserved = [a for a in args if a.split("=")[0] in RESERVED_ARGS]
+    if reserved:
+        raise ValueError(f"{', '.join(reserved)} can't be passed through; the batch runner sets them per protocol")
+
+
+@dataclass
+class BatchJob:
+    """One protocol to process, with its paired documents."""
+    pdf_path: str
+    sap_path: Optional[str] = None
+    sites_path: Optional[str] = None
+    output_dir: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return Path(self.output_dir or self.pdf_path).stem
+
+
+@dataclass
+class BatchManifest:
+    """Status of every job in a batch, written as batch_manifest.json."""
+    output_root: str
+    model: str
+    workers: int
+    llm_concurrency: Optional[int]
+    main_args: List[str] = field(default_factory=list)
+    memory_budget: Optional[int] = None
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+    jobs: Dict[str, Dict] = field(default_factory=dict)
+
+    def add(self, job: BatchJob) -> None:
+        self.jobs[job.pdf_path] = {**asdict(job), "status": "queued"}
+
+    def update(self, pdf_path: str, outcome: Dict) -> Dict:
+        entry = self.jobs[pdf_path]
+        entry.update(outcome)
+        entry["status"] = "done" if outcome.get("exitCode", 0) == 0 else "failed"
+        return entry
+
+    def summary(self) -> Dict:
+        entries = list(self.jobs.values())
+        done = [e for e in entries if e["status"] == "done"]
+        failed = [e for e in entries if e["status"] == "failed"]
+        durations = [e.get("durationSeconds", 0) for e in entries]
+        peaks = [e["peakRssMb"] for e in entries if e.get("peakRssMb")]
+        started = datetime.fromisoformat(self.started_at)
+        wall = (datetime.fromisoformat(self.finished_at) if self.finished_at else datetime.now()) - started
+        wall_seconds = round(wall.total_seconds(), 1)
+        return {
+            "total": len(entries),
+            "succeeded": len(done),
+            "failed": len(failed),
+            "pending": len(entries) - len(done) - len(failed),
+            "wallSeconds": wall_seconds,
+            "protocolSeconds": round(sum(durations), 1),
+            "speedup": round(sum(durations) / wall_seconds, 2) if wall_seconds else None,
+            "maxPeakRssMb": max(peaks) if peaks else None,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "outputRoot": self.output_root,
+            "model": self.model,
+            "workers": self.workers,
+            "llmConcurrency": self.llm_concurrency,
+            "memoryBudgetMb": round(self.memory_budget / MB) if self.memory_budget else None,
+            "mainArgs": self.main_args,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "summary": self.summary(),
+            "jobs": list(self.jobs.values()),
+        }
+
+    def save(self) -> Path:
+        """Write the manifest atomically (it is rewritten after every job)."""
+        os.makedirs(self.output_root, exist_ok=True)
+        path = Path(self.output_root) / MANIFEST_NAME
+        fd, tmp = tempfile.mkstemp(dir=self.output_root, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+        return path
+
+
+def is_companion(pdf_path: str) -> bool:
+    """True for SAP PDFs that belong to another protocol."""
+    return Path(pdf_path).stem.endswith(SAP_SUFFIXES)
+
+
+def find_companions(pdf_path: str) -> BatchJob:
+    """Pair a protocol PDF with <stem>_SAP.pdf and <stem>_sites.csv/xlsx next to it."""
+    path = Path(pdf_path)
+    job = BatchJob(pdf_path=os.path.abspath(pdf_path))
+    for suffix in SAP_SUFFIXES:
+        sap = path.with_name(f"{path.stem}{suffix}.pdf")
+        if sap.exists():
+            job.sap_path = os.path.abspath(sap)
+            break
+    for suffix in SITES_SUFFIXES:
+        for ext in SITES_EXTENSIONS:
+            sites = path.with_name(f"{path.stem}{suffix}{ext}")
+            if sites.exists() and job.sites_path is None:
+                job.sites_path = os.path.abspath(sites)
+    return job
+
+
+def _load_manifest_file(manifest_path: Path) -> List[BatchJob]:
+    base = manifest_path.parent
+
+    def resolve(p: Optional[str]) -> Optional[str]:
+        if not p:
+            return None
+        return os.path.abspath(p if os.path.isabs(p) else base / p)
+
+    if manifest_path.suffix.lower() == ".json":
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        if isinstance(entries, dict):
+            entries = entries.get("jobs", [])
+    else:
+        lines = manifest_path.read_text(encoding='utf-8').splitlines()
+        entries = [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            jobs.append(find_companions(resolve(entry)))
+        else:
+            # Also accepts the job entries of a previous batch_manifest.json
+            job = find_companions(resolve(entry.get("pdf") or entry["pdf_path"]))
+            job.sap_path = resolve(entry.get("sap") or entry.get("sap_path")) or job.sap_path
+            job.sites_path = resolve(entry.get("sites") or entry.get("sites_path")) or job.sites_path
+            jobs.append(job)
+    return jobs
+
+
+def discover_jobs(source: str) -> List[BatchJob]:
+    """
+    Find the protocols to process.
+
+    Args:
+        source: A directory of PDFs, a glob pattern, a single PDF, or a
+                .json/.txt manifest
+
+    Returns:
+        Jobs sorted by path, SAP PDFs paired rather than run on their own
+    """
+    path = Path(source)
+    if path.is_dir():
+        pdfs = [str(p) for p in path.iterdir() if p.suffix.lower() == ".pdf"]
+    elif path.is_file() and path.suffix.lower() != ".pdf":
+        return _load_manifest_file(path)
+    elif path.is_file():
+        pdfs = [source]
+    else:
+        pdfs = [p for p in glob.glob(source) if p.lower().endswith(".pdf")]
+
+    return [find_companions(p) for p in sorted(pdfs) if not is_companion(p)]
+
+
+def assign_output_dirs(jobs: List[BatchJob], output_root: str) -> None:
+    """Give every job <output_root>/<pdf stem>, de-duplicating equal stems."""
+    used: Dict[str, int] = {}
+    for job in jobs:
+        stem = Path(job.pdf_path).stem
+        used[stem] = used.get(stem, 0) + 1
+        name = stem if used[stem] == 1 else f"{stem}_{used[stem]}"
+        job.output_dir = os.path.abspath(os.path.join(output_root, name))
+
+
+# Worker state, installed by _init_worker in every pool process
+_jobs: Dict[str, BatchJob] = {}
+_main_args: List[str] = []
+
+
+def _init_worker(jobs: Dict[str, BatchJob], main_args: List[str], llm_slots) -> None:
+    """Pool initializer: job table, pass-through arguments and the shared LLM limit."""
+    from core.llm_client import set_request_limit
+
+    global _jobs, _main_args
+    _jobs = jobs
+    _main_args = list(main_args)
+    set_request_limit(llm_slots)
+
+
+def run_job(job: BatchJob, model: str, main_args: Optional[List[str]] = None) -> Dict:
+    """
+    Run main_v2 for one protocol in this process.
+
+    Logs go to <output_dir>/run.log as well as the console.
+
+    Returns:
+        Outcome dict for the batch manifest (exitCode, durationSeconds,
+        error, peakRssMb)
+    """
+    import main_v2
+
+    output_dir = job.output_dir or os.path.join("output", Path(job.pdf_path).stem)
+    os.makedirs(output_dir, exist_ok=True)
+
+    argv = [job.pdf_path, "--model", model, "--output-dir", output_dir]
+    if job.sap_path:
+        argv += ["--sap", job.sap_path]
+    if job.sites_path:
+        argv += ["--sites", job.sites_path]
+    argv += list(main_args or [])
+
+    handler = logging.FileHandler(os.path.join(output_dir, JOB_LOG_NAME), encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+
+    # Nest the protocol's trace under its batch.job span
+    batch_traceparent = os.environ.get("TRACEPARENT")
+    match = TRACEPARENT_PATTERN.match(batch_traceparent or "")
+    if match:
+        os.environ["TRACEPARENT"] = make_traceparent(match.group(1), job_span_id(match.group(1), job))
+
+    start = time.time()
+    error = None
+    reset_memory()
+    try:
+        main_v2.main(argv)
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except RunCancelled as e:
+        exit_code, error = 1, f"Cancelled before step {e}"
+    except Exception as e:
+        exit_code, error = 1, f"{type(e).__name__}: {e}"
+        logger.exception(f"{job.name} crashed")
+    finally:
+        root.removeHandler(handler)
+        handler.close()
+        if match:
+            os.environ["TRACEPARENT"] = batch_traceparent
+
+    if exit_code and not error:
+        error = f"main_v2 exited with status {exit_code} (see {JOB_LOG_NAME})"
+    return {
+        "exitCode": exit_code,
+        "durationSeconds": round(time.time() - start, 1),
+        "error": error,
+        "peakRssMb": round(run_peak_rss() / MB, 1),
+        "startedAt": datetime.fromtimestamp(start).isoformat(),
+        "finishedAt": datetime.now().isoformat(),
+    }
+
+
+def previous_peak_rss(job: BatchJob) -> Optional[int]:
+    """Peak RSS in bytes of the job's last run, from its run manifest."""
+    path = Path(job.output_dir or "") / RUN_MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            peak = json.load(f).get("memory", {}).get("rssPeakMb")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return int(peak * MB) if peak else None
+
+
+@dataclass
+class MemoryBudget:
+    """Admit jobs to the pool while their expected peak RSS fits the budget."""
+    limit: int
+    default_job: int = DEFAULT_JOB_MEMORY
+    largest_seen: int = 0
+    running: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def committed(self) -> int:
+        return sum(self.running.values())
+
+    def estimate(self, job: BatchJob) -> int:
+        """The job's peak from its last run, else the largest seen (or assumed) peak."""
+        return previous_peak_rss(job) or max(self.default_job, self.largest_seen)
+
+    def fits(self, job: BatchJob) -> bool:
+        # A job bigger than the whole budget still runs, on its own
+        return not self.running or self.committed + self.estimate(job) <= self.limit
+
+    def start(self, job: BatchJob) -> None:
+        self.running[job.pdf_path] = self.estimate(job)
+
+    def finish(self, job: BatchJob, outcome: Dict) -> None:
+        self.running.pop(job.pdf_path, None)
+        peak = int((outcome.get("peakRssMb") or 0) * MB)
+        self.largest_seen = max(self.largest_seen, peak)
+
+
+def job_span_id(trace: str, job: BatchJob) -> str:
+    """Span id of a job's batch.job span (derivable in the parent and the worker)."""
+    return hashlib.sha256(f"{trace}:{job.pdf_path}".encode()).hexdigest()[:16]
+
+
+def _job_trace_records(trace: str, batch_span: str, job: BatchJob, queued_at: float, outcome: Dict) -> List[Dict]:
+    """The job's own spans (if it got far enough to write them) plus its batch.job span."""
+    records: List[Dict] = []
+    for name in (TRACE_JSONL_NAME, TRACE_OTLP_NAME):
+        path = Path(job.output_dir or "") / name
+        if path.exists():
+            try:
+                records = [r for r in load_trace(str(path)) if r.get("traceId") == trace]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not read trace of {job.name}: {e}")
+            break
+
+    finished = time.time()
+    started = queued_at
+    if outcome.get("startedAt"):
+        started = datetime.fromisoformat(outcome["startedAt"]).timestamp()
+    records.append(make_span(
+        trace, job_span_id(trace, job), batch_span, "batch.job", queued_at, finished,
+        attributes={
+            "p2u.protocol": job.name,
+            "p2u.queue_seconds": round(max(0.0, started - queued_at), 3),
+            "p2u.exit_code": outcome.get("exitCode"),
+            "memory.rss_peak_mb": outcome.get("peakRssMb"),
+        },
+        error=outcome.get("error"),
+    ))
+    return records
+
+
+def process_single_pdf(pdf_path: str, model: str) -> Dict:
+    """
+    Run one protocol of the batch (pool task).
+
+    The job's paired documents and output directory come from the job table
+    installed by _init_worker.
+    """
+    job = _jobs.get(pdf_path) or find_companions(pdf_path)
+    return run_job(job, model, _main_args)
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    model: str,
+    output_root: str,
+    workers: int = 1,
+    llm_concurrency: Optional[int] = None,
+    main_args: Optional[List[str]] = None,
+    memory_budget: Optional[int] = None,
+    job_memory: Optional[int] = None,
+) -> BatchManifest:
+    """
+    Process jobs across a process pool and record progress in the manifest.
+
+    Args:
+        jobs: Protocols to run (see discover_jobs)
+        model: LLM model for every protocol
+        output_root: Directory for the batch manifest and per-protocol outputs
+        workers: Worker processes; 1 runs the jobs in this process
+        llm_concurrency: Maximum LLM requests in flight across all workers
+        main_args: Extra main_v2.py arguments for every protocol
+        memory_budget: Bytes of peak RSS the running protocols may add up
+                       to; the pool starts fewer than `workers` protocols
+                       at a time to stay under it
+        job_memory: Peak RSS assumed for protocols without an earlier run
+                    (default: DEFAULT_JOB_MEMORY)
+
+    Returns:
+        The final BatchManifest (also saved to output_root)
+    """
+    main_args = list(main_args or [])
+    assign_output_dirs(jobs, output_root)
+    manifest = BatchManifest(output_root, model, workers, llm_concurrency, main_args, memory_budget)
+    for job in jobs:
+        manifest.add(job)
+    manifest.save()
+
+    job_table = {job.pdf_path: job for job in jobs}
+    total = len(jobs)
+
+    # One trace for the whole batch; workers inherit it through the environment
+    trace, batch_span = uuid.uuid4().hex, new_span_id()
+    trace_path = os.path.join(output_root, TRACE_JSONL_NAME)
+    if os.path.exists(trace_path):
+        os.remove(trace_path)
+    previous_traceparent = os.environ.get("TRACEPARENT")
+    os.environ["TRACEPARENT"] = make_traceparent(trace, batch_span)
+    batch_start = time.time()
+
+    def record(job: BatchJob, outcome: Optional[Dict]) -> None:
+        entry = manifest.update(job.pdf_path, outcome or {})
+        manifest.save()
+        append_trace(trace_path, _job_trace_records(trace, batch_span, job, batch_start, outcome or {}))
+        finished = sum(1 for e in manifest.jobs.values() if e["status"] != "queued")
+        mark = "✓" if entry["status"] == "done" else "✗"
+        logger.info(f"[{finished}/{total}] {mark} {job.name} ({entry.get('durationSeconds', 0)}s)")
+        if entry.get("error"):
+            logger.warning(f"    {entry['error']}")
+
+    if workers <= 1:
+        _init_worker(job_table, main_args, llm_concurrency)
+        for job in jobs:
+            try:
+                outcome = process_single_pdf(job.pdf_path, model)
+            except Exception as e:
+                outcome = {"exitCode": 1, "error": f"{type(e).__name__}: {e}"}
+            record(job, outcome)
+    else:
+        # spawn: LLM SDK clients and gRPC channels don't survive fork
+        ctx = multiprocessing.get_context("spawn")
+        llm_slots = ctx.BoundedSemaphore(llm_concurrency) if llm_concurrency else None
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(job_table, main_args, llm_slots),
+        ) as pool:
+            budget = MemoryBudget(memory_budget, job_memory or DEFAULT_JOB_MEMORY) if memory_budget else None
+            pending = list(jobs)
+            futures: Dict = {}
+            held: Optional[str] = None
+            while pending or futures:
+                # Jobs start in order; the next one waits until the budget has room
+                while pending and len(futures) < workers:
+                    job = pending[0]
+                    if budget and not budget.fits(job):
+                        if held != job.pdf_path:
+                            held = job.pdf_path
+                            logger.info(
+                                f"Memory budget: {job.name} (~{budget.estimate(job) // MB} MB) waits, "
+                                f"{budget.committed // MB} of {budget.limit // MB} MB in use by "
+                                f"{len(futures)} protocol(s)"
+                            )
+                        break
+                    pending.pop(0)
+                    if budget:
+                        budget.start(job)
+                    futures[pool.submit(process_single_pdf, job.pdf_path, model)] = job
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {"exitCode": 1, "error": f"Worker failed: {type(e).__name__}: {e}"}
+                    if budget:
+                        budget.finish(job, outcome)
+                    record(job, outcome)
+
+    if previous_traceparent is None:
+        os.environ.pop("TRACEPARENT", None)
+    else:
+        os.environ["TRACEPARENT"] = previous_traceparent
+    append_trace(trace_path, [make_span(
+        trace, batch_span, None, "batch", batch_start, time.time(),
+        attributes={
+            "p2u.jobs": total,
+            "p2u.workers": workers,
+            "p2u.llm_concurrency": llm_concurrency,
+            "p2u.memory_budget_mb": memory_budget // MB if memory_budget else None,
+        },
+    )])
+
+    manifest.finished_at = datetime.now().isoformat()
+    manifest.save()
+    return manifest
+
+
+def format_summary_table(manifest: BatchManifest) -> str:
+    """Plain-text table of job status, duration, peak memory and output directory."""
+    rows = [("Protocol", "Status", "Time (s)", "Peak RSS (MB)", "Output")]
+    for entry in manifest.jobs.values():
+        rows.append((
+            Path(entry["pdf_path"]).stem,
+            entry["status"],
+            str(entry.get("durationSeconds", "")),
+            str(entry.get("peakRssMb") or ""),
+            entry.get("output_dir") or "",
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = ["  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip() for row in rows]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+
+    s = manifest.summary()
+    lines.append("")
+    lines.append(
+        f"{s['succeeded']}/{s['total']} succeeded, {s['failed']} failed in {s['wallSeconds']}s "
+        f"({s['protocolSeconds']}s of protocol time, {s['speedup']}x)"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the Protocol2USDM pipeline over many protocols in parallel",
+        epilog="Unrecognized arguments (e.g. --full-protocol) are passed to main_v2.py.",
+    )
+    parser.add_argument(
+        "source",
+        help="Directory of PDFs, glob pattern, or .json/.txt manifest"
+    )
+    parser.add_argument(
+        "--model", "-m",
+        default=DEFAULT_MODEL,
+        help=f"LLM model to use (default: {DEFAULT_MODEL})"
+    )
+    parser.add_argument(
+        "--output-root", "-o",
+        help="Batch output directory (default: output/batch_<timestamp>)"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="Protocols processed in parallel (default: 1)"
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        help="Maximum LLM requests in flight across all workers (default: no limit)"
+    )
+    parser.add_argument(
+        "--memory-budget",
+        help="Peak RSS the running protocols may add up to, e.g. 12G, or 'auto' for "
+             f"{AUTO_BUDGET_FRACTION:.0%} of available memory (default: no limit)"
+    )
+    parser.add_argument(
+        "--job-memory",
+        type=parse_size,
+        help=f"Peak RSS assumed for protocols not run before (default: {DEFAULT_JOB_MEMORY // MB}M)"
+    )
+    args, main_args = parser.parse_known_args(argv)
+
+    try:
+        check_passthrough_args(main_args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    memory_budget = None
+    if args.memory_budget == "auto":
+        available = available_memory()
+        if available is None:
+            parser.error("--memory-budget auto: available memory can't be read on this system")
+        memory_budget = int(available * AUTO_BUDGET_FRACTION)
+    elif args.memory_budget:
+        try:
+            memory_budget = parse_size(args.memory_budget)
+        except ValueError as e:
+            parser.error(str(e))
+
+    jobs = discover_jobs(args.source)
+    if not jobs:
+        logger.error(f"No protocol PDFs found in {args.source}")
+        return 1
+
+    output_root = args.output_root or os.path.join(
+        "output", f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    logger.info(f"Batch: {len(jobs)} protocol(s), {args.workers} worker(s), "
+                f"LLM concurrency {args.llm_concurrency or 'unlimited'}"
+                + (f", memory budget {memory_budget // MB} MB" if memory_budget else ""))
+    for job in jobs:
+        paired = [Path(p).name for p in (job.sap_path, job.sites_path) if p]
+        logger.info(f"  {Path(job.pdf_path).name}" + (f" + {', '.join(paired)}" if paired else ""))
+
+    manifest = run_batch(
+        jobs,
+        model=args.model,
+        output_root=output_root,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        main_args=main_args,
+        memory_budget=memory_budget,
+        job_memory=args.job_memory,
+    )
+
+    logger.info("\n" + format_summary_table(manifest))
+    logger.info(f"Batch manifest: {Path(output_root) / MANIFEST_NAME}")
+    return 0 if manifest.summary()["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,10 +22,13 @@ Compared to main.py, this version:
 import argparse
 import logging
 import os
+import copy
+import functools
+import re
 import sys
-import json
 import uuid
 from pathlib import Path
+from typing import Optional
 
 # Load environment variables from .env
 from dotenv import load_dotenv
@@ -41,6 +44,20 @@ logger = logging.getLogger(__name__)
 # Import from new modular structure
 from extraction import run_from_files, PipelineConfig, PipelineResult
 from core.constants import DEFAULT_MODEL
+from core.artifacts import artifact_exists, close_store, load_artifact, open_store, put_artifact
+from core.checkpoint import ALL_STEPS, RunManifest, run_step
+from core.context_packer import get_packing_stats, reset_packing_stats, save_packing_report
+from core.ids import disable_deterministic_ids, enable_deterministic_ids, id_inputs, uuid_for_simple_id
+from core.memory import disable_tracemalloc, enable_tracemalloc, reset_memory, run_memory
+from core.pdf_utils import get_file_hash
+from core.serialization import COMPACT
+from core.usdm_index import USDMIndex
+from core.usdm_visitor import UsdmVisitor, walk
+from core.profiling import (
+    TRACE_FORMATS, begin_span, disable_profiling, enable_profiling, end_span,
+    format_timing_table, reset_timing, save_timing_report, save_trace,
+    set_resource, span, summarize_spans,
+)
 
 # Import expansion modules
 from extraction.metadata import extract_study_metadata
@@ -68,11 +85,18 @@ from extraction.confidence import (
 )
 
 
+def _saved(result, save_fn, path: str):
+    """Save a phase result and hand it back (for checkpointed steps)."""
+    save_fn(result, path)
+    return result
+
+
 def run_expansion_phases(
     pdf_path: str,
     output_dir: str,
     model: str,
     phases: dict,
+    checkpoints: Optional[RunManifest] = None,
 ) -> dict:
     """
     Run requested expansion phases.
@@ -82,16 +106,22 @@ def run_expansion_phases(
         output_dir: Output directory
         model: LLM model name
         phases: Dict of phase_name -> bool indicating which to run
+        checkpoints: Run manifest; up-to-date phases are reused, not re-run
     
     Returns:
         Dict of phase_name -> extraction result
     """
     results = {}
+    phase_inputs = {"pdf": get_file_hash(pdf_path), "model": model, **id_inputs()}
     
     if phases.get('metadata'):
         logger.info("\n--- Expansion: Study Metadata (Phase 2) ---")
-        result = extract_study_metadata(pdf_path, model_name=model)
-        save_metadata_result(result, os.path.join(output_dir, "2_study_metadata.json"))
+        path = os.path.join(output_dir, "2_study_metadata.json")
+        result = run_step(
+            checkpoints, 'metadata',
+            lambda: _saved(extract_study_metadata(pdf_path, model_name=model), save_metadata_result, path),
+            inputs=phase_inputs, artifacts=["2_study_metadata.json"],
+        )
         results['metadata'] = result
         if result.success and result.metadata:
             conf = calculate_metadata_confidence(result.metadata)
@@ -101,8 +131,12 @@ def run_expansion_phases(
     
     if phases.get('eligibility'):
         logger.info("\n--- Expansion: Eligibility Criteria (Phase 1) ---")
-        result = extract_eligibility_criteria(pdf_path, model_name=model)
-        save_eligibility_result(result, os.path.join(output_dir, "3_eligibility_criteria.json"))
+        path = os.path.join(output_dir, "3_eligibility_criteria.json")
+        result = run_step(
+            checkpoints, 'eligibility',
+            lambda: _saved(extract_eligibility_criteria(pdf_path, model_name=model), save_eligibility_result, path),
+            inputs=phase_inputs, artifacts=["3_eligibility_criteria.json"],
+        )
         results['eligibility'] = result
         if result.success and result.data:
             conf = calculate_eligibility_confidence(result.data)
@@ -112,8 +146,12 @@ def run_expansion_phases(
     
     if phases.get('objectives'):
         logger.info("\n--- Expansion: Objectives & Endpoints (Phase 3) ---")
-        result = extract_objectives_endpoints(pdf_path, model_name=model)
-        save_objectives_result(result, os.path.join(output_dir, "4_objectives_endpoints.json"))
+        path = os.path.join(output_dir, "4_objectives_endpoints.json")
+        result = run_step(
+            checkpoints, 'objectives',
+            lambda: _saved(extract_objectives_endpoints(pdf_path, model_name=model), save_objectives_result, path),
+            inputs=phase_inputs, artifacts=["4_objectives_endpoints.json"],
+        )
         results['objectives'] = result
         if result.success and result.data:
             conf = calculate_objectives_confidence(result.data)
@@ -123,8 +161,12 @@ def run_expansion_phases(
     
     if phases.get('studydesign'):
         logger.info("\n--- Expansion: Study Design (Phase 4) ---")
-        result = extract_study_design(pdf_path, model_name=model)
-        save_study_design_result(result, os.path.join(output_dir, "5_study_design.json"))
+        path = os.path.join(output_dir, "5_study_design.json")
+        result = run_step(
+            checkpoints, 'studydesign',
+            lambda: _saved(extract_study_design(pdf_path, model_name=model), save_study_design_result, path),
+            inputs=phase_inputs, artifacts=["5_study_design.json"],
+        )
         results['studydesign'] = result
         if result.success and result.data:
             conf = calculate_studydesign_confidence(result.data)
@@ -134,8 +176,12 @@ def run_expansion_phases(
     
     if phases.get('interventions'):
         logger.info("\n--- Expansion: Interventions (Phase 5) ---")
-        result = extract_interventions(pdf_path, model_name=model)
-        save_interventions_result(result, os.path.join(output_dir, "6_interventions.json"))
+        path = os.path.join(output_dir, "6_interventions.json")
+        result = run_step(
+            checkpoints, 'interventions',
+            lambda: _saved(extract_interventions(pdf_path, model_name=model), save_interventions_result, path),
+            inputs=phase_inputs, artifacts=["6_interventions.json"],
+        )
         results['interventions'] = result
         if result.success and result.data:
             conf = calculate_interventions_confidence(result.data)
@@ -145,8 +191,12 @@ def run_expansion_phases(
     
     if phases.get('narrative'):
         logger.info("\n--- Expansion: Narrative Structure (Phase 7) ---")
-        result = extract_narrative_structure(pdf_path, model_name=model)
-        save_narrative_result(result, os.path.join(output_dir, "7_narrative_structure.json"))
+        path = os.path.join(output_dir, "7_narrative_structure.json")
+        result = run_step(
+            checkpoints, 'narrative',
+            lambda: _saved(extract_narrative_structure(pdf_path, model_name=model), save_narrative_result, path),
+            inputs=phase_inputs, artifacts=["7_narrative_structure.json"],
+        )
         results['narrative'] = result
         if result.success and result.data:
             conf = calculate_narrative_confidence(result.data)
@@ -156,8 +206,12 @@ def run_expansion_phases(
     
     if phases.get('advanced'):
         logger.info("\n--- Expansion: Advanced Entities (Phase 8) ---")
-        result = extract_advanced_entities(pdf_path, model_name=model)
-        save_advanced_result(result, os.path.join(output_dir, "8_advanced_entities.json"))
+        path = os.path.join(output_dir, "8_advanced_entities.json")
+        result = run_step(
+            checkpoints, 'advanced',
+            lambda: _saved(extract_advanced_entities(pdf_path, model_name=model), save_advanced_result, path),
+            inputs=phase_inputs, artifacts=["8_advanced_entities.json"],
+        )
         results['advanced'] = result
         if result.success and result.data:
             conf = calculate_advanced_confidence(result.data)
@@ -169,7 +223,11 @@ def run_expansion_phases(
         logger.info("\n--- Expansion: Procedures & Devices (Phase 10) ---")
         try:
             from extraction.procedures import extract_procedures_devices
-            result = extract_procedures_devices(pdf_path, model=model, output_dir=output_dir)
+            result = run_step(
+                checkpoints, 'procedures',
+                lambda: extract_procedures_devices(pdf_path, model=model, output_dir=output_dir),
+                inputs=phase_inputs, artifacts=["9_procedures_devices.json"],
+            )
             results['procedures'] = result
             if result.success and result.data:
                 logger.info(f"  ✓ Procedures extraction ({result.data.to_dict()['summary']['procedureCount']} procedures)")
@@ -182,7 +240,11 @@ def run_expansion_phases(
         logger.info("\n--- Expansion: Scheduling Logic (Phase 11) ---")
         try:
             from extraction.scheduling import extract_scheduling
-            result = extract_scheduling(pdf_path, model=model, output_dir=output_dir)
+            result = run_step(
+                checkpoints, 'scheduling',
+                lambda: extract_scheduling(pdf_path, model=model, output_dir=output_dir),
+                inputs=phase_inputs, artifacts=["10_scheduling_logic.json"],
+            )
             results['scheduling'] = result
             if result.success and result.data:
                 logger.info(f"  ✓ Scheduling extraction ({result.data.to_dict()['summary']['timingCount']} timings)")
@@ -195,7 +257,11 @@ def run_expansion_phases(
         logger.info("\n--- Expansion: Document Structure (Phase 12) ---")
         try:
             from extraction.document_structure import extract_document_structure
-            result = extract_document_structure(pdf_path, model=model, output_dir=output_dir)
+            result = run_step(
+                checkpoints, 'docstructure',
+                lambda: extract_document_structure(pdf_path, model=model, output_dir=output_dir),
+                inputs=phase_inputs, artifacts=["13_document_structure.json"],
+            )
             results['docstructure'] = result
             if result.success and result.data:
                 summary = result.data.to_dict()['summary']
@@ -209,7 +275,11 @@ def run_expansion_phases(
         logger.info("\n--- Expansion: Amendment Details (Phase 13) ---")
         try:
             from extraction.amendments import extract_amendment_details
-            result = extract_amendment_details(pdf_path, model=model, output_dir=output_dir)
+            result = run_step(
+                checkpoints, 'amendmentdetails',
+                lambda: extract_amendment_details(pdf_path, model=model, output_dir=output_dir),
+                inputs=phase_inputs, artifacts=["14_amendment_details.json"],
+            )
             results['amendmentdetails'] = result
             if result.success and result.data:
                 summary = result.data.to_dict()['summary']
@@ -222,115 +292,165 @@ def run_expansion_phases(
     return results
 
 
-def convert_ids_to_uuids(data: dict, id_map: dict = None) -> dict:
+# Entity lists matched by name between provenance and the final data
+_NAME_MATCHED_COLLECTIONS = ('activities', 'encounters', 'epochs', 'plannedTimepoints')
+
+
+# Canonical UUID text; other spellings uuid.UUID() accepts are checked the slow way
+_UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+# Legacy provenance timepoints pt_N are the encounters enc_N
+_ENCOUNTER_ID_RE = re.compile(r'^enc_(\d+)$')
+
+# What a key holds, for ID conversion
+_NOT_ID, _ID, _ID_LIST = 0, 1, 2
+
+
+def _is_simple_id(value) -> bool:
+    """Check if value looks like a simple ID that needs conversion."""
+    if not isinstance(value, str) or len(value) >= 50:
+        return False
+    # Skip if already a UUID format
+    if _UUID_RE.fullmatch(value):
+        return False
+    # Check for common ID patterns
+    if '_' not in value and '-' not in value:
+        return False
+    # uuid.UUID() needs 32 hex digits, so shorter values ('act_1') can't be one
+    if len(value) >= 32:
+        try:
+            uuid.UUID(value)
+            return False  # Already a valid UUID
+        except ValueError:
+            pass
+    return True
+
+
+def _id_field_kind(key: str) -> int:
+    if key == 'id' or key.endswith('Id'):
+        return _ID
+    if key.endswith('Ids'):
+        return _ID_LIST
+    return _NOT_ID
+
+
+@functools.lru_cache(maxsize=1)
+def _schema_id_fields() -> dict:
+    """
+    key -> _ID/_ID_LIST for 'id' and the USDM schema's reference attributes.
+    
+    Keys outside the schema (extraction-only fields like fromElementId) are
+    classified by suffix the first time UuidConverter meets them.
+    """
+    kinds = {'id': _ID}
+    try:
+        from core.usdm_schema_loader import get_schema_loader
+        for name, is_list in get_schema_loader().get_reference_fields().items():
+            kinds[name] = _ID_LIST if is_list else _ID
+    except Exception as e:
+        logger.warning(f"USDM schema unavailable, matching ID fields by suffix: {e}")
+    return kinds
+
+
+class UuidConverter(UsdmVisitor):
+    """
+    Replaces simple IDs (like 'study_1', 'act_1') with UUIDs, keeping references intact.
+    
+    Handles 'id', reference fields ending in 'Id' (activityId, encounterId,
+    epochId) and ID arrays ending in 'Ids' (activityIds, childIds), looking
+    each key up in a table seeded from the schema's reference attributes.
+    The mapping used is left in id_map; remap_provenance() converts the
+    matching provenance with it.
+    """
+    
+    def __init__(self, id_map: dict = None):
+        self.id_map = {} if id_map is None else id_map
+        self.kinds = dict(_schema_id_fields())
+        # Legacy provenance timepoints pt_N -> the UUID of enc_N
+        self.timepoint_ids = {}
+        for simple_id, new_id in self.id_map.items():
+            self._note_timepoint(simple_id, new_id)
+    
+    def _note_timepoint(self, simple_id: str, new_id: str) -> None:
+        match = _ENCOUNTER_ID_RE.match(simple_id)
+        if match:
+            self.timepoint_ids[f"pt_{match.group(1)}"] = new_id
+    
+    def _uuid_for(self, simple_id: str) -> str:
+        """Get existing UUID for ID or create new one."""
+        new_id = self.id_map.get(simple_id)
+        if new_id is None:
+            new_id = self.id_map[simple_id] = uuid_for_simple_id(simple_id)
+            self._note_timepoint(simple_id, new_id)
+        return new_id
+    
+    def enter(self, node: dict, trail) -> list:
+        kinds = self.kinds
+        id_lists = []
+        for key, value in node.items():
+            kind = kinds.get(key)
+            if kind is None:
+                kind = kinds[key] = _id_field_kind(key)
+            if kind == _ID:
+                if _is_simple_id(value):
+                    node[key] = self._uuid_for(value)
+            elif kind == _ID_LIST and isinstance(value, list):
+                node[key] = [self._uuid_for(v) if _is_simple_id(v) else v for v in value]
+                id_lists.append(key)
+        return id_lists
+    
+    def convert(self, obj) -> None:
+        """Convert obj in place on its own (what walk(obj, [self]) does, without the visitor overhead)."""
+        if isinstance(obj, dict):
+            id_lists = self.enter(obj, None)
+            for key, value in obj.items():
+                if isinstance(value, (dict, list)) and key not in id_lists:
+                    self.convert(value)
+        elif isinstance(obj, list):
+            for item in obj:
+                if isinstance(item, (dict, list)):
+                    self.convert(item)
+    
+    def remap_provenance(self, provenance_data: dict) -> dict:
+        """convert_provenance_to_uuids with this converter's mapping."""
+        return convert_provenance_to_uuids(provenance_data, self.id_map, self.timepoint_ids)
+
+
+def convert_ids_to_uuids(data: dict, id_map: dict = None, in_place: bool = False) -> tuple:
     """
     Convert all simple IDs (like 'study_1', 'act_1') to proper UUIDs.
     
     USDM 4.0 requires all 'id' fields to be valid UUIDs.
     This function recursively converts IDs while maintaining internal references.
+    validate_and_fix_schema runs UuidConverter in its single post-processing
+    walk instead.
     
     Args:
         data: USDM JSON data
         id_map: Optional existing ID mapping (for consistency)
+        in_place: Convert data itself rather than a copy
         
     Returns:
         Data with UUIDs and the ID mapping used
     """
-    if id_map is None:
-        id_map = {}
-    
-    def is_simple_id(value):
-        """Check if value looks like a simple ID that needs conversion."""
-        if not isinstance(value, str):
-            return False
-        # Skip if already a UUID format
-        try:
-            uuid.UUID(value)
-            return False  # Already a valid UUID
-        except ValueError:
-            pass
-        # Check for common ID patterns
-        id_patterns = ['_', '-']
-        return any(p in value for p in id_patterns) and len(value) < 50
-    
-    def get_or_create_uuid(simple_id: str) -> str:
-        """Get existing UUID for ID or create new one."""
-        if simple_id not in id_map:
-            id_map[simple_id] = str(uuid.uuid4())
-        return id_map[simple_id]
-    
-    def convert_recursive(obj):
-        """Recursively convert IDs in nested structure."""
-        if isinstance(obj, dict):
-            result = {}
-            for key, value in obj.items():
-                if key == 'id' and is_simple_id(value):
-                    result[key] = get_or_create_uuid(value)
-                elif key.endswith('Id') and is_simple_id(value):
-                    # Handle reference fields like activityId, encounterId, epochId
-                    result[key] = get_or_create_uuid(value)
-                elif key.endswith('Ids') and isinstance(value, list):
-                    # Handle ID arrays like activityIds, childIds
-                    result[key] = [get_or_create_uuid(v) if is_simple_id(v) else v for v in value]
-                elif isinstance(value, (dict, list)):
-                    result[key] = convert_recursive(value)
-                else:
-                    result[key] = value
-            return result
-        elif isinstance(obj, list):
-            return [convert_recursive(item) for item in obj]
-        else:
-            return obj
-    
-    converted = convert_recursive(data)
-    return converted, id_map
+    converter = UuidConverter(id_map)
+    converted = data if in_place else copy.deepcopy(data)
+    converter.convert(converted)
+    return converted, converter.id_map
 
 
-def build_name_to_id_map(data: dict) -> dict:
+def build_name_to_id_map(data: dict, index: USDMIndex = None) -> dict:
     """
     Build a mapping of entity names to their IDs from USDM data.
     
     This allows matching entities between provenance and data by name
     when IDs don't match (e.g., after UUID conversion).
     """
-    name_map = {
-        'activities': {},
-        'encounters': {},
-        'epochs': {},
-        'plannedTimepoints': {},
-    }
-    
-    # Navigate to studyDesigns
-    try:
-        study_designs = data.get('study', {}).get('versions', [{}])[0].get('studyDesigns', [])
-        if not study_designs:
-            return name_map
-        sd = study_designs[0]
-    except (KeyError, IndexError, TypeError):
-        return name_map
-    
-    # Build maps by name
-    for act in sd.get('activities', []):
-        if act.get('name') and act.get('id'):
-            name_map['activities'][act['name']] = act['id']
-    
-    for enc in sd.get('encounters', []):
-        if enc.get('name') and enc.get('id'):
-            name_map['encounters'][enc['name']] = enc['id']
-    
-    for epoch in sd.get('epochs', []):
-        if epoch.get('name') and epoch.get('id'):
-            name_map['epochs'][epoch['name']] = epoch['id']
-    
-    # PlannedTimepoints might be in scheduleTimelines or directly
-    for pt in sd.get('plannedTimepoints', []):
-        if pt.get('name') and pt.get('id'):
-            name_map['plannedTimepoints'][pt['name']] = pt['id']
-    
-    return name_map
+    index = index or USDMIndex(data)
+    return {key: index.names(key) for key in _NAME_MATCHED_COLLECTIONS}
 
 
-def convert_provenance_to_uuids(provenance_data: dict, id_map: dict) -> dict:
+def convert_provenance_to_uuids(provenance_data: dict, id_map: dict, timepoint_ids: dict = None) -> dict:
     """
     Convert provenance IDs to UUIDs using the same id_map from convert_ids_to_uuids.
     
@@ -344,6 +464,8 @@ def convert_provenance_to_uuids(provenance_data: dict, id_map: dict) -> dict:
     Args:
         provenance_data: Original provenance dict (entities, cells, cellFootnotes, metadata)
         id_map: ID mapping from convert_ids_to_uuids {simple_id: uuid}
+        timepoint_ids: pt_N -> enc_N UUID, if the caller has it already
+            (UuidConverter collects it while converting); derived from id_map otherwise
         
     Returns:
         New provenance dict with all IDs converted to UUIDs
@@ -353,65 +475,41 @@ def convert_provenance_to_uuids(provenance_data: dict, id_map: dict) -> dict:
     
     # Build pt_N -> enc_N UUID mapping for backward compatibility
     # Legacy provenance used pt_1, pt_2... but id_map has enc_1, enc_2...
-    import re
-    pt_to_enc_uuid = {}
-    for key, uuid_val in id_map.items():
-        match = re.match(r'^enc_(\d+)$', key)
-        if match:
-            n = match.group(1)
-            # Map pt_N directly to enc_N's UUID (backward compat)
-            pt_to_enc_uuid[f"pt_{n}"] = uuid_val
-    
-    def convert_id(old_id: str) -> str:
-        """Convert ID using id_map, return original if not found."""
-        return id_map.get(old_id, old_id)
-    
-    def convert_timepoint_id(old_id: str) -> str:
-        """Convert timepoint ID to UUID. Handles both enc_N (new) and pt_N (legacy)."""
-        # Direct lookup in id_map (handles enc_N directly)
-        if old_id in id_map:
-            return id_map[old_id]
-        # Legacy: pt_N -> enc_N UUID lookup
-        if old_id in pt_to_enc_uuid:
-            return pt_to_enc_uuid[old_id]
-        # Return as-is if not found
-        return old_id
+    if timepoint_ids is None:
+        timepoint_ids = {}
+        for key, uuid_val in id_map.items():
+            match = _ENCOUNTER_ID_RE.match(key)
+            if match:
+                # Map pt_N directly to enc_N's UUID (backward compat)
+                timepoint_ids[f"pt_{match.group(1)}"] = uuid_val
+    
+    # Direct lookup in id_map handles enc_N; legacy pt_N goes through timepoint_ids
+    convert_id = id_map.get
+    
+    def convert_cell_key(key: str) -> str:
+        """Convert "act_id|pt_id" -> "uuid|enc_uuid"."""
+        if '|' not in key:
+            return key
+        act_id, pt_id = key.split('|', 1)
+        pt_uuid = id_map.get(pt_id)
+        if pt_uuid is None:
+            pt_uuid = timepoint_ids.get(pt_id, pt_id)
+        return f"{convert_id(act_id, act_id)}|{pt_uuid}"
     
     result = {}
     
     # Convert entity IDs
     if 'entities' in provenance_data:
-        result['entities'] = {}
-        for entity_type, entities in provenance_data['entities'].items():
-            if isinstance(entities, dict):
-                result['entities'][entity_type] = {
-                    convert_id(eid): source for eid, source in entities.items()
-                }
-            else:
-                result['entities'][entity_type] = entities
+        result['entities'] = {
+            entity_type: {convert_id(eid, eid): source for eid, source in entities.items()}
+            if isinstance(entities, dict) else entities
+            for entity_type, entities in provenance_data['entities'].items()
+        }
     
-    # Convert cell keys (format: "act_id|pt_id" -> "uuid|enc_uuid")
-    if 'cells' in provenance_data:
-        result['cells'] = {}
-        for key, source in provenance_data['cells'].items():
-            if '|' in key:
-                act_id, pt_id = key.split('|', 1)
-                # Use convert_timepoint_id to map pt_N -> enc_N UUID
-                new_key = f"{convert_id(act_id)}|{convert_timepoint_id(pt_id)}"
-                result['cells'][new_key] = source
-            else:
-                result['cells'][key] = source
-    
-    # Convert cellFootnotes keys (format: "act_id|pt_id" -> "uuid|enc_uuid")
-    if 'cellFootnotes' in provenance_data:
-        result['cellFootnotes'] = {}
-        for key, refs in provenance_data['cellFootnotes'].items():
-            if '|' in key:
-                act_id, pt_id = key.split('|', 1)
-                new_key = f"{convert_id(act_id)}|{convert_timepoint_id(pt_id)}"
-                result['cellFootnotes'][new_key] = refs
-            else:
-                result['cellFootnotes'][key] = refs
+    # Convert cell and cellFootnotes keys
+    for section in ('cells', 'cellFootnotes'):
+        if section in provenance_data:
+            result[section] = {convert_cell_key(key): value for key, value in provenance_data[section].items()}
     
     # Copy metadata unchanged
     if 'metadata' in provenance_data:
@@ -433,41 +531,18 @@ def sync_provenance_with_data(provenance_path: str, data: dict, id_map: dict = N
         data: Final USDM data (after any ID conversions)
         id_map: Optional direct ID mapping from convert_ids_to_uuids
     """
-    if not os.path.exists(provenance_path):
+    if not artifact_exists(provenance_path):
         return
     
-    with open(provenance_path, 'r', encoding='utf-8') as f:
-        prov = json.load(f)
+    prov = load_artifact(provenance_path)
     
     # Build name-to-ID map from final data
     name_map = build_name_to_id_map(data)
     
     # Also need provenance entity names to do the mapping
-    # Load the original SoA file to get names for provenance IDs
+    # Index the original SoA file to get names for provenance IDs
     soa_path = provenance_path.replace('_provenance.json', '.json')
-    prov_id_to_name = {'activities': {}, 'encounters': {}, 'epochs': {}, 'plannedTimepoints': {}}
-    
-    if os.path.exists(soa_path):
-        with open(soa_path, 'r', encoding='utf-8') as f:
-            soa_data = json.load(f)
-        
-        # Extract from SoA structure
-        try:
-            sd = soa_data.get('study', {}).get('versions', [{}])[0].get('studyDesigns', [{}])[0]
-            for act in sd.get('activities', []):
-                if act.get('id') and act.get('name'):
-                    prov_id_to_name['activities'][act['id']] = act['name']
-            for enc in sd.get('encounters', []):
-                if enc.get('id') and enc.get('name'):
-                    prov_id_to_name['encounters'][enc['id']] = enc['name']
-            for epoch in sd.get('epochs', []):
-                if epoch.get('id') and epoch.get('name'):
-                    prov_id_to_name['epochs'][epoch['id']] = epoch['name']
-            for pt in sd.get('plannedTimepoints', []):
-                if pt.get('id') and pt.get('name'):
-                    prov_id_to_name['plannedTimepoints'][pt['id']] = pt['name']
-        except (KeyError, IndexError, TypeError):
-            pass
+    soa_index = USDMIndex(load_artifact(soa_path)) if artifact_exists(soa_path) else USDMIndex()
     
     def convert_id(old_id: str, entity_type: str) -> str:
         """Convert old ID to new ID using id_map or name matching."""
@@ -476,8 +551,8 @@ def sync_provenance_with_data(provenance_path: str, data: dict, id_map: dict = N
             return id_map[old_id]
         
         # Try name-based matching
-        if entity_type in prov_id_to_name and entity_type in name_map:
-            name = prov_id_to_name[entity_type].get(old_id)
+        if entity_type in name_map and soa_index.collection_of(old_id) == entity_type:
+            name = soa_index.get(old_id).get('name')
             if name and name in name_map[entity_type]:
                 return name_map[entity_type][name]
         
@@ -511,8 +586,7 @@ def sync_provenance_with_data(provenance_path: str, data: dict, id_map: dict = N
         prov['cells'] = new_cells
     
     # Save updated provenance
-    with open(provenance_path, 'w', encoding='utf-8') as f:
-        json.dump(prov, f, indent=2)
+    put_artifact(provenance_path, prov, COMPACT)
 
 
 def convert_provenance_ids(provenance_path: str, id_map: dict) -> None:
@@ -521,11 +595,10 @@ def convert_provenance_ids(provenance_path: str, id_map: dict) -> None:
     
     Convert simple IDs to UUIDs in provenance file.
     """
-    if not os.path.exists(provenance_path) or not id_map:
+    if not artifact_exists(provenance_path) or not id_map:
         return
     
-    with open(provenance_path, 'r', encoding='utf-8') as f:
-        prov = json.load(f)
+    prov = load_artifact(provenance_path)
     
     def convert_id(simple_id: str) -> str:
         return id_map.get(simple_id, simple_id)
@@ -552,8 +625,7 @@ def convert_provenance_ids(provenance_path: str, id_map: dict) -> None:
         prov['cells'] = new_cells
     
     # Save updated provenance
-    with open(provenance_path, 'w', encoding='utf-8') as f:
-        json.dump(prov, f, indent=2)
+    put_artifact(provenance_path, prov, COMPACT)
 
 
 def validate_and_fix_schema(
@@ -572,7 +644,7 @@ def validate_and_fix_schema(
     3. Validate with official usdm Pydantic package (authoritative)
     
     Args:
-        data: USDM JSON data
+        data: USDM JSON data (normalized and converted in place)
         output_dir: Directory for output files
         model: LLM model for auto-fixes
         use_llm: Whether to use LLM for complex fixes
@@ -584,44 +656,45 @@ def validate_and_fix_schema(
     from validation import (
         validate_usdm_dict, HAS_USDM, USDM_VERSION,  # Official validation
     )
-    from core.usdm_types_generated import normalize_usdm_data
+    from core.usdm_types_generated import UsdmNormalizer
     
     logger.info("=" * 60)
     logger.info("USDM v4.0 Schema Validation Pipeline")
     logger.info("=" * 60)
     
-    # Step 1: Normalize data using dataclass auto-population
-    # This leverages type inference in Encounter, StudyArm, Epoch, Code objects
+    # Steps 1 and 2 share one in-place walk over the document:
+    # 1. Normalize data using dataclass auto-population
+    #    (type inference in Encounter, StudyArm, Epoch, Code objects)
+    # 2. Convert IDs to UUIDs (USDM 4.0 requirement)
+    visitors = [UsdmNormalizer()]
     logger.info("\n[1/3] Normalizing entities (type inference)...")
-    data = normalize_usdm_data(data)
+    if convert_to_uuids:
+        visitors.append(UuidConverter())
+        logger.info("\n[2/3] Converting IDs to UUIDs...")
+    with span("validate.transform", visitors=len(visitors)):
+        walk(data, visitors)
     logger.info("      ✓ Applied type inference to Encounters, Epochs, Arms, Codes")
     
-    # Step 2: Convert IDs to UUIDs (USDM 4.0 requirement)
     id_map = {}
     if convert_to_uuids:
-        logger.info("\n[2/3] Converting IDs to UUIDs...")
-        data, id_map = convert_ids_to_uuids(data)
+        converter = visitors[-1]
+        id_map = converter.id_map
         logger.info(f"      Converted {len(id_map)} IDs to UUIDs")
         
         # Save ID mapping for reference
-        id_map_path = os.path.join(output_dir, "id_mapping.json")
-        with open(id_map_path, 'w', encoding='utf-8') as f:
-            json.dump(id_map, f, indent=2)
+        put_artifact(os.path.join(output_dir, "id_mapping.json"), id_map, COMPACT)
         
         # Generate protocol_usdm_provenance.json with converted IDs
         # This ensures provenance keys match protocol_usdm.json exactly
         orig_provenance_path = os.path.join(output_dir, "9_final_soa_provenance.json")
-        if os.path.exists(orig_provenance_path):
-            with open(orig_provenance_path, 'r', encoding='utf-8') as f:
-                orig_provenance = json.load(f)
+        if artifact_exists(orig_provenance_path):
+            orig_provenance = load_artifact(orig_provenance_path)
             
             # Convert provenance IDs using the same id_map
-            converted_provenance = convert_provenance_to_uuids(orig_provenance, id_map)
+            converted_provenance = converter.remap_provenance(orig_provenance)
             
             # Save as protocol_usdm_provenance.json (paired with protocol_usdm.json)
-            prov_output_path = os.path.join(output_dir, "protocol_usdm_provenance.json")
-            with open(prov_output_path, 'w', encoding='utf-8') as f:
-                json.dump(converted_provenance, f, indent=2)
+            put_artifact(os.path.join(output_dir, "protocol_usdm_provenance.json"), converted_provenance, COMPACT)
             logger.info(f"      ✓ Created protocol_usdm_provenance.json ({len(converted_provenance.get('cells', {}))} cells)")
     
     fixed_data = data
@@ -634,7 +707,8 @@ def validate_and_fix_schema(
     if HAS_USDM:
         logger.info(f"      Using usdm package (USDM {USDM_VERSION})")
         try:
-            usdm_result = validate_usdm_dict(fixed_data)
+            with span("validate.usdm"):
+                usdm_result = validate_usdm_dict(fixed_data)
             
             if usdm_result.valid:
                 logger.info("      ✓ VALIDATION PASSED")
@@ -650,9 +724,7 @@ def validate_and_fix_schema(
                     logger.warning(f"        ... and {len(error_types) - 5} more error types")
             
             # Save detailed validation result
-            validation_output = os.path.join(output_dir, "usdm_validation.json")
-            with open(validation_output, 'w', encoding='utf-8') as f:
-                json.dump(usdm_result.to_dict(), f, indent=2)
+            put_artifact(os.path.join(output_dir, "usdm_validation.json"), usdm_result.to_dict())
             logger.info(f"      Results saved to: usdm_validation.json")
                 
         except Exception as e:
@@ -792,9 +864,11 @@ def combine_to_full_usdm(
             # Copy all SoA-related keys (including notes for SoA footnotes)
             soa_keys = ["scheduleTimelines", "encounters", "activities", "epochs", 
                         "plannedTimepoints", "activityTimepoints", "activityGroups", "notes"]
+            # Copied: validation edits the combined document in place, and
+            # soa_data is the live 9_final_soa.json artifact
             for key in soa_keys:
                 if key in soa_schedule and soa_schedule[key]:
-                    study_design[key] = soa_schedule[key]
+                    study_design[key] = copy.deepcopy(soa_schedule[key])
     
     # Add model field (required) - infer from arms count
     if "model" not in study_design:
@@ -926,15 +1000,22 @@ def combine_to_full_usdm(
     combined["study"]["versions"] = [study_version]
     
     # Save combined output as protocol_usdm.json (golden standard)
-    output_path = os.path.join(output_dir, "protocol_usdm.json")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(combined, f, indent=2, ensure_ascii=False)
+    output_path = put_artifact(os.path.join(output_dir, "protocol_usdm.json"), combined)
     
     logger.info(f"\n✓ Combined USDM saved to: {output_path}")
     return combined, output_path
 
 
-def main():
+def main(argv=None):
+    """
+    Run the pipeline for one protocol.
+
+    Args:
+        argv: Command-line arguments (defaults to sys.argv[1:]); main.py
+              calls this once per protocol in a batch
+
+    Exits via sys.exit with 0 on success, 1 on failure.
+    """
     parser = argparse.ArgumentParser(
         description="Extract Schedule of Activities from clinical protocol PDF (v2 - Simplified)",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1010,7 +1091,7 @@ Examples:
     parser.add_argument(
         "--enrich",
         action="store_true",
-        help="Enrich entities with NCI terminology codes (Step 7)"
+        help="Enrich entities with NCI terminology codes (Step 8)"
     )
     
     parser.add_argument(
@@ -1022,7 +1103,7 @@ Examples:
     parser.add_argument(
         "--validate-schema",
         action="store_true",
-        help="Validate output against USDM schema (Step 8)"
+        help="Validate output against USDM schema (Step 7)"
     )
     
     parser.add_argument(
@@ -1043,6 +1124,57 @@ Examples:
         help="Run full SoA pipeline including enrichment, validation, and conformance (Steps 7-9)"
     )
     
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        metavar="STEP",
+        choices=ALL_STEPS + ["all"],
+        help="Re-run STEP and everything downstream of it, even if the output directory "
+             "has an up-to-date checkpoint (repeatable; 'all' re-runs everything)"
+    )
+    
+    parser.add_argument(
+        "--no-checkpoints",
+        action="store_true",
+        help="Ignore and don't write the run manifest (re-run every step)"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Dump cProfile stats and collapsed stacks per phase to <output>/profile/ "
+             "(a per-phase timing summary is always written)"
+    )
+    
+    parser.add_argument(
+        "--memory-profile",
+        action="store_true",
+        help="Trace Python allocations (tracemalloc) and record each step's heap peak and "
+             "top allocation sites in run_manifest.json (slower; RSS is always sampled)"
+    )
+    
+    parser.add_argument(
+        "--trace-format",
+        choices=TRACE_FORMATS,
+        default="jsonl",
+        help="Format of the span trace written to the output directory: "
+             "trace.jsonl (default) or OTLP/JSON trace.otlp.json"
+    )
+    
+    parser.add_argument(
+        "--deterministic-ids",
+        action="store_true",
+        help="Derive entity UUIDs from the PDF hash and each entity's simple ID or content "
+             "(UUIDv5) instead of random ones, so identical extractions produce identical files"
+    )
+    
+    parser.add_argument(
+        "--no-page-cache",
+        action="store_true",
+        help="Re-run page detection instead of reusing cached decisions for this PDF"
+    )
+    
     # USDM Expansion flags (v6.0)
     expansion_group = parser.add_argument_group('USDM Expansion (v6.0)')
     expansion_group.add_argument(
@@ -1127,7 +1259,15 @@ Examples:
     )
     
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    reset_packing_stats()
+    reset_timing()
+    disable_profiling()
+    if args.memory_profile:
+        enable_tracemalloc()
+    else:
+        disable_tracemalloc()
+    reset_memory()
     
     # Handle --update-cache flag first (can be standalone operation)
     if args.update_cache:
@@ -1184,7 +1324,21 @@ Examples:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = os.path.join("output", f"{protocol_name}_{timestamp}")
     
+    # Set on every call; main() runs repeatedly in batch/daemon worker processes
+    from core.page_cache import DEFAULT_ENABLED, set_page_cache_enabled
+    set_page_cache_enabled(DEFAULT_ENABLED and not args.no_page_cache)
+    
+    if args.profile:
+        logger.info(f"Profiling phases into {enable_profiling(output_dir)}")
+    set_resource(**{
+        "p2u.protocol": protocol_name,
+        "gen_ai.request.model": args.model,
+        "p2u.output_dir": os.path.abspath(output_dir),
+    })
+    run_span = begin_span("run", protocol=protocol_name)
+    
     # Parse page numbers if provided (user gives 1-indexed, convert to 0-indexed)
+    # Explicit pages always win over (cached) page detection
     soa_pages = None
     if args.pages:
         try:
@@ -1249,6 +1403,22 @@ Examples:
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
+    # Steps whose inputs are unchanged since the last run in this directory are reused
+    checkpoints = RunManifest(output_dir, enabled=not args.no_checkpoints)
+    if args.update_evs_cache:
+        args.force.append("enrich")
+    if args.force:
+        forced = checkpoints.force(args.force)
+        logger.info(f"Forcing re-run of: {', '.join(sorted(forced))}")
+    pdf_hash = get_file_hash(args.pdf_path)
+    if args.deterministic_ids:
+        enable_deterministic_ids(pdf_hash)
+    else:
+        disable_deterministic_ids()
+    
+    # Stages hand JSON artifacts to each other in memory; files are written behind
+    open_store()
+    
     # Run pipeline
     try:
         result = None
@@ -1259,24 +1429,34 @@ Examples:
             logger.info("\n" + "="*60)
             logger.info("SCHEDULE OF ACTIVITIES EXTRACTION")
             logger.info("="*60)
-            result = run_from_files(
-                pdf_path=args.pdf_path,
-                output_dir=output_dir,
-                soa_pages=soa_pages,
-                config=config,
+            result = run_step(
+                checkpoints, 'soa',
+                lambda: run_from_files(
+                    pdf_path=args.pdf_path,
+                    output_dir=output_dir,
+                    soa_pages=soa_pages,
+                    config=config,
+                ),
+                inputs={
+                    "pdf": pdf_hash,
+                    "pages": soa_pages,
+                    "model": config.model_name,
+                    "validateWithVision": config.validate_with_vision,
+                    "removeHallucinations": config.remove_hallucinations,
+                    "confidenceThreshold": config.hallucination_confidence_threshold,
+                },
+                artifacts=["9_final_soa.json"],
             )
             
             # Load SoA data for combining
             if result.success and result.output_path:
-                with open(result.output_path, 'r', encoding='utf-8') as f:
-                    soa_data = json.load(f)
+                soa_data = load_artifact(result.output_path)
         else:
             # Check for existing SoA
             existing_soa = os.path.join(output_dir, "9_final_soa.json")
             if os.path.exists(existing_soa):
                 logger.info(f"Loading existing SoA from {existing_soa}")
-                with open(existing_soa, 'r', encoding='utf-8') as f:
-                    soa_data = json.load(f)
+                soa_data = load_artifact(existing_soa)
         
         # Print SoA results
         if result:
@@ -1320,6 +1500,7 @@ Examples:
                 output_dir=output_dir,
                 model=config.model_name,
                 phases=expansion_phases,
+                checkpoints=checkpoints,
             )
             
             # Print expansion summary
@@ -1332,7 +1513,13 @@ Examples:
             logger.info("\n--- Conditional: SAP Analysis Populations ---")
             try:
                 from extraction.conditional import extract_from_sap
-                sap_result = extract_from_sap(conditional_sources['sap'], model=config.model_name, output_dir=output_dir)
+                sap_path = conditional_sources['sap']
+                sap_result = run_step(
+                    checkpoints, 'sap',
+                    lambda: extract_from_sap(sap_path, model=config.model_name, output_dir=output_dir),
+                    inputs={"sap": get_file_hash(sap_path), "model": config.model_name},
+                    artifacts=["11_sap_populations.json"],
+                )
                 if sap_result.success:
                     expansion_results['sap'] = sap_result
                     logger.info(f"  ✓ SAP extraction ({sap_result.data.to_dict()['summary']['populationCount']} populations)")
@@ -1345,7 +1532,13 @@ Examples:
             logger.info("\n--- Conditional: Study Sites ---")
             try:
                 from extraction.conditional import extract_from_sites
-                sites_result = extract_from_sites(conditional_sources['sites'], output_dir=output_dir)
+                sites_path = conditional_sources['sites']
+                sites_result = run_step(
+                    checkpoints, 'sites',
+                    lambda: extract_from_sites(sites_path, output_dir=output_dir),
+                    inputs={"sites": get_file_hash(sites_path)},
+                    artifacts=["12_study_sites.json"],
+                )
                 if sites_result.success:
                     expansion_results['sites'] = sites_result
                     logger.info(f"  ✓ Sites extraction ({sites_result.data.to_dict()['summary']['siteCount']} sites)")
@@ -1364,7 +1557,12 @@ Examples:
             logger.info("\n" + "="*60)
             logger.info("COMBINING OUTPUTS")
             logger.info("="*60)
-            combined_data, combined_usdm_path = combine_to_full_usdm(output_dir, soa_data, expansion_results)
+            combined_data, combined_usdm_path = run_step(
+                checkpoints, 'combine',
+                lambda: combine_to_full_usdm(output_dir, soa_data, expansion_results),
+                inputs=id_inputs(),
+                upstream=(["soa"] if soa_data else []) + list(expansion_results),
+            )
             
             # ═══════════════════════════════════════════════════════════════
             # SCHEMA VALIDATION & AUTO-FIX (integrated into combine phase)
@@ -1373,59 +1571,74 @@ Examples:
             logger.info("SCHEMA VALIDATION & AUTO-FIX")
             logger.info("="*60)
             
-            # Validate and fix schema issues
+            # Validate and fix schema issues (skipped when combine output is unchanged)
             use_llm_for_fixes = not args.no_validate  # Use LLM unless explicitly disabled
-            fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map = validate_and_fix_schema(
-                combined_data,
-                output_dir,
-                model=config.model_name,
-                use_llm=use_llm_for_fixes,
-            )
-            
-            # Save the fixed data back to protocol_usdm.json
-            # (Always save since UUID conversion happens)
-            with open(combined_usdm_path, 'w', encoding='utf-8') as f:
-                json.dump(fixed_data, f, indent=2, ensure_ascii=False)
-            logger.info(f"  ✓ USDM output saved to: {combined_usdm_path}")
-            
-            # Note: protocol_usdm_provenance.json is created during validate_and_fix_schema
-            # with UUID-converted IDs that match protocol_usdm.json exactly
-            prov_path = os.path.join(output_dir, "protocol_usdm_provenance.json")
-            if os.path.exists(prov_path):
-                logger.info(f"  ✓ Provenance file: protocol_usdm_provenance.json")
             
-            combined_data = fixed_data
-            
-            # Save schema validation results (including unfixable issues)
-            schema_output_path = os.path.join(output_dir, "schema_validation.json")
-            schema_output = {
-                "valid": usdm_result.valid if usdm_result else (schema_validation_result.valid if schema_validation_result else False),
-                "schemaVersion": "4.0",
-                "validator": "usdm_pydantic" if usdm_result else "openapi_custom",
-                "summary": {
-                    "errorsCount": usdm_result.error_count if usdm_result else 0,
-                    "warningsCount": usdm_result.warning_count if usdm_result else 0,
-                },
-                "issues": [i.to_dict() for i in (usdm_result.issues if usdm_result else (schema_validation_result.issues if schema_validation_result else []))],
-            }
-            if schema_fixer_result:
-                schema_output["fixerSummary"] = {
-                    "originalIssues": schema_fixer_result.original_issues,
-                    "fixedIssues": schema_fixer_result.fixed_issues,
-                    "remainingIssues": schema_fixer_result.remaining_issues,
-                    "iterations": schema_fixer_result.iterations,
+            def _validate_combined():
+                fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map = validate_and_fix_schema(
+                    combined_data,
+                    output_dir,
+                    model=config.model_name,
+                    use_llm=use_llm_for_fixes,
+                )
+                
+                # Replace protocol_usdm.json with the fixed data
+                # (Always, since UUID conversion happens)
+                put_artifact(combined_usdm_path, fixed_data)
+                logger.info(f"  ✓ USDM output saved to: {combined_usdm_path}")
+                
+                # Note: protocol_usdm_provenance.json is created during validate_and_fix_schema
+                # with UUID-converted IDs that match protocol_usdm.json exactly
+                prov_path = os.path.join(output_dir, "protocol_usdm_provenance.json")
+                if artifact_exists(prov_path):
+                    logger.info(f"  ✓ Provenance file: protocol_usdm_provenance.json")
+                
+                # Save schema validation results (including unfixable issues)
+                schema_output_path = os.path.join(output_dir, "schema_validation.json")
+                schema_output = {
+                    "valid": usdm_result.valid if usdm_result else (schema_validation_result.valid if schema_validation_result else False),
+                    "schemaVersion": "4.0",
+                    "validator": "usdm_pydantic" if usdm_result else "openapi_custom",
+                    "summary": {
+                        "errorsCount": usdm_result.error_count if usdm_result else 0,
+                        "warningsCount": usdm_result.warning_count if usdm_result else 0,
+                    },
+                    "issues": [i.to_dict() for i in (usdm_result.issues if usdm_result else (schema_validation_result.issues if schema_validation_result else []))],
                 }
-                schema_output["fixesApplied"] = [f.to_dict() for f in schema_fixer_result.fixes_applied]
-                schema_output["unfixableIssues"] = [i.to_dict() for i in schema_fixer_result.unfixable_issues]
+                if schema_fixer_result:
+                    schema_output["fixerSummary"] = {
+                        "originalIssues": schema_fixer_result.original_issues,
+                        "fixedIssues": schema_fixer_result.fixed_issues,
+                        "remainingIssues": schema_fixer_result.remaining_issues,
+                        "iterations": schema_fixer_result.iterations,
+                    }
+                    schema_output["fixesApplied"] = [f.to_dict() for f in schema_fixer_result.fixes_applied]
+                    schema_output["unfixableIssues"] = [i.to_dict() for i in schema_fixer_result.unfixable_issues]
+                
+                put_artifact(schema_output_path, schema_output)
+                logger.info(f"  Schema validation report: {schema_output_path}")
+                return fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map
             
-            with open(schema_output_path, 'w', encoding='utf-8') as f:
-                json.dump(schema_output, f, indent=2, ensure_ascii=False)
-            logger.info(f"  Schema validation report: {schema_output_path}")
+            fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map = run_step(
+                checkpoints, 'validate', _validate_combined,
+                inputs={"model": config.model_name, "useLlm": use_llm_for_fixes, **id_inputs()},
+                upstream=["combine"],
+                artifacts=["protocol_usdm.json", "schema_validation.json"],
+            )
+            combined_data = fixed_data
         
         # Determine which output to validate with legacy/conformance
         # For full-protocol: validate combined output
-        # For SoA-only: validate SoA output
-        validation_target = combined_usdm_path if combined_usdm_path else (result.output_path if result else None)
+        # For SoA-only: validate a copy of the SoA output. 9_final_soa.json stays
+        # the soa step's checkpointed artifact; validation (UUID conversion) and
+        # enrichment rewrite 9_final_soa_usdm.json, as they do protocol_usdm.json
+        soa_output_path = result.output_path if result else None
+        if combined_usdm_path:
+            validation_target = combined_usdm_path
+        elif soa_output_path:
+            validation_target = os.path.join(output_dir, "9_final_soa_usdm.json")
+        else:
+            validation_target = None
         
         # Run post-processing steps if requested
         if validation_target:
@@ -1433,31 +1646,10 @@ Examples:
             run_validate = args.validate_schema or args.soa or args.full_protocol
             run_conform = args.conformance or args.soa or args.full_protocol
             
-            if run_enrich:
-                logger.info("\n--- Step 7: Terminology Enrichment ---")
-                from enrichment.terminology import enrich_terminology as enrich_fn, update_evs_cache
-                
-                # Update EVS cache if requested
-                if args.update_evs_cache:
-                    logger.info("  Updating EVS terminology cache...")
-                    cache_result = update_evs_cache()
-                    logger.info(f"  Cache updated: {cache_result.get('success', 0)} codes fetched")
-                
-                enrich_result = enrich_fn(validation_target, output_dir=output_dir)
-                enriched = enrich_result.get('enriched', 0)
-                total = enrich_result.get('total_entities', 0)
-                if enriched > 0:
-                    logger.info(f"  ✓ Enriched {enriched}/{total} entities with NCI codes")
-                    by_type = enrich_result.get('by_type', {})
-                    for etype, count in by_type.items():
-                        logger.info(f"    - {etype}: {count}")
-                else:
-                    logger.info(f"  No entities required enrichment")
-            
             if run_validate:
                 # Skip legacy validation if OpenAPI validation was already done
                 if schema_validation_result is not None:
-                    logger.info("\n--- Step 8: Schema Validation (already completed) ---")
+                    logger.info("\n--- Step 7: Schema Validation (already completed) ---")
                     if usdm_result and usdm_result.valid:
                         logger.info(f"  ✓ Schema validation PASSED")
                     elif usdm_result:
@@ -1467,49 +1659,58 @@ Examples:
                         logger.info(f"  Schema validation completed")
                 else:
                     # Run validation for SoA-only outputs
-                    logger.info("\n--- Step 8: Schema Validation ---")
-                    with open(validation_target, 'r', encoding='utf-8') as f:
-                        target_data = json.load(f)
+                    logger.info("\n--- Step 7: Schema Validation ---")
+                    use_llm_for_fixes = not args.no_validate
+
+                    def _validate_soa():
+                        # Copied: validation edits its input, and this is the live soa artifact
+                        target_data = copy.deepcopy(load_artifact(soa_output_path))
                     
-                    fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map = validate_and_fix_schema(
-                        target_data,
-                        output_dir,
-                        model=config.model_name,
-                        use_llm=not args.no_validate,
-                    )
+                        fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map = validate_and_fix_schema(
+                            target_data,
+                            output_dir,
+                            model=config.model_name,
+                            use_llm=use_llm_for_fixes,
+                        )
                     
-                    # Save fixed data (UUID conversion always happens)
-                    with open(validation_target, 'w', encoding='utf-8') as f:
-                        json.dump(fixed_data, f, indent=2, ensure_ascii=False)
-                    logger.info(f"  ✓ Fixed data saved")
+                        # Save fixed data (UUID conversion always happens)
+                        put_artifact(validation_target, fixed_data)
+                        logger.info(f"  ✓ Fixed data saved")
                     
-                    # Note: protocol_usdm_provenance.json is created during validate_and_fix_schema
-                    prov_path = os.path.join(output_dir, "protocol_usdm_provenance.json")
-                    if os.path.exists(prov_path):
-                        logger.info(f"  ✓ Provenance file: protocol_usdm_provenance.json")
+                        # Note: protocol_usdm_provenance.json is created during validate_and_fix_schema
+                        prov_path = os.path.join(output_dir, "protocol_usdm_provenance.json")
+                        if artifact_exists(prov_path):
+                            logger.info(f"  ✓ Provenance file: protocol_usdm_provenance.json")
                     
-                    # Save schema validation report
-                    schema_output_path = os.path.join(output_dir, "schema_validation.json")
-                    schema_output = {
-                        "valid": usdm_result.valid if usdm_result else False,
-                        "schemaVersion": "4.0",
-                        "validator": "usdm_pydantic" if usdm_result else "none",
-                        "summary": {
-                            "errorsCount": usdm_result.error_count if usdm_result else 0,
-                            "warningsCount": usdm_result.warning_count if usdm_result else 0,
-                        },
-                        "issues": [i.to_dict() for i in (usdm_result.issues if usdm_result else [])],
-                    }
-                    if schema_fixer_result:
-                        schema_output["fixerSummary"] = {
-                            "originalIssues": schema_fixer_result.original_issues,
-                            "fixedIssues": schema_fixer_result.fixed_issues,
-                            "remainingIssues": schema_fixer_result.remaining_issues,
+                        # Save schema validation report
+                        schema_output_path = os.path.join(output_dir, "schema_validation.json")
+                        schema_output = {
+                            "valid": usdm_result.valid if usdm_result else False,
+                            "schemaVersion": "4.0",
+                            "validator": "usdm_pydantic" if usdm_result else "none",
+                            "summary": {
+                                "errorsCount": usdm_result.error_count if usdm_result else 0,
+                                "warningsCount": usdm_result.warning_count if usdm_result else 0,
+                            },
+                            "issues": [i.to_dict() for i in (usdm_result.issues if usdm_result else [])],
                         }
-                        schema_output["fixesApplied"] = [f.to_dict() for f in schema_fixer_result.fixes_applied]
+                        if schema_fixer_result:
+                            schema_output["fixerSummary"] = {
+                                "originalIssues": schema_fixer_result.original_issues,
+                                "fixedIssues": schema_fixer_result.fixed_issues,
+                                "remainingIssues": schema_fixer_result.remaining_issues,
+                            }
+                            schema_output["fixesApplied"] = [f.to_dict() for f in schema_fixer_result.fixes_applied]
                     
-                    with open(schema_output_path, 'w', encoding='utf-8') as f:
-                        json.dump(schema_output, f, indent=2, ensure_ascii=False)
+                        put_artifact(schema_output_path, schema_output)
+                        return fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map
+
+                    fixed_data, schema_validation_result, schema_fixer_result, usdm_result, id_map = run_step(
+                        checkpoints, 'validate', _validate_soa,
+                        inputs={"model": config.model_name, "useLlm": use_llm_for_fixes, **id_inputs()},
+                        upstream=["soa"],
+                        artifacts=[os.path.relpath(validation_target, output_dir), "schema_validation.json"],
+                    )
                     
                     final_valid = usdm_result.valid if usdm_result else (schema_validation_result.valid if schema_validation_result else False)
                     if final_valid:
@@ -1517,10 +1718,50 @@ Examples:
                     else:
                         logger.warning(f"  Schema validation found issues (see schema_validation.json)")
             
+            if run_enrich:
+                logger.info("\n--- Step 8: Terminology Enrichment ---")
+                from enrichment.terminology import enrich_terminology as enrich_fn, update_evs_cache
+                
+                # Update EVS cache if requested
+                if args.update_evs_cache:
+                    logger.info("  Updating EVS terminology cache...")
+                    cache_result = update_evs_cache()
+                    logger.info(f"  Cache updated: {cache_result.get('success', 0)} codes fetched")
+                
+                # Enrichment edits validation_target in place, after validation
+                validated = bool(combined_usdm_path) or run_validate
+
+                def _enrich():
+                    if not validated:
+                        # SoA-only without validation: enrich a copy of the SoA output
+                        put_artifact(validation_target, copy.deepcopy(load_artifact(soa_output_path)))
+                    return enrich_fn(validation_target, output_dir=output_dir)
+
+                enrich_result = run_step(
+                    checkpoints, 'enrich', _enrich,
+                    inputs={"target": os.path.basename(validation_target)},
+                    upstream=["validate"] if validated else ["soa"],
+                    artifacts=[os.path.relpath(validation_target, output_dir)],
+                )
+                enriched = enrich_result.get('enriched', 0)
+                total = enrich_result.get('total_entities', 0)
+                if enriched > 0:
+                    logger.info(f"  ✓ Enriched {enriched}/{total} entities with NCI codes")
+                    by_type = enrich_result.get('by_type', {})
+                    for etype, count in by_type.items():
+                        logger.info(f"    - {etype}: {count}")
+                else:
+                    logger.info(f"  No entities required enrichment")
+            
             if run_conform:
                 logger.info("\n--- Step 9: CDISC Conformance ---")
                 from validation.cdisc_conformance import run_cdisc_conformance as conform_fn
-                conform_result = conform_fn(validation_target, output_dir)
+                conform_result = run_step(
+                    checkpoints, 'conformance',
+                    lambda: conform_fn(validation_target, output_dir),
+                    upstream=["validate", "enrich"],
+                    artifacts=["conformance_report.json"],
+                )
                 if conform_result.get('success'):
                     issues = conform_result.get('issues', 0)
                     warnings = conform_result.get('warnings', 0)
@@ -1539,18 +1780,22 @@ Examples:
             
             # Update computational execution status if full protocol
             if combined_usdm_path and run_validate and schema_validation_result is not None:
-                with open(combined_usdm_path, 'r', encoding='utf-8') as f:
-                    final_data = json.load(f)
+                final_data = load_artifact(combined_usdm_path)
                 if "computationalExecution" not in final_data:
                     final_data["computationalExecution"] = {}
                 final_data["computationalExecution"]["validationStatus"] = "complete" if schema_validation_result.valid else "issues_found"
-                with open(combined_usdm_path, 'w', encoding='utf-8') as f:
-                    json.dump(final_data, f, indent=2, ensure_ascii=False)
+                put_artifact(combined_usdm_path, final_data)
+        
+        # Every artifact is on disk before anything else reads the output directory
+        if not close_store():
+            logger.warning("Some output files could not be written (see errors above)")
         
         # Launch Streamlit viewer if requested
         if args.view:
             if combined_usdm_path and os.path.exists(combined_usdm_path):
                 launch_viewer(combined_usdm_path)
+            elif validation_target and os.path.exists(validation_target):
+                launch_viewer(validation_target)
             elif result and result.success and result.output_path:
                 launch_viewer(result.output_path)
         
@@ -1559,6 +1804,25 @@ Examples:
         expansion_success = all(r.success for r in expansion_results.values()) if expansion_results else True
         overall_success = soa_success and expansion_success
         
+        # Tokens saved by context packing, per phase
+        packing_report = save_packing_report(output_dir)
+        if packing_report:
+            saved = sum(s["tokens_saved"] for s in get_packing_stats().values())
+            logger.info(f"Context packing saved {saved:,} prompt tokens: {packing_report}")
+        
+        # Peak memory of the run (read back by the batch runner's --memory-budget)
+        memory = run_memory()
+        checkpoints.record_run_memory(memory)
+        run_span.attrs["memory.rss_peak_mb"] = memory.get("rssPeakMb")
+        logger.info(f"Peak memory: {memory.get('rssPeakMb', 0):,.0f} MB RSS")
+        
+        # Wall/CPU time per phase (and cProfile dumps with --profile)
+        end_span(run_span)
+        timing_report = save_timing_report(output_dir)
+        if timing_report:
+            logger.info("Timing by phase:\n" + format_timing_table(summarize_spans()))
+        save_trace(output_dir, args.trace_format)
+        
         # Final summary
         logger.info("\n" + "="*60)
         logger.info("EXTRACTION COMPLETE")
@@ -1568,7 +1832,9 @@ Examples:
         if run_any_expansion:
             exp_success = sum(1 for r in expansion_results.values() if r.success)
             logger.info(f"Expansion: {exp_success}/{len(expansion_results)} phases successful")
-        
+        if checkpoints.enabled:
+            logger.info(f"Checkpoints: {checkpoints.summary()}")
+
         # Schema validation summary
         if schema_validation_result is not None:
             if schema_validation_result.valid:
@@ -1590,6 +1856,11 @@ Examples:
         if args.verbose:
             import traceback
             traceback.print_exc()
+        close_store()
+        run_span.attrs["memory.rss_peak_mb"] = run_memory().get("rssPeakMb")
+        end_span(run_span, error=type(e).__name__)
+        save_timing_report(output_dir)
+        save_trace(output_dir, args.trace_format)
         sys.exit(1)
 
 
@@ -2,12 +2,13 @@ import streamlit as st
 import json
 import os
 import glob
-import pandas as pd  # for reading the M11 mapping workbook
 import re
 import html
 from pathlib import Path
 from datetime import datetime
 
+from core.usdm_index import USDMIndex
+
 # ============================================================================
 # CUSTOM CSS FOR UX IMPROVEMENTS
 # ============================================================================
@@ -644,6 +645,7 @@ def get_schedule_components(data):
         'activityTimepoints': schedule_data.get('activityTimepoints', []),
         'footnotes': soa_footnotes,
         '_raw_study_design': schedule_data,  # Keep raw for additional lookups
+        '_index': USDMIndex(schedule_data),  # id/reference lookups for the grid build
     }
 
 
@@ -651,6 +653,8 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
     """
     Parses a potentially incomplete or non-standard USDM file and renders the best possible SoA table.
     """
+    import pandas as pd
+
     components = get_schedule_components(data)
     if not components:
         st.error(
@@ -664,6 +668,7 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
         return
 
     # --- Create maps for easy lookups ---
+    index = components['_index']
     activity_map = {act.get('id'): act for act in components['activities'] if act.get('id')}
     epoch_map = {e.get('id'): e.get('name', 'Unnamed Epoch') for e in components['epochs'] if e.get('id')}
     encounter_map = {e.get('id'): e.get('name', 'Unnamed Encounter') for e in components['encounters'] if e.get('id')}
@@ -703,7 +708,7 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
             if pt and pt.get('encounterId') and at.get('activityId'):
                 encounter_id = pt['encounterId']
                 # Find the epoch for this encounter
-                epoch_id = next((enc.get('epochId') for enc in components['encounters'] if enc.get('id') == encounter_id), None)
+                epoch_id = (index.get(encounter_id) or {}).get('epochId')
                 if epoch_id:
                     epoch_encounter_pairs[epoch_id].add(encounter_id)
                     activity_encounter_links.add((at['activityId'], encounter_id))
@@ -771,7 +776,6 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
 
     # Helper maps
     epoch_map = {e.get('id'): e.get('name', 'Unnamed Epoch') for e in components['epochs'] if e.get('id')}
-    enc_map_full = {e.get('id'): e for e in components['encounters'] if e.get('id')}
 
     # Maintain original file order by iterating through plannedTimepoints as they appear
     for pt in components['plannedTimepoints']:
@@ -781,7 +785,7 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
             continue
 
         # epoch → encounter → pt
-        enc = enc_map_full.get(enc_id, {})
+        enc = index.get(enc_id) or {}
         epoch_id = enc.get('epochId')
         epoch_name = epoch_map.get(epoch_id, 'Unnamed Epoch')
         # Prefer visit-window label from timing; fallback to encounter name
@@ -810,7 +814,6 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
     col_multi_index = pd.MultiIndex.from_tuples(col_index_data, names=['Epoch', 'Visit Window', 'Planned TP'])
 
     # --- Create and Populate DataFrame ---
-    df = pd.DataFrame("", index=row_multi_index, columns=col_multi_index)
 
     # Pre-compute activity ⇢ plannedTimepoint/encounter links
     activity_pt_links = set()
@@ -856,14 +859,20 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
             if at.get('activityId') and at.get('plannedTimepointId'):
                 activity_pt_links.add((at['activityId'], at['plannedTimepointId']))
 
-    # populate DataFrame from USDM activity-timepoint links
+    # populate DataFrame from USDM activity-timepoint links - one pass over the
+    # links by grid position instead of a .loc lookup per activity x timepoint
+    rows_by_activity = defaultdict(list)
     for i, activity in enumerate(ordered_activities):
-        row_label = row_index_data[i]
-        act_id = activity.get('id')
-        for col_tuple, pt_info in zip(col_index_data, ordered_pt_for_cols):
-            pt_id = pt_info['id']
-            if (act_id, pt_id) in activity_pt_links:
-                df.loc[row_label, col_tuple] = 'X'
+        rows_by_activity[activity.get('id')].append(i)
+    cols_by_pt = defaultdict(list)
+    for j, pt_info in enumerate(ordered_pt_for_cols):
+        cols_by_pt[pt_info['id']].append(j)
+    cells = [[""] * len(col_index_data) for _ in row_index_data]
+    for act_id, pt_id in activity_pt_links:
+        for i in rows_by_activity.get(act_id, ()):
+            for j in cols_by_pt.get(pt_id, ()):
+                cells[i][j] = 'X'
+    df = pd.DataFrame(cells, index=row_multi_index, columns=col_multi_index)
 
     # Display the full dataframe (no filtering of all-X rows)
     df_display = df
@@ -1225,6 +1234,133 @@ def render_flexible_soa(data, table_id: str = "main", source_name: str = "SoA da
         # No provenance - simple dataframe display
         st.dataframe(df_display, use_container_width=True, height=600)
 
+def find_trace_files(run_path):
+    """Trace files for a run: its own, and the batch trace of its parent folder."""
+    candidates = []
+    for folder in (Path(run_path), Path(run_path).parent):
+        for name in ("trace.jsonl", "trace.otlp.json"):
+            if (folder / name).exists():
+                candidates.append(folder / name)
+                break
+    return candidates
+
+def render_trace_timeline(run_path):
+    """Gantt view of the spans in trace.jsonl / trace.otlp.json (see core/profiling.py)."""
+    import altair as alt
+    import pandas as pd
+    from core.profiling import critical_path, load_trace
+
+    trace_files = find_trace_files(run_path)
+    if not trace_files:
+        render_no_data_message("Timeline", "Traces are written by main_v2.py and main.py runs (trace.jsonl)")
+        return
+
+    trace_file = st.selectbox(
+        "Trace file", trace_files, format_func=lambda p: str(p), key="trace_file",
+        help="The run's own trace, or the batch trace that covers every protocol in the batch",
+    )
+    try:
+        spans = load_trace(str(trace_file))
+    except Exception as e:
+        st.error(f"Could not read {trace_file}: {e}")
+        return
+    if not spans:
+        st.info("Trace file is empty.")
+        return
+
+    traces = sorted({s['traceId'] for s in spans}, key=lambda t: -max(
+        s['endTimeUnixNano'] for s in spans if s['traceId'] == t))
+    if len(traces) > 1:
+        trace_id = st.selectbox("Trace", traces, key="trace_id")
+        spans = [s for s in spans if s['traceId'] == trace_id]
+
+    by_id = {s['spanId']: s for s in spans}
+    critical = {s['spanId'] for s in critical_path(spans)}
+    t0 = min(s['startTimeUnixNano'] for s in spans)
+
+    def depth(s):
+        d = 0
+        while s.get('parentSpanId') in by_id and d < 50:
+            s = by_id[s['parentSpanId']]
+            d += 1
+        return d
+
+    def top_phase(s):
+        # First span below the run/batch level, used to colour bars
+        chain = [s]
+        while chain[-1].get('parentSpanId') in by_id:
+            chain.append(by_id[chain[-1]['parentSpanId']])
+        below = [c for c in reversed(chain) if c['name'] not in ('batch', 'batch.job', 'run')]
+        return below[0]['name'] if below else s['name']
+
+    rows = []
+    for s in spans:
+        attrs = s.get('attributes', {})
+        resource = s.get('resource', {})
+        rows.append({
+            'span': s['name'],
+            'label': '  ' * depth(s) + s['name'],
+            'lane': f"{resource.get('p2u.protocol') or attrs.get('p2u.protocol', '')} · "
+                    f"pid {resource.get('process.pid', '?')} · {attrs.get('thread.name', '')}",
+            'phase': top_phase(s),
+            'start_s': (s['startTimeUnixNano'] - t0) / 1e9,
+            'end_s': (s['endTimeUnixNano'] - t0) / 1e9,
+            'duration_s': (s['endTimeUnixNano'] - s['startTimeUnixNano']) / 1e9,
+            'cpu_s': attrs.get('p2u.cpu_seconds'),
+            'tokens_in': attrs.get('gen_ai.usage.input_tokens'),
+            'tokens_out': attrs.get('gen_ai.usage.output_tokens'),
+            'cache_hit': attrs.get('cache.hit'),
+            'critical': s['spanId'] in critical,
+            'status': s.get('status', {}).get('code', 'OK'),
+            'order': s['startTimeUnixNano'],
+        })
+    df = pd.DataFrame(rows)
+    for col in ('cpu_s', 'tokens_in', 'tokens_out'):
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    llm = df[df['span'] == 'llm.request']
+    total = df['end_s'].max()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Wall time", f"{total:.1f}s")
+    col2.metric("Spans", len(df))
+    col3.metric("LLM requests", len(llm))
+    tokens = int(llm['tokens_in'].fillna(0).sum() + llm['tokens_out'].fillna(0).sum()) if len(llm) else 0
+    col4.metric("LLM tokens", f"{tokens:,}")
+
+    col1, col2 = st.columns(2)
+    group_by = col1.radio("Rows", ["Span", "Protocol / worker"], horizontal=True, key="trace_rows")
+    min_ms = col2.slider("Hide spans shorter than (ms)", 0, 5000, 0, step=50, key="trace_min_ms")
+    shown = df[df['duration_s'] * 1000 >= min_ms].sort_values('order')
+    if len(shown) > 1500:
+        st.caption(f"Showing the 1500 longest of {len(shown)} spans")
+        shown = shown.nlargest(1500, 'duration_s').sort_values('order')
+
+    y_field = 'label' if group_by == "Span" else 'lane'
+    height = max(200, min(4000, 18 * shown[y_field].nunique()))
+    chart = alt.Chart(shown).mark_bar().encode(
+        x=alt.X('start_s:Q', title='Seconds since trace start'),
+        x2='end_s:Q',
+        y=alt.Y(f'{y_field}:N', sort=None, title=None, axis=alt.Axis(labelLimit=400)),
+        color=alt.Color('phase:N', legend=alt.Legend(title='Phase')),
+        opacity=alt.condition(alt.datum.critical, alt.value(1.0), alt.value(0.45)),
+        tooltip=['span', 'phase', alt.Tooltip('duration_s:Q', format='.3f'),
+                 alt.Tooltip('cpu_s:Q', format='.3f'), 'tokens_in', 'tokens_out',
+                 'cache_hit', 'status', 'lane'],
+    ).properties(height=height)
+    st.altair_chart(chart, use_container_width=True)
+    st.caption("Opaque bars are on the critical path (the chain that set end-to-end latency).")
+
+    with st.expander("Critical path"):
+        path = df[df['critical']].sort_values('order')
+        st.dataframe(path[['label', 'start_s', 'duration_s', 'cpu_s', 'lane']], use_container_width=True)
+
+    with st.expander("Totals by span"):
+        totals = df.groupby('span').agg(
+            calls=('span', 'size'), total_s=('duration_s', 'sum'), max_s=('duration_s', 'max'),
+            cpu_s=('cpu_s', 'sum'), tokens_in=('tokens_in', 'sum'), tokens_out=('tokens_out', 'sum'),
+        ).sort_values('total_s', ascending=False)
+        st.dataframe(totals, use_container_width=True)
+
 def get_provenance_sources(provenance, item_type, item_id):
     """
     Determines the provenance (text, vision, or both) for a given item ID.
@@ -1803,12 +1939,13 @@ st.markdown("--- ")
 st.header("Intermediate Outputs & Debugging")
 
 # Create tabs for intermediate files
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "Text Extraction", 
     "Data Files", 
     "SoA Images",
     "Quality Metrics",
     "Validation & Conformance",
+    "Timeline",
 ])
 
 with tab1:
@@ -1902,7 +2039,7 @@ with tab5:
         st.info("Select an output directory to view validation results.")
     else:
         # --- Terminology Enrichment ---
-        st.markdown("### 🏷️ Terminology Enrichment (Step 7)")
+        st.markdown("### 🏷️ Terminology Enrichment (Step 8)")
         
         # Check for enrichment report
         enrichment_file = output_dir / "terminology_enrichment.json"
@@ -2020,3 +2157,7 @@ with tab5:
                     st.markdown(f"- Remaining issues: {fixer.get('remainingIssues', 0)}")
         else:
             st.info("Schema validation not run. Use `--validate-schema` or `--full` flag.")
+
+with tab6:
+    st.subheader("Pipeline Timeline")
+    render_trace_timeline(run_path)
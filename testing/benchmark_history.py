@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Benchmark History - SQLite history of benchmark runs and regression reports.
+
+Ingests the results the benchmark tools write to benchmark_results/ into a
+local SQLite database (benchmark_results/history.sqlite):
+
+- offline_<timestamp>.json from benchmark_offline.py: per-stage latency
+  samples, throughput, RSS growth and scaling exponents
+- benchmark_report.json from benchmark_models.py: per model and protocol
+  duration, tokens, cost, peak RSS, golden accuracy, success and
+  conformance issues (the file is overwritten by each run, so the history
+  is where older runs are kept)
+- the older benchmark_<timestamp>.json files: execution time and quality
+  scores per test case
+
+and compares a run with a baseline run of the same kind. Each metric gets
+its change, a permutation-test p-value where both runs have repeated
+samples (offline latencies), and a status: a regression when it got worse
+by more than its kind's threshold and, where it can be tested, the change
+is significant; "noise" when it crossed the threshold but is not.
+
+Usage:
+    python testing/benchmark_history.py ingest
+    python testing/benchmark_history.py runs
+    python testing/benchmark_history.py compare --kind offline --report benchmark_results/report.md
+    python testing/benchmark_history.py compare --baseline 3 --threshold latency=5 \\
+        --report benchmark_results/report.html --fail-on-regression
+    python testing/benchmark_history.py history combine p50Ms
+"""
+
+import argparse
+import html
+import json
+import logging
+import random
+import sqlite3
+import statistics
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+RESULTS_DIR = PROJECT_ROOT / "benchmark_results"
+DEFAULT_DB = RESULTS_DIR / "history.sqlite"
+SCHEMA_VERSION = 1
+
+# Metric kinds: which direction is better and the default regression threshold (percent)
+METRIC_KINDS: Dict[str, Tuple[str, float]] = {
+    "latency": ("lower", 10.0),
+    "throughput": ("higher", 10.0),
+    "tokens": ("lower", 5.0),
+    "cost": ("lower", 5.0),
+    "memory": ("lower", 10.0),
+    "scaling": ("lower", 10.0),
+    "quality": ("higher", 5.0),
+    "issues": ("lower", 0.0),
+}
+
+ALPHA = 0.05
+MIN_SAMPLES = 3
+PERMUTATION_ROUNDS = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    commit_sha TEXT,
+    dirty INTEGER,
+    source TEXT,
+    ingested TEXT NOT NULL,
+    UNIQUE (kind, timestamp)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    subject TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value REAL NOT NULL,
+    samples TEXT,
+    PRIMARY KEY (run_id, subject, metric)
+);
+"""
+
+
+@dataclass
+class Metric:
+    """One measured value of a run: a stage or model/protocol and what was measured."""
+    subject: str
+    metric: str
+    kind: str
+    value: float
+    samples: Optional[List[float]] = None
+
+
+@dataclass
+class Run:
+    """A benchmark run as stored in the history."""
+    id: int
+    kind: str
+    timestamp: str
+    commit: Optional[str] = None
+    dirty: Optional[bool] = None
+    source: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        commit = (self.commit or "?") + ("+" if self.dirty else "")
+        return f"run {self.id} ({commit}, {self.timestamp})"
+
+
+@dataclass
+class Delta:
+    """A metric compared between the baseline and current run."""
+    subject: str
+    metric: str
+    kind: str
+    baseline: float
+    current: float
+    change_pct: Optional[float]
+    p_value: Optional[float]
+    threshold: float
+    status: str
+
+
+@dataclass
+class Comparison:
+    """Every metric the two runs share, plus what only one of them has."""
+    baseline: Run
+    current: Run
+    deltas: List[Delta] = field(default_factory=list)
+    only_baseline: List[str] = field(default_factory=list)
+    only_current: List[str] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(1 for d in self.deltas if d.status == status)
+
+    @property
+    def regressions(self) -> List[Delta]:
+        return [d for d in self.deltas if d.status == "regression"]
+
+
+# =============================================================================
+# Result files
+# =============================================================================
+
+def normalize_timestamp(value: str) -> str:
+    """ISO timestamp (seconds) from either 20261018_222016 or an ISO string."""
+    for parse in (lambda v: datetime.strptime(v, "%Y%m%d_%H%M%S"), datetime.fromisoformat):
+        try:
+            return parse(value).isoformat(timespec="seconds")
+        except (TypeError, ValueError):
+            continue
+    return str(value)
+
+
+def _offline_metrics(data: Dict) -> List[Metric]:
+    metrics = []
+    for name, r in data.get("stages", {}).items():
+        if "p50Ms" not in r:
+            continue
+        metrics.append(Metric(name, "p50Ms", "latency", r["p50Ms"], r.get("samplesMs")))
+        if r.get("throughput"):
+            metrics.append(Metric(name, "throughput", "throughput", r["throughput"]))
+        if "rssPeakGrowthMb" in r:
+            metrics.append(Metric(name, "rssPeakGrowthMb", "memory", r["rssPeakGrowthMb"]))
+    for name, s in data.get("scaling", {}).items():
+        if s.get("exponent") is not None:
+            metrics.append(Metric(name, "scalingExponent", "scaling", s["exponent"]))
+    return metrics
+
+
+def _model_metrics(data: Dict) -> List[Metric]:
+    metrics = []
+    for r in data.get("results", []):
+        subject = f"{r['model']}/{r['protocol']}"
+        metrics.append(Metric(subject, "success", "quality", 1.0 if r.get("success") else 0.0))
+        if not r.get("success"):
+            continue
+        metrics.append(Metric(subject, "durationSeconds", "latency", r.get("duration_seconds", 0.0)))
+        metrics.append(Metric(subject, "conformanceIssues", "issues", r.get("conformance_issues", 0)))
+        metrics.append(Metric(subject, "ticks", "quality", r.get("ticks", 0)))
+        tokens = r.get("input_tokens", 0) + r.get("output_tokens", 0)
+        if tokens:
+            metrics.append(Metric(subject, "totalTokens", "tokens", tokens))
+        if r.get("peak_rss_mb"):
+            metrics.append(Metric(subject, "peakRssMb", "memory", r["peak_rss_mb"]))
+        if r.get("cost_usd") is not None:
+            metrics.append(Metric(subject, "costUsd", "cost", r["cost_usd"]))
+        if r.get("accuracy") is not None:
+            metrics.append(Metric(subject, "accuracy", "quality", r["accuracy"]))
+    return metrics
+
+
+def _legacy_metrics(data: Dict) -> List[Metric]:
+    metrics = []
+    for case, m in data.get("test_cases", {}).items():
+        subject = f"{data.get('model', '?')}/{case}"
+        metrics.append(Metric(subject, "validationPass", "quality", 1.0 if m.get("validation_pass") else 0.0))
+        if m.get("error_occurred"):
+            continue
+        metrics.append(Metric(subject, "executionSeconds", "latency", m.get("execution_time_seconds", 0.0)))
+        for key, name in (("completeness_score", "completeness"), ("linkage_accuracy", "linkageAccuracy"),
+                          ("field_population_rate", "fieldPopulation")):
+            metrics.append(Metric(subject, name, "quality", m.get(key, 0.0)))
+    return metrics
+
+
+def parse_result(data: Dict) -> Optional[Tuple[str, List[Metric]]]:
+    """(kind, metrics) for a result file's contents, or None if it isn't a benchmark result."""
+    if not isinstance(data, dict) or "timestamp" not in data:
+        return None
+    if "stages" in data:
+        return "offline", _offline_metrics(data)
+    if "results" in data and "models" in data:
+        return "models", _model_metrics(data)
+    if "test_cases" in data:
+        return "legacy", _legacy_metrics(data)
+    return None
+
+
+# =============================================================================
+# History database
+# =============================================================================
+
+class BenchmarkHistory:
+    """SQLite store of benchmark runs and their metrics."""
+
+    def __init__(self, path: str = str(DEFAULT_DB)):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "BenchmarkHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def ingest(self, path: str) -> Optional[int]:
+        """Add a result file; returns the new run id, or None if unrecognized or already present."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping {path}: {e}")
+            return None
+        parsed = parse_result(data)
+        if parsed is None:
+            logger.debug(f"Skipping {path}: not a benchmark result")
+            return None
+        kind, metrics = parsed
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO runs (kind, timestamp, commit_sha, dirty, source, ingested) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, normalize_timestamp(data["timestamp"]), data.get("commit"),
+                 None if data.get("dirty") is None else int(data["dirty"]),
+                 str(path), datetime.now().isoformat(timespec="seconds")),
+            )
+            if not cursor.rowcount:
+                return None
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO metrics (run_id, subject, metric, kind, value, samples) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, m.subject, m.metric, m.kind, float(m.value),
+                  json.dumps(m.samples) if m.samples else None) for m in metrics],
+            )
+        return run_id
+
+    def ingest_dir(self, directory: str = str(RESULTS_DIR)) -> List[int]:
+        """Ingest every result file in a directory, oldest first."""
+        added = []
+        for path in sorted(Path(directory).glob("*.json"), key=lambda p: p.stat().st_mtime):
+            run_id = self.ingest(str(path))
+            if run_id is not None:
+                added.append(run_id)
+        return added
+
+    def _run(self, row) -> Run:
+        return Run(id=row[0], kind=row[1], timestamp=row[2], commit=row[3],
+                   dirty=None if row[4] is None else bool(row[4]), source=row[5])
+
+    def runs(self, kind: Optional[str] = None) -> List[Run]:
+        """Runs in time order."""
+        query = "SELECT id, kind, timestamp, commit_sha, dirty, source FROM runs"
+        params: Tuple = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        return [self._run(row) for row in self.conn.execute(query + " ORDER BY timestamp, id", params)]
+
+    def find_run(self, ref: str, kind: Optional[str] = None) -> Optional[Run]:
+        """A run by id, or the latest run whose commit starts with ref."""
+        runs = self.runs(kind)
+        if str(ref).isdigit():
+            return next((r for r in runs if r.id == int(ref)), None)
+        matches = [r for r in runs if r.commit and r.commit.startswith(str(ref))]
+        return matches[-1] if matches else None
+
+    def metrics(self, run_id: int) -> Dict[Tuple[str, str], Metric]:
+        rows = self.conn.execute(
+            "SELECT subject, metric, kind, value, samples FROM metrics WHERE run_id = ?", (run_id,))
+        return {
+            (subject, metric): Metric(subject, metric, kind, value, json.loads(samples) if samples else None)
+            for subject, metric, kind, value, samples in rows
+        }
+
+    def series(self, subject: str, metric: str) -> List[Tuple[Run, float]]:
+        """A metric's value over every run that has it."""
+        rows = self.conn.execute(
+            "SELECT r.id, r.kind, r.timestamp, r.commit_sha, r.dirty, r.source, m.value "
+            "FROM metrics m JOIN runs r ON r.id = m.run_id "
+            "WHERE m.subject = ? AND m.metric = ? ORDER BY r.timestamp, r.id",
+            (subject, metric),
+        )
+        return [(self._run(row[:6]), row[6]) for row in rows]
+
+
+def record(path: str, db: Optional[str] = None) -> Optional[int]:
+    """Ingest a just-written result into the history next to it (the benchmark tools call this)."""
+    db = db or str(Path(path).parent / DEFAULT_DB.name)
+    try:
+        with BenchmarkHistory(db) as history:
+            return history.ingest(path)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record {path} in {db}: {e}")
+        return None
+
+
+# =============================================================================
+# Comparison
+# =============================================================================
+
+def permutation_p_value(a: List[float], b: List[float], rounds: int = PERMUTATION_ROUNDS,
+                        seed: int = 0) -> Optional[float]:
+    """
+    Two-sided p-value that two sample sets share a mean, by random
+    relabelling. No distribution assumptions, which suits latency samples;
+    None when either side has fewer than MIN_SAMPLES.
+    """
+    if len(a) < MIN_SAMPLES or len(b) < MIN_SAMPLES:
+        return None
+    observed = abs(statistics.fmean(a) - statistics.fmean(b))
+    pooled = list(a) + list(b)
+    rng = random.Random(seed)
+    hits = 0
+    for _ in range(rounds):
+        rng.shuffle(pooled)
+        if abs(statistics.fmean(pooled[:len(a)]) - statistics.fmean(pooled[len(a):])) >= observed - 1e-12:
+            hits += 1
+    return (hits + 1) / (rounds + 1)
+
+
+def compare_metric(base: Metric, cur: Metric, thresholds: Dict[str, float], alpha: float = ALPHA) -> Delta:
+    direction, default = METRIC_KINDS.get(cur.kind, ("lower", 10.0))
+    threshold = thresholds.get(cur.kind, default)
+    change = (cur.value - base.value) / abs(base.value) * 100 if base.value else None
+    p_value = permutation_p_value(base.samples or [], cur.samples or [])
+
+    # Positive "worse" means the metric moved in its bad direction
+    worse = cur.value - base.value if direction == "lower" else base.value - cur.value
+    worse_pct = (worse / abs(base.value) * 100) if base.value else (float("inf") if worse > 0 else 0.0)
+    if abs(worse_pct) <= threshold or worse == 0:
+        status = "unchanged"
+    elif p_value is not None and p_value >= alpha:
+        status = "noise"
+    else:
+        status = "regression" if worse > 0 else "improvement"
+    return Delta(cur.subject, cur.metric, cur.kind, base.value, cur.value,
+                 change, p_value, threshold, status)
+
+
+def compare_runs(history: BenchmarkHistory, baseline: Run, current: Run,
+                 thresholds: Optional[Dict[str, float]] = None, alpha: float = ALPHA) -> Comparison:
+    """Compare every metric two runs share."""
+    base_metrics = history.metrics(baseline.id)
+    cur_metrics = history.metrics(current.id)
+    comparison = Comparison(baseline=baseline, current=current)
+    for key, cur in cur_metrics.items():
+        if key in base_metrics:
+            comparison.deltas.append(compare_metric(base_metrics[key], cur, thresholds or {}, alpha))
+    order = {"regression": 0, "improvement": 1, "noise": 2, "unchanged": 3}
+    comparison.deltas.sort(key=lambda d: (order[d.status], d.subject, d.metric))
+    comparison.only_baseline = sorted({s for s, _ in base_metrics} - {s for s, _ in cur_metrics})
+    comparison.only_current = sorted({s for s, _ in cur_metrics} - {s for s, _ in base_metrics})
+    return comparison
+
+
+# =============================================================================
+# Reports
+# =============================================================================
+
+def _fmt(value: float) -> str:
+    return f"{value:,.3f}".rstrip("0").rstrip(".") if value != int(value) else f"{int(value):,}"
+
+
+def _change(d: Delta) -> str:
+    if d.change_pct is None:
+        return "new" if d.current else "-"
+    return f"{d.change_pct:+.1f}%"
+
+
+def _p(d: Delta) -> str:
+    return "-" if d.p_value is None else f"{d.p_value:.3f}"
+
+
+def _summary(comparison: Comparison) -> str:
+    return (f"{comparison.count('regression')} regressions, {comparison.count('improvement')} improvements, "
+            f"{comparison.count('noise')} within noise, {comparison.count('unchanged')} unchanged")
+
+
+def format_markdown(comparison: Comparison, all_metrics: bool = False) -> str:
+    """Markdown report; unchanged metrics are left out unless all_metrics."""
+    lines = [
+        f"# Benchmark comparison: {comparison.current.kind}",
+        "",
+        f"- Baseline: {comparison.baseline.label}",
+        f"- Current: {comparison.current.label}",
+        f"- **{_summary(comparison)}**",
+        "",
+        "| Subject | Metric | Baseline | Current | Change | p | Threshold | Status |",
+        "|---|---|---:|---:|---:|---:|---:|---|",
+    ]
+    for d in comparison.deltas:
+        if d.status == "unchanged" and not all_metrics:
+            continue
+        status = f"**{d.status}**" if d.status == "regression" else d.status
+        lines.append(f"| {d.subject} | {d.metric} | {_fmt(d.baseline)} | {_fmt(d.current)} | "
+                     f"{_change(d)} | {_p(d)} | {d.threshold:g}% | {status} |")
+    if comparison.only_baseline:
+        lines += ["", f"Only in baseline: {', '.join(comparison.only_baseline)}"]
+    if comparison.only_current:
+        lines += ["", f"Only in current: {', '.join(comparison.only_current)}"]
+    return "\n".join(lines) + "\n"
+
+
+_HTML_STYLE = """
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #ccc; padding: 4px 8px; }
+td.num { text-align: right; font-variant-numeric: tabular-nums; }
+tr.regression { background: #fdd; }
+tr.improvement { background: #dfd; }
+tr.noise { color: #777; }
+"""
+
+
+def format_html(comparison: Comparison, all_metrics: bool = False) -> str:
+    """Standalone HTML report with regressions and improvements highlighted."""
+    esc = html.escape
+    rows = []
+    for d in comparison.deltas:
+        if d.status == "unchanged" and not all_metrics:
+            continue
+        rows.append(
+            f'<tr class="{d.status}"><td>{esc(d.subject)}</td><td>{esc(d.metric)}</td>'
+            f'<td class="num">{_fmt(d.baseline)}</td><td class="num">{_fmt(d.current)}</td>'
+            f'<td class="num">{_change(d)}</td><td class="num">{_p(d)}</td>'
+            f'<td class="num">{d.threshold:g}%</td><td>{d.status}</td></tr>'
+        )
+    extra = ""
+    if comparison.only_baseline:
+        extra += f"<p>Only in baseline: {esc(', '.join(comparison.only_baseline))}</p>"
+    if comparison.only_current:
+        extra += f"<p>Only in current: {esc(', '.join(comparison.only_current))}</p>"
+    return (
+        f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>Benchmark comparison: {esc(comparison.current.kind)}</title>"
+        f"<style>{_HTML_STYLE}</style></head><body>\n"
+        f"<h1>Benchmark comparison: {esc(comparison.current.kind)}</h1>\n"
+        f"<p>Baseline: {esc(comparison.baseline.label)}<br>Current: {esc(comparison.current.label)}</p>\n"
+        f"<p><strong>{esc(_summary(comparison))}</strong></p>\n"
+        "<table><tr><th>Subject</th><th>Metric</th><th>Baseline</th><th>Current</th>"
+        "<th>Change</th><th>p</th><th>Threshold</th><th>Status</th></tr>\n"
+        + "\n".join(rows) + f"\n</table>\n{extra}\n</body></html>\n"
+    )
+
+
+def parse_thresholds(values: Optional[List[str]]) -> Dict[str, float]:
+    """--threshold latency=5 tokens=2 -> {"latency": 5.0, "tokens": 2.0}"""
+    thresholds = {}
+    for value in values or []:
+        kind, sep, pct = value.partition("=")
+        if not sep or kind not in METRIC_KINDS:
+            raise ValueError(f"Invalid threshold '{value}' (expected KIND=PERCENT, KIND one of {', '.join(METRIC_KINDS)})")
+        thresholds[kind] = float(pct)
+    return thresholds
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _compare(history: BenchmarkHistory, args) -> int:
+    current = history.find_run(args.current, args.kind) if args.current else None
+    if args.current and current is None:
+        logger.error(f"No run '{args.current}' in {history.path}")
+        return 2
+    kind = current.kind if current else args.kind
+    runs = history.runs(kind)
+    current = current or (runs[-1] if runs else None)
+    if current is None:
+        logger.error(f"No {kind} runs in {history.path} (run 'ingest' first)")
+        return 2
+
+    if args.baseline:
+        baseline = history.find_run(args.baseline, kind)
+    else:
+        earlier = [r for r in runs if (r.timestamp, r.id) < (current.timestamp, current.id)]
+        baseline = earlier[-1] if earlier else None
+    if baseline is None:
+        logger.error(f"No baseline run for {current.label}")
+        return 2
+
+    comparison = compare_runs(history, baseline, current, parse_thresholds(args.threshold), args.alpha)
+    markdown = format_markdown(comparison, args.all)
+    print(markdown)
+    if args.report:
+        report = format_html(comparison, args.all) if args.report.endswith((".html", ".htm")) else markdown
+        Path(args.report).write_text(report, encoding='utf-8')
+        logger.info(f"Report saved to {args.report}")
+    return 1 if args.fail_on_regression and comparison.regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track benchmark results over time and report regressions")
+    parser.add_argument("--db", default=str(DEFAULT_DB), help=f"History database (default: {DEFAULT_DB.relative_to(PROJECT_ROOT)})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="Add result files (default: everything in benchmark_results/)")
+    ingest.add_argument("files", nargs="*", help="Result JSON files")
+
+    runs = sub.add_parser("runs", help="List stored runs")
+    runs.add_argument("--kind", choices=["offline", "models", "legacy"])
+
+    compare = sub.add_parser("compare", help="Compare a run with a baseline")
+    compare.add_argument("--kind", choices=["offline", "models", "legacy"], default="offline",
+                         help="Kind of run when --current is not given (default: offline)")
+    compare.add_argument("--current", help="Run id or commit (default: latest run)")
+    compare.add_argument("--baseline", help="Run id or commit (default: the run before current)")
+    compare.add_argument("--threshold", nargs="+", metavar="KIND=PCT",
+                         help=f"Regression thresholds in percent, e.g. latency=5 tokens=2 (kinds: {', '.join(METRIC_KINDS)})")
+    compare.add_argument("--alpha", type=float, default=ALPHA, help=f"Significance level (default: {ALPHA})")
+    compare.add_argument("--report", help="Write the report to this file (.md or .html)")
+    compare.add_argument("--all", action="store_true", help="Include unchanged metrics in the report")
+    compare.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if anything regressed")
+
+    series = sub.add_parser("history", help="Show one metric over all runs")
+    series.add_argument("subject", help="Stage name or model/protocol")
+    series.add_argument("metric", help="Metric name, e.g. p50Ms or totalTokens")
+
+    args = parser.parse_args(argv)
+
+    with BenchmarkHistory(args.db) as history:
+        if args.command == "ingest":
+            if args.files:
+                added = [i for i in (history.ingest(f) for f in args.files) if i is not None]
+            else:
+                added = history.ingest_dir()
+            logger.info(f"Added {len(added)} run(s) to {args.db}")
+            return 0
+
+        if args.command == "runs":
+            for run in history.runs(args.kind):
+                print(f"  {run.id:>4}  {run.kind:<8} {run.timestamp}  {(run.commit or '-'):<10} "
+                      f"{'dirty' if run.dirty else '':<6} {run.source or ''}")
+            return 0
+
+        if args.command == "history":
+            points = history.series(args.subject, args.metric)
+            if not points:
+                logger.error(f"No values for {args.subject} {args.metric}")
+                return 2
+            for run, value in points:
+                print(f"  {run.label:<50} {_fmt(value):>14}")
+            return 0
+
+        try:
+            return _compare(history, args)
+        except ValueError as e:
+            parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
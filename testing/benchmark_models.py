@@ -5,30 +5,67 @@ Model Benchmarking Utility
 Compares extraction quality between different LLM models by running
 the full pipeline on all protocols in the input folder.
 
+Runs are spread over worker processes: each provider gets --provider-limit
+lanes (default 2) and its API requests are capped at that many across the
+lanes, so different providers run side by side without any one exceeding
+its rate limit. --replay-cache records every LLM response so a rerun
+replays them instead of calling the APIs (reproducible, and free).
+
+Each model is scored on latency, cost (tokens at list prices) and accuracy
+(activity and encounter names against input/<protocol>_golden.json where
+one exists); the report lists the models on the Pareto frontier.
+
 Usage:
     python benchmark_models.py
     python benchmark_models.py --models gpt-5.1 gemini-3-pro-preview
     python benchmark_models.py --input-dir input --output-dir benchmark_results
+    python benchmark_models.py --provider-limit openai=4 gemini=2 --replay-cache benchmark_results/replay
+    python benchmark_models.py --replay-cache benchmark_results/replay --replay-mode replay
 """
 
 import argparse
+import difflib
 import json
+import multiprocessing
 import os
 import sys
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime
 from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 import logging
 
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROVIDER_LIMIT = 2
+
+# USD per million input/output tokens (list prices when this was written);
+# --prices FILE overrides or adds models. Matched by longest model prefix.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-5.1": (1.25, 10.0),
+    "gpt-5": (1.25, 10.0),
+    "gpt-4o": (2.5, 10.0),
+    "gemini-3-pro": (2.0, 12.0),
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.3, 2.5),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-opus-4": (15.0, 75.0),
+}
+
+# Golden names count as found at this difflib similarity
+NAME_MATCH_CUTOFF = 0.8
+
 
 @dataclass
 class RunResult:
@@ -45,6 +82,14 @@ class RunResult:
     schema_valid: bool = False
     conformance_issues: int = 0
     duration_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    peak_rss_mb: float = 0.0
+    provider: str = ""
+    accuracy: Optional[float] = None
+    cost_usd: Optional[float] = None
+    replayed_calls: int = 0
+    replayed_seconds: float = 0.0
     error: Optional[str] = None
     
     def to_dict(self):
@@ -58,20 +103,73 @@ class BenchmarkReport:
     models: List[str]
     protocols: List[str]
     results: List[RunResult] = field(default_factory=list)
+    summary: Dict[str, Dict] = field(default_factory=dict)
+    pareto: List[str] = field(default_factory=list)
     
     def to_dict(self):
         return {
             'timestamp': self.timestamp,
             'models': self.models,
             'protocols': self.protocols,
-            'results': [r.to_dict() for r in self.results]
+            'results': [r.to_dict() for r in self.results],
+            'summary': self.summary,
+            'pareto': self.pareto,
         }
 
 
-def run_pipeline_for_model(pdf_path: str, model: str, output_base: str) -> RunResult:
+def _entity_names(doc: Dict, key: str) -> List[str]:
+    """Lower-cased names of activities/encounters from a USDM document or 9_final_soa.json."""
+    version = (doc.get('study', {}).get('versions') or [{}])[0]
+    items = version.get('timeline', {}).get(key) or (version.get('studyDesigns') or [{}])[0].get(key) or []
+    return [str(i['name']).strip().lower() for i in items if isinstance(i, dict) and i.get('name')]
+
+
+def name_f1(golden: List[str], extracted: List[str], cutoff: float = NAME_MATCH_CUTOFF) -> float:
+    """F1 of extracted names against golden names; each extracted name matches at most once."""
+    if not golden and not extracted:
+        return 1.0
+    unmatched = list(extracted)
+    hits = 0
+    for name in golden:
+        match = difflib.get_close_matches(name, unmatched, n=1, cutoff=cutoff)
+        if match:
+            unmatched.remove(match[0])
+            hits += 1
+    if not hits:
+        return 0.0
+    precision, recall = hits / len(extracted), hits / len(golden)
+    return 2 * precision * recall / (precision + recall)
+
+
+def golden_accuracy(extracted_path: str, golden_path: str) -> float:
+    """Mean activity and encounter name F1 of an extracted SoA against a golden USDM file."""
+    with open(extracted_path, 'r', encoding='utf-8') as f:
+        extracted = json.load(f)
+    with open(golden_path, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    scores = [name_f1(_entity_names(golden, key), _entity_names(extracted, key))
+              for key in ('activities', 'encounters')]
+    return round(sum(scores) / len(scores), 4)
+
+
+def model_price(model: str, prices: Dict[str, Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """(input, output) USD per million tokens for the longest matching model prefix."""
+    matches = [name for name in prices if model.lower().startswith(name.lower())]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def run_pipeline_for_model(
+    pdf_path: str,
+    model: str,
+    output_base: str,
+    golden_path: Optional[str] = None,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> RunResult:
     """Run the full pipeline for a single protocol with a specific model."""
     from extraction import run_from_files, PipelineConfig
     from extraction.pipeline import enrich_terminology, validate_schema, run_cdisc_conformance
+    from core.memory import MB, reset_memory, run_peak_rss
+    from core.profiling import get_spans, reset_timing
     
     protocol_name = Path(pdf_path).stem
     output_dir = os.path.join(output_base, f"{protocol_name}_{model.replace('.', '_')}")
@@ -79,10 +177,13 @@ def run_pipeline_for_model(pdf_path: str, model: str, output_base: str) -> RunRe
     result = RunResult(
         model=model,
         protocol=protocol_name,
-        success=False
+        success=False,
+        provider=provider_for(model),
     )
     
     start_time = time.time()
+    reset_timing()
+    reset_memory()
     
     try:
         logger.info(f"  Running {model} on {protocol_name}...")
@@ -120,6 +221,12 @@ def run_pipeline_for_model(pdf_path: str, model: str, output_base: str) -> RunRe
             result.epochs = len(timeline.get('epochs', []))
             result.encounters = len(timeline.get('encounters', []))
             
+            if golden_path:
+                try:
+                    result.accuracy = golden_accuracy(pipeline_result.output_path, golden_path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"    Golden comparison failed: {e}")
+            
             # Run post-processing steps
             try:
                 enrich_result = enrich_terminology(pipeline_result.output_path)
@@ -150,9 +257,163 @@ def run_pipeline_for_model(pdf_path: str, model: str, output_base: str) -> RunRe
         logger.error(f"    Pipeline failed: {e}")
     
     result.duration_seconds = time.time() - start_time
+    # Token usage from the LLM call spans (see llm_providers), peak RSS of the run
+    for s in get_spans():
+        if s.name != "llm.request":
+            continue
+        result.input_tokens += s.attrs.get("gen_ai.usage.input_tokens", 0) or 0
+        result.output_tokens += s.attrs.get("gen_ai.usage.output_tokens", 0) or 0
+        if s.attrs.get("cache.hit"):
+            result.replayed_calls += 1
+            result.replayed_seconds += s.attrs.get("p2u.replayed_seconds", 0.0)
+    result.replayed_seconds = round(result.replayed_seconds, 3)
+    result.peak_rss_mb = round(run_peak_rss() / MB, 1)
+    price = model_price(model, MODEL_PRICES if prices is None else prices)
+    if price:
+        result.cost_usd = round((result.input_tokens * price[0] + result.output_tokens * price[1]) / 1e6, 4)
     return result
 
 
+def provider_for(model: str) -> str:
+    """The model's provider as used for request limits (openai, gemini, anthropic)."""
+    from core.llm_client import genai_system
+    return genai_system(model)
+
+
+def _init_worker(provider_slots: Dict[str, Any], replay_dir: Optional[str], replay_mode: str) -> None:
+    """Install the shared per-provider request limits and the replay cache in a process."""
+    from core.llm_client import ReplayCache, set_replay_cache, set_request_limit
+    
+    for provider, slots in provider_slots.items():
+        set_request_limit(slots, provider=provider)
+    set_replay_cache(ReplayCache(replay_dir, replay_mode) if replay_dir else None)
+
+
+def _log_result(result: RunResult) -> None:
+    if result.success:
+        replay = f", {result.replayed_calls} replayed" if result.replayed_calls else ""
+        logger.info(f"    ✓ {result.model} on {result.protocol}: {result.activities} activities, "
+                    f"{result.ticks} ticks in {result.duration_seconds:.1f}s{replay}")
+    else:
+        logger.warning(f"    ✗ {result.model} on {result.protocol} failed: {result.error}")
+
+
+def run_benchmark(
+    jobs: List[Tuple[str, str, Optional[str]]],
+    output_dir: str,
+    provider_limits: Dict[str, int],
+    replay_dir: Optional[str] = None,
+    replay_mode: str = "auto",
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    parallel: bool = True,
+) -> List[RunResult]:
+    """
+    Run (pdf, model, golden) jobs and return their results in job order.
+    
+    In parallel, each provider runs up to its limit of jobs at once in
+    separate processes (spans and memory tracking are per process) and its
+    API requests are capped at the same number through a shared semaphore;
+    providers never wait on each other.
+    """
+    limits = {provider_for(model): provider_limits.get(provider_for(model), DEFAULT_PROVIDER_LIMIT)
+              for _, model, _ in jobs}
+    if not parallel:
+        _init_worker({}, replay_dir, replay_mode)
+        results = []
+        for i, (pdf, model, golden) in enumerate(jobs, 1):
+            logger.info(f"[{i}/{len(jobs)}] {model} on {Path(pdf).stem}")
+            results.append(run_pipeline_for_model(pdf, model, output_dir, golden, prices))
+            _log_result(results[-1])
+        return results
+    
+    queues: Dict[str, deque] = {provider: deque() for provider in limits}
+    for index, (pdf, model, golden) in enumerate(jobs):
+        queues[provider_for(model)].append((index, pdf, model, golden))
+    running = {provider: 0 for provider in limits}
+    workers = sum(min(limits[p], len(q)) for p, q in queues.items())
+    
+    ctx = multiprocessing.get_context("spawn")
+    slots = {provider: ctx.BoundedSemaphore(limit) for provider, limit in limits.items()}
+    results: List[Optional[RunResult]] = [None] * len(jobs)
+    logger.info(f"Running {len(jobs)} jobs on {workers} workers "
+                f"({', '.join(f'{p}: {n}' for p, n in limits.items())})")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(slots, replay_dir, replay_mode),
+    ) as pool:
+        pending = {}
+        
+        def submit() -> None:
+            for provider, queue in queues.items():
+                while queue and running[provider] < limits[provider]:
+                    index, pdf, model, golden = queue.popleft()
+                    future = pool.submit(run_pipeline_for_model, pdf, model, output_dir, golden, prices)
+                    pending[future] = (index, provider)
+                    running[provider] += 1
+        
+        submit()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, provider = pending.pop(future)
+                running[provider] -= 1
+                pdf, model, _ = jobs[index]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = RunResult(model=model, protocol=Path(pdf).stem, success=False,
+                                               provider=provider, error=f"Worker failed: {e}")
+                _log_result(results[index])
+            submit()
+    return results
+
+
+def summarize_models(results: List[RunResult]) -> Dict[str, Dict]:
+    """
+    Per-model means over successful runs. latencySeconds adds back the
+    recorded duration of replayed LLM calls, estimating a live run.
+    """
+    def mean(values: List[float]) -> Optional[float]:
+        return round(sum(values) / len(values), 4) if values else None
+    
+    summary = {}
+    for model in dict.fromkeys(r.model for r in results):
+        runs = [r for r in results if r.model == model]
+        ok = [r for r in runs if r.success]
+        costs = [r.cost_usd for r in ok if r.cost_usd is not None]
+        summary[model] = {
+            "runs": len(runs),
+            "successes": len(ok),
+            "latencySeconds": mean([r.duration_seconds + r.replayed_seconds for r in ok]),
+            "tokens": mean([r.input_tokens + r.output_tokens for r in ok]),
+            "costUsd": mean(costs) if len(costs) == len(ok) else None,
+            "accuracy": mean([r.accuracy for r in ok if r.accuracy is not None]),
+        }
+    return summary
+
+
+def pareto_frontier(summary: Dict[str, Dict]) -> List[str]:
+    """
+    Models no other model beats on latency, cost and accuracy at once.
+    Cost is USD when every model has a price, tokens otherwise; a model
+    without a golden score counts as least accurate.
+    """
+    candidates = {m: s for m, s in summary.items() if s["successes"]}
+    cost_key = "costUsd" if all(s["costUsd"] is not None for s in candidates.values()) else "tokens"
+    
+    def point(s: Dict) -> Tuple[float, float, float]:
+        accuracy = s["accuracy"] if s["accuracy"] is not None else -1.0
+        return s["latencySeconds"], s[cost_key] or 0.0, -accuracy
+    
+    points = {m: point(s) for m, s in candidates.items()}
+    return [
+        m for m, p in points.items()
+        if not any(q != p and all(qi <= pi for qi, pi in zip(q, p)) for o, q in points.items() if o != m)
+    ]
+
+
 def generate_comparison_report(report: BenchmarkReport) -> str:
     """Generate a human-readable comparison report."""
     lines = []
@@ -220,6 +481,24 @@ def generate_comparison_report(report: BenchmarkReport) -> str:
     
     lines.append("")
     
+    if any(s["successes"] for s in report.summary.values()):
+        lines.append("=" * 80)
+        lines.append("LATENCY / COST / ACCURACY (* = Pareto frontier)")
+        lines.append("-" * 80)
+        lines.append(f"  {'Model':<25} | {'Latency':>9} | {'Tokens':>10} | {'Cost':>9} | {'Accuracy':>8}")
+        lines.append("-" * 80)
+        for model, s in report.summary.items():
+            if not s["successes"]:
+                continue
+            mark = "*" if model in report.pareto else " "
+            cost = f"${s['costUsd']:.3f}" if s["costUsd"] is not None else "-"
+            accuracy = f"{s['accuracy']:.3f}" if s["accuracy"] is not None else "-"
+            lines.append(
+                f"{mark} {model:<25} | {s['latencySeconds']:>8.1f}s | {s['tokens']:>10,.0f} | "
+                f"{cost:>9} | {accuracy:>8}"
+            )
+        lines.append("")
+    
     # Determine winner
     lines.append("=" * 80)
     lines.append("RECOMMENDATION")
@@ -275,9 +554,48 @@ def main():
         nargs="*",
         help="Specific protocols to test (PDF filenames without extension)"
     )
+    parser.add_argument(
+        "--provider-limit",
+        nargs="+",
+        default=[],
+        metavar="PROVIDER=N",
+        help=f"Concurrent jobs and API requests per provider, e.g. openai=4 gemini=2 "
+             f"(default: {DEFAULT_PROVIDER_LIMIT} each)"
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Run one job at a time in this process"
+    )
+    parser.add_argument(
+        "--replay-cache",
+        help="Directory of recorded LLM responses to replay (and record into)"
+    )
+    parser.add_argument(
+        "--replay-mode",
+        choices=["auto", "replay", "record"],
+        default="auto",
+        help="auto: replay, call on a miss; replay: fail on a miss; record: always call (default: auto)"
+    )
+    parser.add_argument(
+        "--prices",
+        help="JSON file of {model: [input, output]} USD per million tokens"
+    )
     
     args = parser.parse_args()
     
+    provider_limits = {}
+    for value in args.provider_limit:
+        provider, _, limit = value.partition("=")
+        if not limit.isdigit() or int(limit) < 1:
+            parser.error(f"Invalid --provider-limit '{value}' (expected PROVIDER=N)")
+        provider_limits[provider] = int(limit)
+    
+    prices = dict(MODEL_PRICES)
+    if args.prices:
+        with open(args.prices, 'r', encoding='utf-8') as f:
+            prices.update({model: tuple(price) for model, price in json.load(f).items()})
+    
     # Find all protocols
     input_dir = Path(args.input_dir)
     if not input_dir.exists():
@@ -308,27 +626,25 @@ def main():
     )
     
     # Run benchmarks
-    total_runs = len(pdf_files) * len(args.models)
-    current_run = 0
-    
+    jobs = []
     for pdf_file in pdf_files:
-        logger.info(f"\nProcessing: {pdf_file.name}")
-        
+        golden = input_dir / f"{pdf_file.stem}_golden.json"
         for model in args.models:
-            current_run += 1
-            logger.info(f"[{current_run}/{total_runs}] {model}")
-            
-            result = run_pipeline_for_model(
-                str(pdf_file),
-                model,
-                str(output_dir)
-            )
-            report.results.append(result)
-            
-            if result.success:
-                logger.info(f"    ✓ {result.activities} activities, {result.ticks} ticks in {result.duration_seconds:.1f}s")
-            else:
-                logger.warning(f"    ✗ Failed: {result.error}")
+            jobs.append((str(pdf_file), model, str(golden) if golden.exists() else None))
+    
+    start_time = time.time()
+    report.results = run_benchmark(
+        jobs,
+        str(output_dir),
+        provider_limits,
+        replay_dir=args.replay_cache,
+        replay_mode=args.replay_mode,
+        prices=prices,
+        parallel=not args.sequential,
+    )
+    logger.info(f"{len(jobs)} runs finished in {time.time() - start_time:.1f}s")
+    report.summary = summarize_models(report.results)
+    report.pareto = pareto_frontier(report.summary)
     
     # Generate and save report
     report_json_path = output_dir / "benchmark_report.json"
@@ -336,6 +652,10 @@ def main():
         json.dump(report.to_dict(), f, indent=2)
     logger.info(f"\nJSON report saved to: {report_json_path}")
     
+    # benchmark_report.json is overwritten by the next run; the history keeps it
+    from benchmark_history import record
+    record(str(report_json_path))
+    
     # Generate text report
     text_report = generate_comparison_report(report)
     report_txt_path = output_dir / "benchmark_report.txt"
@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+"""
+Offline performance benchmarks for every pipeline stage that doesn't call an LLM.
+
+Times the deterministic stages against the bundled inputs - the protocol
+PDFs in input/, the golden USDM files and the saved runs in output/ - so it
+needs no API keys and no network (terminology enrichment runs against a
+pre-seeded EVS cache).
+
+Each stage reports latency percentiles (p50/p90/p99 per call) and throughput
+in its own unit (pages/s, MB/s, entities/s, documents/s). Results are saved
+to benchmark_results/offline_<timestamp>.json with the git commit they were
+measured on, and --compare prints the change against an earlier result.
+
+Usage:
+    python testing/benchmark_offline.py
+    python testing/benchmark_offline.py --stages usdm.normalize,usdm.convert_ids --repeats 50
+    python testing/benchmark_offline.py --compare benchmark_results/offline_20260101_120000.json
+    python testing/benchmark_offline.py --synthetic large
+    python testing/benchmark_offline.py --scaling 0.25,0.5,1,2 --stages combine,usdm.convert_ids
+    python testing/benchmark_offline.py --list
+
+--synthetic and --scaling generate protocols with testing/synthetic_protocol.py.
+--scaling runs the stages on the medium preset at each factor and fits
+time ~ size^k per stage; k well above 1 means the stage scales
+super-linearly and will hurt on large protocols before small ones.
+"""
+
+import argparse
+import copy
+import inspect
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+logger = logging.getLogger(__name__)
+
+RESULT_PREFIX = "offline_"
+DEFAULT_GOLDEN = [
+    "input/Alexion_NCT04573309_Wilsons_golden.json",
+    "test_data/medium/CDISC_Pilot_Study_gold.json",
+]
+PERCENTILES = (50, 90, 99)
+
+# Fitted size exponent above which a stage is reported as super-linear
+SUPERLINEAR_EXPONENT = 1.2
+
+# Saved expansion artifacts replayed through their extractor's parser for combine
+REPLAYED_PHASES = {
+    "metadata": ("2_study_metadata.json", "extraction.metadata.extractor", "_parse_metadata_response"),
+    "eligibility": ("3_eligibility_criteria.json", "extraction.eligibility.extractor", "_parse_eligibility_response"),
+    "objectives": ("4_objectives_endpoints.json", "extraction.objectives.extractor", "_parse_objectives_response"),
+    "studydesign": ("5_study_design.json", "extraction.studydesign.extractor", "_parse_design_response"),
+    "interventions": ("6_interventions.json", "extraction.interventions.extractor", "_parse_interventions_response"),
+    "advanced": ("8_advanced_entities.json", "extraction.advanced.extractor", "_build_advanced_data"),
+}
+
+PAGE_FINDERS = [
+    ("extraction.eligibility.extractor", "find_eligibility_pages"),
+    ("extraction.objectives.extractor", "find_objectives_pages"),
+    ("extraction.studydesign.extractor", "find_study_design_pages"),
+    ("extraction.interventions.extractor", "find_intervention_pages"),
+]
+
+
+class Skip(Exception):
+    """A stage can't run here (missing optional package or fixture)."""
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def count_entities(data: Any) -> int:
+    """Number of dicts carrying an instanceType."""
+    count = 0
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            if "instanceType" in obj:
+                count += 1
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return count
+
+
+def tiled(doc: Dict, times: int) -> Dict:
+    """
+    doc with its study versions repeated times over, a bigger document of the same shape.
+
+    Each copy's simple IDs (and the references to them) get a '_<copy>'
+    suffix so they stay distinct.
+    """
+    def suffixed(obj: Any, n: int) -> Any:
+        if isinstance(obj, dict):
+            out = {}
+            for key, value in obj.items():
+                if key == "id" or key.endswith("Id"):
+                    out[key] = f"{value}_{n}" if isinstance(value, str) else value
+                elif key.endswith("Ids") and isinstance(value, list):
+                    out[key] = [f"{v}_{n}" if isinstance(v, str) else v for v in value]
+                else:
+                    out[key] = suffixed(value, n)
+            return out
+        if isinstance(obj, list):
+            return [suffixed(item, n) for item in obj]
+        return obj
+
+    result = copy.deepcopy(doc)
+    versions = doc["study"]["versions"]
+    result["study"]["versions"] = [v for n in range(times) for v in suffixed(versions, n)]
+    return result
+
+
+def git_commit() -> Dict[str, Any]:
+    """Commit the benchmark ran on, and whether the tree had local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+        return {"commit": commit or None, "dirty": bool(status)}
+    except (OSError, subprocess.SubprocessError):
+        return {"commit": None, "dirty": None}
+
+
+@dataclass
+class Fixtures:
+    """Benchmark inputs, loaded once and shared by the stages."""
+    pdfs: List[str]
+    golden: List[str]
+    runs: List[str]
+    work_dir: str
+    _cache: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def discover(cls, work_dir: str, pdfs: Optional[List[str]] = None,
+                 golden: Optional[List[str]] = None, runs: Optional[List[str]] = None) -> "Fixtures":
+        if pdfs is None:
+            pdfs = [str(p) for p in sorted((PROJECT_ROOT / "input").glob("*.pdf"))
+                    if not p.stem.lower().endswith("_sap")]
+        if golden is None:
+            golden = [str(PROJECT_ROOT / p) for p in DEFAULT_GOLDEN if (PROJECT_ROOT / p).exists()]
+        if runs is None:
+            runs = [str(p) for p in sorted((PROJECT_ROOT / "output").glob("*"))
+                    if (p / "9_final_soa.json").exists()]
+        return cls(pdfs=pdfs, golden=golden, runs=runs, work_dir=work_dir)
+
+    def _load(self, key: str, loader: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = loader()
+        return self._cache[key]
+
+    def json(self, path: str) -> Any:
+        def load():
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return self._load(f"json:{path}", load)
+
+    def golden_docs(self) -> List[Dict]:
+        if not self.golden:
+            raise Skip("no golden USDM files")
+        return [self.json(p) for p in self.golden]
+
+    def page_counts(self) -> Dict[str, int]:
+        def load():
+            import fitz
+            counts = {}
+            for pdf in self.pdfs:
+                with fitz.open(pdf) as doc:
+                    counts[pdf] = len(doc)
+            return counts
+        if not self.pdfs:
+            raise Skip("no protocol PDFs")
+        return self._load("page_counts", load)
+
+    def run_files(self, name: str) -> List[str]:
+        paths = [str(Path(run) / name) for run in self.runs if (Path(run) / name).exists()]
+        if not paths:
+            raise Skip(f"no saved runs with {name}")
+        return paths
+
+    def replayed_results(self, run: str) -> Dict[str, Any]:
+        """Expansion results rebuilt from a saved run's raw LLM responses."""
+        def load():
+            import importlib
+            results = {}
+            for phase, (name, module, parser) in REPLAYED_PHASES.items():
+                path = Path(run) / name
+                if not path.exists():
+                    continue
+                raw = self.json(str(path)).get("rawResponse")
+                if not raw:
+                    continue
+                data = getattr(importlib.import_module(module), parser)(raw)
+                if data is not None:
+                    results[phase] = types.SimpleNamespace(success=True, data=data, metadata=data)
+            return results
+        return self._load(f"replay:{run}", load)
+
+    @classmethod
+    def synthetic(cls, work_dir: str, spec) -> "Fixtures":
+        """Fixtures from a generated protocol (see testing/synthetic_protocol.py)."""
+        from synthetic_protocol import write_protocol
+
+        paths = write_protocol(spec, os.path.join(work_dir, spec.name))
+        return cls(pdfs=[paths["pdf"]], golden=[paths["usdm"]], runs=[paths["run_dir"]], work_dir=work_dir)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "pdfs": {Path(p).name: n for p, n in self.page_counts().items()} if self.pdfs else {},
+            "golden": [Path(p).name for p in self.golden],
+            "runs": [Path(p).name for p in self.runs],
+        }
+
+
+@dataclass
+class Workload:
+    """One timed call and the amount of work it does."""
+    run: Callable[[Any], Any]
+    units: float
+    prepare: Optional[Callable[[], Any]] = None   # untimed, fresh input for each call
+
+
+@dataclass
+class Stage:
+    name: str
+    unit: str
+    description: str
+    setup: Callable[[Fixtures], Workload]
+
+
+STAGES: Dict[str, Stage] = {}
+
+
+def stage(name: str, unit: str, description: str):
+    """Register a stage; the decorated function builds its workload from the fixtures."""
+    def register(setup: Callable[[Fixtures], Workload]) -> Callable[[Fixtures], Workload]:
+        STAGES[name] = Stage(name, unit, description, setup)
+        return setup
+    return register
+
+
+@stage("pdf.text", "pages", "PyMuPDF text extraction of every page (PageTextStore.from_pdf)")
+def _pdf_text(fx: Fixtures) -> Workload:
+    from core.page_store import PageTextStore
+
+    counts = fx.page_counts()
+
+    def run(_):
+        for pdf in fx.pdfs:
+            PageTextStore.from_pdf(pdf)
+    return Workload(run, sum(counts.values()))
+
+
+@stage("pages.soa", "pages", "SoA page heuristic (find_soa_pages_heuristic, warm page store)")
+def _pages_soa(fx: Fixtures) -> Workload:
+    from core.page_store import get_page_store
+    from extraction.soa_finder import find_soa_pages_heuristic
+
+    counts = fx.page_counts()
+    cache_dir = os.path.join(fx.work_dir, "page_cache")
+    for pdf in fx.pdfs:
+        get_page_store(pdf, cache_dir)
+
+    def run(_):
+        for pdf in fx.pdfs:
+            find_soa_pages_heuristic(pdf)
+    return Workload(run, sum(counts.values()))
+
+
+@stage("pages.phases", "pages", "Eligibility/objectives/design/intervention page heuristics")
+def _pages_phases(fx: Fixtures) -> Workload:
+    import importlib
+
+    from core.page_store import get_page_store
+
+    counts = fx.page_counts()
+    cache_dir = os.path.join(fx.work_dir, "page_cache")
+    for pdf in fx.pdfs:
+        get_page_store(pdf, cache_dir)
+    finders = [getattr(importlib.import_module(m), f) for m, f in PAGE_FINDERS]
+    # Each finder scans at most its max_pages_to_scan pages
+    limits = [inspect.signature(f).parameters["max_pages_to_scan"].default for f in finders]
+
+    def run(_):
+        for pdf in fx.pdfs:
+            for finder in finders:
+                finder(pdf)
+    return Workload(run, sum(min(n, limit) for n in counts.values() for limit in limits))
+
+
+@stage("pdf.render", "pages", "Page rendering to PNG at 150 dpi (first 3 pages of each PDF)")
+def _pdf_render(fx: Fixtures) -> Workload:
+    from core.pdf_utils import render_pages_to_images
+
+    counts = fx.page_counts()
+    pages = {pdf: list(range(min(3, n))) for pdf, n in counts.items()}
+    out_dir = os.path.join(fx.work_dir, "render")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def run(_):
+        for pdf, numbers in pages.items():
+            render_pages_to_images(pdf, numbers, out_dir)
+    return Workload(run, sum(len(p) for p in pages.values()))
+
+
+@stage("json.parse_llm", "MB", "parse_llm_json on saved raw responses wrapped like LLM output")
+def _parse_llm(fx: Fixtures) -> Workload:
+    from core.json_utils import parse_llm_json
+
+    texts = []
+    for name in (n for n, _, _ in REPLAYED_PHASES.values()):
+        for path in fx.runs:
+            artifact = Path(path) / name
+            if artifact.exists() and fx.json(str(artifact)).get("rawResponse"):
+                body = json.dumps(fx.json(str(artifact))["rawResponse"], indent=2)
+                texts.append(f"Here is the extracted data:\n```json\n{body}\n```")
+    if not texts:
+        raise Skip("no saved raw responses")
+
+    def run(_):
+        for text in texts:
+            parse_llm_json(text)
+    return Workload(run, sum(len(t.encode()) for t in texts) / (1024 * 1024))
+
+
+@stage("schema.load", "entities", "USDMSchemaLoader.load from the compiled schema (fresh loader per call)")
+def _schema_load(fx: Fixtures) -> Workload:
+    from core.usdm_schema_loader import USDMSchemaLoader
+
+    count = len(USDMSchemaLoader().load())     # writes the compiled schema if needed
+
+    def run(_):
+        USDMSchemaLoader().load()
+    return Workload(run, count)
+
+
+@stage("usdm.normalize", "entities", "normalize_usdm_data over the golden USDM documents")
+def _normalize(fx: Fixtures) -> Workload:
+    from core.usdm_types_generated import normalize_usdm_data
+
+    docs = fx.golden_docs()
+
+    def run(_):
+        for doc in docs:
+            normalize_usdm_data(doc)
+    return Workload(run, sum(count_entities(d) for d in docs))
+
+
+@stage("usdm.convert_ids", "entities", "convert_ids_to_uuids over the golden USDM documents")
+def _convert_ids(fx: Fixtures) -> Workload:
+    from main_v2 import convert_ids_to_uuids
+
+    docs = fx.golden_docs()
+
+    def run(_):
+        for doc in docs:
+            convert_ids_to_uuids(doc)
+    return Workload(run, sum(count_entities(d) for d in docs))
+
+
+@stage("usdm.convert_ids_x10", "entities",
+       "In-place convert_ids_to_uuids of a document 10x the first golden file (study versions repeated)")
+def _convert_ids_x10(fx: Fixtures) -> Workload:
+    from main_v2 import convert_ids_to_uuids
+
+    doc = tiled(fx.golden_docs()[0], 10)
+
+    def prepare():
+        return copy.deepcopy(doc)
+
+    def run(copied):
+        convert_ids_to_uuids(copied, in_place=True)
+    return Workload(run, count_entities(doc), prepare)
+
+
+@stage("soa.types", "ticks", "Timeline.from_dict + to_dict of a 200 activity x 50 visit SoA (every cell ticked)")
+def _soa_types(fx: Fixtures) -> Workload:
+    from core.usdm_types import Timeline
+
+    data = {
+        "activities": [{"id": f"act_{i}", "name": f"Activity {i}"} for i in range(200)],
+        "encounters": [{"id": f"enc_{j}", "name": f"Visit {j}", "epochId": "epoch_1"} for j in range(50)],
+        "epochs": [{"id": "epoch_1", "name": "Treatment"}],
+        "activityTimepoints": [{"activityId": f"act_{i}", "encounterId": f"enc_{j}", "footnoteRefs": ["a"]}
+                               for i in range(200) for j in range(50)],
+    }
+
+    def run(_):
+        Timeline.from_dict(data).to_dict()
+    return Workload(run, len(data["activityTimepoints"]))
+
+
+@stage("usdm.postprocess", "entities",
+       "The pipeline's in-place post-processing walks: validate (normalize + UUID conversion), then enrichment")
+def _postprocess(fx: Fixtures) -> Workload:
+    from core.usdm_types_generated import UsdmNormalizer
+    from core.usdm_visitor import walk
+    from enrichment.terminology import TerminologyEnricher
+    from main_v2 import UuidConverter
+
+    docs = fx.golden_docs()
+    use_offline_evs(fx.work_dir)
+
+    def prepare():
+        # The walks edit their input; each call gets fresh copies
+        return [copy.deepcopy(doc) for doc in docs]
+
+    def run(copies):
+        for doc in copies:
+            walk(doc, [UsdmNormalizer(), UuidConverter()])     # validate step
+            walk(doc, [TerminologyEnricher()])                  # enrich step
+    return Workload(run, sum(count_entities(d) for d in docs), prepare)
+
+
+@stage("usdm.index", "entities", "USDMIndex build plus the dangling-reference check over the golden documents")
+def _index(fx: Fixtures) -> Workload:
+    from core.usdm_index import USDMIndex
+
+    docs = fx.golden_docs()
+
+    def run(_):
+        for doc in docs:
+            USDMIndex(doc).dangling()
+    return Workload(run, sum(count_entities(d) for d in docs))
+
+
+@stage("provenance.convert", "cells", "convert_provenance_to_uuids with each saved run's id_mapping.json")
+def _provenance(fx: Fixtures) -> Workload:
+    from main_v2 import convert_provenance_to_uuids
+
+    pairs = []
+    for path in fx.run_files("9_final_soa_provenance.json"):
+        mapping = Path(path).parent / "id_mapping.json"
+        if mapping.exists():
+            pairs.append((fx.json(path), fx.json(str(mapping))))
+    if not pairs:
+        raise Skip("no saved runs with provenance and id_mapping.json")
+
+    def run(_):
+        for provenance, id_map in pairs:
+            convert_provenance_to_uuids(provenance, id_map)
+    return Workload(run, sum(len(p.get("cells", {})) for p, _ in pairs) or len(pairs))
+
+
+@stage("combine", "documents", "combine_to_full_usdm of the saved SoA plus replayed expansion results")
+def _combine(fx: Fixtures) -> Workload:
+    from main_v2 import combine_to_full_usdm
+
+    inputs = [(fx.json(path), fx.replayed_results(str(Path(path).parent)))
+              for path in fx.run_files("9_final_soa.json")]
+    out_dir = os.path.join(fx.work_dir, "combine")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def run(_):
+        for soa, results in inputs:
+            combine_to_full_usdm(out_dir, soa, results)
+    return Workload(run, len(inputs))
+
+
+@stage("enrich", "entities", "enrich_terminology on the golden documents (seeded EVS cache, no network)")
+def _enrich(fx: Fixtures) -> Workload:
+    from enrichment.terminology import enrich_terminology
+
+    docs = fx.golden_docs()
+    use_offline_evs(fx.work_dir)
+    out_dir = os.path.join(fx.work_dir, "enrich")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, f"doc_{i}.json") for i in range(len(docs))]
+
+    def prepare():
+        # enrich_terminology rewrites its input in place
+        for doc, path in zip(docs, paths):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(doc, f)
+
+    def run(_):
+        for path in paths:
+            enrich_terminology(path, out_dir)
+    return Workload(run, sum(count_entities(d) for d in docs), prepare)
+
+
+@stage("conformance.local", "entities", "Local CDISC conformance rules over the golden documents")
+def _conformance(fx: Fixtures) -> Workload:
+    from validation.cdisc_conformance import _run_local_conformance
+
+    docs = fx.golden_docs()
+    out_dir = os.path.join(fx.work_dir, "conformance")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def run(_):
+        for path in fx.golden:
+            _run_local_conformance(path, out_dir)
+    return Workload(run, sum(count_entities(d) for d in docs))
+
+
+@stage("validate.pydantic", "entities", "usdm package (pydantic) validation of the golden documents")
+def _validate(fx: Fixtures) -> Workload:
+    from validation import HAS_USDM, validate_usdm_dict
+
+    if not HAS_USDM:
+        raise Skip("usdm package not installed")
+    docs = fx.golden_docs()
+
+    def run(_):
+        for doc in docs:
+            validate_usdm_dict(copy.deepcopy(doc))
+    return Workload(run, sum(count_entities(d) for d in docs))
+
+
+def use_offline_evs(work_dir: str) -> None:
+    """Point enrichment at an EVS client seeded with the USDM codes that never goes online."""
+    from core import evs_client
+
+    class OfflineEVSClient(evs_client.EVSClient):
+        def _http_get(self, url, params=None, timeout=10):
+            return None
+
+    client = OfflineEVSClient(Path(work_dir) / "evs_cache.json")
+    now = time.time()
+    for code, decode in evs_client.USDM_CODES.items():
+        client.cache[f"ncit:{code}"] = {"_cached_at": now, "data": {
+            "id": code,
+            "code": code,
+            "codeSystem": "http://ncicb.nci.nih.gov/xml/owl/EVS/Thesaurus.owl",
+            "codeSystemVersion": "offline",
+            "decode": decode,
+            "instanceType": "Code",
+        }}
+    evs_client._client = client
+
+
+def measure(workload: Workload, repeats: int, warmup: int = 1) -> Dict[str, Any]:
+    """Time repeats calls (after warmup) and summarize latency, throughput and RSS growth."""
+    from core.memory import MB, track_memory
+
+    latencies = []
+    with track_memory("benchmark") as memory:
+        for i in range(warmup + repeats):
+            payload = workload.prepare() if workload.prepare else None
+            start = time.perf_counter()
+            workload.run(payload)
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                latencies.append(elapsed * 1000)
+
+    mean_ms = statistics.fmean(latencies)
+    result = {
+        "calls": len(latencies),
+        "unitsPerCall": round(workload.units, 3),
+        "meanMs": round(mean_ms, 3),
+        "minMs": round(min(latencies), 3),
+        "maxMs": round(max(latencies), 3),
+        "stdevMs": round(statistics.stdev(latencies), 3) if len(latencies) > 1 else 0.0,
+        "throughput": round(workload.units / (mean_ms / 1000), 3) if mean_ms else None,
+        "samplesMs": [round(x, 3) for x in latencies],
+        "rssPeakGrowthMb": round((memory.rss_peak - memory.rss_start) / MB, 1),
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}Ms"] = round(percentile(latencies, pct), 3)
+    return result
+
+
+def run_suite(fixtures: Fixtures, names: Optional[List[str]] = None,
+              repeats: int = 10, warmup: int = 1) -> Dict[str, Dict[str, Any]]:
+    """Run the selected stages; failures and skips are recorded, not raised."""
+    results = {}
+    for name in names or list(STAGES):
+        st = STAGES[name]
+        entry: Dict[str, Any] = {"unit": st.unit, "description": st.description}
+        try:
+            entry.update(measure(st.setup(fixtures), repeats, warmup))
+        except Skip as e:
+            entry["skipped"] = str(e)
+        except Exception as e:
+            logger.exception(f"Stage {name} failed")
+            entry["error"] = f"{type(e).__name__}: {e}"
+        results[name] = entry
+    return results
+
+
+def scaling_exponent(sizes: List[float], times: List[float]) -> Optional[float]:
+    """Least-squares slope of log(time) against log(size): time grows as size^k."""
+    points = [(math.log(x), math.log(y)) for x, y in zip(sizes, times) if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    mean_x = statistics.fmean(x for x, _ in points)
+    mean_y = statistics.fmean(y for _, y in points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def run_scaling(work_dir: str, factors: List[float], names: Optional[List[str]] = None,
+                repeats: int = 5, warmup: int = 1, preset: str = "medium") -> Dict[str, Dict[str, Any]]:
+    """
+    Run the stages on a synthetic protocol at each scale factor and fit
+    each stage's size exponent. Sizes are the stage's own units per call,
+    or the document's entity count for per-document stages.
+    """
+    from synthetic_protocol import PRESETS
+
+    points: Dict[str, List[Dict[str, Any]]] = {}
+    for factor in factors:
+        spec = PRESETS[preset].scaled(factor)
+        fixtures = Fixtures.synthetic(os.path.join(work_dir, f"x{factor:g}"), spec)
+        entities = count_entities(fixtures.golden_docs()[0])
+        for name, r in run_suite(fixtures, names, repeats, warmup).items():
+            if "p50Ms" not in r:
+                continue
+            size = r["unitsPerCall"] if r["unit"] != "documents" else entities
+            points.setdefault(name, []).append({"scale": factor, "size": size, "p50Ms": r["p50Ms"]})
+
+    scaling = {}
+    for name, series in points.items():
+        exponent = scaling_exponent([p["size"] for p in series], [p["p50Ms"] for p in series])
+        scaling[name] = {
+            "points": series,
+            "exponent": round(exponent, 2) if exponent is not None else None,
+            "superLinear": exponent is not None and exponent > SUPERLINEAR_EXPONENT,
+        }
+    return scaling
+
+
+def format_scaling(scaling: Dict[str, Dict[str, Any]]) -> str:
+    factors = [p["scale"] for p in next(iter(scaling.values()))["points"]] if scaling else []
+    header = "".join(f"{'x' + format(f, 'g'):>10}" for f in factors)
+    lines = [f"  {'Stage (p50 ms)':<20}{header} {'exponent':>9}"]
+    for name, entry in scaling.items():
+        cells = "".join(f"{p['p50Ms']:>10.2f}" for p in entry["points"])
+        exponent = "-" if entry["exponent"] is None else f"{entry['exponent']:.2f}"
+        mark = "  super-linear" if entry["superLinear"] else ""
+        lines.append(f"  {name:<20}{cells} {exponent:>9}{mark}")
+    return "\n".join(lines)
+
+
+def format_results(stages: Dict[str, Dict[str, Any]]) -> str:
+    lines = [f"  {'Stage':<20} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'throughput':>22}"]
+    for name, r in stages.items():
+        if "p50Ms" not in r:
+            lines.append(f"  {name:<20} {'(' + (r.get('skipped') or r.get('error', '')) + ')'}")
+            continue
+        rate = f"{r['throughput']:,.1f} {r['unit']}/s"
+        lines.append(f"  {name:<20} {r['p50Ms']:>10.2f} {r['p90Ms']:>10.2f} {r['p99Ms']:>10.2f} {rate:>22}")
+    return "\n".join(lines)
+
+
+def format_comparison(previous: Dict[str, Any], current: Dict[str, Any], threshold: float) -> str:
+    """p50 change per stage; slower than threshold percent is marked."""
+    label = f"{previous.get('commit') or '?'} -> {current.get('commit') or '?'}"
+    lines = [f"  {'Stage':<20} {'before ms':>10} {'after ms':>10} {'change':>9}   ({label})"]
+    for name, r in current["stages"].items():
+        old = previous.get("stages", {}).get(name, {})
+        if "p50Ms" not in r or "p50Ms" not in old or not old["p50Ms"]:
+            continue
+        change = (r["p50Ms"] - old["p50Ms"]) / old["p50Ms"] * 100
+        mark = "  slower" if change > threshold else ("  faster" if change < -threshold else "")
+        lines.append(f"  {name:<20} {old['p50Ms']:>10.2f} {r['p50Ms']:>10.2f} {change:>+8.1f}%{mark}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the non-LLM pipeline stages offline")
+    parser.add_argument("--stages", help="Comma-separated stage names (default: all, see --list)")
+    parser.add_argument("--repeats", type=int, default=10, help="Timed calls per stage (default: 10)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed calls first (default: 1)")
+    parser.add_argument("--pdf", action="append", help="Protocol PDF to use instead of input/*.pdf (repeatable)")
+    parser.add_argument("--usdm", action="append", help="USDM JSON to use instead of the golden files (repeatable)")
+    parser.add_argument("--run-dir", action="append", help="Saved run to use instead of output/* (repeatable)")
+    parser.add_argument("--synthetic", metavar="PRESET[:SCALE]",
+                        help="Benchmark a generated protocol instead, e.g. large or medium:4")
+    parser.add_argument("--scaling", metavar="FACTORS",
+                        help="Comma-separated scale factors of the medium synthetic protocol, e.g. 0.25,0.5,1,2")
+    parser.add_argument("--output-dir", default="benchmark_results", help="Where to save results")
+    parser.add_argument("--compare", help="Earlier offline_*.json result to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent p50 change reported as slower/faster (default: 10)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Don't record the result in <output-dir>/history.sqlite")
+    parser.add_argument("--list", action="store_true", help="List the stages and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for st in STAGES.values():
+            print(f"  {st.name:<20} {st.description}")
+        return 0
+
+    names = [n.strip() for n in args.stages.split(",")] if args.stages else None
+    unknown = [n for n in names or [] if n not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)} (see --list)")
+
+    # Stage code logs every call; keep the report readable
+    logging.basicConfig(level=logging.WARNING, format='[%(levelname)s] %(message)s')
+
+    scaling = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.synthetic:
+            from synthetic_protocol import PRESETS
+
+            preset, _, factor = args.synthetic.partition(":")
+            if preset not in PRESETS:
+                parser.error(f"Unknown synthetic preset '{preset}' ({', '.join(PRESETS)})")
+            spec = PRESETS[preset].scaled(float(factor)) if factor else PRESETS[preset]
+            fixtures = Fixtures.synthetic(work_dir, spec)
+        else:
+            fixtures = Fixtures.discover(work_dir, args.pdf, args.usdm, args.run_dir)
+        stages = run_suite(fixtures, names, args.repeats, args.warmup)
+        info = fixtures.info()
+        if args.scaling:
+            factors = [float(f) for f in args.scaling.split(",")]
+            scaling = run_scaling(os.path.join(work_dir, "scaling"), factors, names, args.repeats, args.warmup)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    result = {
+        "timestamp": timestamp,
+        **git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeats": args.repeats,
+        "warmup": args.warmup,
+        "fixtures": info,
+        "stages": stages,
+    }
+    if args.synthetic:
+        result["synthetic"] = args.synthetic
+    if scaling is not None:
+        result["scaling"] = scaling
+
+    print(f"\nOffline benchmark - commit {result['commit'] or 'unknown'}"
+          f"{' (modified)' if result['dirty'] else ''}, {args.repeats} repeats")
+    print(format_results(stages))
+    if scaling:
+        print("\nScaling (medium synthetic protocol)")
+        print(format_scaling(scaling))
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print("\n" + format_comparison(json.load(f), result, args.threshold))
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{RESULT_PREFIX}{timestamp}.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved results to {output_path}")
+    if not args.no_history:
+        from benchmark_history import record
+        record(str(output_path))
+    return 1 if any("error" in r for r in stages.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark the BM25 retrieval index on large protocols.
+
+Builds a synthetic ~300-page PDF by concatenating the protocols in input/,
+then times page text extraction, index build, cache reload and per-phase
+queries. Results go to benchmark_results/retrieval_benchmark_<timestamp>.json.
+
+Usage:
+    python testing/benchmark_retrieval.py
+    python testing/benchmark_retrieval.py --pages 500 --repeats 50
+    python testing/benchmark_retrieval.py --pdf input/large_protocol.pdf
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fitz  # PyMuPDF
+
+from core import page_store, retrieval
+from core.constants import PHASE_TOKEN_BUDGETS
+
+# Phase queries, taken from the extractors that declare them
+PHASE_QUERIES = {
+    "metadata": "extraction.metadata.extractor",
+    "eligibility": "extraction.eligibility.extractor",
+    "objectives": "extraction.objectives.extractor",
+    "studydesign": "extraction.studydesign.extractor",
+    "interventions": "extraction.interventions.extractor",
+    "procedures": "extraction.procedures.extractor",
+    "scheduling": "extraction.scheduling.extractor",
+    "sap": "extraction.conditional.sap_extractor",
+}
+
+
+def build_large_pdf(source_dir: Path, target_pages: int, output_path: Path) -> int:
+    """Concatenate source PDFs until the document reaches target_pages."""
+    sources = sorted(source_dir.glob("*.pdf"))
+    if not sources:
+        raise FileNotFoundError(f"No PDFs in {source_dir}")
+    doc = fitz.open()
+    while len(doc) < target_pages:
+        for src_path in sources:
+            with fitz.open(str(src_path)) as src:
+                remaining = target_pages - len(doc)
+                doc.insert_pdf(src, to_page=min(len(src), remaining) - 1)
+            if len(doc) >= target_pages:
+                break
+    doc.save(str(output_path))
+    count = len(doc)
+    doc.close()
+    return count
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_benchmark(pdf_path: str, repeats: int) -> dict:
+    import importlib
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_dir = Path(cache_dir)
+        store, extract_ms = _timed(page_store.PageTextStore.from_pdf, pdf_path)
+        index, build_ms = _timed(retrieval.BM25Index.build, store.pages)
+
+        # Cold path through the public API writes both caches
+        page_store.clear_page_stores()
+        retrieval._indexes.clear()
+        _, cold_ms = _timed(retrieval.get_document_index, pdf_path, cache_dir)
+
+        # Warm-from-disk path (new process equivalent)
+        page_store.clear_page_stores()
+        retrieval._indexes.clear()
+        _, disk_ms = _timed(retrieval.get_document_index, pdf_path, cache_dir)
+        cache_bytes = sum(p.stat().st_size for p in cache_dir.glob("*.json"))
+
+    queries = {}
+    for phase, module_name in PHASE_QUERIES.items():
+        query = importlib.import_module(module_name).CONTEXT_QUERY
+        timings = []
+        hits = []
+        for _ in range(repeats):
+            hits, ms = _timed(index.search, query)
+            timings.append(ms)
+        queries[phase] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(sorted(timings)[int(0.95 * (len(timings) - 1))], 3),
+            "hits": len(hits),
+            "token_budget": PHASE_TOKEN_BUDGETS[phase],
+        }
+
+    return {
+        "pages": store.page_count,
+        "chunks": len(index.chunks),
+        "terms": len(index.postings),
+        "text_extraction_ms": round(extract_ms, 1),
+        "index_build_ms": round(build_ms, 1),
+        "cold_get_document_index_ms": round(cold_ms, 1),
+        "disk_cached_get_document_index_ms": round(disk_ms, 1),
+        "cache_bytes": cache_bytes,
+        "queries": queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 retrieval build/query time")
+    parser.add_argument("--pdf", help="Benchmark this PDF instead of a synthetic one")
+    parser.add_argument("--input-dir", default="input", help="Source PDFs for the synthetic document")
+    parser.add_argument("--pages", type=int, default=300, help="Synthetic document size")
+    parser.add_argument("--repeats", type=int, default=20, help="Query repetitions per phase")
+    parser.add_argument("--output-dir", default="benchmark_results", help="Where to save results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = str(Path(tmp) / "synthetic_protocol.pdf")
+            build_large_pdf(Path(args.input_dir), args.pages, Path(pdf_path))
+        results = run_benchmark(pdf_path, args.repeats)
+
+    print(f"\nBM25 retrieval benchmark - {results['pages']} pages, {results['chunks']} chunks, {results['terms']} terms")
+    print(f"  Text extraction:        {results['text_extraction_ms']:>9.1f} ms")
+    print(f"  Index build:            {results['index_build_ms']:>9.1f} ms")
+    print(f"  Cold index (+caching):  {results['cold_get_document_index_ms']:>9.1f} ms")
+    print(f"  Index from disk cache:  {results['disk_cached_get_document_index_ms']:>9.1f} ms")
+    print(f"\n  {'Phase':<15} {'median ms':>10} {'p95 ms':>10} {'hits':>6}")
+    for phase, q in results["queries"].items():
+        print(f"  {phase:<15} {q['median_ms']:>10.3f} {q['p95_ms']:>10.3f} {q['hits']:>6}")
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = output_dir / f"retrieval_benchmark_{timestamp}.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"timestamp": timestamp, "source": args.pdf or "synthetic", **results}, f, indent=2)
+    print(f"\nSaved results to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
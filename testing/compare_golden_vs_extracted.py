@@ -11,6 +11,10 @@ from pathlib import Path
 from datetime import datetime
 from difflib import SequenceMatcher
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.usdm_index import USDMIndex
+
 # Paths
 GOLDEN_FILE = "input/Alexion_NCT04573309_Wilsons_golden.json"
 OUTPUT_DIR = "output/Alexion_NCT04573309_Wilsons"
@@ -92,6 +96,20 @@ def find_best_match(target, candidates, key='text'):
     
     return best_match, best_score
 
+def find_named(index, name, collection):
+    """Entity of the collection named exactly name (an index lookup), else None."""
+    for entity_id in index.ids_named(name):
+        if index.collection_of(entity_id) == collection:
+            return index.get(entity_id)
+    return None
+
+def best_combined_match(index, target, candidates, collection, key='name'):
+    """Exact name via the index, falling back to the similarity scan."""
+    exact = find_named(index, target.get(key), collection) if isinstance(target.get(key), str) else None
+    if exact is not None:
+        return exact, 1.0
+    return find_best_match(target, candidates, key)
+
 def match_status(golden, extracted, combined=None):
     """Return match status emojis for extracted and combined vs golden."""
     e_match = "✅" if semantic_match(golden, extracted) else "❌"
@@ -114,31 +132,29 @@ def compare_all():
     gv = golden['study']['versions'][0]
     gd = gv.get('studyDesigns', [{}])[0]
     
-    # Load combined USDM and flatten structure
+    # Load combined USDM and index it - collections are found wherever the
+    # combined layout puts them (study, version, design or top level)
     combined_raw = load_json(COMBINED_FILE) if Path(COMBINED_FILE).exists() else {}
-    comb_study = combined_raw.get('study', {})
-    comb_design = combined_raw.get('studyDesigns', [{}])[0] if combined_raw.get('studyDesigns') else {}
+    c_index = USDMIndex(combined_raw)
     
     # Flatten combined for easy access - note different key names in combined file
     combined = {
-        'studyIdentifiers': comb_study.get('studyIdentifiers', []),
-        'titles': comb_study.get('studyTitles', []),  # studyTitles not titles
-        'indications': comb_study.get('indications', []),
-        # From studyDesigns[0]:
-        'eligibilityCriteria': comb_design.get('eligibilityCriteria', []),
-        'objectives': comb_design.get('objectives', []),
-        'endpoints': comb_design.get('endpoints', []),
-        'studyArms': comb_design.get('studyArms', []),
-        'epochs': comb_design.get('epochs', []),
-        'studyInterventions': comb_design.get('studyInterventions', []),
-        'activities': comb_design.get('activities', []),
-        'encounters': comb_design.get('encounters', []),
-        # Top-level entities:
-        'administrableProducts': combined_raw.get('administrableProducts', []),
-        'abbreviations': combined_raw.get('abbreviations', []),
-        'studyAmendments': combined_raw.get('studyAmendments', []),
-        'procedures': combined_raw.get('procedures', []),
-        'analysisPopulations': combined_raw.get('analysisPopulations', []),  # Top-level in combined
+        'studyIdentifiers': c_index.in_collection('studyIdentifiers'),
+        'titles': c_index.in_collection('titles') or c_index.in_collection('studyTitles'),
+        'indications': c_index.in_collection('indications'),
+        'eligibilityCriteria': c_index.in_collection('eligibilityCriteria'),
+        'objectives': c_index.in_collection('objectives'),
+        'endpoints': c_index.in_collection('endpoints'),
+        'studyArms': c_index.in_collection('arms') or c_index.in_collection('studyArms'),
+        'epochs': c_index.in_collection('epochs'),
+        'studyInterventions': c_index.in_collection('studyInterventions'),
+        'activities': c_index.in_collection('activities'),
+        'encounters': c_index.in_collection('encounters'),
+        'administrableProducts': c_index.in_collection('administrableProducts'),
+        'abbreviations': c_index.in_collection('abbreviations'),
+        'studyAmendments': c_index.in_collection('studyAmendments'),
+        'procedures': c_index.in_collection('procedures'),
+        'analysisPopulations': c_index.in_collection('analysisPopulations'),
     }
     
     out("=" * 200)
@@ -577,7 +593,7 @@ def compare_all():
         else:
             e_name = '-'
         # Find best combined match
-        best_c, c_score = find_best_match(g_act, c_activities, 'name')
+        best_c, c_score = best_combined_match(c_index, g_act, c_activities, 'activities')
         c_name = best_c.get('name', '-') if best_c else '-'
         
         match_pct = f"{int(best_e_score*100)}%"
@@ -618,7 +634,7 @@ def compare_all():
         else:
             e_name = '-'
         # Find best combined match
-        best_c, _ = find_best_match(g_enc, c_encounters, 'name')
+        best_c, _ = best_combined_match(c_index, g_enc, c_encounters, 'encounters')
         c_name = best_c.get('name', '-') if best_c else '-'
         
         match_pct = f"{int(best_e_score*100)}%"
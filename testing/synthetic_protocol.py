@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+"""
+Synthetic protocol generator for scaling tests.
+
+Builds a protocol PDF (title page, table of contents, synopsis, objectives,
+design, numbered eligibility criteria, a multi-page Schedule of Activities
+table and filler narrative sections) and the USDM JSON that matches it, at
+any scale - e.g. 250 activities x 120 visits, 100+ criteria and 500+ pages,
+well beyond the bundled inputs. Everything is derived from a seed, so the
+same spec always produces the same files.
+
+Alongside the PDF it writes a run directory in the layout main_v2.py leaves
+behind (9_final_soa.json, provenance, id_mapping.json and the raw responses
+of the expansion phases), so the offline benchmarks can replay combine and
+provenance conversion without an LLM, and the viewer can open it.
+
+Usage:
+    python testing/synthetic_protocol.py --preset large --output-dir output/synthetic_large
+    python testing/synthetic_protocol.py --activities 400 --visits 200 --pages 800 --output-dir /tmp/xl
+
+    from synthetic_protocol import PRESETS, write_protocol
+    paths = write_protocol(PRESETS["large"].scaled(2), "/tmp/synthetic")
+"""
+
+import argparse
+import json
+import random
+import sys
+import textwrap
+import uuid
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import fitz  # PyMuPDF
+
+CDISC = "http://www.cdisc.org"
+CT_VERSION = "2024-09-27"
+
+# Portrait and landscape US Letter, in points
+PORTRAIT = (612, 792)
+LANDSCAPE = (792, 612)
+MARGIN = 54
+FONT_SIZE = 10
+LINE_HEIGHT = 13
+WRAP_CHARS = 92
+
+# SoA table layout per page
+SOA_VISITS_PER_PAGE = 20
+SOA_ROWS_PER_PAGE = 44
+SOA_LABEL_WIDTH = 180
+SOA_ROW_HEIGHT = 10
+
+EPOCHS = ["Screening", "Run-in", "Treatment", "Extension", "Follow-up"]
+EPOCH_CODES = {
+    "Screening": ("C202487", "Screening Epoch"),
+    "Run-in": ("C98779", "Run-in Epoch"),
+    "Treatment": ("C101526", "Treatment Epoch"),
+    "Extension": ("C98779", "Extension Epoch"),
+    "Follow-up": ("C202578", "Follow-Up Epoch"),
+}
+ACTIVITY_GROUPS = [
+    "Eligibility", "Study Administration", "Safety Assessments", "Vital Signs",
+    "Laboratory Assessments", "Pharmacokinetics", "Efficacy Assessments",
+    "Patient-Reported Outcomes", "Study Intervention", "Biomarkers",
+]
+ASSESSMENTS = [
+    "Physical examination", "Body weight", "Blood pressure", "Heart rate", "12-lead ECG",
+    "Hematology", "Clinical chemistry", "Urinalysis", "Serum pregnancy test", "Coagulation panel",
+    "PK sample", "Anti-drug antibodies", "Adverse event review", "Concomitant medications",
+    "Drug dispensing", "Drug accountability", "Quality of life questionnaire", "Symptom diary",
+    "Biomarker sample", "Imaging assessment",
+]
+CRITERIA_SUBJECTS = [
+    "age", "body mass index", "renal function", "hepatic function", "prior therapy",
+    "pregnancy status", "contraception", "cardiac history", "infection status",
+    "malignancy history", "laboratory values", "concomitant medication", "informed consent",
+]
+FILLER_SECTIONS = [
+    "Statistical Considerations", "Adverse Events and Serious Adverse Events",
+    "Pharmacokinetic Analyses", "Data Management", "Ethical Considerations",
+    "Quality Assurance", "Study Discontinuation", "Publication Policy",
+    "Risk Assessment", "Investigational Product Handling",
+]
+WORDS = (
+    "participants study treatment dose safety efficacy assessment visit protocol analysis "
+    "endpoint investigator sponsor baseline period randomized placebo clinical data monitoring "
+    "procedure sample laboratory adverse event reported documented evaluated according schedule "
+    "within days prior following administration primary secondary population criteria consent"
+).split()
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """Size of a synthetic protocol."""
+    activities: int = 250
+    visits: int = 120
+    criteria: int = 100
+    objectives: int = 12
+    arms: int = 4
+    pages: int = 500
+    tick_density: float = 0.3
+    seed: int = 0
+    name: str = "SYNTH"
+
+    def scaled(self, factor: float) -> "SyntheticSpec":
+        """Every count multiplied by factor (at least 1; pages at least what the content needs)."""
+        def grow(n: int) -> int:
+            return max(1, round(n * factor))
+        return replace(
+            self,
+            activities=grow(self.activities), visits=grow(self.visits),
+            criteria=grow(self.criteria), objectives=grow(self.objectives),
+            arms=grow(self.arms), pages=grow(self.pages),
+            name=f"{self.name}_x{factor:g}",
+        )
+
+
+PRESETS: Dict[str, SyntheticSpec] = {
+    "small": SyntheticSpec(activities=30, visits=12, criteria=15, objectives=4, arms=2, pages=40, name="SYNTH_S"),
+    "medium": SyntheticSpec(activities=100, visits=50, criteria=50, objectives=8, arms=3, pages=200, name="SYNTH_M"),
+    "large": SyntheticSpec(name="SYNTH_L"),
+    "xl": SyntheticSpec(activities=500, visits=240, criteria=200, objectives=24, arms=8, pages=1000, name="SYNTH_XL"),
+}
+
+
+def _code(code: str, decode: str) -> Dict:
+    return {"code": code, "codeSystem": CDISC, "codeSystemVersion": CT_VERSION, "decode": decode, "instanceType": "Code"}
+
+
+class SyntheticProtocol:
+    """Protocol content for a spec; the PDF, USDM and run artifacts all derive from it."""
+
+    def __init__(self, spec: SyntheticSpec):
+        self.spec = spec
+        rng = random.Random(spec.seed)
+        self.title = f"A Phase 3, Randomized, Double-blind Study of {spec.name}-101 in Participants with Synthetic Disease"
+
+        self.epochs = EPOCHS[:max(2, min(len(EPOCHS), spec.visits // 10))]
+        self.visits: List[Tuple[str, str, int, str]] = []   # (id, name, study day, epoch)
+        for i in range(spec.visits):
+            epoch = self.epochs[min(len(self.epochs) - 1, i * len(self.epochs) // spec.visits)]
+            self.visits.append((f"enc_{i + 1}", f"Visit {i + 1}", -28 + 7 * i, epoch))
+
+        self.groups: List[Tuple[str, str, List[str]]] = []   # (id, name, activity ids)
+        self.activities: List[Tuple[str, str]] = []          # (id, name)
+        per_group = max(1, spec.activities // len(ACTIVITY_GROUPS))
+        for i in range(spec.activities):
+            name = f"{ASSESSMENTS[i % len(ASSESSMENTS)]} {i // len(ASSESSMENTS) + 1}"
+            self.activities.append((f"act_{i + 1}", name))
+            g = min(i // per_group, len(ACTIVITY_GROUPS) - 1)
+            if g >= len(self.groups):
+                self.groups.append((f"grp_{g + 1}", ACTIVITY_GROUPS[g], []))
+            self.groups[g][2].append(f"act_{i + 1}")
+
+        # Every activity is done at least once; the rest of the grid at tick_density
+        self.ticks: List[Tuple[str, str]] = []
+        for a, (act_id, _) in enumerate(self.activities):
+            first = rng.randrange(spec.visits)
+            for v, (enc_id, _, _, _) in enumerate(self.visits):
+                if v == first or rng.random() < spec.tick_density:
+                    self.ticks.append((act_id, enc_id))
+        self.footnotes = {tick: rng.choice("abcdefgh") for tick in rng.sample(self.ticks, min(len(self.ticks), spec.activities // 5))}
+
+        self.criteria: List[Tuple[str, str, str]] = []   # (id, category, text)
+        inclusion = max(1, spec.criteria // 2)
+        for i in range(spec.criteria):
+            category = "Inclusion" if i < inclusion else "Exclusion"
+            subject = CRITERIA_SUBJECTS[i % len(CRITERIA_SUBJECTS)]
+            if category == "Inclusion":
+                text = f"Participants must meet the protocol requirements for {subject} ({i + 1})."
+            else:
+                text = f"Participants with a clinically significant history of abnormal {subject} ({i + 1})."
+            self.criteria.append((f"ec_{i + 1}", category, f"{text} {self.sentence(rng, 10)}"))
+
+        self.objectives: List[Tuple[str, str, str, str]] = []   # (id, level, objective text, endpoint text)
+        for i in range(spec.objectives):
+            level = "Primary" if i == 0 else ("Secondary" if i <= spec.objectives // 2 else "Exploratory")
+            self.objectives.append((f"obj_{i + 1}", level, f"To evaluate {self.sentence(rng, 8)}",
+                                    f"Change from baseline in {self.sentence(rng, 6)}"))
+        self.arms = [f"Arm {chr(65 + i % 26)}{i // 26 or ''}: {spec.name}-101 {10 * (i + 1)} mg" for i in range(spec.arms)]
+        self.filler_seed = rng.random()
+
+    @staticmethod
+    def sentence(rng: random.Random, words: int) -> str:
+        text = " ".join(rng.choice(WORDS) for _ in range(words))
+        return text[0].upper() + text[1:] + "."
+
+    # ----- LLM-shaped raw responses (what the extractors parse) -----
+
+    def raw_responses(self) -> Dict[str, Dict]:
+        spec = self.spec
+        return {
+            "metadata": {
+                "titles": [{"id": "title_1", "text": self.title, "type": {"code": "OfficialStudyTitle", "decode": "Official Study Title"}, "instanceType": "StudyTitle"}],
+                "identifiers": [{"id": "sid_1", "text": f"{spec.name}-101-301", "instanceType": "StudyIdentifier"}],
+                "organizations": [{"id": "org_1", "name": "Synthetic Pharma, Inc.", "type": {"code": "Sponsor", "decode": "Sponsor"}, "instanceType": "Organization"}],
+                "studyPhase": {"code": "Phase3", "decode": "Phase 3"},
+                "studyType": "Interventional",
+                "indication": {"id": "ind_1", "name": "Synthetic Disease", "instanceType": "Indication"},
+            },
+            "eligibility": {
+                "eligibilityCriteria": [
+                    {"id": cid, "name": text.split(".")[0][:60], "identifier": str(i + 1),
+                     "category": {"code": category, "decode": f"{category} Criterion"},
+                     "criterionItemId": f"eci_{i + 1}", "instanceType": "EligibilityCriterion"}
+                    for i, (cid, category, text) in enumerate(self.criteria)
+                ],
+                "eligibilityCriterionItems": [
+                    {"id": f"eci_{i + 1}", "name": text.split(".")[0][:60], "text": text, "instanceType": "EligibilityCriterionItem"}
+                    for i, (_, _, text) in enumerate(self.criteria)
+                ],
+                "population": {"id": "pop_1", "name": "Study Population", "includesHealthySubjects": False,
+                               "plannedMinimumAge": "P18Y", "criterionIds": [c[0] for c in self.criteria]},
+            },
+            "objectives": {
+                "objectives": [
+                    {"id": oid, "name": f"{level} Objective {i + 1}", "text": text,
+                     "level": {"code": level, "decode": f"{level} Objective"},
+                     "endpointIds": [f"ep_{i + 1}"], "instanceType": "Objective"}
+                    for i, (oid, level, text, _) in enumerate(self.objectives)
+                ],
+                "endpoints": [
+                    {"id": f"ep_{i + 1}", "name": f"{level} Endpoint {i + 1}", "text": endpoint,
+                     "level": {"code": level, "decode": f"{level} Endpoint"}, "purpose": "Efficacy", "instanceType": "Endpoint"}
+                    for i, (_, level, _, endpoint) in enumerate(self.objectives)
+                ],
+                "estimands": [],
+            },
+            "studydesign": {
+                "studyDesign": {"type": "Interventional", "trialIntentTypes": ["Treatment"],
+                                "blinding": {"schema": "Double Blind", "maskedRoles": []},
+                                "randomization": {"type": "Randomized", "allocationRatio": None, "stratificationFactors": []},
+                                "controlType": "Placebo", "therapeuticAreas": ["Synthetic Medicine"]},
+                "arms": [{"name": arm, "type": "Experimental Arm", "description": f"Participants receive {arm}"} for arm in self.arms],
+                "cohorts": [],
+                "epochs": [{"name": e, "description": f"{e} period"} for e in self.epochs],
+            },
+            "interventions": {
+                "interventions": [{"name": f"{spec.name}-101", "role": "Investigational Product", "description": "Synthetic investigational product"}],
+                "products": [{"name": f"{spec.name}-101 tablets", "doseForm": "Tablet", "strength": "10 mg", "manufacturer": "Synthetic Pharma"}],
+                "substances": [{"name": f"{spec.name.lower()}ib", "description": "Active ingredient"}],
+                "administrations": [{"name": arm, "dose": f"{10 * (i + 1)} mg", "frequency": "once daily", "route": "Oral", "duration": "52 weeks"}
+                                    for i, arm in enumerate(self.arms)],
+                "devices": [],
+            },
+            "advanced": {
+                "amendments": [],
+                "geographicScope": {"type": "Global", "countries": [{"name": "United States", "code": "US"}], "regions": [], "plannedSites": None},
+                "sites": [],
+            },
+        }
+
+    # ----- SoA and USDM -----
+
+    def soa(self) -> Dict:
+        """The SoA in the shape of 9_final_soa.json (simple ids)."""
+        rng = random.Random(self.spec.seed + 1)
+        design = {
+            "id": "sd_1",
+            "name": "Study Design",
+            "instanceType": "InterventionalStudyDesign",
+            "blindingSchema": {"id": "bs_1", "instanceType": "AliasCode", "standardCode": {"id": "code_bs", **_code("C15228", "Double Blind")}},
+            "epochs": [
+                {"id": f"epoch_{i + 1}", "name": e, "instanceType": "StudyEpoch",
+                 "type": {"id": f"code_ep_{i + 1}", **_code(*EPOCH_CODES[e])}}
+                for i, e in enumerate(self.epochs)
+            ],
+            "activities": [
+                {"id": gid, "name": name, "instanceType": "Activity", "childIds": children}
+                for gid, name, children in self.groups
+            ] + [
+                {"id": aid, "name": name, "instanceType": "Activity", "description": f"{name} as per protocol"}
+                for aid, name in self.activities
+            ],
+            "encounters": [
+                {"id": eid, "name": f"{name} (Day {day})", "instanceType": "Encounter",
+                 "type": {"id": f"code_{eid}", **_code("C25716", "Visit")},
+                 "epochId": f"epoch_{self.epochs.index(epoch) + 1}"}
+                for eid, name, day, epoch in self.visits
+            ],
+            "scheduleTimelines": [{
+                "id": "timeline_1",
+                "name": "Main Schedule Timeline",
+                "mainTimeline": True,
+                "instanceType": "ScheduleTimeline",
+                "entryCondition": "Subject enrolled in study",
+                "entryId": "sai_1",
+                "instances": [
+                    {"id": f"sai_{i + 1}", "activityIds": [act], "instanceType": "ScheduledActivityInstance",
+                     "name": f"{act}@{enc}", "encounterId": enc}
+                    for i, (act, enc) in enumerate(self.ticks)
+                ],
+            }],
+            "notes": [
+                {"id": f"soa_fn_{i + 1}", "text": f"{letter} {self.sentence(rng, 12)}", "instanceType": "CommentAnnotation"}
+                for i, letter in enumerate("abcdefgh")
+            ],
+        }
+        return {
+            "usdmVersion": "4.0",
+            "systemName": "Protocol2USDM",
+            "systemVersion": "synthetic",
+            "study": {"id": "study_1", "name": self.spec.name, "instanceType": "Study", "versions": [
+                {"id": "sv_1", "versionIdentifier": "1.0", "rationale": "Synthetic protocol",
+                 "instanceType": "StudyVersion", "studyDesigns": [design]},
+            ]},
+        }
+
+    def provenance(self) -> Dict:
+        return {
+            "entities": {
+                "activities": {aid: "text" for aid, _ in self.activities},
+                "plannedTimepoints": {eid: "text" for eid, _, _, _ in self.visits},
+                "encounters": {eid: "text" for eid, _, _, _ in self.visits},
+                "epochs": {f"epoch_{i + 1}": "text" for i in range(len(self.epochs))},
+                "activityGroups": {gid: "text" for gid, _, _ in self.groups},
+            },
+            "cells": {f"{act}|{enc}": "both" for act, enc in self.ticks},
+            "cellFootnotes": {f"{act}|{enc}": [letter] for (act, enc), letter in self.footnotes.items()},
+            "metadata": {"model": "synthetic", "extraction_type": "text"},
+        }
+
+    def usdm(self) -> Dict:
+        """A full USDM document: the SoA design plus criteria, objectives, arms and cells."""
+        doc = self.soa()
+        version = doc["study"]["versions"][0]
+        design = version["studyDesigns"][0]
+        raw = self.raw_responses()
+
+        version["titles"] = [{**raw["metadata"]["titles"][0], "type": {"id": "code_title", **_code("C207616", "Official Study Title")}}]
+        version["studyIdentifiers"] = [{"id": "sid_1", "text": f"{self.spec.name}-101-301", "scopeId": "org_1", "instanceType": "StudyIdentifier"}]
+        version["organizations"] = [{"id": "org_1", "name": "Synthetic Pharma, Inc.", "identifier": "SP",
+                                     "identifierScheme": "DUNS", "type": {"id": "code_org", **_code("C70793", "Clinical Study Sponsor")},
+                                     "instanceType": "Organization"}]
+        version["eligibilityCriterionItems"] = raw["eligibility"]["eligibilityCriterionItems"]
+        design["studyType"] = {"id": "code_st", **_code("C98388", "Interventional Study")}
+        design["studyPhase"] = {"id": "phase_1", "instanceType": "AliasCode", "standardCode": {"id": "code_ph", **_code("C15602", "Phase III Trial")}}
+        design["eligibilityCriteria"] = [
+            {**c, "category": {"id": f"code_cat_{i + 1}", **(_code("C25532", "Inclusion Criteria") if c["category"]["code"] == "Inclusion"
+                                                            else _code("C25370", "Exclusion Criteria"))}}
+            for i, c in enumerate(raw["eligibility"]["eligibilityCriteria"])
+        ]
+        design["population"] = {"id": "pop_1", "name": "Study Population", "includesHealthySubjects": False,
+                                "criterionIds": [c[0] for c in self.criteria], "instanceType": "StudyDesignPopulation"}
+        levels = {"Primary": ("C85826", "C94496"), "Secondary": ("C85827", "C139173"), "Exploratory": ("C163559", "C170559")}
+        design["objectives"] = [
+            {"id": oid, "name": f"OBJ{i + 1}", "text": text, "instanceType": "Objective",
+             "level": {"id": f"code_ol_{i + 1}", **_code(levels[level][0], f"{level} Objective")},
+             "endpoints": [{"id": f"ep_{i + 1}", "name": f"END{i + 1}", "text": endpoint, "purpose": "Efficacy",
+                            "level": {"id": f"code_el_{i + 1}", **_code(levels[level][1], f"{level} Endpoint")},
+                            "instanceType": "Endpoint"}]}
+            for i, (oid, level, text, endpoint) in enumerate(self.objectives)
+        ]
+        design["arms"] = [
+            {"id": f"arm_{i + 1}", "name": arm, "description": f"Participants receive {arm}",
+             "type": {"id": f"code_arm_{i + 1}", **_code("C174266", "Experimental Arm")},
+             "dataOriginDescription": "Data collected from subjects",
+             "dataOriginType": {"id": f"code_do_{i + 1}", **_code("C188866", "Data Generated Within Study")},
+             "instanceType": "StudyArm"}
+            for i, arm in enumerate(self.arms)
+        ]
+        design["studyCells"] = [
+            {"id": f"cell_{a + 1}_{e + 1}", "armId": f"arm_{a + 1}", "epochId": f"epoch_{e + 1}", "elementIds": [], "instanceType": "StudyCell"}
+            for a in range(len(self.arms)) for e in range(len(self.epochs))
+        ]
+        return doc
+
+    def id_mapping(self) -> Dict[str, str]:
+        """Deterministic simple id -> UUID map (what convert_ids_to_uuids saves)."""
+        rng = random.Random(self.spec.seed + 2)
+        ids: List[str] = []
+
+        def collect(obj):
+            if isinstance(obj, dict):
+                if isinstance(obj.get("id"), str):
+                    ids.append(obj["id"])
+                for value in obj.values():
+                    collect(value)
+            elif isinstance(obj, list):
+                for item in obj:
+                    collect(item)
+        collect(self.usdm())
+        return {i: str(uuid.UUID(int=rng.getrandbits(128), version=4)) for i in dict.fromkeys(ids)}
+
+    # ----- PDF -----
+
+    def write_pdf(self, path: str) -> int:
+        """Draw the protocol; returns the page count (at least spec.pages)."""
+        doc = fitz.open()
+        writer = _TextWriter(doc)
+
+        page = doc.new_page(width=PORTRAIT[0], height=PORTRAIT[1])
+        page.insert_textbox(fitz.Rect(MARGIN, 200, PORTRAIT[0] - MARGIN, 400), self.title, fontsize=18, align=1)
+        page.insert_text((MARGIN, 460), f"Protocol Number: {self.spec.name}-101-301", fontsize=12)
+        page.insert_text((MARGIN, 480), "Sponsor: Synthetic Pharma, Inc.", fontsize=12)
+        page.insert_text((MARGIN, 500), "Phase 3", fontsize=12)
+
+        sections = ["1 Protocol Summary", "1.1 Synopsis", "1.3 Schedule of Activities (SoA)", "3 Objectives and Endpoints",
+                    "4 Study Design", "5 Study Population", "5.1 Inclusion Criteria", "5.2 Exclusion Criteria",
+                    "6 Study Intervention"] + [f"{i + 7} {name}" for i, name in enumerate(FILLER_SECTIONS)]
+        writer.heading("TABLE OF CONTENTS")
+        for section in sections:
+            writer.line(f"{section} {'.' * (70 - len(section))} {sections.index(section) * 7 + 5}")
+
+        writer.heading("1 PROTOCOL SUMMARY")
+        writer.heading("1.1 Synopsis", level=2)
+        writer.paragraph(f"Title: {self.title}")
+        writer.paragraph(f"Number of participants: approximately {40 * len(self.arms)} participants will be randomized "
+                         f"across {len(self.arms)} arms. The study consists of {len(self.epochs)} periods and "
+                         f"{len(self.visits)} visits.")
+
+        writer.close()
+        self._write_soa(doc)
+
+        rng = random.Random(self.filler_seed)
+        writer.new_page()
+        writer.heading("3 OBJECTIVES AND ENDPOINTS")
+        for _, level, text, endpoint in self.objectives:
+            writer.paragraph(f"{level} objective: {text}")
+            writer.paragraph(f"    Endpoint: {endpoint}")
+
+        writer.heading("4 STUDY DESIGN")
+        writer.paragraph(f"This is a randomized, double-blind, placebo-controlled study with {len(self.arms)} arms: "
+                         + "; ".join(self.arms) + ". " + self.sentence(rng, 40))
+        for epoch in self.epochs:
+            writer.paragraph(f"{epoch} period: {self.sentence(rng, 30)}")
+
+        writer.heading("5 STUDY POPULATION")
+        writer.heading("5.1 Inclusion Criteria", level=2)
+        writer.paragraph("Participants are eligible to be included in the study only if all of the following criteria apply:")
+        exclusion = [text for _, category, text in self.criteria if category == "Exclusion"]
+        for number, (_, category, text) in enumerate(c for c in self.criteria if c[1] == "Inclusion"):
+            writer.paragraph(f"{number + 1}. {text}")
+        if exclusion:
+            writer.heading("5.2 Exclusion Criteria", level=2)
+            writer.paragraph("Participants are excluded from the study if any of the following criteria apply:")
+            for number, text in enumerate(exclusion):
+                writer.paragraph(f"{number + 1}. {text}")
+
+        writer.heading("6 STUDY INTERVENTION")
+        writer.paragraph(f"Investigational product: {self.spec.name}-101 tablets, 10 mg, administered orally once daily. "
+                         + self.sentence(rng, 40))
+
+        # Narrative filler up to the requested size
+        section = 0
+        while len(doc) < self.spec.pages:
+            writer.heading(f"{section + 7} {FILLER_SECTIONS[section % len(FILLER_SECTIONS)].upper()}")
+            for _ in range(6):
+                writer.paragraph(self.sentence(rng, 120))
+            section += 1
+            writer.close()
+
+        writer.close()
+        doc.save(path, garbage=1, deflate=True)
+        count = len(doc)
+        doc.close()
+        return count
+
+    def _write_soa(self, doc: "fitz.Document") -> None:
+        """Schedule of Activities table, tiled over landscape pages (visit blocks x activity blocks)."""
+        ticks = set(self.ticks)
+        names = dict(self.activities)
+        rows: List[Tuple[str, str]] = []   # (label, activity id or "" for a group row)
+        for _, group, children in self.groups:
+            rows.append((group.upper(), ""))
+            rows.extend((names[aid], aid) for aid in children)
+
+        width, height = LANDSCAPE
+        col_width = (width - 2 * MARGIN - SOA_LABEL_WIDTH) / SOA_VISITS_PER_PAGE
+        for v0 in range(0, len(self.visits), SOA_VISITS_PER_PAGE):
+            visits = self.visits[v0:v0 + SOA_VISITS_PER_PAGE]
+            for r0 in range(0, len(rows), SOA_ROWS_PER_PAGE):
+                page = doc.new_page(width=width, height=height)
+                continued = " (continued)" if v0 or r0 else ""
+                shape = page.new_shape()
+                shape.insert_text((MARGIN, MARGIN - 20), f"Table 1 Schedule of Activities{continued}", fontsize=11)
+                y = MARGIN
+                header_rows = [("Visit", [name for _, name, _, _ in visits]),
+                               ("Study Day", [str(day) for _, _, day, _ in visits]),
+                               ("Period", [epoch for _, _, _, epoch in visits])]
+                for label, cells in header_rows:
+                    shape.insert_text((MARGIN + 2, y + SOA_ROW_HEIGHT - 2), label, fontsize=7)
+                    for i, cell in enumerate(cells):
+                        shape.insert_text((MARGIN + SOA_LABEL_WIDTH + i * col_width + 2, y + SOA_ROW_HEIGHT - 2), cell[:9], fontsize=6)
+                    y += SOA_ROW_HEIGHT
+                for label, act_id in rows[r0:r0 + SOA_ROWS_PER_PAGE]:
+                    shape.draw_line((MARGIN, y), (width - MARGIN, y))
+                    shape.insert_text((MARGIN + 2, y + SOA_ROW_HEIGHT - 2), label[:40], fontsize=7)
+                    for i, (enc_id, _, _, _) in enumerate(visits):
+                        if act_id and (act_id, enc_id) in ticks:
+                            mark = "X" + self.footnotes.get((act_id, enc_id), "")
+                            shape.insert_text((MARGIN + SOA_LABEL_WIDTH + i * col_width + col_width / 3, y + SOA_ROW_HEIGHT - 2), mark, fontsize=7)
+                    y += SOA_ROW_HEIGHT
+                for i in range(len(visits) + 1):
+                    x = MARGIN + SOA_LABEL_WIDTH + i * col_width
+                    shape.draw_line((x, MARGIN), (x, y))
+                shape.draw_rect(fitz.Rect(MARGIN, MARGIN, width - MARGIN, y))
+                shape.finish(width=0.5)
+                shape.commit()
+        page = doc.new_page(width=width, height=height)
+        page.insert_text((MARGIN, MARGIN), "Schedule of Activities footnotes", fontsize=11)
+        for i, letter in enumerate("abcdefgh"):
+            page.insert_text((MARGIN, MARGIN + 20 + i * LINE_HEIGHT), f"{letter}. {WORDS[i]} {WORDS[-i - 1]} as per protocol section 8.", fontsize=8)
+
+
+class _TextWriter:
+    """
+    Flows headings and wrapped paragraphs onto portrait pages.
+
+    Text is batched into one Shape per page; Page.insert_text commits a
+    shape per call, which dominates generation time for large documents.
+    """
+
+    def __init__(self, doc: "fitz.Document"):
+        self.doc = doc
+        self.shape = None
+        self.y = 0.0
+
+    def new_page(self) -> None:
+        self.close()
+        self.shape = self.doc.new_page(width=PORTRAIT[0], height=PORTRAIT[1]).new_shape()
+        self.y = MARGIN
+
+    def close(self) -> None:
+        if self.shape is not None:
+            self.shape.commit()
+            self.shape = None
+
+    def line(self, text: str, size: float = FONT_SIZE) -> None:
+        if self.shape is None or self.y + LINE_HEIGHT > PORTRAIT[1] - MARGIN:
+            self.new_page()
+        self.shape.insert_text((MARGIN, self.y + size), text, fontsize=size)
+        self.y += LINE_HEIGHT * size / FONT_SIZE
+
+    def heading(self, text: str, level: int = 1) -> None:
+        if level == 1:
+            self.new_page()
+        self.y += 6
+        self.line(text, size=14 if level == 1 else 12)
+
+    def paragraph(self, text: str) -> None:
+        for wrapped in textwrap.wrap(text, WRAP_CHARS) or [""]:
+            self.line(wrapped)
+        self.y += 4
+
+
+def write_protocol(spec: SyntheticSpec, output_dir: str) -> Dict[str, str]:
+    """
+    Write <name>.pdf, <name>_usdm.json and a run/ directory for a spec.
+
+    Returns:
+        Paths of the written files: pdf, usdm, run_dir
+    """
+    out = Path(output_dir)
+    run_dir = out / "run"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    protocol = SyntheticProtocol(spec)
+
+    pdf_path = out / f"{spec.name}.pdf"
+    pages = protocol.write_pdf(str(pdf_path))
+
+    def dump(path: Path, data: Dict) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    usdm_path = out / f"{spec.name}_usdm.json"
+    dump(usdm_path, protocol.usdm())
+    dump(run_dir / "9_final_soa.json", protocol.soa())
+    dump(run_dir / "9_final_soa_provenance.json", protocol.provenance())
+    dump(run_dir / "id_mapping.json", protocol.id_mapping())
+    artifacts = {
+        "metadata": "2_study_metadata.json", "eligibility": "3_eligibility_criteria.json",
+        "objectives": "4_objectives_endpoints.json", "studydesign": "5_study_design.json",
+        "interventions": "6_interventions.json", "advanced": "8_advanced_entities.json",
+    }
+    for phase, raw in protocol.raw_responses().items():
+        dump(run_dir / artifacts[phase], {"success": True, "modelUsed": "synthetic", "rawResponse": raw})
+    dump(out / "synthetic_spec.json", {**asdict(spec), "pdfPages": pages, "ticks": len(protocol.ticks)})
+    return {"pdf": str(pdf_path), "usdm": str(usdm_path), "run_dir": str(run_dir)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic protocol PDF and matching USDM for scaling tests")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="large", help="Base size (default: large)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every count of the preset")
+    for name in ("activities", "visits", "criteria", "objectives", "arms", "pages", "seed"):
+        parser.add_argument(f"--{name}", type=int, help=f"Override the number of {name}" if name != "seed" else "Random seed")
+    parser.add_argument("--output-dir", "-o", required=True, help="Directory for the PDF, USDM JSON and run/")
+    args = parser.parse_args(argv)
+
+    spec = PRESETS[args.preset]
+    if args.scale != 1.0:
+        spec = spec.scaled(args.scale)
+    overrides = {k: getattr(args, k) for k in ("activities", "visits", "criteria", "objectives", "arms", "pages", "seed")
+                 if getattr(args, k) is not None}
+    spec = replace(spec, **overrides)
+
+    paths = write_protocol(spec, args.output_dir)
+    with open(Path(args.output_dir) / "synthetic_spec.json", 'r', encoding='utf-8') as f:
+        info = json.load(f)
+    print(f"{spec.name}: {info['pdfPages']} pages, {spec.activities} activities x {spec.visits} visits "
+          f"({info['ticks']} ticks), {spec.criteria} criteria")
+    for key, path in paths.items():
+        print(f"  {key:<8} {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Tests for the in-memory artifact store and its write-behind sink.
+
+Run with: pytest tests/test_artifacts.py -v
+"""
+
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def store():
+    from core.artifacts import close_store, open_store
+
+    # Long delay: nothing is written until a flush asks for it
+    yield open_store(write_delay=60.0)
+    close_store()
+
+
+class TestArtifactStore:
+    """Tests for core.artifacts."""
+
+    def test_get_returns_put_object_without_io(self, store, tmp_path):
+        """Test stages get the object back and nothing touches disk until a flush."""
+        from core.artifacts import artifact_exists, load_artifact, put_artifact
+
+        path = str(tmp_path / "protocol_usdm.json")
+        data = {"study": {"id": "s1"}}
+        put_artifact(path, data)
+
+        assert load_artifact(path) is data
+        assert artifact_exists(path)
+        assert not os.path.exists(path)
+        assert store.pending() == [os.path.abspath(path)]
+
+    def test_puts_coalesce_into_one_atomic_write(self, store, tmp_path):
+        """Test repeated puts of an artifact write only the last version, with no temp files left."""
+        from core.artifacts import flush_artifacts, put_artifact
+
+        path = str(tmp_path / "protocol_usdm.json")
+        for status in ("pending", "validated", "complete"):
+            put_artifact(path, {"validationStatus": status, "name": "Étude"})
+        assert flush_artifacts([path])
+
+        with open(path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == {"validationStatus": "complete", "name": "Étude"}
+        assert store.writes == 1 and store.puts == 3
+        assert os.listdir(tmp_path) == ["protocol_usdm.json"]
+        assert store.pending() == []
+
+    def test_close_flushes_everything(self, tmp_path):
+        """Test closing the store writes every pending artifact and later puts go straight to disk."""
+        from core.artifacts import close_store, get_store, open_store, put_artifact
+
+        open_store(write_delay=60.0)
+        put_artifact(str(tmp_path / "a.json"), [1])
+        put_artifact(str(tmp_path / "sub" / "b.json"), {"b": 2})
+        assert close_store()
+        assert get_store() is None
+        assert json.loads((tmp_path / "sub" / "b.json").read_text()) == {"b": 2}
+
+        put_artifact(str(tmp_path / "c.json"), {"c": 3})
+        assert (tmp_path / "c.json").exists()
+
+    def test_disk_fallback_and_write_errors(self, store, tmp_path):
+        """Test files not in the store load from disk, and failed writes are reported by flush."""
+        from core.artifacts import load_artifact, put_artifact, flush_artifacts
+
+        (tmp_path / "existing.json").write_text('{"x": 1}')
+        first = load_artifact(str(tmp_path / "existing.json"))
+        assert first == {"x": 1} and load_artifact(str(tmp_path / "existing.json")) is first
+        with pytest.raises(FileNotFoundError):
+            load_artifact(str(tmp_path / "missing.json"))
+
+        bad = str(tmp_path / "bad.json")
+        put_artifact(bad, {"not": {1, 2}})     # sets aren't JSON
+        assert not flush_artifacts([bad])
+        assert os.path.abspath(bad) in store.errors
+
+    def test_manifest_sees_pending_artifacts(self, store, tmp_path):
+        """Test a checkpointed step records an artifact still waiting in the store."""
+        from core.artifacts import put_artifact
+        from core.checkpoint import RunManifest
+
+        def step():
+            put_artifact(str(tmp_path / "out.json"), {"value": 1})
+            return {"success": True}
+
+        manifest = RunManifest(str(tmp_path))
+        manifest.run("metadata", step, artifacts=["out.json"])
+        assert manifest.steps["metadata"]["artifacts"] == ["out.json"]
+        assert not (tmp_path / "out.json").exists()
@@ -18,7 +18,7 @@ def test_main_processes_each_pdf(tmp_path):
         p.write_bytes(b"%PDF-1.4 dummy content")
 
     # Monkeypatch argv to simulate CLI call
-    test_args = ["main.py", str(pdf_dir)]
+    test_args = ["main.py", str(pdf_dir), "--output-root", str(tmp_path / "out")]
 
     with mock.patch.object(sys, "argv", test_args):
         called = []
@@ -33,3 +33,114 @@ def test_main_processes_each_pdf(tmp_path):
     # Ensure each of the three PDFs was processed
     assert len(called) == 3
     assert set(map(os.path.abspath, called)) == set(map(str, pdf_files))
+
+
+class TestBatchDiscovery:
+    """Tests for protocol discovery and companion pairing."""
+
+    def test_sap_and_sites_paired(self, tmp_path):
+        """Test *_SAP.pdf and *_sites.csv are paired, not run on their own."""
+        for name in ["A.pdf", "A_SAP.pdf", "A_sites.csv", "B.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF-1.4")
+
+        jobs = main_mod.discover_jobs(str(tmp_path))
+        assert [os.path.basename(j.pdf_path) for j in jobs] == ["A.pdf", "B.pdf"]
+        assert jobs[0].sap_path == str(tmp_path / "A_SAP.pdf")
+        assert jobs[0].sites_path == str(tmp_path / "A_sites.csv")
+        assert jobs[1].sap_path is None
+
+    def test_glob_and_manifest_sources(self, tmp_path):
+        """Test glob patterns and JSON manifests with explicit pairings."""
+        import json
+
+        for name in ["A.pdf", "B.pdf", "other_sap.pdf"]:
+            (tmp_path / name).write_bytes(b"%PDF-1.4")
+        assert len(main_mod.discover_jobs(str(tmp_path / "A*.pdf"))) == 1
+
+        manifest = tmp_path / "batch.json"
+        manifest.write_text(json.dumps(["A.pdf", {"pdf": "B.pdf", "sap": "other_sap.pdf"}]))
+        jobs = main_mod.discover_jobs(str(manifest))
+        assert [os.path.basename(j.pdf_path) for j in jobs] == ["A.pdf", "B.pdf"]
+        assert jobs[1].sap_path == str(tmp_path / "other_sap.pdf")
+
+
+class TestBatchRun:
+    """Tests for the batch manifest and pass-through arguments."""
+
+    def test_manifest_records_failures(self, tmp_path):
+        """Test per-protocol outcomes and the summary land in batch_manifest.json."""
+        import json
+
+        jobs = [main_mod.BatchJob(str(tmp_path / f"p{i}.pdf")) for i in range(3)]
+        outcomes = iter([{"exitCode": 0, "durationSeconds": 5},
+                         {"exitCode": 1, "durationSeconds": 2, "error": "boom"},
+                         {"exitCode": 0, "durationSeconds": 4}])
+
+        with mock.patch.object(main_mod, "process_single_pdf", side_effect=lambda p, m: next(outcomes)):
+            manifest = main_mod.run_batch(jobs, "gemini-2.5-pro", str(tmp_path / "out"))
+
+        data = json.loads((tmp_path / "out" / "batch_manifest.json").read_text())
+        assert data["summary"]["succeeded"] == 2 and data["summary"]["failed"] == 1
+        assert [j["status"] for j in data["jobs"]] == ["done", "failed", "done"]
+        assert data["jobs"][0]["output_dir"] == str(tmp_path / "out" / "p0")
+        assert "p1" in main_mod.format_summary_table(manifest)
+
+    def test_protocol_traces_merge_into_batch_trace(self, tmp_path):
+        """Test each protocol's spans nest under its batch.job span in <output_root>/trace.jsonl."""
+        import main_v2
+        from core.profiling import load_trace, reset_timing, save_trace, span
+
+        def fake_main(argv):
+            reset_timing()
+            with span("run"):
+                with span("soa"):
+                    pass
+            save_trace(argv[argv.index("--output-dir") + 1])
+
+        jobs = [main_mod.BatchJob(str(tmp_path / f"p{i}.pdf")) for i in range(2)]
+        with mock.patch.object(main_v2, "main", side_effect=fake_main):
+            main_mod.run_batch(jobs, "gemini-2.5-pro", str(tmp_path / "out"))
+
+        spans = load_trace(str(tmp_path / "out" / "trace.jsonl"))
+        by_id = {s["spanId"]: s for s in spans}
+        assert len({s["traceId"] for s in spans}) == 1
+        assert sorted(s["name"] for s in spans) == ["batch", "batch.job", "batch.job", "run", "run", "soa", "soa"]
+        for run in (s for s in spans if s["name"] == "run"):
+            job = by_id[run["parentSpanId"]]
+            assert job["name"] == "batch.job"
+            assert by_id[job["parentSpanId"]]["name"] == "batch"
+
+    def test_reserved_arguments_rejected(self, tmp_path):
+        """Test per-protocol options can't be passed through to main_v2."""
+        import pytest
+
+        with pytest.raises(SystemExit):
+            main_mod.main([str(tmp_path), "--sap", "x.pdf"])
+
+    def test_request_limit_caps_concurrency(self):
+        """Test request_slot never lets more than the limit run at once."""
+        import threading
+        import time
+        import llm_providers
+
+        llm_providers.set_request_limit(2)
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def call():
+            with llm_providers.request_slot():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+
+        try:
+            threads = [threading.Thread(target=call) for _ in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            llm_providers.set_request_limit(None)
+        assert peak[0] == 2
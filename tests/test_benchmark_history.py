@@ -0,0 +1,106 @@
+"""
+Tests for the benchmark history and regression report.
+
+Run with: pytest tests/test_benchmark_history.py -v
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'testing')))
+
+
+def _offline(path, timestamp, samples, throughput=100.0, memory=10.0):
+    stage = {"unit": "documents", "p50Ms": sorted(samples)[len(samples) // 2], "samplesMs": samples,
+             "throughput": throughput, "rssPeakGrowthMb": memory}
+    path.write_text(json.dumps({"timestamp": timestamp, "commit": "abc1234", "dirty": False,
+                                "stages": {"combine": stage, "skipped.stage": {"skipped": "no fixture"}}}))
+    return str(path)
+
+
+def _models(path, timestamp, tokens, issues=0):
+    result = {"model": "gpt-x", "protocol": "P1", "success": True, "ticks": 100, "duration_seconds": 60.0,
+              "conformance_issues": issues, "input_tokens": tokens, "output_tokens": 0, "peak_rss_mb": 500.0}
+    path.write_text(json.dumps({"timestamp": timestamp, "models": ["gpt-x"], "protocols": ["P1"],
+                                "results": [result]}))
+    return str(path)
+
+
+class TestBenchmarkHistory:
+    """Tests for testing/benchmark_history.py."""
+
+    def test_ingest_is_idempotent(self, tmp_path):
+        """Test result files become runs once, and non-results are ignored."""
+        from benchmark_history import BenchmarkHistory
+
+        _offline(tmp_path / "offline_1.json", "20260101_120000", [10.0, 11.0, 12.0])
+        _models(tmp_path / "benchmark_report.json", "2026-01-01T13:00:00", 1000)
+        (tmp_path / "other.json").write_text(json.dumps({"not": "a result"}))
+
+        with BenchmarkHistory(str(tmp_path / "h.sqlite")) as history:
+            assert len(history.ingest_dir(str(tmp_path))) == 2
+            assert history.ingest_dir(str(tmp_path)) == []
+            offline = history.runs("offline")[0]
+            assert offline.timestamp == "2026-01-01T12:00:00" and offline.commit == "abc1234"
+            metrics = history.metrics(offline.id)
+            assert metrics[("combine", "p50Ms")].samples == [10.0, 11.0, 12.0]
+            assert {m for _, m in metrics} == {"p50Ms", "throughput", "rssPeakGrowthMb"}
+
+    def test_significant_slowdown_is_a_regression(self, tmp_path):
+        """Test a clear latency increase regresses; an overlapping one is only noise."""
+        from benchmark_history import BenchmarkHistory, compare_runs
+
+        with BenchmarkHistory(str(tmp_path / "h.sqlite")) as history:
+            base = history.ingest(_offline(tmp_path / "a.json", "20260101_120000", [10.0, 10.2, 9.9, 10.1, 10.0]))
+            slow = history.ingest(_offline(tmp_path / "b.json", "20260102_120000", [13.0, 13.2, 12.9, 13.1, 13.0]))
+            noisy = history.ingest(_offline(tmp_path / "c.json", "20260103_120000", [5.0, 25.0, 6.0, 24.0, 12.0]))
+            runs = {r.id: r for r in history.runs()}
+
+            deltas = {d.metric: d for d in compare_runs(history, runs[base], runs[slow]).deltas}
+            assert deltas["p50Ms"].status == "regression"
+            assert deltas["p50Ms"].p_value < 0.05
+            assert deltas["throughput"].status == "unchanged"
+
+            deltas = {d.metric: d for d in compare_runs(history, runs[base], runs[noisy]).deltas}
+            assert deltas["p50Ms"].status == "noise"
+
+    def test_token_and_issue_thresholds(self, tmp_path):
+        """Test model runs flag token growth past its threshold and any new conformance issue."""
+        from benchmark_history import BenchmarkHistory, compare_runs
+
+        with BenchmarkHistory(str(tmp_path / "h.sqlite")) as history:
+            base = history.ingest(_models(tmp_path / "a.json", "2026-01-01T00:00:00", 1000))
+            cur = history.ingest(_models(tmp_path / "b.json", "2026-01-02T00:00:00", 1040, issues=2))
+            runs = {r.id: r for r in history.runs("models")}
+
+            deltas = {d.metric: d for d in compare_runs(history, runs[base], runs[cur]).deltas}
+            assert deltas["totalTokens"].status == "unchanged"     # +4% under the 5% default
+            assert deltas["conformanceIssues"].status == "regression"
+            strict = {d.metric: d for d in compare_runs(history, runs[base], runs[cur], {"tokens": 2.0}).deltas}
+            assert strict["totalTokens"].status == "regression"
+
+    def test_cli_writes_reports(self, tmp_path):
+        """Test compare writes Markdown and HTML reports and can fail on regressions."""
+        from benchmark_history import main
+
+        db = str(tmp_path / "h.sqlite")
+        _offline(tmp_path / "a.json", "20260101_120000", [10.0, 10.1, 9.9], memory=10.0)
+        _offline(tmp_path / "b.json", "20260102_120000", [10.0, 10.1, 9.9], memory=20.0)
+        assert main(["--db", db, "ingest", str(tmp_path / "a.json"), str(tmp_path / "b.json")]) == 0
+
+        assert main(["--db", db, "compare", "--report", str(tmp_path / "r.md")]) == 0
+        markdown = (tmp_path / "r.md").read_text()
+        assert "| combine | rssPeakGrowthMb | 10 | 20 | +100.0% |" in markdown
+        assert "1 regressions" in markdown
+
+        assert main(["--db", db, "compare", "--report", str(tmp_path / "r.html"), "--fail-on-regression"]) == 1
+        assert '<tr class="regression"><td>combine</td><td>rssPeakGrowthMb</td>' in (tmp_path / "r.html").read_text()
+
+    def test_permutation_p_value(self):
+        """Test the permutation test separates distinct samples and needs enough of them."""
+        from benchmark_history import permutation_p_value
+
+        assert permutation_p_value([1.0, 1.1, 0.9, 1.0], [2.0, 2.1, 1.9, 2.0]) < 0.05
+        assert permutation_p_value([1.0, 2.0, 3.0], [1.5, 2.5, 2.0]) > 0.5
+        assert permutation_p_value([1.0, 2.0], [3.0, 4.0, 5.0]) is None
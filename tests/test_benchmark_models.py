@@ -0,0 +1,68 @@
+"""
+Tests for the model benchmark's accuracy, cost and Pareto scoring.
+
+Run with: pytest tests/test_benchmark_models.py -v
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'testing')))
+pytest.importorskip("dotenv")
+
+
+def _result(model, protocol, seconds, tokens, accuracy, cost=None, success=True):
+    from benchmark_models import RunResult
+
+    return RunResult(model=model, protocol=protocol, success=success, duration_seconds=seconds,
+                     input_tokens=tokens, accuracy=accuracy, cost_usd=cost)
+
+
+class TestModelBenchmark:
+    """Tests for testing/benchmark_models.py."""
+
+    def test_golden_accuracy(self, tmp_path):
+        """Test activity and encounter names are matched fuzzily against the golden file."""
+        from benchmark_models import golden_accuracy, name_f1
+
+        assert name_f1(["vital signs", "ecg"], ["Vital signs".lower(), "ecg", "x-ray"]) == pytest.approx(0.8)
+        assert name_f1([], []) == 1.0
+
+        golden = {"study": {"versions": [{"studyDesigns": [{
+            "activities": [{"name": "Vital Signs"}, {"name": "ECG"}],
+            "encounters": [{"name": "Screening"}, {"name": "Day 1"}],
+        }]}]}}
+        soa = {"study": {"versions": [{"timeline": {
+            "activities": [{"name": "Vital signs "}, {"name": "ECG"}],
+            "encounters": [{"name": "Screening"}],
+        }}]}}
+        (tmp_path / "golden.json").write_text(json.dumps(golden))
+        (tmp_path / "soa.json").write_text(json.dumps(soa))
+        assert golden_accuracy(str(tmp_path / "soa.json"), str(tmp_path / "golden.json")) == pytest.approx((1 + 2 / 3) / 2, abs=1e-4)
+
+    def test_model_price_prefix(self):
+        """Test prices match the longest model prefix."""
+        from benchmark_models import model_price
+
+        prices = {"gpt-5": (1.0, 2.0), "gpt-5.1": (3.0, 4.0)}
+        assert model_price("gpt-5.1-mini", prices) == (3.0, 4.0)
+        assert model_price("gpt-5-nano", prices) == (1.0, 2.0)
+        assert model_price("gemini-2.5-pro", prices) is None
+
+    def test_pareto_frontier(self):
+        """Test dominated models drop off the latency/cost/accuracy frontier."""
+        from benchmark_models import pareto_frontier, summarize_models
+
+        results = [
+            _result("fast", "P1", 60, 1000, 0.6, cost=0.01),
+            _result("accurate", "P1", 300, 5000, 0.9, cost=0.05),
+            _result("dominated", "P1", 400, 6000, 0.7, cost=0.06),
+            _result("broken", "P1", 10, 10, None, success=False),
+        ]
+        summary = summarize_models(results)
+        assert summary["fast"]["latencySeconds"] == 60
+        assert summary["broken"]["successes"] == 0
+        assert pareto_frontier(summary) == ["fast", "accurate"]
@@ -0,0 +1,49 @@
+"""
+Tests for the offline stage benchmark suite.
+
+Run with: pytest tests/test_benchmark_offline.py -v
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'testing')))
+
+
+class TestOfflineBenchmark:
+    """Tests for testing/benchmark_offline.py."""
+
+    def test_percentile_interpolates(self):
+        """Test percentiles interpolate between samples."""
+        from benchmark_offline import percentile
+
+        assert percentile([5.0], 99) == 5.0
+        assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+        assert percentile([4.0, 1.0, 3.0, 2.0], 100) == 4.0
+
+    def test_suite_measures_and_skips(self, tmp_path):
+        """Test stages report percentiles and throughput; missing fixtures are skipped."""
+        from benchmark_offline import Fixtures, run_suite
+
+        usdm = tmp_path / "doc.json"
+        usdm.write_text(json.dumps({"study": {"instanceType": "Study", "id": "study_1", "versions": []}}))
+        fixtures = Fixtures.discover(str(tmp_path), pdfs=[], golden=[str(usdm)], runs=[])
+
+        stages = run_suite(fixtures, ["usdm.convert_ids", "combine"], repeats=3, warmup=0)
+        convert = stages["usdm.convert_ids"]
+        assert convert["calls"] == 3 and len(convert["samplesMs"]) == 3
+        assert convert["p50Ms"] <= convert["p99Ms"] <= convert["maxMs"]
+        assert convert["unitsPerCall"] == 1 and convert["unit"] == "entities"
+        assert "9_final_soa.json" in stages["combine"]["skipped"]
+
+    def test_comparison_marks_regressions(self):
+        """Test --compare flags stages slower than the threshold."""
+        from benchmark_offline import format_comparison
+
+        before = {"commit": "aaa", "stages": {"combine": {"p50Ms": 10.0}, "enrich": {"p50Ms": 10.0}}}
+        after = {"commit": "bbb", "stages": {"combine": {"p50Ms": 12.0}, "enrich": {"p50Ms": 10.5}}}
+        lines = format_comparison(before, after, threshold=10).splitlines()
+        assert "aaa -> bbb" in lines[0]
+        assert lines[1].split()[0] == "combine" and lines[1].endswith("slower")
+        assert not lines[2].endswith("slower")
@@ -0,0 +1,95 @@
+"""
+Tests for running header/footer stripping.
+
+Run with: pytest tests/test_boilerplate.py -v
+"""
+
+
+SECTIONS = [
+    "Title Page", "Synopsis", "Objectives", "Study Design", "Population",
+    "Inclusion Criteria", "Exclusion Criteria", "Treatments", "Assessments", "Statistics",
+]
+
+
+def _pages(count=10):
+    """Pages with a running header, a page-number footer and distinct bodies."""
+    pages = []
+    for n in range(1, count + 1):
+        section = SECTIONS[(n - 1) % len(SECTIONS)]
+        pages.append(
+            "PROTOCOL XYZ-001 CONFIDENTIAL\n"
+            "Version 2.0, 12 Jan 2024\n"
+            f"{section}\n"
+            f"Body text describing {section.lower()}.\n"
+            f"Page {n} of {count}\n"
+        )
+    return pages
+
+
+class TestBoilerplate:
+    """Tests for core.boilerplate module."""
+
+    def test_strips_header_and_footer(self):
+        """Test repeated edge lines are removed but body text is kept."""
+        from core.boilerplate import strip_boilerplate
+
+        clean, removed = strip_boilerplate(_pages())
+        assert clean[3].startswith("Study Design")
+        assert "CONFIDENTIAL" not in clean[3]
+        assert "Page 4 of 10" not in clean[3]
+        assert "Body text describing study design." in clean[3]
+        assert [line for _, line in removed[3]][:2] == ["PROTOCOL XYZ-001 CONFIDENTIAL", "Version 2.0, 12 Jan 2024"]
+
+    def test_cover_page_kept(self):
+        """Test the cover page keeps the protocol number for metadata."""
+        from core.boilerplate import strip_boilerplate
+
+        clean, removed = strip_boilerplate(_pages())
+        assert clean[0].startswith("PROTOCOL XYZ-001")
+        assert removed[0] == []
+
+    def test_position_matters(self):
+        """Test a repeated line away from the page edges is not stripped."""
+        from core.boilerplate import find_boilerplate
+
+        pages = [f"Title {n}\\nA\\nB\\nC\\nD\\nInclusion Criteria\\nE\\nF\\nG\\nH\\nEnd {n}" for n in range(10)]
+        keys = find_boilerplate(pages)
+        assert not any(key == "inclusion criteria" for _, key in keys)
+
+    def test_restore_is_exact(self):
+        """Test the removed lines restore the original text."""
+        from core.boilerplate import restore_page, strip_boilerplate
+
+        pages = _pages()
+        clean, removed = strip_boilerplate(pages)
+        assert all(restore_page(c, r) == p for c, r, p in zip(clean, removed, pages))
+        assert clean[5].split("\n")[0] == "Inclusion Criteria"
+
+    def test_short_documents_untouched(self):
+        """Test documents below MIN_PAGES are left alone."""
+        from core.boilerplate import strip_boilerplate
+
+        pages = _pages(3)
+        assert strip_boilerplate(pages)[0] == pages
+
+    def test_page_store_strips_and_restores(self, tmp_path, monkeypatch):
+        """Test page store text is stripped and raw_page() restores it."""
+        import fitz
+        from core import page_cache, page_store
+
+        monkeypatch.setattr(page_cache, "CACHE_DIR", tmp_path / "cache")
+        page_store.clear_page_stores()
+        path = tmp_path / "protocol.pdf"
+        doc = fitz.open()
+        for text in _pages(6):
+            doc.new_page().insert_text((72, 72), text, fontsize=10)
+        doc.save(str(path))
+        doc.close()
+
+        store = page_store.get_page_store(str(path))
+        assert "CONFIDENTIAL" not in store.get_page(2)
+        assert "CONFIDENTIAL" in store.raw_page(2)
+
+        page_store.clear_page_stores()
+        assert page_store.get_page_store(str(path)).raw_page(2) == store.raw_page(2)
+        page_store.clear_page_stores()
@@ -0,0 +1,143 @@
+"""
+Tests for the run manifest used for incremental re-runs.
+
+Run with: pytest tests/test_checkpoint.py -v
+"""
+
+import pytest
+
+
+class _Counter:
+    """Step function that counts its calls and writes an artifact."""
+
+    def __init__(self, output_dir, artifact="out.json", result=None):
+        self.calls = 0
+        self.path = output_dir / artifact
+        self.result = result if result is not None else {"success": True, "value": 1}
+
+    def __call__(self):
+        self.calls += 1
+        self.path.write_text("{}")
+        return self.result
+
+
+class TestRunManifest:
+    """Tests for core.checkpoint.RunManifest."""
+
+    def test_fresh_step_is_reused(self, tmp_path):
+        """Test an unchanged step is skipped and its result reloaded."""
+        from core.checkpoint import RunManifest
+
+        step = _Counter(tmp_path)
+        first = RunManifest(str(tmp_path)).run("eligibility", step, inputs={"pdf": "abc"}, artifacts=["out.json"])
+
+        manifest = RunManifest(str(tmp_path))
+        second = manifest.run("eligibility", step, inputs={"pdf": "abc"}, artifacts=["out.json"])
+        assert step.calls == 1
+        assert second == first
+        assert manifest.skipped == ["eligibility"]
+        assert (tmp_path / "run_manifest.json").exists()
+
+    def test_changed_inputs_rerun(self, tmp_path):
+        """Test a different input hash invalidates the step."""
+        from core.checkpoint import RunManifest
+
+        step = _Counter(tmp_path)
+        RunManifest(str(tmp_path)).run("eligibility", step, inputs={"model": "a"})
+        RunManifest(str(tmp_path)).run("eligibility", step, inputs={"model": "b"})
+        assert step.calls == 2
+
+    def test_missing_artifact_reruns(self, tmp_path):
+        """Test a deleted output file invalidates the step."""
+        from core.checkpoint import RunManifest
+
+        step = _Counter(tmp_path)
+        RunManifest(str(tmp_path)).run("metadata", step, artifacts=["out.json"])
+        step.path.unlink()
+        RunManifest(str(tmp_path)).run("metadata", step, artifacts=["out.json"])
+        assert step.calls == 2
+
+    def test_failed_results_not_recorded(self, tmp_path):
+        """Test failed steps always run again."""
+        from core.checkpoint import RunManifest
+
+        step = _Counter(tmp_path, result={"success": False})
+        RunManifest(str(tmp_path)).run("sap", step)
+        manifest = RunManifest(str(tmp_path))
+        manifest.run("sap", step)
+        assert step.calls == 2
+        assert "sap" not in manifest.steps
+
+    def test_force_covers_downstream(self, tmp_path):
+        """Test forcing a step re-runs it and everything downstream."""
+        from core.checkpoint import RunManifest
+
+        manifest = RunManifest(str(tmp_path))
+        forced = manifest.force(["validate"])
+        assert forced == {"validate", "enrich", "conformance"}
+        assert "combine" in manifest.force(["eligibility"])
+        with pytest.raises(ValueError):
+            manifest.force(["nonexistent"])
+
+    def test_upstream_change_reruns(self, tmp_path):
+        """Test a new upstream output invalidates the consuming step."""
+        from core.checkpoint import RunManifest
+
+        combine = _Counter(tmp_path, "combined.json", {"value": 1})
+        validate = _Counter(tmp_path, "validated.json")
+        manifest = RunManifest(str(tmp_path))
+        manifest.run("combine", combine)
+        manifest.run("validate", validate, upstream=["combine"])
+
+        combine.result = {"value": 2}
+        manifest = RunManifest(str(tmp_path))
+        manifest.force(["combine"])
+        manifest.run("combine", combine)
+        manifest.run("validate", validate, upstream=["combine"])
+        assert validate.calls == 2
+
+    def test_disabled_manifest_always_runs(self, tmp_path):
+        """Test --no-checkpoints runs every step and writes nothing."""
+        from core.checkpoint import RunManifest, run_step
+
+        step = _Counter(tmp_path)
+        for _ in range(2):
+            run_step(RunManifest(str(tmp_path), enabled=False), "metadata", step)
+        run_step(None, "metadata", step)
+        assert step.calls == 3
+        assert not (tmp_path / "run_manifest.json").exists()
+
+
+class TestCodeFingerprint:
+    """Tests for core.checkpoint.code_fingerprint."""
+
+    def test_steps_cover_shared_modules(self):
+        """Test step code includes the core modules, prompts and data files the step imports."""
+        from core.checkpoint import PROJECT_ROOT, step_sources
+
+        def sources(step):
+            return {p.relative_to(PROJECT_ROOT).as_posix() for p in step_sources(step)}
+
+        eligibility = sources("eligibility")
+        assert {"core/llm_client.py", "core/json_utils.py", "core/usdm_types_generated.py",
+                "extraction/eligibility/prompts.py", "core/schema_cache/dataStructure.yml"} <= eligibility
+        assert "extraction/soa_finder.py" not in eligibility
+        assert "extraction/models/soa_page_classifier.json" in sources("soa")
+        assert {"core/usdm_types.py", "extraction/interventions/extractor.py"} <= sources("combine")
+
+    def test_imported_module_change_invalidates(self, tmp_path, monkeypatch):
+        """Test editing a module the step only imports (relative and function-level) changes its fingerprint."""
+        from core import checkpoint
+
+        package = tmp_path / "pkg"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        (package / "step.py").write_text("from .helper import run\n")
+        (package / "helper.py").write_text("def run():\n    import shared\n")
+        (tmp_path / "shared.py").write_text("PROMPT = 'v1'\n")
+        monkeypatch.setattr(checkpoint, "PROJECT_ROOT", tmp_path)
+        monkeypatch.setitem(checkpoint.STEP_CODE, "metadata", ["pkg/step.py"])
+
+        before = checkpoint.code_fingerprint("metadata")
+        (tmp_path / "shared.py").write_text("PROMPT = 'version 2'\n")
+        assert checkpoint.code_fingerprint("metadata") != before
@@ -0,0 +1,124 @@
+"""
+Tests for the token-budgeted context packer.
+
+Run with: pytest tests/test_context_packer.py -v
+"""
+
+import pytest
+
+
+def _page(n, body):
+    """Page text with a running header and a page-number footer."""
+    return f"Protocol XYZ-001 Confidential\nVersion 2.0 12 Jan 2024\n{body}\nPage {n} of 40\n"
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    from core import context_packer
+
+    context_packer.reset_packing_stats()
+    yield
+    context_packer.reset_packing_stats()
+
+
+class TestTokenEstimate:
+    """Tests for core.context_packer.estimate_tokens."""
+
+    def test_provider_families(self):
+        """Test model names map to tokenizer families."""
+        from core.context_packer import provider_family
+
+        assert provider_family("gpt-5.1") == "openai"
+        assert provider_family("gemini-2.5-pro") == "google"
+        assert provider_family("claude-sonnet-4") == "anthropic"
+        assert provider_family(None) == "unknown"
+
+    def test_estimate_is_plausible(self):
+        """Test the estimate tracks ~4 characters per token on prose."""
+        from core.context_packer import estimate_tokens
+
+        text = "Participants must provide written informed consent before screening. " * 20
+        tokens = estimate_tokens(text, "gemini-2.5-pro")
+        assert len(text) / 6 < tokens < len(text) / 2.5
+        assert estimate_tokens("", "gemini-2.5-pro") == 0
+
+    def test_truncate_to_tokens(self):
+        """Test truncation fits the budget and cuts on a line boundary."""
+        from core.context_packer import estimate_tokens, truncate_to_tokens
+
+        text = "\n".join(f"Line {i} of the inclusion criteria section" for i in range(200))
+        cut = truncate_to_tokens(text, 100)
+        assert estimate_tokens(cut) <= 100
+        assert text.startswith(cut) and text[len(cut)] == "\n"
+
+
+class TestPacking:
+    """Tests for core.context_packer.pack_pages."""
+
+    def test_strips_page_labels(self):
+        """Test page labels are removed and pages get headers."""
+        from core.context_packer import pack_pages
+
+        bodies = ["Inclusion criteria", "Exclusion criteria", "Lifestyle restrictions"]
+        items = [(i, f"{body}\nPage {i + 1} of 40\n") for i, body in enumerate(bodies)]
+        packed = pack_pages(items, token_budget=10000)
+
+        assert "Page 2 of 40" not in packed.text
+        assert "Lifestyle restrictions" in packed.text
+        assert packed.text.startswith("--- Page 1 ---")
+        assert packed.tokens_saved > 0
+
+    def test_keeps_numeric_table_cells(self):
+        """Test bare numbers inside a page are not mistaken for page numbers."""
+        from core.context_packer import clean_text
+
+        text = "Visit\n1\n2\n3\nDay\n7"
+        assert clean_text(text) == "Visit\n1\n2\n3\nDay"
+
+    def test_budget_respected_in_priority_order(self):
+        """Test lower-priority pages are truncated or dropped, output in page order."""
+        from core.context_packer import pack_pages
+
+        body = "Eligibility requirement text for this study population. " * 25
+        packed = pack_pages([(9, body), (2, body), (5, body), (7, body)], token_budget=1100)
+
+        assert packed.tokens <= 1100
+        assert packed.pages == [2, 5, 9]
+        assert packed.text.index("--- Page 3 ---") < packed.text.index("--- Page 10 ---")
+        assert packed.truncated_pages == [5]
+        assert packed.dropped_pages == [7]
+
+    def test_no_phase_budget_keeps_every_page(self):
+        """Test phase_budget=False packs every item however long (detector pages)."""
+        from core.context_packer import pack_pages
+
+        body = "Investigational product dose and administration. " * 200
+        packed = pack_pages([(p, body) for p in range(6)], phase="interventions", phase_budget=False)
+        assert packed.pages == list(range(6))
+        assert packed.dropped_pages == packed.truncated_pages == []
+
+    def test_per_item_budget_shares(self):
+        """Test every item gets a share under per_item_budget."""
+        from core.context_packer import pack_pages
+
+        body = "Schedule of activities visit window procedure. " * 100
+        packed = pack_pages([(p, body) for p in range(5)], token_budget=2000,
+                            per_item_budget=400, header_template="PAGE {index}:")
+        assert packed.pages == [0, 1, 2, 3, 4]
+        assert "PAGE 4:" in packed.text
+
+    def test_phase_stats_report(self, tmp_path):
+        """Test tokens saved are accumulated per phase and written out."""
+        import json
+        from core.context_packer import get_packing_stats, pack_pages, save_packing_report
+
+        items = [(i, _page(i + 1, "Objective and endpoint text")) for i in range(3)]
+        pack_pages(items, phase="objectives")
+        pack_pages(items, phase="objectives")
+
+        stats = get_packing_stats()["objectives"]
+        assert stats["calls"] == 2
+        assert stats["tokens_saved"] == stats["raw_tokens"] - stats["packed_tokens"] > 0
+
+        report = json.loads(save_packing_report(str(tmp_path)).read_text())
+        assert report["total_tokens_saved"] == stats["tokens_saved"]
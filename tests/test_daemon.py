@@ -0,0 +1,188 @@
+"""
+Tests for the extraction daemon (scheduler, spool directory and HTTP API).
+
+Run with: pytest tests/test_daemon.py -v
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "protocol.pdf"
+    path.write_bytes(b"%PDF-1.4 not really a pdf")
+    (tmp_path / "protocol_SAP.pdf").write_bytes(b"%PDF-1.4")
+    return path
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    """Scheduler without worker processes; jobs stay queued."""
+    from daemon import Scheduler
+
+    return Scheduler(workers=1, output_root=str(tmp_path / "out"))
+
+
+def _slot_holding_worker(conn, worker_id, llm_slots, held, cancel):
+    """Stand-in worker: takes a job, holds an LLM slot and never finishes (ignores cancel)."""
+    import time
+    from daemon import _TrackedSlots
+
+    slots = _TrackedSlots(llm_slots, held)
+    conn.send(("ready", {}))
+    conn.recv()
+    slots.acquire()
+    time.sleep(600)
+
+
+def _request(url, method="GET", body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestScheduler:
+    """Tests for daemon.Scheduler queueing."""
+
+    def test_submit_pairs_and_records(self, scheduler, pdf):
+        """Test jobs are paired with the SAP and recorded in job.json."""
+        job = scheduler.submit(str(pdf))
+        assert job.status == "queued"
+        assert job.sap_path.endswith("protocol_SAP.pdf")
+        with open(f"{job.output_dir}/job.json", encoding="utf-8") as f:
+            assert json.load(f)["id"] == job.id
+
+    def test_submit_rejects_missing_files(self, scheduler, pdf):
+        """Test missing PDFs and malformed args raise ValueError."""
+        with pytest.raises(ValueError):
+            scheduler.submit(str(pdf.parent / "missing.pdf"))
+        with pytest.raises(ValueError):
+            scheduler.submit(str(pdf), args="--full-protocol")
+
+    def test_submit_rejects_reserved_args(self, scheduler, pdf):
+        """Test args can't override the job's output dir, model or companions (same error as main.py)."""
+        for args in (["--output-dir", "/tmp/elsewhere"], ["--model=gpt-4o"], ["--full-protocol", "-p", "3"]):
+            with pytest.raises(ValueError, match="can't be passed through"):
+                scheduler.submit(str(pdf), args=args)
+        assert scheduler.health()["queued"] == 0
+        assert scheduler.submit(str(pdf), args=["--full-protocol"]).args == ["--full-protocol"]
+
+    def test_cancel_queued_job(self, scheduler, pdf):
+        """Test a queued job can be cancelled and leaves the queue."""
+        first = scheduler.submit(str(pdf))
+        second = scheduler.submit(str(pdf))
+        assert first.output_dir != second.output_dir
+
+        assert scheduler.cancel(first.id).status == "cancelled"
+        assert scheduler.health()["queued"] == 1
+        with pytest.raises(KeyError):
+            scheduler.cancel("unknown")
+
+    def test_worker_runs_job(self, tmp_path, pdf):
+        """Test a warm worker runs a job to completion (a broken PDF fails fast)."""
+        from daemon import Scheduler
+
+        scheduler = Scheduler(workers=1, output_root=str(tmp_path / "out")).start()
+        try:
+            job = scheduler.wait(scheduler.submit(str(pdf), args=["--no-checkpoints"]).id, timeout=120)
+            assert job.status == "failed"
+            assert job.exit_code == 1
+            assert scheduler.health()["workers"][0]["jobsRun"] == 1
+        finally:
+            scheduler.shutdown()
+
+
+    def test_killed_worker_gives_back_llm_slots(self, tmp_path, pdf, monkeypatch):
+        """Test cancelling a job whose worker holds an LLM slot leaves the slot to the next job."""
+        import time
+        import daemon
+
+        monkeypatch.setattr(daemon, "_worker_main", _slot_holding_worker)
+        monkeypatch.setattr(daemon, "CANCEL_GRACE_SECONDS", 0.5)
+        scheduler = daemon.Scheduler(workers=1, llm_concurrency=1, output_root=str(tmp_path / "out")).start()
+
+        def slots_held_by(worker_id):
+            deadline = time.time() + 60
+            while time.time() < deadline:
+                worker = scheduler._workers[0]
+                if worker.id == worker_id and worker.held.value:
+                    return worker.held.value
+                time.sleep(0.1)
+            return 0
+
+        try:
+            first = scheduler.submit(str(pdf))
+            assert slots_held_by(0) == 1
+            assert scheduler.cancel(first.id).status == "cancelled"
+            second = scheduler.submit(str(pdf))
+            assert slots_held_by(1) == 1        # the replacement worker got the only slot
+            assert scheduler.get(second.id).status == "running"
+        finally:
+            scheduler.shutdown()
+
+    def test_cancel_stops_run_between_steps(self):
+        """Test run_step refuses to start a step once the cancel event is set."""
+        import threading
+        from core.checkpoint import RunCancelled, run_step, set_cancel_event
+
+        cancel = threading.Event()
+        set_cancel_event(cancel)
+        try:
+            assert run_step(None, "metadata", lambda: 1) == 1
+            cancel.set()
+            with pytest.raises(RunCancelled):
+                run_step(None, "eligibility", lambda: 1)
+        finally:
+            set_cancel_event(None)
+
+
+class TestSpoolAndAPI:
+    """Tests for the spool directory and HTTP job API."""
+
+    def test_spool_requests(self, scheduler, pdf, tmp_path):
+        """Test spool requests are accepted or rejected and get status files."""
+        from daemon import SpoolWatcher
+
+        spool = SpoolWatcher(scheduler, str(tmp_path / "spool"))
+        (spool.dirs["incoming"] / "good.json").write_text(json.dumps({"pdf": str(pdf)}))
+        (spool.dirs["incoming"] / "bad.json").write_text(json.dumps({"pdf": "missing.pdf"}))
+
+        jobs = spool.scan()
+        assert len(jobs) == 1 and jobs[0].source == "spool"
+        assert (spool.dirs["accepted"] / f"{jobs[0].id}.json").exists()
+        assert (spool.dirs["status"] / f"{jobs[0].id}.json").exists()
+        assert (spool.dirs["rejected"] / "bad.json.error").exists()
+        assert not list(spool.dirs["incoming"].iterdir())
+
+    def test_http_api(self, scheduler, pdf):
+        """Test submit, status, result and cancel over HTTP."""
+        from daemon import make_server
+
+        server = make_server(scheduler, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            status, job = _request(f"{base}/jobs", "POST", {"pdf": str(pdf), "args": ["--soa"]})
+            assert status == 202 and job["status"] == "queued"
+
+            assert _request(f"{base}/jobs/{job['id']}")[1]["args"] == ["--soa"]
+            assert _request(f"{base}/jobs/{job['id']}/result")[0] == 409
+            assert _request(f"{base}/jobs", "POST", {"pdf": "missing.pdf"})[0] == 400
+            assert _request(f"{base}/jobs/nope")[0] == 404
+
+            status, cancelled = _request(f"{base}/jobs/{job['id']}", "DELETE")
+            assert status == 200 and cancelled["status"] == "cancelled"
+            assert _request(f"{base}/health")[1]["jobs"] == {"cancelled": 1}
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,109 @@
+"""
+Tests for random and deterministic (UUIDv5) id generation.
+
+Run with: pytest tests/test_ids.py -v
+"""
+
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def deterministic():
+    from core.ids import disable_deterministic_ids, enable_deterministic_ids
+
+    enable_deterministic_ids("pdf-hash-1")
+    yield enable_deterministic_ids
+    disable_deterministic_ids()
+
+
+def _soa():
+    return {
+        "study": {"id": "study_1", "versions": [{"id": "sv_1", "studyDesigns": [{
+            "id": "sd_1",
+            "activities": [{"id": "act_1", "name": "ECG"}, {"id": "act_2", "name": "Labs"}],
+            "encounters": [{"id": "enc_1", "name": "Screening", "epochId": "epoch_1"}],
+            "epochs": [{"id": "epoch_1", "name": "Treatment"}],
+            "scheduleTimelines": [{"id": "tl_1", "instances": [
+                {"id": "sai_1", "activityIds": ["act_1", "act_2"], "encounterId": "enc_1"},
+            ]}],
+        }]}]},
+    }
+
+
+class TestIds:
+    """Tests for core.ids and the id generation built on it."""
+
+    def test_random_by_default(self):
+        """Test ids stay random uuid4 values when deterministic mode is off."""
+        from core.ids import deterministic_ids_enabled, id_inputs, new_uuid, uuid_for_simple_id
+
+        assert not deterministic_ids_enabled()
+        assert id_inputs() == {}
+        assert uuid_for_simple_id("act_1") != uuid_for_simple_id("act_1")
+        assert uuid.UUID(new_uuid("Code", {"code": "C1"})).version == 4
+
+    def test_simple_ids_are_stable_per_protocol(self, deterministic):
+        """Test convert_ids_to_uuids gives the same id_mapping on every run, and a different one per protocol."""
+        from main_v2 import convert_ids_to_uuids
+
+        first, first_map = convert_ids_to_uuids(_soa())
+        second, second_map = convert_ids_to_uuids(_soa())
+        assert first == second and first_map == second_map
+        assert uuid.UUID(first_map["act_1"]).version == 5
+        instance = first["study"]["versions"][0]["studyDesigns"][0]["scheduleTimelines"][0]["instances"][0]
+        assert instance["activityIds"] == [first_map["act_1"], first_map["act_2"]]
+
+        deterministic("pdf-hash-2")
+        _, other_map = convert_ids_to_uuids(_soa())
+        assert set(other_map) == set(first_map) and other_map["act_1"] != first_map["act_1"]
+
+    def test_minted_ids_use_content_and_occurrence(self, deterministic):
+        """Test ids minted for id-less entities repeat across runs, and equal content still gets distinct ids."""
+        from core.usdm_types_generated import Code
+
+        def mint():
+            return [Code(code="C25426", decode="Visit").to_dict()["id"],
+                    Code(code="C25426", decode="Visit").to_dict()["id"],
+                    Code(code="C99158", decode="Day").to_dict()["id"]]
+
+        ids = mint()
+        assert len(set(ids)) == 3
+        deterministic("pdf-hash-1")      # a new run of the same protocol
+        assert mint() == ids
+
+    def test_postprocessed_document_is_byte_identical(self, deterministic):
+        """Test normalization + UUID conversion of the same extraction serializes to identical bytes."""
+        from core.serialization import dumps_bytes
+        from core.usdm_types_generated import normalize_usdm_data
+        from main_v2 import convert_ids_to_uuids
+
+        def run():
+            deterministic("pdf-hash-1")
+            converted, id_map = convert_ids_to_uuids(normalize_usdm_data(_soa()))
+            return dumps_bytes(converted), dumps_bytes(id_map)
+
+        assert run() == run()
+
+    def test_reused_step_does_not_collide_with_rerun_step(self, deterministic, tmp_path):
+        """Test a step re-run next to one reused from its checkpoint mints the ids it minted the first time."""
+        from core.checkpoint import RunManifest, run_step
+        from core.usdm_types_generated import Code
+
+        def step():
+            codes = [Code(code="C25426", decode="Visit"), Code(code="C25426", decode="Visit")]
+            return {"success": True, "ids": [c.to_dict()["id"] for c in codes]}
+
+        def run(model):
+            deterministic("pdf-hash-1")
+            manifest = RunManifest(str(tmp_path))
+            metadata = run_step(manifest, "metadata", step, inputs={"model": "a"})
+            eligibility = run_step(manifest, "eligibility", step, inputs={"model": model})
+            return manifest, metadata["ids"] + eligibility["ids"]
+
+        _, first = run("a")
+        manifest, second = run("b")
+        assert manifest.skipped == ["metadata"] and manifest.executed == ["eligibility"]
+        assert len(set(second)) == 4
+        assert second == first
@@ -291,3 +291,117 @@ class TestLLMResponse:
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
+
+
+class _CountingProvider(OpenAIProvider):
+    """OpenAI provider whose API call is replaced by a counter."""
+    calls = 0
+
+    def __init__(self, model, api_key=None):
+        self.model = model
+        self.api_key = api_key or "test-key"
+
+    def generate(self, messages, config=None):
+        type(self).calls += 1
+        return LLMResponse(content=f"answer {self.calls}", model=self.model,
+                           usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15})
+
+
+class TestReplayCache:
+    """Test suite for recording and replaying LLM responses."""
+
+    @pytest.fixture(autouse=True)
+    def counting_provider(self, monkeypatch):
+        from llm_providers import set_replay_cache
+
+        _CountingProvider.calls = 0
+        monkeypatch.setitem(LLMProviderFactory._providers, 'openai', _CountingProvider)
+        yield
+        set_replay_cache(None)
+
+    def test_generate_is_replayed(self, tmp_path):
+        """Test a second identical request is served from the cache with its usage."""
+        from core.profiling import get_spans, reset_timing
+        from llm_providers import ReplayCache, set_replay_cache
+
+        set_replay_cache(ReplayCache(str(tmp_path)))
+        messages = [{"role": "user", "content": "hello"}]
+        first = LLMProviderFactory.create('openai', 'gpt-4o').generate(messages)
+        reset_timing()
+        second = LLMProviderFactory.create('openai', 'gpt-4o').generate(messages)
+        other = LLMProviderFactory.create('openai', 'gpt-4o').generate(messages, LLMConfig(temperature=0.5))
+
+        assert first.content == second.content == "answer 1"
+        assert other.content == "answer 2"
+        assert _CountingProvider.calls == 2
+        hit = get_spans()[0]
+        assert hit.attrs["cache.hit"] is True
+        assert hit.attrs["gen_ai.usage.input_tokens"] == 10
+
+    def test_replay_mode_needs_recording(self, tmp_path):
+        """Test replay-only mode raises on a miss and record mode always calls."""
+        from llm_providers import ReplayCache, ReplayMiss, set_replay_cache
+
+        messages = [{"role": "user", "content": "hello"}]
+        set_replay_cache(ReplayCache(str(tmp_path), mode="replay"))
+        with pytest.raises(ReplayMiss):
+            LLMProviderFactory.create('openai', 'gpt-4o').generate(messages)
+
+        set_replay_cache(ReplayCache(str(tmp_path), mode="record"))
+        for _ in range(2):
+            LLMProviderFactory.create('openai', 'gpt-4o').generate(messages)
+        assert _CountingProvider.calls == 2
+
+        set_replay_cache(ReplayCache(str(tmp_path), mode="replay"))
+        assert LLMProviderFactory.create('openai', 'gpt-4o').generate(messages).content == "answer 2"
+
+    def test_replayed_call_skips_errors(self, tmp_path):
+        """Test replayed() records results but not error results."""
+        from llm_providers import ReplayCache, replayed, set_replay_cache
+
+        set_replay_cache(ReplayCache(str(tmp_path)))
+        calls = []
+
+        def call():
+            calls.append(1)
+            return {"error": "quota"} if len(calls) == 1 else {"response": "ok"}
+
+        assert replayed(("vision", "m", "p"), call) == {"error": "quota"}
+        assert replayed(("vision", "m", "p"), call) == {"response": "ok"}
+        assert replayed(("vision", "m", "p"), call) == {"response": "ok"}
+        assert len(calls) == 2
+
+
+class TestProviderLimits:
+    """Test suite for per-provider request limits."""
+
+    def test_provider_limit_is_separate(self):
+        """Test a provider's cap holds its own requests without blocking other providers."""
+        import threading
+        import time
+        from llm_providers import request_slot, set_request_limit
+
+        active = {"openai": 0, "gemini": 0}
+        peak = {"openai": 0, "gemini": 0}
+        lock = threading.Lock()
+
+        def request(provider):
+            with request_slot(**{"gen_ai.system": provider}):
+                with lock:
+                    active[provider] += 1
+                    peak[provider] = max(peak[provider], active[provider])
+                time.sleep(0.02)
+                with lock:
+                    active[provider] -= 1
+
+        set_request_limit(1, provider="openai")
+        try:
+            threads = [threading.Thread(target=request, args=(p,)) for p in ["openai"] * 4 + ["gemini"] * 4]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            set_request_limit(None, provider="openai")
+        assert peak["openai"] == 1
+        assert peak["gemini"] > 1
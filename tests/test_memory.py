@@ -0,0 +1,110 @@
+"""
+Tests for the per-step memory tracking and the batch memory budget.
+
+Run with: pytest tests/test_memory.py -v
+"""
+
+import json
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_memory():
+    from core.memory import disable_tracemalloc, reset_memory
+
+    reset_memory()
+    yield
+    disable_tracemalloc()
+
+
+class TestTrackMemory:
+    """Tests for core.memory."""
+
+    def test_parse_size(self):
+        """Test sizes with units, bare megabytes and rejects."""
+        from core.memory import MB, parse_size
+
+        assert parse_size("12G") == 12 * 1024 * MB
+        assert parse_size("1500M") == 1500 * MB
+        assert parse_size("512MB") == 512 * MB
+        assert parse_size("256") == 256 * MB
+        assert parse_size("1.5g") == int(1.5 * 1024 * MB)
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+    def test_window_records_rss_and_allocation_sites(self):
+        """Test a tracked block reports RSS, the Python peak and where memory is held."""
+        from core.memory import MB, enable_tracemalloc, track_memory
+
+        enable_tracemalloc()
+        with track_memory("combine") as window:
+            held = [bytearray(1024) for _ in range(4096)]
+
+        data = window.to_dict()
+        assert data["rssPeakMb"] >= data["rssStartMb"] > 0
+        assert window.python_peak >= 4 * MB
+        assert data["topAllocations"][0]["site"].startswith("tests")
+        assert data["topAllocations"][0]["sizeMb"] >= 4
+        assert window.span_attributes()["memory.python_peak_mb"] >= 4
+        del held
+
+    def test_run_step_records_memory(self, tmp_path):
+        """Test checkpointed steps store their memory window in the run manifest."""
+        from core.checkpoint import MANIFEST_NAME, RunManifest, run_step
+        from core.memory import run_memory
+
+        manifest = RunManifest(str(tmp_path))
+        run_step(manifest, "eligibility", lambda: 2, inputs={"pdf": "x"})
+        manifest.record_run_memory(run_memory())
+
+        saved = json.loads((tmp_path / MANIFEST_NAME).read_text())
+        assert saved["steps"]["eligibility"]["memory"]["rssPeakMb"] > 0
+        assert saved["memory"]["rssPeakMb"] > 0
+
+
+class TestMemoryBudget:
+    """Tests for main.MemoryBudget admission."""
+
+    def _job(self, tmp_path, name, peak_mb=None):
+        from core.checkpoint import MANIFEST_NAME
+        from main import BatchJob
+
+        out = tmp_path / name
+        out.mkdir()
+        if peak_mb:
+            (out / MANIFEST_NAME).write_text(json.dumps({"memory": {"rssPeakMb": peak_mb}}))
+        return BatchJob(pdf_path=f"/in/{name}.pdf", output_dir=str(out))
+
+    def test_estimates_from_previous_runs(self, tmp_path):
+        """Test a prior run's peak is used, else the largest peak seen in the batch."""
+        from core.memory import MB
+        from main import MemoryBudget
+
+        budget = MemoryBudget(limit=4000 * MB, default_job=1000 * MB)
+        known = self._job(tmp_path, "known", peak_mb=600)
+        fresh = self._job(tmp_path, "fresh")
+        assert budget.estimate(known) == 600 * MB
+        assert budget.estimate(fresh) == 1000 * MB
+
+        budget.finish(known, {"peakRssMb": 1800})
+        assert budget.estimate(fresh) == 1800 * MB
+
+    def test_fits_throttles_and_oversized_runs_alone(self, tmp_path):
+        """Test jobs are held while the budget is committed; an oversized job runs alone."""
+        from core.memory import MB
+        from main import MemoryBudget
+
+        budget = MemoryBudget(limit=2500 * MB, default_job=1000 * MB)
+        a, b, c = (self._job(tmp_path, n) for n in "abc")
+        big = self._job(tmp_path, "big", peak_mb=5000)
+
+        budget.start(a)
+        assert budget.fits(b)
+        budget.start(b)
+        assert not budget.fits(c)
+        budget.finish(a, {"peakRssMb": 900})
+        assert budget.fits(c)
+
+        budget.finish(b, {})
+        assert not budget.running and budget.fits(big)
@@ -0,0 +1,139 @@
+"""
+Tests for the page-finding cache.
+
+Run with: pytest tests/test_page_cache.py -v
+"""
+
+import pytest
+
+
+@pytest.fixture
+def page_cache(tmp_path, monkeypatch):
+    """Point the page cache singleton at a temporary directory."""
+    from core import page_cache as module
+
+    cache = module.PageCache(tmp_path / "page_cache")
+    monkeypatch.setattr(module, "_cache", cache)
+    monkeypatch.setattr(module, "_enabled", True)
+    return cache
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "protocol.pdf"
+    path.write_bytes(b"%PDF-1.4 fake protocol")
+    return path
+
+
+class TestFileHash:
+    """Tests for core.pdf_utils.get_file_hash."""
+
+    def test_hash_is_stable(self, pdf_file):
+        """Test the same content hashes the same."""
+        from core.pdf_utils import get_file_hash
+
+        assert get_file_hash(str(pdf_file)) == get_file_hash(str(pdf_file))
+        assert len(get_file_hash(str(pdf_file))) == 64
+
+    def test_hash_follows_content(self, tmp_path, pdf_file):
+        """Test a copy hashes the same and different content does not."""
+        from core.pdf_utils import get_file_hash
+
+        copy = tmp_path / "copy.pdf"
+        copy.write_bytes(pdf_file.read_bytes())
+        other = tmp_path / "other.pdf"
+        other.write_bytes(b"%PDF-1.4 another protocol")
+
+        assert get_file_hash(str(copy)) == get_file_hash(str(pdf_file))
+        assert get_file_hash(str(other)) != get_file_hash(str(pdf_file))
+
+
+class TestMemoizePageFinder:
+    """Tests for core.page_cache.memoize_page_finder."""
+
+    def _finder(self, calls, result=(3, 4), **decorator_kwargs):
+        from core.page_cache import memoize_page_finder
+
+        @memoize_page_finder("test", **decorator_kwargs)
+        def find_test_pages(pdf_path, model_name=None, max_pages_to_scan=50):
+            calls.append((model_name, max_pages_to_scan))
+            return list(result)
+
+        return find_test_pages
+
+    def test_second_call_uses_cache(self, page_cache, pdf_file):
+        """Test repeated detection on the same PDF is served from disk."""
+        calls = []
+        finder = self._finder(calls)
+
+        assert finder(str(pdf_file)) == [3, 4]
+        assert finder(str(pdf_file)) == [3, 4]
+        assert len(calls) == 1
+        assert list(page_cache.cache_dir.glob("*.json"))
+
+    def test_arguments_are_part_of_key(self, page_cache, pdf_file):
+        """Test model and scan arguments get separate entries."""
+        calls = []
+        finder = self._finder(calls)
+
+        finder(str(pdf_file), model_name="gemini-2.5-pro")
+        finder(str(pdf_file), model_name="gpt-4o")
+        finder(str(pdf_file), model_name="gpt-4o", max_pages_to_scan=10)
+        finder(str(pdf_file), "gpt-4o")
+        assert len(calls) == 3
+
+    def test_version_invalidates(self, page_cache, pdf_file):
+        """Test bumping the detector version recomputes."""
+        calls = []
+        self._finder(calls, version=1)(str(pdf_file))
+        self._finder(calls, version=2)(str(pdf_file))
+        assert len(calls) == 2
+
+    def test_disabled_bypasses_cache(self, page_cache, pdf_file, monkeypatch):
+        """Test disabling the cache always recomputes."""
+        from core import page_cache as module
+
+        monkeypatch.setattr(module, "_enabled", False)
+        calls = []
+        finder = self._finder(calls)
+        finder(str(pdf_file))
+        finder(str(pdf_file))
+        assert len(calls) == 2
+
+    def test_empty_results_not_cached(self, page_cache, pdf_file):
+        """Test failed detection is retried on the next run."""
+        calls = []
+        finder = self._finder(calls, result=())
+        finder(str(pdf_file))
+        finder(str(pdf_file))
+        assert len(calls) == 2
+
+    def test_degraded_results_not_cached(self, page_cache, pdf_file):
+        """Test results flagged uncacheable are not persisted."""
+        from core.page_cache import memoize_page_finder, mark_result_uncacheable
+
+        calls = []
+
+        @memoize_page_finder("fallback")
+        def find_fallback_pages(pdf_path):
+            calls.append(pdf_path)
+            mark_result_uncacheable()
+            return [1]
+
+        find_fallback_pages(str(pdf_file))
+        find_fallback_pages(str(pdf_file))
+        assert len(calls) == 2
+
+    def test_default_dir_is_outside_the_package(self, tmp_path, monkeypatch):
+        """Test the default cache lives in the user cache directory, not the source tree."""
+        from pathlib import Path
+
+        from core import page_cache as module
+
+        monkeypatch.setattr(module.os, "name", "posix")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert module._default_cache_dir() == tmp_path / "protocol2usdm" / "page_cache"
+
+        monkeypatch.delenv("XDG_CACHE_HOME")
+        package_root = Path(module.__file__).resolve().parent.parent
+        assert package_root not in module._default_cache_dir().resolve().parents
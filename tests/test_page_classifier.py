@@ -0,0 +1,192 @@
+"""
+Tests for the local SoA page classifier.
+
+Run with: pytest tests/test_page_classifier.py -v
+"""
+
+import pytest
+
+
+def _make_pdf(path, soa_pages, total_pages=6):
+    """Build a small PDF with prose pages and landscape X-grid pages."""
+    import fitz
+
+    doc = fitz.open()
+    for i in range(total_pages):
+        if i in soa_pages:
+            page = doc.new_page(width=792, height=612)
+            page.insert_text((72, 60), "Table 1: Schedule of Activities", fontsize=10)
+            page.insert_text((72, 80), "Procedure  Screening  Day 1  Day 8  Week 4  Week 8  Follow-up", fontsize=8)
+            for row in range(20):
+                y = 100 + row * 20
+                page.insert_text((72, y), f"Assessment {row}", fontsize=8)
+                for col in range(8):
+                    if (row + col) % 2 == 0:
+                        page.insert_text((250 + col * 50, y), "X", fontsize=8)
+        else:
+            page = doc.new_page(width=612, height=792)
+            text = (
+                "Participants will be informed about the study objectives and the "
+                "procedures described in the following sections of this protocol. "
+            ) * 20
+            page.insert_textbox(fitz.Rect(72, 72, 540, 720), text, fontsize=10)
+    doc.save(str(path))
+    doc.close()
+
+
+class TestPageClassifier:
+    """Tests for extraction.page_classifier module."""
+
+    def test_shipped_model_loads(self):
+        """Test the shipped model matches the feature definition."""
+        from extraction.page_classifier import PAGE_FEATURES, get_page_classifier
+
+        classifier = get_page_classifier()
+        assert classifier is not None
+        assert classifier.features == PAGE_FEATURES
+        assert len(classifier.weights) == len(PAGE_FEATURES)
+        assert classifier.low_threshold < classifier.high_threshold
+
+    def test_label_bands(self):
+        """Test probability thresholds map to soa/uncertain/not_soa."""
+        from extraction.page_classifier import PageClassifier
+
+        classifier = PageClassifier(weights=[], bias=0.0, mean=[], std=[], features=[])
+        assert classifier.label_for(0.95) == "soa"
+        assert classifier.label_for(0.5) == "uncertain"
+        assert classifier.label_for(0.05) == "not_soa"
+
+    def test_train_separates_pages(self):
+        """Test training learns a separable feature."""
+        from extraction.page_classifier import train_page_classifier
+
+        samples = [{"x_mark_density": 0.3, "landscape": 1.0}] * 5 + [{"x_mark_density": 0.0}] * 20
+        labels = [1] * 5 + [0] * 20
+        classifier = train_page_classifier(samples, labels, epochs=300)
+
+        assert classifier.predict_proba(samples[0]) > classifier.high_threshold
+        assert classifier.predict_proba(samples[-1]) < classifier.low_threshold
+
+    def test_train_requires_both_classes(self):
+        """Test training rejects single-class data."""
+        from extraction.page_classifier import train_page_classifier
+
+        with pytest.raises(ValueError):
+            train_page_classifier([{"landscape": 1.0}], [1])
+
+    def test_round_trip(self, tmp_path):
+        """Test save/load keeps weights and thresholds."""
+        from extraction.page_classifier import PageClassifier, train_page_classifier
+
+        classifier = train_page_classifier(
+            [{"landscape": 1.0}, {"landscape": 0.0}], [1, 0], epochs=10, high_threshold=0.85
+        )
+        path = tmp_path / "model.json"
+        classifier.save(path)
+        loaded = PageClassifier.load(path)
+
+        assert loaded.weights == classifier.weights
+        assert loaded.high_threshold == 0.85
+
+    def test_classify_pdf_finds_grid_pages(self, tmp_path):
+        """Test the shipped model picks out SoA-like grid pages."""
+        from extraction.page_classifier import get_page_classifier
+
+        pdf_path = tmp_path / "protocol.pdf"
+        _make_pdf(pdf_path, soa_pages={2, 3})
+        predictions = get_page_classifier().classify_pdf(str(pdf_path))
+
+        assert len(predictions) == 6
+        assert {p.page_num for p in predictions if p.is_soa} == {2, 3}
+
+    def test_find_soa_pages_skips_llm_when_confident(self, tmp_path, monkeypatch):
+        """Test confident classifier pages of a trusted model need no LLM call."""
+        from core import page_cache
+        from extraction import soa_finder
+
+        def fail_llm(*args, **kwargs):
+            raise AssertionError("LLM should not be called")
+
+        monkeypatch.setattr(page_cache, "_enabled", False)
+        monkeypatch.setattr(soa_finder, "CLASSIFIER_MIN_HOLDOUT_RECALL", 0.0)
+        monkeypatch.setattr(soa_finder, "find_soa_pages_llm", fail_llm)
+        pdf_path = tmp_path / "protocol.pdf"
+        _make_pdf(pdf_path, soa_pages={2, 3})
+
+        pages = soa_finder.find_soa_pages(str(pdf_path), model_name="gemini-2.5-pro")
+        assert {2, 3} <= set(pages)
+
+    def test_shipped_model_pages_are_llm_candidates(self, tmp_path, monkeypatch):
+        """Test the shipped model (held-out recall 0 on one protocol) never skips the LLM."""
+        from core import page_cache
+        from extraction import soa_finder
+        from extraction.page_classifier import get_page_classifier
+
+        calls = []
+
+        def fake_llm(pdf_path, model_name, candidates):
+            calls.append(sorted(candidates))
+            return [2, 3]
+
+        assert get_page_classifier().holdout_recall() < soa_finder.CLASSIFIER_MIN_HOLDOUT_RECALL
+        monkeypatch.setattr(page_cache, "_enabled", False)
+        monkeypatch.setattr(soa_finder, "find_soa_pages_llm", fake_llm)
+        pdf_path = tmp_path / "protocol.pdf"
+        _make_pdf(pdf_path, soa_pages={2, 3})
+
+        soa_finder.find_soa_pages(str(pdf_path), model_name="gemini-2.5-pro")
+        assert len(calls) == 1 and {2, 3} <= set(calls[0])
+
+    def test_find_soa_pages_asks_llm_when_heuristics_disagree(self, tmp_path, monkeypatch):
+        """Test classifier pages the title/heuristic passes don't back go to the LLM as candidates."""
+        from core import page_cache
+        from extraction import soa_finder
+
+        calls = []
+
+        def fake_llm(pdf_path, model_name, candidates):
+            calls.append(sorted(candidates))
+            return [3]
+
+        monkeypatch.setattr(page_cache, "_enabled", False)
+        monkeypatch.setattr(soa_finder, "find_soa_pages_llm", fake_llm)
+        monkeypatch.setattr(soa_finder, "find_soa_pages_heuristic", lambda *a, **k: [5])
+        monkeypatch.setattr(soa_finder, "_find_soa_title_pages", lambda *a, **k: [])
+        pdf_path = tmp_path / "protocol.pdf"
+        _make_pdf(pdf_path, soa_pages={2, 3})
+
+        pages = soa_finder.find_soa_pages(str(pdf_path), model_name="gemini-2.5-pro")
+        assert calls == [[2, 3, 5]]
+        assert 3 in pages
+
+    def test_classifier_agreement(self):
+        """Test agreement needs pages near a candidate and a title page or mostly heuristic hits."""
+        from extraction.soa_finder import _classifier_agrees
+
+        assert _classifier_agrees([13, 14], title_pages=[6, 13], heuristic_pages=[12, 24])
+        assert _classifier_agrees([11, 12, 13, 14], title_pages=[], heuristic_pages=[11, 12, 15])
+        assert not _classifier_agrees([13, 14, 40], title_pages=[13], heuristic_pages=[])
+        assert not _classifier_agrees([13, 14, 15], title_pages=[], heuristic_pages=[12])
+
+    def test_classifier_must_cover_table_candidates(self):
+        """Test a title/heuristic candidate with X-mark cells outside the classifier pages blocks the short-circuit."""
+        from extraction.page_classifier import PagePrediction
+        from extraction.soa_finder import _covers_table_candidates
+
+        density = {12: 0.02, 13: 0.3, 14: 0.3, 24: 0.0}
+        predictions = [PagePrediction(page_num=p, probability=0.5, label="uncertain",
+                                      features={"x_mark_density": density.get(p, 0.0)}) for p in range(30)]
+        assert _covers_table_candidates([12, 13, 14], predictions, title_pages=[13], heuristic_pages=[12, 24])
+        assert not _covers_table_candidates([13, 14], predictions, title_pages=[13], heuristic_pages=[12, 24])
+
+    def test_classifier_pages_are_capped(self, tmp_path, monkeypatch):
+        """Test the classifier path returns at most 10 pages, like the other paths."""
+        from core import page_cache
+        from extraction import soa_finder
+
+        monkeypatch.setattr(page_cache, "_enabled", False)
+        pdf_path = tmp_path / "protocol.pdf"
+        _make_pdf(pdf_path, soa_pages=set(range(1, 14)), total_pages=15)
+
+        pages = soa_finder.find_soa_pages(str(pdf_path), use_llm=False)
+        assert len(pages) == 10
@@ -0,0 +1,166 @@
+"""
+Tests for the per-phase timing spans and --profile hooks.
+
+Run with: pytest tests/test_profiling.py -v
+"""
+
+import json
+import time
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_timing():
+    from core.profiling import disable_profiling, reset_timing
+
+    reset_timing()
+    yield
+    disable_profiling()
+    reset_timing()
+
+
+def _busy(seconds):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+class TestSpans:
+    """Tests for core.profiling.span."""
+
+    def test_nesting_and_wait_time(self):
+        """Test child spans link to their parent and sleeping counts as wait, not CPU."""
+        from core.profiling import get_spans, span
+
+        with span("outer", kind="test") as outer:
+            with span("inner.sleep"):
+                time.sleep(0.05)
+            with span("inner.busy"):
+                _busy(0.02)
+
+        spans = {s.name: s for s in get_spans()}
+        assert spans["inner.sleep"].parent_id == outer.id
+        assert spans["outer"].parent_id is None
+        assert spans["outer"].attrs == {"kind": "test"}
+        assert spans["inner.sleep"].wait_seconds >= 0.04
+        assert spans["inner.busy"].cpu_seconds >= 0.015
+        assert spans["outer"].wall_seconds >= spans["inner.sleep"].wall_seconds
+
+    def test_error_is_recorded(self):
+        """Test a span that raises is still recorded, tagged with the exception."""
+        from core.profiling import get_spans, span
+
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        assert get_spans()[0].error == "ValueError"
+
+    def test_run_step_is_a_phase(self, tmp_path):
+        """Test checkpointed steps are timed and reused steps are tagged."""
+        from core.checkpoint import RunManifest, run_step
+        from core.profiling import get_spans
+
+        run_step(None, "metadata", lambda: 1)
+        manifest = RunManifest(str(tmp_path))
+        run_step(manifest, "eligibility", lambda: 2, inputs={"pdf": "x"})
+        run_step(RunManifest(str(tmp_path)), "eligibility", lambda: 2, inputs={"pdf": "x"})
+
+        spans = get_spans()
+        assert [s.name for s in spans] == ["metadata", "eligibility", "eligibility"]
+        assert [s.attrs.get("cache.hit") for s in spans[1:]] == [False, True]
+
+
+class TestReports:
+    """Tests for the summary report and cProfile output."""
+
+    def test_summary_files(self, tmp_path):
+        """Test timing_summary.json/.txt aggregate calls per span name."""
+        from core.profiling import save_timing_report, span
+
+        for _ in range(3):
+            with span("llm.request"):
+                pass
+        with span("validate"):
+            pass
+
+        path = save_timing_report(str(tmp_path))
+        report = json.loads(path.read_text())
+        rows = {r["name"]: r for r in report["spans"]}
+        assert rows["llm.request"]["calls"] == 3
+        assert report["spanCount"] == 4
+        assert "llm.request" in (tmp_path / "timing_summary.txt").read_text()
+
+    def test_profile_dumps_per_phase(self, tmp_path):
+        """Test --profile writes loadable pstats and collapsed stacks for outer phases only."""
+        import pstats
+
+        from core.profiling import enable_profiling, phase
+
+        enable_profiling(str(tmp_path))
+        with phase("combine"):
+            with phase("nested"):
+                _busy(0.02)
+
+        profile_dir = tmp_path / "profile"
+        assert sorted(p.name for p in profile_dir.iterdir()) == ["combine.collapsed", "combine.pstats"]
+        assert pstats.Stats(str(profile_dir / "combine.pstats")).total_tt > 0
+
+        lines = (profile_dir / "combine.collapsed").read_text().splitlines()
+        assert lines
+        assert any("_busy" in line for line in lines)
+        stack, micros = lines[0].rsplit(" ", 1)
+        assert int(micros) > 0 and " " not in stack
+
+
+class TestTrace:
+    """Tests for the OpenTelemetry-style trace export."""
+
+    def test_jsonl_and_otlp_round_trip(self, tmp_path):
+        """Test both trace formats load back with ids, parents and attributes intact."""
+        from core.profiling import load_trace, save_trace, set_resource, span
+
+        set_resource(**{"p2u.protocol": "P1"})
+        with span("run"):
+            with span("llm.request", **{"gen_ai.usage.input_tokens": 120, "cache.hit": False}):
+                pass
+
+        jsonl = load_trace(str(save_trace(str(tmp_path), "jsonl")))
+        otlp = load_trace(str(save_trace(str(tmp_path), "otlp")))
+        for spans in (jsonl, otlp):
+            run, call = spans
+            assert call["parentSpanId"] == run["spanId"]
+            assert call["kind"] == "CLIENT"
+            assert call["attributes"]["gen_ai.usage.input_tokens"] == 120
+            assert call["attributes"]["cache.hit"] is False
+            assert call["resource"]["p2u.protocol"] == "P1"
+        assert [s["spanId"] for s in jsonl] == [s["spanId"] for s in otlp]
+
+    def test_traceparent_joins_parent_trace(self, monkeypatch):
+        """Test a TRACEPARENT environment variable sets the trace and root parent."""
+        from core.profiling import get_spans, reset_timing, span, span_to_otel
+
+        monkeypatch.setenv("TRACEPARENT", "00-" + "a" * 32 + "-" + "b" * 16 + "-01")
+        reset_timing()
+        with span("run"):
+            pass
+        record = span_to_otel(get_spans()[0])
+        assert record["traceId"] == "a" * 32
+        assert record["parentSpanId"] == "b" * 16
+
+    def test_critical_path(self):
+        """Test the critical path follows the last-finishing chain of children."""
+        from core.profiling import critical_path
+
+        def s(span_id, parent, start, end):
+            return {"spanId": span_id, "parentSpanId": parent,
+                    "startTimeUnixNano": start, "endTimeUnixNano": end}
+
+        spans = [
+            s("run", None, 0, 100),
+            s("soa", "run", 0, 40),
+            s("metadata", "run", 0, 90),     # runs alongside soa, finishes last
+            s("combine", "run", 90, 100),
+            s("llm", "metadata", 10, 85),
+        ]
+        assert [x["spanId"] for x in critical_path(spans)] == ["run", "metadata", "llm", "combine"]
@@ -0,0 +1,141 @@
+"""
+Tests for the page text store and BM25 retrieval index.
+
+Run with: pytest tests/test_retrieval.py -v
+"""
+
+import pytest
+
+
+PAGES = [
+    "Protocol ABC-123\nA Phase 3 Study of Drug X in Adults\nSponsor: Example Pharma",
+    "Synopsis\nPrimary objective: evaluate efficacy.\nSecondary objective: safety.",
+    "5.1 Inclusion Criteria\nParticipants must be 18 years or older.\nDiagnosis of disease Y.",
+    "5.2 Exclusion Criteria\nHistory of liver disease.\nPregnant participants.",
+    "9 Statistical Considerations\nThe safety population includes all dosed participants.",
+]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Isolate page text/index caches in a temporary directory."""
+    from core import page_cache, page_store, retrieval
+
+    monkeypatch.setattr(page_cache, "CACHE_DIR", tmp_path / "cache")
+    page_store.clear_page_stores()
+    retrieval._indexes.clear()
+    yield tmp_path / "cache"
+    page_store.clear_page_stores()
+    retrieval._indexes.clear()
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    import fitz
+
+    path = tmp_path / "protocol.pdf"
+    doc = fitz.open()
+    for text in PAGES:
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(72, 72, 540, 720), text, fontsize=11)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+class TestBM25Index:
+    """Tests for core.retrieval.BM25Index."""
+
+    def test_chunks_stay_within_pages(self):
+        """Test chunking never merges text from different pages."""
+        from core.retrieval import chunk_pages
+
+        chunks = chunk_pages(["a\n" * 10, "", "b\n" * 10], chunk_chars=8)
+        assert {c.page_num for c in chunks} == {0, 2}
+        assert all(set(c.text.replace("\n", "")) <= {"a"} for c in chunks if c.page_num == 0)
+
+    def test_search_ranks_relevant_page_first(self):
+        """Test the matching page scores highest."""
+        from core.retrieval import BM25Index
+
+        index = BM25Index.build(PAGES)
+        hits = index.search("inclusion criteria participants")
+        assert hits[0].page_num == 2
+        assert hits[0].score > hits[-1].score
+
+    def test_search_without_matches(self):
+        """Test unmatched queries return nothing."""
+        from core.retrieval import BM25Index
+
+        assert BM25Index.build(PAGES).search("zebra") == []
+        assert BM25Index.build([]).search("criteria") == []
+
+    def test_round_trip(self):
+        """Test serialized indexes score identically."""
+        import json
+        from core.retrieval import BM25Index
+
+        index = BM25Index.build(PAGES)
+        restored = BM25Index.from_dict(json.loads(json.dumps(index.to_dict())))
+        query = "exclusion criteria history"
+        assert [(h.chunk_id, round(h.score, 6)) for h in restored.search(query)] == \
+               [(h.chunk_id, round(h.score, 6)) for h in index.search(query)]
+
+
+class TestContextSelection:
+    """Tests for page store caching and budgeted selection."""
+
+    def test_page_store_cached_on_disk(self, cache_dir, pdf_path):
+        """Test page text is extracted once and reloaded from disk."""
+        from core import page_store
+
+        store = page_store.get_page_store(pdf_path)
+        assert store.page_count == len(PAGES)
+        assert "Inclusion Criteria" in store.get_page(2)
+        assert list(cache_dir.glob("*.text.json"))
+
+        page_store.clear_page_stores()
+        assert page_store.get_page_store(pdf_path).pages == store.pages
+
+    def test_select_context_pages(self, cache_dir, pdf_path):
+        """Test the best pages are picked and forced pages are kept."""
+        from core.retrieval import select_context_pages
+
+        pages = select_context_pages(pdf_path, "inclusion exclusion criteria", 10000)
+        assert {2, 3} <= set(pages)
+        assert 0 not in pages
+
+        pages = select_context_pages(pdf_path, "inclusion criteria", 10000, always_include_pages=[0])
+        assert 0 in pages and 2 in pages
+        assert list(cache_dir.glob("*.bm25.json"))
+
+    def test_token_budget_limits_pages(self, cache_dir, pdf_path):
+        """Test pages beyond the budget are dropped."""
+        from core.retrieval import select_context_pages
+
+        assert len(select_context_pages(pdf_path, "criteria participants", 30)) == 1
+
+    def test_retrieve_context_text(self, cache_dir, pdf_path):
+        """Test chunk text comes back with page headers."""
+        from core.retrieval import retrieve_context
+
+        text, pages = retrieve_context(pdf_path, "statistical considerations", 10000)
+        assert pages == [4]
+        assert text.startswith("--- Page 5 ---")
+        assert "safety population" in text
+
+    def test_rank_pages(self, cache_dir, pdf_path):
+        """Test pages are ordered by relevance, unmatched pages last in their given order."""
+        from core.retrieval import rank_pages
+
+        assert rank_pages(pdf_path, "exclusion criteria liver disease", [0, 1, 3, 4]) == [3, 0, 1, 4]
+
+    def test_budgeted_extraction_keeps_relevant_pages(self, cache_dir, pdf_path):
+        """Test detector pages are all sent by default, and the most relevant ones under a budget."""
+        from core.pdf_utils import extract_text_from_pages
+
+        text = extract_text_from_pages(pdf_path, [0, 1, 2, 3, 4], query="exclusion criteria liver")
+        assert text.count("--- Page ") == 5
+
+        text = extract_text_from_pages(pdf_path, [0, 1, 2, 3, 4], token_budget=40, query="exclusion criteria liver")
+        assert "--- Page 4 ---" in text and "--- Page 1 ---" not in text
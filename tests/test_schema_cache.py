@@ -0,0 +1,68 @@
+"""
+Tests for the compiled (pickled) USDM schema cache.
+
+Run with: pytest tests/test_schema_cache.py -v
+"""
+
+import shutil
+
+
+def _loader(tmp_path):
+    from core.usdm_schema_loader import CACHED_SCHEMA, USDMSchemaLoader
+
+    schema = tmp_path / "dataStructure.yml"
+    if not schema.exists():
+        shutil.copyfile(CACHED_SCHEMA, schema)
+    return USDMSchemaLoader(schema)
+
+
+class TestSchemaCache:
+    """Tests for USDMSchemaLoader's compiled schema."""
+
+    def test_compiled_schema_matches_parse(self, tmp_path):
+        """Test a load from the compiled schema gives the same definitions as parsing the YAML."""
+        parsed = _loader(tmp_path).load()
+        assert (tmp_path / "dataStructure.pickle").exists()
+
+        compiled = _loader(tmp_path).load()
+        assert compiled == parsed
+        assert compiled["Encounter"].attributes["scheduledAtId"].is_reference
+
+    def test_compiled_schema_skips_yaml(self, tmp_path, monkeypatch):
+        """Test a warm load never calls yaml.safe_load."""
+        import yaml
+
+        _loader(tmp_path).load()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("schema YAML parsed again")
+        monkeypatch.setattr(yaml, "safe_load", fail)
+        assert "Activity" in _loader(tmp_path).load()
+
+    def test_stale_or_corrupt_cache_is_rebuilt(self, tmp_path):
+        """Test an edited schema or an unreadable pickle falls back to parsing (and rewrites the cache)."""
+        _loader(tmp_path).load()
+        schema = tmp_path / "dataStructure.yml"
+        schema.write_text(schema.read_text(encoding="utf-8").replace("\nEncounter:", "\nVisit:", 1), encoding="utf-8")
+        entities = _loader(tmp_path).load()
+        assert "Visit" in entities and "Encounter" not in entities
+
+        (tmp_path / "dataStructure.pickle").write_bytes(b"not a pickle")
+        assert "Visit" in _loader(tmp_path).load()
+        assert "Visit" in _loader(tmp_path)._load_compiled(tmp_path / "dataStructure.pickle", _key(schema))
+
+    def test_entities_share_the_global_loader(self):
+        """Test the generated types use the process-wide loader instead of one each."""
+        from core.usdm_schema_loader import get_schema_loader
+        from core.usdm_types_generated import Activity, Encounter
+
+        assert Activity._get_schema() is get_schema_loader() is Encounter._get_schema()
+        assert Encounter.get_definition() is get_schema_loader().get_entity("Encounter")
+
+
+def _key(schema):
+    import hashlib
+
+    from core.usdm_schema_loader import COMPILED_SCHEMA_VERSION
+
+    return f"{COMPILED_SCHEMA_VERSION}:{hashlib.sha256(schema.read_bytes()).hexdigest()}"
@@ -0,0 +1,61 @@
+"""
+Tests for the JSON serialization layer.
+
+Run with: pytest tests/test_serialization.py -v
+"""
+
+import json
+
+import pytest
+
+DOC = {"b": [1, 2.5, 1e-05], "a": {"name": "Étude", "empty": []}, "n": None}
+
+
+class TestSerialization:
+    """Tests for core.serialization."""
+
+    def test_modes(self):
+        """Test pretty output matches json.dump(indent=2), compact has no whitespace, canonical sorts keys."""
+        from core.serialization import CANONICAL, COMPACT, PRETTY, dumps
+
+        assert json.loads(dumps(DOC, PRETTY)) == DOC
+        assert dumps({"a": [1, {"b": "É"}]}, PRETTY) == json.dumps({"a": [1, {"b": "É"}]}, indent=2, ensure_ascii=False)
+        assert dumps({"x": [1, 2], "y": "É"}, COMPACT) == '{"x":[1,2],"y":"É"}'
+        assert dumps(DOC, CANONICAL) == '{"a":{"empty":[],"name":"Étude"},"b":[1,2.5,1e-05],"n":null}'
+        with pytest.raises(ValueError):
+            dumps(DOC, "fancy")
+
+    def test_canonical_is_backend_independent(self, monkeypatch):
+        """Test canonical bytes (used for hashing) don't change when orjson is missing."""
+        import core.serialization as serialization
+
+        with_backend = serialization.dumps_bytes(DOC, serialization.CANONICAL)
+        monkeypatch.setattr(serialization, "HAS_ORJSON", False)
+        assert serialization.backend() == "json"
+        assert serialization.dumps_bytes(DOC, serialization.CANONICAL) == with_backend
+        assert json.loads(serialization.dumps(DOC, serialization.COMPACT)) == DOC
+
+    def test_stdlib_fallbacks(self):
+        """Test values and files the fast backend rejects still behave like the stdlib."""
+        from core.serialization import COMPACT, dumps, loads
+
+        assert dumps({1: 2 ** 70}, COMPACT) == '{"1":1180591620717411303424}'
+        assert loads('{"x": NaN}')["x"] != loads('{"x": NaN}')["x"]
+        assert loads(b'{"x": 1}') == {"x": 1}
+        with pytest.raises(json.JSONDecodeError):
+            loads("{not json")
+        with pytest.raises(TypeError):
+            dumps({"s": {1, 2}})
+        assert dumps({"s": {1}}, COMPACT, default=sorted) == '{"s":[1]}'
+
+    def test_save_and_load(self, tmp_path):
+        """Test files round-trip, and atomic saves leave no temp files behind."""
+        from core.serialization import COMPACT, load_json, save_json
+
+        save_json(tmp_path / "pretty.json", DOC)
+        save_json(str(tmp_path / "sub" / "compact.json"), DOC, COMPACT, atomic=True)
+
+        assert load_json(tmp_path / "pretty.json") == DOC
+        assert load_json(tmp_path / "sub" / "compact.json") == DOC
+        assert (tmp_path / "pretty.json").read_text(encoding='utf-8').startswith('{\n  "b"')
+        assert sorted(p.name for p in (tmp_path / "sub").iterdir()) == ["compact.json"]
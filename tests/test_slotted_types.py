@@ -0,0 +1,87 @@
+"""
+Tests for the __slots__-based USDM and SoA types.
+
+Run with: pytest tests/test_slotted_types.py -v
+"""
+
+import copy
+import dataclasses
+import pickle
+
+import pytest
+
+
+class TestSlottedTypes:
+    """Tests for slotted_dataclass and the cached field sets on USDMEntity."""
+
+    def test_instances_have_no_dict(self):
+        """Test generated and internal SoA types are slotted and reject unknown attributes."""
+        from core.usdm_types import ActivityTimepoint, Timeline
+        from core.usdm_types_generated import Activity, Code
+
+        for obj in (ActivityTimepoint(activityId="act_1", encounterId="enc_1"), Timeline(),
+                    Activity(id="act_1", name="ECG"), Code(code="C1", decode="x")):
+            assert not hasattr(obj, "__dict__"), type(obj).__name__
+        with pytest.raises(AttributeError):
+            Activity(id="act_1", name="ECG").nmae = "typo"
+
+    def test_to_dict_output_unchanged(self):
+        """Test to_dict keeps its key order, skips None values and serializes nested entities."""
+        from core.usdm_types_generated import Activity, Code, Encounter
+
+        encounter = Encounter(id="enc_1", name="Screening", type=Code(id="c_1", code="C25426", decode="Visit"))
+        assert encounter.to_dict() == {
+            "id": "enc_1", "name": "Screening", "instanceType": "Encounter",
+            "type": {"id": "c_1", "code": "C25426", "codeSystem": "http://www.cdisc.org",
+                     "codeSystemVersion": "2024-09-27", "decode": "Visit", "instanceType": "Code"},
+        }
+        assert list(Activity(id="act_1", name="ECG", label="E").to_dict()) == ["id", "name", "instanceType", "label"]
+
+    def test_from_dict_filters_to_fields(self):
+        """Test from_dict drops keys that aren't fields, using the per-class cached field set."""
+        from core.usdm_types_generated import Activity, Encounter
+
+        activity = Activity.from_dict({"id": "act_1", "name": "ECG", "unknown": 1, "_private": 2})
+        assert activity.id == "act_1" and activity.name == "ECG"
+        assert Activity._field_set() == frozenset(Activity._field_names())
+        assert "unknown" not in Activity._field_set() and "epochId" in Encounter._field_set()
+        assert Activity._field_set() is not Encounter._field_set()
+
+    def test_pickle_and_copy(self):
+        """Test slotted objects pickle and deepcopy, and __dict__-era pickle state still loads."""
+        from core.usdm_types import ActivityTimepoint, HeaderStructure
+        from core.usdm_types_generated import Activity
+
+        header = HeaderStructure.from_dict({"columnHierarchy": {"encounters": [{"id": "enc_1", "name": "V1"}]},
+                                            "rowGroups": [{"id": "g_1", "name": "Labs"}]})
+        assert pickle.loads(pickle.dumps(header)) == header
+        assert copy.deepcopy(header) == header
+
+        for obj in (ActivityTimepoint(activityId="act_1", encounterId="enc_1"), Activity(id="act_1", name="ECG")):
+            legacy = type(obj).__new__(type(obj))       # pickle state was vars(obj) before the slots
+            legacy.__setstate__({f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)})
+            assert legacy == obj
+
+    def test_compiled_codecs_match_the_generic_rules(self):
+        """Test the per-class compiled to_dict/from_dict keep defaults, __post_init__ and the required-field error."""
+        from core.usdm_schema_loader import USDMEntity, slotted_dataclass
+        from core.usdm_types_generated import Activity, ScheduledActivityInstance
+
+        activity = Activity.from_dict({"id": "act_1", "name": "ECG", "unknown": 1})
+        assert activity == Activity(id="act_1", name="ECG")
+        assert activity.childIds is not Activity.from_dict({"name": "x"}).childIds   # factories called per instance
+        assert ScheduledActivityInstance.from_dict({"id": "sai_1", "activityId": "act_1"}).activityIds == ["act_1"]
+        assert Activity.from_dict({}) is None
+
+        encoded = USDMEntity.to_dict(Activity(id="act_1", name="ECG", childIds=[], label="E"))
+        assert encoded == {"id": "act_1", "name": "ECG", "instanceType": "Activity", "label": "E"}
+
+        @slotted_dataclass
+        class Marker(USDMEntity):
+            text: str
+            id: str = ""
+
+        assert Marker.from_dict({"text": "x", "other": 1}) == Marker(text="x")
+        assert USDMEntity.to_dict(Marker(text="x", id="m_1")) == {"text": "x", "id": "m_1", "instanceType": "Marker"}
+        with pytest.raises(TypeError):
+            Marker.from_dict({"id": "m_1"})
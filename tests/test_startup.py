@@ -0,0 +1,68 @@
+"""
+Tests for CLI startup time: heavy packages load on first use, not on import.
+
+Run with: pytest tests/test_startup.py -v
+"""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Seconds of import time main_v2.py --help may spend (was ~2.6 s with eager SDK imports)
+IMPORT_BUDGET = 1.0
+
+# Packages a run only needs once it calls an LLM, renders a table or validates
+HEAVY_PACKAGES = ("openai", "anthropic", "google.generativeai", "pandas", "PIL", "pydantic", "usdm_model", "fitz")
+
+
+def _importtime(*args):
+    """(total import seconds, imported module names) from python -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=120,
+    )
+    total, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)", line)
+        if match:
+            modules.add(match.group(3))
+            if match.group(2) == " ":    # top-level imports; nested ones are in their cumulative time
+                total += int(match.group(1))
+    return total / 1e6, modules, proc
+
+
+class TestStartup:
+    """Import-time budget for main_v2.py and the lazy loaders behind it."""
+
+    def test_help_import_budget(self):
+        """Test main_v2.py --help imports within IMPORT_BUDGET seconds (best of 3 runs)."""
+        runs = [_importtime("main_v2.py", "--help") for _ in range(3)]
+        assert all(proc.returncode == 0 and "usage:" in proc.stdout for _, _, proc in runs)
+        best = min(total for total, _, _ in runs)
+        assert best < IMPORT_BUDGET, f"main_v2.py --help spent {best:.2f}s importing"
+
+    def test_help_skips_heavy_packages(self):
+        """Test --help loads no vendor SDK, pandas, PIL, pydantic/usdm or PyMuPDF."""
+        _, modules, _ = _importtime("main_v2.py", "--help")
+        assert "extraction.header_analyzer" in modules
+        assert [name for name in HEAVY_PACKAGES if name in modules] == []
+
+    def test_lazy_names_resolve(self):
+        """Test lazily exported names still resolve to the real objects."""
+        import extraction
+        import llm_providers
+        from extraction.pipeline import run_from_files
+
+        assert extraction.run_from_files is run_from_files
+        assert "build_usdm_output" in dir(extraction)
+        assert llm_providers.genai.__name__ == "google.generativeai"
+        for module in (extraction, llm_providers):
+            try:
+                module.no_such_name
+            except AttributeError:
+                pass
+            else:
+                raise AssertionError(f"{module.__name__}.no_such_name resolved")
@@ -0,0 +1,87 @@
+"""
+Tests for the synthetic protocol generator used by the scaling benchmarks.
+
+Run with: pytest tests/test_synthetic_protocol.py -v
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'testing')))
+
+fitz = pytest.importorskip("fitz")
+
+
+@pytest.fixture(scope="module")
+def small_protocol(tmp_path_factory):
+    from synthetic_protocol import PRESETS, write_protocol
+
+    out = tmp_path_factory.mktemp("synthetic")
+    return PRESETS["small"], write_protocol(PRESETS["small"], str(out))
+
+
+class TestSyntheticProtocol:
+    """Tests for testing/synthetic_protocol.py."""
+
+    def test_pdf_has_findable_soa(self, small_protocol):
+        """Test the PDF reaches the requested length and the SoA heuristic finds its table."""
+        from extraction.soa_finder import find_soa_pages_heuristic
+
+        spec, paths = small_protocol
+        with fitz.open(paths["pdf"]) as doc:
+            assert len(doc) >= spec.pages
+            soa_pages = [i for i in range(len(doc)) if "Schedule of Activities" in doc[i].get_text()]
+        found = find_soa_pages_heuristic(paths["pdf"])
+        assert found and set(found) & set(soa_pages)
+
+    def test_usdm_matches_spec(self, small_protocol):
+        """Test the USDM document carries the spec's entity counts."""
+        spec, paths = small_protocol
+        with open(paths["usdm"], 'r', encoding='utf-8') as f:
+            version = json.load(f)["study"]["versions"][0]
+        design = version["studyDesigns"][0]
+
+        assert len(version["eligibilityCriterionItems"]) == spec.criteria
+        assert len([a for a in design["activities"] if not a.get("childIds")]) == spec.activities
+        assert len(design["encounters"]) == spec.visits
+        assert len(design["objectives"]) == spec.objectives
+        assert len(design["arms"]) == spec.arms
+
+    def test_run_dir_replays_through_combine(self, small_protocol, tmp_path):
+        """Test the saved raw responses parse and combine into a full document."""
+        from benchmark_offline import Fixtures, run_suite
+
+        spec, paths = small_protocol
+        fixtures = Fixtures(pdfs=[paths["pdf"]], golden=[paths["usdm"]], runs=[paths["run_dir"]],
+                            work_dir=str(tmp_path))
+        stages = run_suite(fixtures, ["combine", "pages.soa"], repeats=1, warmup=0)
+        assert "skipped" not in stages["combine"]
+        assert stages["pages.soa"]["unitsPerCall"] > 0
+
+    def test_seeded_and_scaled(self):
+        """Test a seed reproduces the same content and scaled() grows every count."""
+        from dataclasses import replace
+
+        from synthetic_protocol import PRESETS, SyntheticProtocol
+
+        spec = PRESETS["small"]
+        assert SyntheticProtocol(spec).usdm() == SyntheticProtocol(spec).usdm()
+        assert SyntheticProtocol(spec).ticks != SyntheticProtocol(replace(spec, seed=1)).ticks
+
+        doubled = spec.scaled(2)
+        assert doubled.activities == 2 * spec.activities
+        assert doubled.pages == 2 * spec.pages
+        assert doubled.name == "SYNTH_S_x2"
+        assert spec.scaled(0.01).arms == 1
+
+    def test_scaling_exponent(self):
+        """Test the fitted exponent recovers linear and quadratic growth."""
+        from benchmark_offline import scaling_exponent
+
+        sizes = [100, 200, 400, 800]
+        assert scaling_exponent(sizes, [0.5 * s for s in sizes]) == pytest.approx(1.0)
+        assert scaling_exponent(sizes, [0.001 * s * s for s in sizes]) == pytest.approx(2.0)
+        assert scaling_exponent([100], [1.0]) is None
@@ -0,0 +1,125 @@
+"""
+Tests for the USDM entity index.
+
+Run with: pytest tests/test_usdm_index.py -v
+"""
+
+
+def _doc():
+    return {
+        "study": {
+            "id": "study_1",
+            "versions": [{
+                "id": "sv_1",
+                "studyDesigns": [{
+                    "id": "sd_1",
+                    "instanceType": "InterventionalStudyDesign",
+                    "epochs": [{"id": "epoch_1", "name": "Screening", "instanceType": "StudyEpoch"}],
+                    "encounters": [
+                        {"id": "enc_1", "name": "Visit 1", "epochId": "epoch_1", "instanceType": "Encounter"},
+                        {"id": "enc_2", "name": "Visit 2", "epochId": "epoch_1", "instanceType": "Encounter"},
+                    ],
+                    "activities": [
+                        {"id": "act_1", "name": "Labs", "childIds": ["act_2"], "instanceType": "Activity"},
+                        {"id": "act_2", "name": "Hematology", "instanceType": "Activity"},
+                    ],
+                    "scheduleTimelines": [{
+                        "id": "tl_1",
+                        "instances": [{
+                            "id": "sai_1",
+                            "instanceType": "ScheduledActivityInstance",
+                            "activityIds": ["act_2"],
+                            "encounterId": "enc_1",
+                            "timing": {"relativeToId": "enc_9"},
+                        }],
+                    }],
+                }],
+            }],
+        },
+    }
+
+
+class TestUSDMIndex:
+    """Tests for core.usdm_index.USDMIndex."""
+
+    def test_lookups(self):
+        """Test id, type, name, collection and reference lookups."""
+        from core.usdm_index import USDMIndex
+
+        index = USDMIndex(_doc())
+
+        assert index.get("enc_2")["name"] == "Visit 2"
+        assert [a["id"] for a in index.of_type("Activity")] == ["act_1", "act_2"]
+        assert index.ids_named("Visit 1") == ["enc_1"]
+        assert index.collection_of("epoch_1") == "epochs"
+        assert index.owner_of("enc_1") == "sd_1"
+        assert index.names("encounters") == {"Visit 1": "enc_1", "Visit 2": "enc_2"}
+        assert index.references["sai_1"] == {"act_2", "enc_1", "enc_9"}
+        assert index.referrers["epoch_1"] == {"enc_1", "enc_2"}
+
+    def test_dangling_references(self):
+        """Test references to missing ids are reported with their holder (id-less dicts count for their entity)."""
+        from core.usdm_index import USDMIndex
+
+        index = USDMIndex(_doc())
+        dangling = index.dangling()
+
+        assert [(r.referrer, r.field, r.target) for r in dangling] == [("sai_1", "relativeToId", "enc_9")]
+        assert dangling[0].holder == {"relativeToId": "enc_9"}
+
+    def test_rename_rewrites_references(self):
+        """Test renaming an entity updates the document's reference fields and the index."""
+        from core.usdm_index import USDMIndex
+
+        data = _doc()
+        index = USDMIndex(data)
+        index.rename("enc_1", "e-uuid")
+        index.rename("act_2", "a-uuid")
+
+        instance = index.get("sai_1")
+        assert instance["encounterId"] == "e-uuid" and instance["activityIds"] == ["a-uuid"]
+        assert index.get("act_1")["childIds"] == ["a-uuid"]
+        assert "enc_1" not in index and index.get("e-uuid")["name"] == "Visit 1"
+        assert index.ids_named("Visit 1") == ["e-uuid"]
+        assert index.references["e-uuid"] == {"epoch_1"}
+        assert index.referrers["a-uuid"] == {"act_1", "sai_1"}
+
+    def test_append_remove_and_set_field(self):
+        """Test edits through the index keep the document and every lookup in step."""
+        from core.usdm_index import USDMIndex
+
+        data = _doc()
+        index = USDMIndex(data)
+        index.append("sd_1", "encounters", {"id": "enc_9", "name": "Follow-up",
+                                            "epochId": "epoch_1", "instanceType": "Encounter"})
+        assert index.dangling() == []
+        assert index.get("sd_1")["encounters"][-1]["id"] == "enc_9"
+        assert index.referrers["epoch_1"] == {"enc_1", "enc_2", "enc_9"}
+
+        index.set_field("enc_2", "name", "Day 8")
+        index.set_field("enc_2", "epochId", "epoch_2")
+        assert index.ids_named("Day 8") == ["enc_2"] and not index.ids_named("Visit 2")
+        assert [r.target for r in index.dangling()] == ["epoch_2"]
+
+        index.remove("enc_2")
+        assert [e["id"] for e in data["study"]["versions"][0]["studyDesigns"][0]["encounters"]] == ["enc_1", "enc_9"]
+        assert "enc_2" not in index and index.dangling() == []
+        assert index.referrers["epoch_1"] == {"enc_1", "enc_9"}
+
+    def test_provenance_sync_matches_by_name(self, tmp_path):
+        """Test sync_provenance_with_data maps SoA ids to the final data's ids through entity names."""
+        from core.serialization import load_json, save_json
+        from main_v2 import sync_provenance_with_data
+
+        save_json(tmp_path / "9_final_soa.json", _doc())
+        save_json(tmp_path / "9_final_soa_provenance.json",
+                  {"entities": {"activities": {"act_2": "text"}}, "cells": {"act_2|enc_1": "both"}})
+        final = _doc()
+        final["study"]["versions"][0]["studyDesigns"][0]["activities"][1]["id"] = "a-uuid"
+        final["study"]["versions"][0]["studyDesigns"][0]["encounters"][0]["id"] = "e-uuid"
+
+        sync_provenance_with_data(str(tmp_path / "9_final_soa_provenance.json"), final)
+
+        prov = load_json(tmp_path / "9_final_soa_provenance.json")
+        assert prov["entities"]["activities"] == {"a-uuid": "text"}
+        assert prov["cells"] == {"a-uuid|e-uuid": "both"}
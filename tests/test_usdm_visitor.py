@@ -0,0 +1,128 @@
+"""
+Tests for the single-pass USDM visitor framework.
+
+Run with: pytest tests/test_usdm_visitor.py -v
+"""
+
+import copy
+
+
+def _without_minted_ids(obj, known):
+    """Blank UUIDs the normalizer mints itself (they differ run to run)."""
+    if isinstance(obj, dict):
+        return {k: ("<minted>" if k == "id" and v not in known else _without_minted_ids(v, known))
+                for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_without_minted_ids(v, known) for v in obj]
+    return obj
+
+
+def _doc():
+    return {
+        "study": {
+            "id": "study_1",
+            "versions": [{
+                "id": "sv_1",
+                "studyDesigns": [{
+                    "id": "sd_1",
+                    "studyArms": [{"id": "arm_1", "name": "Arm A", "type": {"code": "C174266", "decode": "Experimental Arm"}}],
+                    "encounters": [{"id": "enc_1", "name": "Screening", "epochId": "epoch_1"}],
+                    "epochs": [{"id": "epoch_1", "name": "Treatment"}],
+                    "objectives": [{"id": "obj_1", "name": "Efficacy", "level": "Primary",
+                                    "instanceType": "Objective"}],
+                    "blindingSchema": "Partially Blind",
+                    "activities": [{"id": "act_1", "name": "ECG", "childIds": ["act_2", "act_3"]}],
+                }],
+            }],
+        },
+    }
+
+
+class TestUsdmVisitor:
+    """Tests for core.usdm_visitor and the visitors built on it."""
+
+    def test_fused_pass_matches_separate_passes(self):
+        """Test normalize + UUID conversion in one walk gives the same document as the two old passes."""
+        from core.usdm_types_generated import UsdmNormalizer, normalize_usdm_data
+        from core.usdm_visitor import walk
+        from main_v2 import UuidConverter, convert_ids_to_uuids
+
+        sequential, id_map = convert_ids_to_uuids(normalize_usdm_data(_doc()))
+
+        fused = _doc()
+        converter = UuidConverter(id_map=dict(id_map))  # same UUIDs for comparison
+        walk(fused, [UsdmNormalizer(), converter])
+
+        known = set(id_map.values())
+        assert _without_minted_ids(fused, known) == _without_minted_ids(sequential, known)
+        assert converter.id_map == id_map
+        assert "arms" in fused["study"]["versions"][0]["studyDesigns"][0]
+
+    def test_skip_and_key_skips(self):
+        """Test SKIP prunes a subtree for one visitor only, and returned keys prune just those children."""
+        from core.usdm_visitor import SKIP, UsdmVisitor, walk
+
+        class Recorder(UsdmVisitor):
+            def __init__(self, result=None):
+                self.result = result
+                self.seen = []
+
+            def enter(self, node, trail):
+                self.seen.append(node.get("name"))
+                return self.result(node) if self.result else None
+
+        data = {"name": "root", "a": {"name": "a", "x": {"name": "ax"}}, "b": [{"name": "b0"}]}
+        everything = Recorder()
+        skip_a = Recorder(lambda node: SKIP if node["name"] == "a" else None)
+        skip_b = Recorder(lambda node: ["b"] if node["name"] == "root" else None)
+        walk(data, [skip_a, everything, skip_b])
+
+        assert everything.seen == ["root", "a", "ax", "b0"]
+        assert skip_a.seen == ["root", "a", "b0"]
+        assert skip_b.seen == ["root", "a", "ax"]
+
+    def test_instance_types_and_paths(self):
+        """Test instance_types filters enter() without stopping the walk, and trails format as report paths."""
+        from core.usdm_visitor import UsdmVisitor, format_path, walk
+
+        class ObjectivePaths(UsdmVisitor):
+            instance_types = frozenset({"Objective"})
+
+            def __init__(self):
+                self.paths = []
+
+            def enter(self, node, trail):
+                self.paths.append(format_path(trail))
+
+        visitor = ObjectivePaths()
+        walk(_doc(), [visitor])
+        assert visitor.paths == ["/study/versions[0]/studyDesigns[0]/objectives[0]"]
+        assert format_path([]) == ""
+
+    def test_controlled_terminology_check(self):
+        """Test CT001/CT002 warnings carry the path of the offending entity."""
+        from validation.cdisc_conformance import _check_controlled_terminology
+
+        doc = _doc()
+        doc["study"]["versions"][0]["studyDesigns"][0]["objectives"][0]["level"] = {"decode": "Tertiary"}
+        warnings = []
+        _check_controlled_terminology(doc, warnings)
+
+        assert [w["rule"] for w in warnings] == ["CT002", "CT001"]
+        assert warnings[0]["message"] == '/study/versions[0]/studyDesigns[0]: Invalid blinding schema "Partially Blind"'
+        assert warnings[1]["message"].startswith("/study/versions[0]/studyDesigns[0]/objectives[0]: ")
+
+    def test_wrappers_copy_unless_in_place(self):
+        """Test convert_ids_to_uuids and normalize_usdm_data leave their input alone unless in_place=True."""
+        from core.usdm_types_generated import normalize_usdm_data
+        from main_v2 import convert_ids_to_uuids
+
+        original = _doc()
+        untouched = copy.deepcopy(original)
+        converted, id_map = convert_ids_to_uuids(original)
+        normalize_usdm_data(original)
+        assert original == untouched
+        assert converted["study"]["id"] == id_map["study_1"]
+
+        result, _ = convert_ids_to_uuids(original, in_place=True)
+        assert result is original and original["study"]["id"] != "study_1"
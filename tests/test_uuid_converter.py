@@ -0,0 +1,82 @@
+"""
+Tests for the schema-driven simple ID -> UUID conversion.
+
+Run with: pytest tests/test_uuid_converter.py -v
+"""
+
+import uuid
+
+
+def _soa():
+    return {
+        "id": "sd_1",
+        "encounters": [{"id": "enc_1", "name": "Screening", "epochId": "epoch_1"}],
+        "epochs": [{"id": "epoch_1", "name": "Treatment"}],
+        "activities": [{"id": "act_1", "name": "ECG", "childIds": ["act_2"]}, {"id": "act_2", "name": "Labs"}],
+        "instances": [{"id": "sai_1", "activityIds": ["act_1", "act_2"], "encounterId": "enc_1"}],
+        "transitions": [{"id": "tr_1", "fromElementId": "el_1", "administrationIds": ["adm_1"]}],
+        "notes": [{"id": "12345678-1234-1234-1234-123456789abc", "text": "keep_me", "scopeId": "none"}],
+    }
+
+
+class TestUuidConverter:
+    """Tests for main_v2.UuidConverter and the functions built on it."""
+
+    def test_schema_reference_fields(self):
+        """Test the converter's field table comes from the schema's Ref attributes."""
+        from core.usdm_schema_loader import get_schema_loader
+        from main_v2 import UuidConverter, _ID, _ID_LIST
+
+        fields = get_schema_loader().get_reference_fields()
+        assert fields["encounterId"] is False and fields["activityIds"] is True
+        assert "name" not in fields and "id" not in fields
+
+        kinds = UuidConverter().kinds
+        assert kinds["id"] == _ID and kinds["epochId"] == _ID and kinds["childIds"] == _ID_LIST
+
+    def test_simple_id_detection(self):
+        """Test every spelling uuid.UUID() accepts counts as converted, and short underscored ids don't."""
+        from main_v2 import _is_simple_id
+
+        value = "12345678-1234-1234-1234-123456789abc"
+        for spelling in (value, value.upper(), "{%s}" % value, "urn:uuid:" + value, value.replace("-", "")):
+            assert not _is_simple_id(spelling), spelling
+        assert _is_simple_id("act_1") and _is_simple_id("enc-12")
+        assert not _is_simple_id("plain") and not _is_simple_id("x_" * 30) and not _is_simple_id(7)
+
+    def test_converts_in_place_with_references(self):
+        """Test in-place conversion keeps references (schema and suffix-matched fields) pointing at the new ids."""
+        from main_v2 import convert_ids_to_uuids
+
+        data = _soa()
+        converted, id_map = convert_ids_to_uuids(data, in_place=True)
+
+        assert converted is data
+        assert all(uuid.UUID(v) for v in id_map.values())
+        assert data["encounters"][0]["epochId"] == data["epochs"][0]["id"] == id_map["epoch_1"]
+        assert data["activities"][0]["childIds"] == [id_map["act_2"]]
+        assert data["instances"][0]["activityIds"] == [id_map["act_1"], id_map["act_2"]]
+        assert data["transitions"][0]["fromElementId"] == id_map["el_1"]
+        assert data["transitions"][0]["administrationIds"] == [id_map["adm_1"]]
+        note = data["notes"][0]
+        assert note == {"id": "12345678-1234-1234-1234-123456789abc", "text": "keep_me", "scopeId": "none"}
+
+    def test_remap_provenance(self):
+        """Test the converter remaps provenance (legacy pt_N cells included) like convert_provenance_to_uuids."""
+        from main_v2 import UuidConverter, convert_provenance_to_uuids
+
+        provenance = {
+            "entities": {"activities": {"act_1": "text", "act_9": "vision"}, "note": "unchanged"},
+            "cells": {"act_1|enc_1": "both", "act_2|pt_1": "text", "bare": "vision"},
+            "cellFootnotes": {"act_1|pt_1": ["a"]},
+            "metadata": {"model": "m"},
+        }
+        converter = UuidConverter()
+        converter.convert(_soa())
+        act_1, act_2, enc_1 = (converter.id_map[k] for k in ("act_1", "act_2", "enc_1"))
+
+        remapped = converter.remap_provenance(provenance)
+        assert remapped == convert_provenance_to_uuids(provenance, converter.id_map)
+        assert remapped["entities"] == {"activities": {act_1: "text", "act_9": "vision"}, "note": "unchanged"}
+        assert remapped["cells"] == {f"{act_1}|{enc_1}": "both", f"{act_2}|{enc_1}": "text", "bare": "vision"}
+        assert remapped["cellFootnotes"] == {f"{act_1}|{enc_1}": ["a"]}
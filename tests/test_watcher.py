@@ -0,0 +1,125 @@
+"""
+Tests for the watch-folder ingestion.
+
+Run with: pytest tests/test_watcher.py -v
+"""
+
+import pytest
+
+
+@pytest.fixture
+def watch(tmp_path):
+    """A polling watcher over tmp_path/in feeding an unstarted scheduler."""
+    from daemon import Scheduler
+    from watcher import FolderWatcher
+
+    (tmp_path / "in").mkdir()
+    scheduler = Scheduler(workers=1, output_root=str(tmp_path / "out"))
+    return FolderWatcher(scheduler, str(tmp_path / "in"), settle_seconds=5, use_inotify=False)
+
+
+def _drop(path, content=b"%PDF-1.4 protocol"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+class TestFolderWatcher:
+    """Tests for watcher.FolderWatcher (polling mode)."""
+
+    def test_companions_map_to_protocol(self):
+        """Test SAP and sites files resolve to their protocol PDF."""
+        from watcher import protocol_path_for
+
+        assert protocol_path_for("/d/P1.pdf") == "/d/P1.pdf"
+        assert protocol_path_for("/d/P1_SAP.pdf") == "/d/P1.pdf"
+        assert protocol_path_for("/d/P1_sites.xlsx") == "/d/P1.pdf"
+        assert protocol_path_for("/d/notes.txt") is None
+
+    def test_settle_then_queue_once(self, watch, tmp_path):
+        """Test files are queued after settling, with their SAP, only once."""
+        _drop(tmp_path / "in" / "P1.pdf")
+        _drop(tmp_path / "in" / "P1_SAP.pdf", b"%PDF-1.4 sap")
+
+        assert watch.poll(now=100) == 2
+        assert watch.flush(now=102) == []
+        jobs = watch.flush(now=106)
+        assert len(jobs) == 1
+        assert jobs[0].sap_path.endswith("P1_SAP.pdf")
+        assert jobs[0].source == "watch"
+
+        assert watch.poll(now=110) == 0
+        watch.touch(str(tmp_path / "in" / "P1.pdf"), now=110)
+        assert watch.flush(now=120) == []
+
+    def test_dedupe_by_content(self, watch, tmp_path):
+        """Test renamed copies are skipped but a new SAP re-queues the protocol."""
+        _drop(tmp_path / "in" / "P1.pdf")
+        watch.poll(now=0)
+        assert len(watch.flush(now=10)) == 1
+
+        _drop(tmp_path / "in" / "P1 copy.pdf")
+        watch.poll(now=20)
+        assert watch.flush(now=30) == []
+
+        _drop(tmp_path / "in" / "P1_SAP.pdf", b"%PDF-1.4 sap")
+        watch.poll(now=40)
+        assert len(watch.flush(now=50)) == 1
+
+    def test_seen_content_survives_restart(self, watch, tmp_path):
+        """Test the state file stops a restarted watcher re-processing the folder."""
+        from watcher import FolderWatcher
+
+        _drop(tmp_path / "in" / "P1.pdf")
+        watch.poll(now=0)
+        watch.flush(now=10)
+
+        restarted = FolderWatcher(watch.scheduler, str(tmp_path / "in"), settle_seconds=5, use_inotify=False)
+        restarted.poll(now=20)
+        assert restarted.flush(now=30) == []
+
+    def test_priority_subfolders(self, watch, tmp_path):
+        """Test interactive/ jobs run before backlog/ and default jobs."""
+        from daemon import PRIORITIES
+
+        _drop(tmp_path / "in" / "backlog" / "Old.pdf", b"old")
+        _drop(tmp_path / "in" / "New.pdf", b"new")
+        _drop(tmp_path / "in" / "interactive" / "Review.pdf", b"review")
+        watch.poll(now=0)
+        jobs = {j.pdf_path.rsplit("/", 1)[-1]: j for j in watch.flush(now=10)}
+        assert jobs["Review.pdf"].priority == PRIORITIES["interactive"]
+        assert jobs["Old.pdf"].priority == PRIORITIES["backlog"]
+
+        order = [watch.scheduler._next_job().pdf_path.rsplit("/", 1)[-1] for _ in range(3)]
+        assert order == ["Review.pdf", "New.pdf", "Old.pdf"]
+
+    @pytest.mark.skipif("not __import__('watcher').HAS_INOTIFY")
+    def test_inotify_reports_new_files(self, tmp_path):
+        """Test inotify events for files and new subfolders."""
+        from watcher import _Inotify
+
+        inotify = _Inotify()
+        try:
+            inotify.add_tree(str(tmp_path))
+            _drop(tmp_path / "P1.pdf")
+            paths, _ = inotify.read(timeout=2)
+            assert str(tmp_path / "P1.pdf") in paths
+
+            (tmp_path / "interactive").mkdir()
+            _, rescan = inotify.read(timeout=2)
+            assert rescan
+            _drop(tmp_path / "interactive" / "P2.pdf")
+            paths, _ = inotify.read(timeout=2)
+            assert str(tmp_path / "interactive" / "P2.pdf") in paths
+        finally:
+            inotify.close()
+
+    def test_failed_jobs_can_be_retried(self, watch, tmp_path):
+        """Test cancelled/failed content is forgotten and re-queued on the next change."""
+        _drop(tmp_path / "in" / "P1.pdf")
+        watch.poll(now=0)
+        job = watch.flush(now=10)[0]
+        watch.scheduler.cancel(job.id)
+
+        watch.touch(str(tmp_path / "in" / "P1.pdf"), now=20)
+        assert len(watch.flush(now=30)) == 1
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Train the local SoA page classifier.
+
+Builds labelled pages from previous pipeline runs and golden files:
+- output/<protocol>_<timestamp>/3_soa_images/soa_page_NNN.png names give the
+  (1-indexed) SoA pages used for that protocol. These include the +/-1 pages
+  added by adjacent-page expansion, which are trimmed off again since the
+  finder re-applies the expansion after classification
+- input/<protocol>_golden.json activities are matched against page text;
+  pages containing a large share of the golden activity names are SoA pages
+
+The matching PDF is looked up as input/<protocol>.pdf. The trained model is
+written to extraction/models/soa_page_classifier.json.
+
+Usage:
+    python tools/train_page_classifier.py
+    python tools/train_page_classifier.py --output-root output --input-dir input
+    python tools/train_page_classifier.py --evaluate-only
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fitz  # PyMuPDF
+
+from extraction.page_classifier import (
+    DEFAULT_MODEL_PATH,
+    PageClassifier,
+    extract_pdf_features,
+    train_page_classifier,
+)
+
+logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+RUN_DIR_PATTERN = re.compile(r'^(?P<protocol>.+)_\d{8}_\d{6}$')
+SOA_IMAGE_PATTERN = re.compile(r'^soa_page_(\d+)\.png$')
+
+# Share of golden activity names that must appear on a page to label it SoA
+GOLDEN_MATCH_RATIO = 0.3
+
+
+def labels_from_outputs(output_root: Path) -> Dict[str, Set[int]]:
+    """Collect 0-indexed SoA pages per protocol from saved SoA images."""
+    labels: Dict[str, Set[int]] = {}
+    latest_run: Dict[str, str] = {}
+    for image_dir in sorted(output_root.glob("*/3_soa_images")):
+        run_name = image_dir.parent.name
+        match = RUN_DIR_PATTERN.match(run_name)
+        protocol = match.group("protocol") if match else run_name
+        pages = set()
+        for image in image_dir.iterdir():
+            m = SOA_IMAGE_PATTERN.match(image.name)
+            if m:
+                pages.add(int(m.group(1)) - 1)
+        if not pages:
+            continue
+        if len(pages) >= 3:
+            pages -= {min(pages), max(pages)}
+        # Later runs (sorted by timestamp suffix) replace earlier ones
+        if run_name >= latest_run.get(protocol, ""):
+            latest_run[protocol] = run_name
+            labels[protocol] = pages
+    return labels
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r'\s+', ' ', text.lower())
+
+
+def labels_from_golden(golden_path: Path, pdf_path: Path) -> Set[int]:
+    """Label pages whose text contains many of the golden SoA activity names."""
+    with open(golden_path, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+
+    names = []
+    for version in golden.get("study", {}).get("versions", []):
+        for design in version.get("studyDesigns", []):
+            names.extend(a.get("name", "") for a in design.get("activities", []))
+    names = [_normalize(n) for n in names if n and len(n) > 3]
+    if not names:
+        return set()
+
+    pages = set()
+    doc = fitz.open(str(pdf_path))
+    for page_num in range(len(doc)):
+        text = _normalize(doc[page_num].get_text())
+        hits = sum(1 for n in names if n in text)
+        if hits / len(names) >= GOLDEN_MATCH_RATIO:
+            pages.add(page_num)
+    doc.close()
+    return pages
+
+
+def build_dataset(output_root: Path, input_dir: Path) -> Dict[str, Tuple[List[Dict[str, float]], List[int]]]:
+    """Return {protocol: (page_features, labels)} for every labelled protocol."""
+    labels = labels_from_outputs(output_root)
+
+    for golden_path in input_dir.glob("*_golden.json"):
+        protocol = golden_path.stem[:-len("_golden")]
+        pdf_path = input_dir / f"{protocol}.pdf"
+        if pdf_path.exists():
+            golden_pages = labels_from_golden(golden_path, pdf_path)
+            logger.info(f"{protocol}: golden file labels pages {sorted(p + 1 for p in golden_pages)}")
+            labels.setdefault(protocol, set()).update(golden_pages)
+
+    dataset = {}
+    for protocol, soa_pages in sorted(labels.items()):
+        pdf_path = input_dir / f"{protocol}.pdf"
+        if not pdf_path.exists():
+            logger.warning(f"Skipping {protocol}: {pdf_path} not found")
+            continue
+        features = extract_pdf_features(str(pdf_path))
+        y = [1 if i in soa_pages else 0 for i in range(len(features))]
+        logger.info(f"{protocol}: {len(features)} pages, SoA pages {sorted(p + 1 for p in soa_pages)}")
+        dataset[protocol] = (features, y)
+    return dataset
+
+
+def evaluate(classifier: PageClassifier, features: List[Dict[str, float]], labels: List[int]) -> Dict[str, float]:
+    """Precision/recall on confident predictions plus the uncertain share."""
+    predictions = classifier.classify_features(features)
+    tp = sum(1 for p, y in zip(predictions, labels) if p.is_soa and y)
+    fp = sum(1 for p, y in zip(predictions, labels) if p.is_soa and not y)
+    fn = sum(1 for p, y in zip(predictions, labels) if p.label == "not_soa" and y)
+    uncertain = sum(1 for p in predictions if p.is_uncertain)
+    return {
+        "pages": len(labels),
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / sum(labels) if sum(labels) else 1.0,
+        "missed": fn,
+        "uncertain": uncertain,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local SoA page classifier")
+    parser.add_argument("--output-root", default="output", help="Directory with previous pipeline runs")
+    parser.add_argument("--input-dir", default="input", help="Directory with protocol PDFs and golden files")
+    parser.add_argument("--model-out", default=str(DEFAULT_MODEL_PATH), help="Where to write the trained model")
+    parser.add_argument("--epochs", type=int, default=2000, help="Gradient descent iterations")
+    parser.add_argument("--evaluate-only", action="store_true", help="Evaluate the existing model without training")
+    args = parser.parse_args()
+
+    dataset = build_dataset(Path(args.output_root), Path(args.input_dir))
+    if not dataset:
+        logger.error("No labelled protocols found")
+        return 1
+
+    if args.evaluate_only:
+        classifier = PageClassifier.load(Path(args.model_out))
+        for protocol, (features, labels) in dataset.items():
+            logger.info(f"{protocol}: {evaluate(classifier, features, labels)}")
+        return 0
+
+    # Leave-one-protocol-out to estimate generalization
+    holdout = {}
+    if len(dataset) > 1:
+        for protocol in dataset:
+            train_x, train_y = [], []
+            for other, (features, labels) in dataset.items():
+                if other != protocol:
+                    train_x.extend(features)
+                    train_y.extend(labels)
+            classifier = train_page_classifier(train_x, train_y, epochs=args.epochs)
+            holdout[protocol] = evaluate(classifier, *dataset[protocol])
+            logger.info(f"Held-out {protocol}: {holdout[protocol]}")
+
+    all_x, all_y = [], []
+    for features, labels in dataset.values():
+        all_x.extend(features)
+        all_y.extend(labels)
+    classifier = train_page_classifier(all_x, all_y, epochs=args.epochs)
+    classifier.metadata = {
+        "protocols": sorted(dataset),
+        "pages": len(all_y),
+        "soa_pages": sum(all_y),
+        "training": {p: evaluate(classifier, *dataset[p]) for p in dataset},
+        "holdout": holdout,
+    }
+    classifier.save(Path(args.model_out))
+    logger.info(f"Training metrics: {classifier.metadata['training']}")
+    logger.info(f"Saved page classifier to {args.model_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
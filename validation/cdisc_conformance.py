@@ -5,13 +5,16 @@ Validates USDM output against CDISC conformance rules.
 Uses local CDISC CORE engine when available.
 """
 
-import json
 import logging
 import os
 import subprocess
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
+from core.artifacts import flush_artifacts, load_artifact, put_artifact
+from core.serialization import load_json, save_json
+from core.usdm_visitor import Trail, UsdmVisitor, format_path, walk
+
 logger = logging.getLogger(__name__)
 
 # Path to local CDISC CORE engine
@@ -73,8 +76,7 @@ def run_cdisc_conformance(
 
 def _save_conformance_report(result: Dict[str, Any], output_path: str) -> None:
     """Save conformance result to JSON file."""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=2)
+    put_artifact(output_path, result)
 
 
 def _ensure_core_cache(core_dir: Path) -> bool:
@@ -139,6 +141,7 @@ def _run_local_core_engine(json_path: str, output_dir: str) -> Dict[str, Any]:
     # CORE engine appends .json to output path, so use base name without extension
     output_base = os.path.join(output_dir, "conformance_report")
     output_path = output_base + ".json"  # The actual file CORE will create
+    flush_artifacts([json_path])  # CORE reads the dataset from disk
     
     try:
         # Run CORE engine
@@ -164,8 +167,7 @@ def _run_local_core_engine(json_path: str, output_dir: str) -> Dict[str, Any]:
         )
         
         if result.returncode == 0 and os.path.exists(output_path):
-            with open(output_path, 'r', encoding='utf-8') as f:
-                report = json.load(f)
+            report = load_json(output_path)
             
             issues = report.get('issues', [])
             warnings = [i for i in issues if i.get('severity') == 'Warning']
@@ -265,8 +267,7 @@ def _run_cdisc_api(
     # CDISC CORE API endpoint
     url = "https://api.cdisc.org/usdm/validate"
     
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_artifact(json_path)
     
     response = requests.post(
         url,
@@ -283,8 +284,7 @@ def _run_cdisc_api(
         
         # Save report
         output_path = os.path.join(output_dir, 'cdisc_conformance_report.json')
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2)
+        save_json(output_path, result)
         
         return {
             'success': True,
@@ -309,8 +309,7 @@ def _run_local_conformance(json_path: str, output_dir: str) -> Dict[str, Any]:
     3. Code values are from CDISC controlled terminology
     4. Cross-references are valid
     """
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_artifact(json_path)
     
     issues = []
     warnings = []
@@ -403,8 +402,7 @@ def _run_local_conformance(json_path: str, output_dir: str) -> Dict[str, Any]:
     
     # Save report
     output_path = os.path.join(output_dir, 'conformance_report.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2)
+    put_artifact(output_path, report)
     
     logger.info(f"Conformance check: {len(issues)} errors, {len(warnings)} warnings")
     
@@ -416,29 +414,30 @@ def _run_local_conformance(json_path: str, output_dir: str) -> Dict[str, Any]:
     }
 
 
-def _check_controlled_terminology(data: Dict, warnings: List) -> None:
-    """Check that coded values use CDISC controlled terminology."""
-    
-    # Valid objective levels
-    valid_obj_levels = {'Primary', 'Secondary', 'Exploratory'}
-    
-    # Valid blinding schemas
-    valid_blinding = {'Open Label', 'Single Blind', 'Double Blind', 'Triple Blind'}
-    
-    def check_recursive(obj, path=""):
-        if not isinstance(obj, dict):
-            return
-        
+# Valid objective/endpoint levels (CT001)
+VALID_OBJECTIVE_LEVELS = frozenset({'Primary', 'Secondary', 'Exploratory'})
+
+# Valid blinding schemas (CT002)
+VALID_BLINDING_SCHEMAS = frozenset({'Open Label', 'Single Blind', 'Double Blind', 'Triple Blind'})
+
+
+class ControlledTerminologyCheck(UsdmVisitor):
+    """Check that coded values use CDISC controlled terminology (collects warnings, never edits)."""
+
+    def __init__(self, warnings: Optional[List] = None):
+        self.warnings = warnings if warnings is not None else []
+
+    def enter(self, obj: Dict[str, Any], trail: Trail) -> None:
         # Check objective level
         if 'level' in obj and obj.get('instanceType') in ('Objective', 'Endpoint'):
             level = obj['level']
             if isinstance(level, dict):
                 level = level.get('code', level.get('decode'))
-            if level and level not in valid_obj_levels:
-                warnings.append({
+            if level and level not in VALID_OBJECTIVE_LEVELS:
+                self.warnings.append({
                     'rule': 'CT001',
                     'severity': 'WARNING',
-                    'message': f'{path}: Invalid objective/endpoint level "{level}"',
+                    'message': f'{format_path(trail)}: Invalid objective/endpoint level "{level}"',
                 })
         
         # Check blinding schema
@@ -446,22 +445,17 @@ def _check_controlled_terminology(data: Dict, warnings: List) -> None:
             blinding = obj['blindingSchema']
             if isinstance(blinding, dict):
                 blinding = blinding.get('code', blinding.get('decode'))
-            if blinding and blinding not in valid_blinding:
-                warnings.append({
+            if blinding and blinding not in VALID_BLINDING_SCHEMAS:
+                self.warnings.append({
                     'rule': 'CT002',
                     'severity': 'WARNING',
-                    'message': f'{path}: Invalid blinding schema "{blinding}"',
+                    'message': f'{format_path(trail)}: Invalid blinding schema "{blinding}"',
                 })
-        
-        for key, value in obj.items():
-            if isinstance(value, dict):
-                check_recursive(value, f"{path}/{key}")
-            elif isinstance(value, list):
-                for i, item in enumerate(value):
-                    if isinstance(item, dict):
-                        check_recursive(item, f"{path}/{key}[{i}]")
-    
-    check_recursive(data)
+
+
+def _check_controlled_terminology(data: Dict, warnings: List) -> None:
+    """Check that coded values use CDISC controlled terminology."""
+    walk(data, [ControlledTerminologyCheck(warnings)])
 
 
 def _get_timestamp() -> str:
@@ -16,6 +16,7 @@ Usage:
             print(f"  {issue.location}: {issue.message}")
 """
 
+import importlib.util
 import json
 import logging
 from dataclasses import dataclass, field
@@ -23,13 +24,16 @@ from typing import Optional, List, Dict, Any
 from enum import Enum
 from collections import defaultdict
 
+from core.serialization import load_json
+
 logger = logging.getLogger(__name__)
 
-# Check if usdm package is available
+# Check if usdm package is available. Its pydantic models take ~0.4 s to
+# import, so only usdm_info is imported here and the models on first use
 try:
-    from pydantic import ValidationError
-    from usdm_model import Wrapper
     import usdm_info
+    if importlib.util.find_spec("usdm_model") is None:
+        raise ImportError("usdm_model not found")
     HAS_USDM = True
     USDM_VERSION = usdm_info.__model_version__
     PACKAGE_VERSION = usdm_info.__package_version__
@@ -41,6 +45,13 @@ except ImportError:
     logger.warning("usdm package not installed. Install with: pip install usdm")
 
 
+def _usdm_models():
+    """The usdm Wrapper model and pydantic's ValidationError."""
+    from pydantic import ValidationError
+    from usdm_model import Wrapper
+    return Wrapper, ValidationError
+
+
 class ValidationSeverity(Enum):
     """Severity levels for validation issues."""
     ERROR = "error"
@@ -177,8 +188,7 @@ class USDMValidator:
         
         # Load JSON
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_json(filepath)
         except json.JSONDecodeError as e:
             result.issues.append(ValidationIssue(
                 location='file',
@@ -249,6 +259,7 @@ class USDMValidator:
             return result
         
         # Perform schema validation using usdm Pydantic models
+        Wrapper, ValidationError = _usdm_models()
         try:
             wrapper = Wrapper(**data)
             result.valid = True
@@ -325,6 +336,7 @@ def get_usdm_schema() -> Optional[Dict]:
     """
     if not HAS_USDM:
         return None
+    Wrapper, _ = _usdm_models()
     return Wrapper.model_json_schema()
 
 
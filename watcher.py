@@ -0,0 +1,341 @@
+"""
+Watch Folder - Feed protocols dropped into a shared folder to the daemon.
+
+Watches a directory tree for new or changed PDFs (Linux inotify, or polling
+where inotify isn't available), pairs each protocol with its
+<name>_SAP.pdf and <name>_sites.csv/.xlsx, and queues it on the daemon's
+scheduler once its files have stopped changing for settle_seconds.
+
+Jobs are de-duplicated by content: the SHA-256 of the protocol plus its
+companions. A renamed copy or a re-saved identical file is skipped;
+dropping a new SAP next to an already-processed protocol queues it again.
+Seen content keys are persisted, so restarts don't re-process the folder;
+keys of failed or cancelled jobs are forgotten so the files can be retried.
+
+Priority comes from the first subfolder, if it is named after a priority:
+    <watch>/interactive/protocol.pdf   -> ahead of everything else
+    <watch>/backlog/old_protocol.pdf   -> after everything else
+    <watch>/protocol.pdf               -> the watcher's default priority
+
+Usage:
+    python daemon.py --watch /shared/protocols --watch-args="--full-protocol"
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import select
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.pdf_utils import get_file_hash
+from daemon import PRIORITIES, DaemonJob, Scheduler, priority_value
+from main import SAP_SUFFIXES, SITES_EXTENSIONS, SITES_SUFFIXES, find_companions
+
+logger = logging.getLogger(__name__)
+
+# inotify via libc (Linux); otherwise the watcher polls
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.inotify_init1
+    HAS_INOTIFY = True
+except (OSError, AttributeError):
+    _libc = None
+    HAS_INOTIFY = False
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+
+EVENT_HEADER = struct.Struct("iIII")
+
+STATE_VERSION = 1
+
+# Files being copied in keep changing; wait this long after the last change
+DEFAULT_SETTLE_SECONDS = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+
+WATCHED_EXTENSIONS = (".pdf",) + SITES_EXTENSIONS
+
+
+class _Inotify:
+    """Minimal recursive inotify reader."""
+
+    def __init__(self):
+        self.fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, str] = {}
+
+    def add_tree(self, root: str) -> None:
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            wd = _libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Cannot watch {dirpath}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self.dirs[wd] = dirpath
+
+    def read(self, timeout: float) -> Tuple[List[str], bool]:
+        """
+        Wait for events.
+
+        Returns:
+            Tuple of (changed file paths, overflowed); on overflow callers
+            should rescan since events were lost
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        paths: List[str] = []
+        overflowed = False
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                overflowed = True
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                    overflowed = True  # pick up files copied in with the folder
+            else:
+                paths.append(path)
+        return paths, overflowed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def protocol_path_for(path: str) -> Optional[str]:
+    """The protocol PDF a watched file belongs to (itself for protocols)."""
+    p = Path(path)
+    stem, ext = p.stem, p.suffix.lower()
+    if ext in SITES_EXTENSIONS:
+        for suffix in SITES_SUFFIXES:
+            if stem.endswith(suffix):
+                return str(p.with_name(stem[:-len(suffix)] + ".pdf"))
+        return None
+    if ext != ".pdf":
+        return None
+    for suffix in SAP_SUFFIXES:
+        if stem.endswith(suffix):
+            return str(p.with_name(stem[:-len(suffix)] + ".pdf"))
+    return str(p)
+
+
+class FolderWatcher:
+    """Queue protocols that appear or change under a directory."""
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        watch_dir: str,
+        state_path: Optional[str] = None,
+        priority: str = "normal",
+        model: Optional[str] = None,
+        args: Optional[List[str]] = None,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: Optional[bool] = None,
+    ):
+        self.scheduler = scheduler
+        self.root = os.path.abspath(watch_dir)
+        self.state_path = Path(state_path or Path(scheduler.output_root) / "watch_state.json")
+        self.priority = priority_value(priority)
+        self.model = model
+        self.args = list(args or [])
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = HAS_INOTIFY if use_inotify is None else (use_inotify and HAS_INOTIFY)
+
+        self._pending: Dict[str, float] = {}      # protocol path -> last change time
+        self._stats: Dict[str, Tuple[int, int]] = {}  # file -> (size, mtime_ns), polling only
+        self._seen: Dict[str, Dict] = {}           # content key -> first job
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="p2u-watch", daemon=True)
+        self._load_state()
+        scheduler.add_listener(self._job_changed)
+
+    def _load_state(self) -> None:
+        if not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                self._seen = data.get("seen", {})
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Watch state {self.state_path} unreadable, starting fresh: {e}")
+
+    def _save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.state_path.parent, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"version": STATE_VERSION, "seen": self._seen}, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _job_changed(self, job: DaemonJob) -> None:
+        """Forget failed/cancelled content so dropping the file again retries it."""
+        if job.source != "watch" or job.status not in ("failed", "cancelled"):
+            return
+        with self._lock:
+            keys = [k for k, v in self._seen.items() if v.get("jobId") == job.id]
+            for key in keys:
+                del self._seen[key]
+            if keys:
+                self._save_state()
+
+    def start(self) -> "FolderWatcher":
+        os.makedirs(self.root, exist_ok=True)
+        self._thread.start()
+        mode = "inotify" if self.use_inotify else f"polling every {self.poll_interval}s"
+        logger.info(f"Watching {self.root} ({mode})")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _files(self) -> Iterator[str]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if name.lower().endswith(WATCHED_EXTENSIONS) and not name.startswith("."):
+                    yield os.path.join(dirpath, name)
+
+    def touch(self, path: str, now: Optional[float] = None) -> None:
+        """Note a changed file; its protocol is considered once it settles."""
+        protocol = protocol_path_for(path)
+        if protocol:
+            self._pending[protocol] = time.time() if now is None else now
+
+    def poll(self, now: Optional[float] = None) -> int:
+        """Scan the tree and touch files whose size or mtime changed."""
+        changed = 0
+        current: Dict[str, Tuple[int, int]] = {}
+        for path in self._files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            current[path] = (st.st_size, st.st_mtime_ns)
+            if self._stats.get(path) != current[path]:
+                self.touch(path, now)
+                changed += 1
+        self._stats = current
+        return changed
+
+    def content_key(self, job) -> str:
+        """Hash of the protocol plus its companions."""
+        digest = hashlib.sha256()
+        for path in (job.pdf_path, job.sap_path, job.sites_path):
+            digest.update((get_file_hash(path) if path else "-").encode())
+        return digest.hexdigest()
+
+    def priority_for(self, path: str) -> int:
+        rel = Path(os.path.relpath(path, self.root))
+        if len(rel.parts) > 1 and rel.parts[0] in PRIORITIES:
+            return PRIORITIES[rel.parts[0]]
+        return self.priority
+
+    def flush(self, now: Optional[float] = None) -> List[DaemonJob]:
+        """Queue every pending protocol that has settled."""
+        now = time.time() if now is None else now
+        due = [p for p, t in self._pending.items() if now - t >= self.settle_seconds]
+        jobs = []
+        for protocol in sorted(due):
+            del self._pending[protocol]
+            job = self._consider(protocol)
+            if job:
+                jobs.append(job)
+        return jobs
+
+    def _consider(self, protocol: str) -> Optional[DaemonJob]:
+        if not os.path.isfile(protocol):
+            # A SAP/sites file without its protocol (yet)
+            return None
+        try:
+            paired = find_companions(protocol)
+            key = self.content_key(paired)
+        except OSError as e:
+            logger.warning(f"Cannot read {protocol}: {e}")
+            return None
+
+        with self._lock:
+            if key in self._seen:
+                logger.debug(f"Skipping {protocol}: same content as {self._seen[key]['pdf']}")
+                return None
+            # Claimed before submit; the job listener may fire during submit
+            self._seen[key] = {"pdf": paired.pdf_path}
+        try:
+            job = self.scheduler.submit(
+                paired.pdf_path,
+                model=self.model,
+                sap_path=paired.sap_path,
+                sites_path=paired.sites_path,
+                args=self.args,
+                source="watch",
+                priority=self.priority_for(protocol),
+            )
+        except ValueError as e:
+            logger.warning(f"Cannot queue {protocol}: {e}")
+            with self._lock:
+                del self._seen[key]
+            return None
+        with self._lock:
+            if key in self._seen:
+                self._seen[key].update(jobId=job.id, queuedAt=job.submitted_at)
+                self._save_state()
+        return job
+
+    def _loop(self) -> None:
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify()
+                inotify.add_tree(self.root)
+            except OSError as e:
+                logger.warning(f"inotify unavailable ({e}); polling instead")
+                inotify = None
+
+        # Files already in the folder; seen content is skipped
+        self.poll()
+        while not self._stop.is_set():
+            try:
+                if inotify:
+                    paths, overflowed = inotify.read(timeout=1.0)
+                    for path in paths:
+                        self.touch(path)
+                    if overflowed:
+                        self.poll()
+                else:
+                    self._stop.wait(self.poll_interval)
+                    self.poll()
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Watch folder scan failed: {e}")
+        if inotify:
+            inotify.close()